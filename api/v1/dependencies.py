@@ -0,0 +1,35 @@
+"""
+FastAPI dependencies for shared, app-lifetime resources.
+
+Resources are created in the lifespan hook in `main.py` and stored on
+`app.state`; these helpers expose them to route handlers via `Depends`.
+"""
+
+from fastapi import Request
+
+from core.cache import IdempotencyCache
+from core.events import WorkQueue
+
+
+def get_email_dedupe(request: Request) -> IdempotencyCache:
+    """Returns the shared idempotency cache for Pub/Sub pushes and Gmail messages.
+
+    Args:
+        request: The incoming request, used to reach `app.state`.
+
+    Returns:
+        The idempotency cache created at application startup.
+    """
+    return request.app.state.email_dedupe
+
+
+def get_gmail_queue(request: Request) -> WorkQueue:
+    """Returns the work queue that Gmail webhook pushes are handed off to.
+
+    Args:
+        request: The incoming request, used to reach `app.state`.
+
+    Returns:
+        The Gmail ingestion queue created at application startup.
+    """
+    return request.app.state.gmail_queue
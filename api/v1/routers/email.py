@@ -1,35 +1,44 @@
-from fastapi import APIRouter, Request, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, Response, status
+from api.v1.dependencies import get_email_dedupe, get_gmail_queue
+from core.cache import IdempotencyCache
+from core.events import QueueFullError, WorkQueue
 from domains.email.models import PubSubPushRequest
-from domains.email.ingestion import process_gmail_webhook
-from integrations.gmail import GmailClient
+from domains.email.ingestion import push_key
 from core.logging import logger
 
-
 router = APIRouter()
 
 
-@router.post("/webhooks/gmail")
-async def handle_gmail_webhook(request: PubSubPushRequest):
+@router.post("/webhooks/gmail", status_code=status.HTTP_204_NO_CONTENT)
+async def handle_gmail_webhook(
+    request: PubSubPushRequest,
+    queue: WorkQueue = Depends(get_gmail_queue),
+    dedupe: IdempotencyCache = Depends(get_email_dedupe),
+):
     """
     Receives push notifications from Google Cloud Pub/Sub
     """
+    # Acknowledges redeliveries of an already-processed push without requeueing.
+    if await dedupe.seen(push_key(request)):
+        logger.info(f"Duplicate push {request.message.message_id}, skipping.")
+        return Response(status_code=status.HTTP_204_NO_CONTENT)
+
+    # Hands the push to the ingestion workers instead of processing it inline.
+    # The worker marks the push once ingestion succeeded; until then a
+    # redelivery is queued again, and the mailbox checkpoint and per-message
+    # dedupe keep the extra run from fetching anything twice.
     try:
-        # Creates a new GmailClient per request for simplicity during testing.
-        # This approach is inefficient and will be optimized in main.py.
-        logger.info("Gmail webhook received, starting ingestion...")
-
-        async with GmailClient() as client:
-            processed_emails = await process_gmail_webhook(request, client)
-
-        logger.info(f"Successfully processed {len(processed_emails)} emails.")
-
-        # Returns 204 No Content to acknowledge successful receipt to Pub/Sub.
-        return "", status.HTTP_204_NO_CONTENT
-
-    except Exception as e:
-        logger.error(f"Error processing webhook: {e}", exc_info=True)
-        # Returns 500 to signal Pub/Sub to retry the webhook delivery.
+        await queue.put(request)
+    except QueueFullError as e:
+        logger.warning(f"Shedding Gmail webhook: {e}")
+        # Returns 503 so Pub/Sub backs off and redelivers later.
         raise HTTPException(
-            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-            detail=f"Internal server error: {e}",
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="Ingestion queue is full, retry later",
+            headers={"Retry-After": "30"},
         )
+
+    logger.info(f"Gmail webhook {request.message.message_id} queued for ingestion.")
+
+    # Returns 204 No Content to acknowledge successful receipt to Pub/Sub.
+    return Response(status_code=status.HTTP_204_NO_CONTENT)
@@ -0,0 +1,143 @@
+"""
+Caching primitives shared across domains.
+
+This module provides an idempotency cache: a bounded in-memory LRU with TTL,
+optionally backed by an on-disk SQLite tier that survives restarts.
+"""
+
+import asyncio
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from pathlib import Path
+from typing import Dict, Optional
+
+from core.logging import logger
+
+
+class IdempotencyCache:
+    """Remembers which keys (e.g. Pub/Sub or Gmail message IDs) were processed.
+
+    Lookups hit the in-memory LRU first and fall back to the disk tier, when
+    configured, promoting disk hits back into memory. Entries expire after
+    `ttl_seconds` in both tiers. Disk reads and writes run in a worker
+    thread, off the event loop.
+    """
+
+    # Expired disk rows are purged once every this many writes
+    PURGE_EVERY = 1000
+
+    def __init__(
+        self,
+        max_entries: int = 10_000,
+        ttl_seconds: float = 24 * 60 * 60,
+        db_path: Optional[str] = None,
+    ):
+        """
+        Args:
+            max_entries: Maximum keys kept in memory before evicting the LRU one.
+            ttl_seconds: How long a key is remembered after it is marked.
+            db_path: SQLite file for the on-disk tier; memory-only when None.
+        """
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self._entries: "OrderedDict[str, float]" = OrderedDict()  # key -> expires_at
+        self._hits = 0
+        self._disk_hits = 0
+        self._misses = 0
+        self._writes = 0
+
+        self._conn: Optional[sqlite3.Connection] = None
+        self._lock = threading.Lock()
+        if db_path:
+            Path(db_path).parent.mkdir(parents=True, exist_ok=True)
+            self._conn = sqlite3.connect(
+                db_path, timeout=30.0, check_same_thread=False, isolation_level=None
+            )
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute("PRAGMA synchronous=NORMAL")
+            self._conn.execute("""
+                CREATE TABLE IF NOT EXISTS idempotency_keys (
+                    key TEXT PRIMARY KEY,
+                    expires_at REAL NOT NULL
+                ) WITHOUT ROWID
+                """)
+
+    async def seen(self, key: str) -> bool:
+        """Returns True if `key` was marked and has not expired yet."""
+        now = time.time()
+        expires_at = self._entries.get(key)
+        if expires_at is not None:
+            if expires_at > now:
+                self._entries.move_to_end(key)
+                self._hits += 1
+                return True
+            del self._entries[key]
+
+        expires_at = None
+        if self._conn is not None:
+            expires_at = await asyncio.to_thread(self._disk_get, key)
+        if expires_at is not None and expires_at > now:
+            self._remember(key, expires_at)
+            self._hits += 1
+            self._disk_hits += 1
+            return True
+
+        self._misses += 1
+        return False
+
+    async def mark(self, key: str) -> None:
+        """Records `key` as processed in every tier."""
+        expires_at = time.time() + self.ttl_seconds
+        self._remember(key, expires_at)
+        if self._conn is not None:
+            await asyncio.to_thread(self._disk_put, key, expires_at)
+
+    @property
+    def stats(self) -> Dict[str, int]:
+        """Hit/miss counters and current in-memory size."""
+        return {
+            "hits": self._hits,
+            "disk_hits": self._disk_hits,
+            "misses": self._misses,
+            "size": len(self._entries),
+        }
+
+    def close(self) -> None:
+        """Closes the disk tier, if any."""
+        if self._conn is not None:
+            with self._lock:
+                self._conn.close()
+            self._conn = None
+
+    def _remember(self, key: str, expires_at: float) -> None:
+        self._entries[key] = expires_at
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    def _disk_get(self, key: str) -> Optional[float]:
+        if self._conn is None:
+            return None
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT expires_at FROM idempotency_keys WHERE key = ?", (key,)
+            ).fetchone()
+        return row[0] if row else None
+
+    def _disk_put(self, key: str, expires_at: float) -> None:
+        if self._conn is None:
+            return
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO idempotency_keys (key, expires_at) VALUES (?, ?)",
+                (key, expires_at),
+            )
+            self._writes += 1
+            if self._writes % self.PURGE_EVERY == 0:
+                purged = self._conn.execute(
+                    "DELETE FROM idempotency_keys WHERE expires_at <= ?",
+                    (time.time(),),
+                ).rowcount
+                logger.debug(f"Purged {purged} expired idempotency keys")
@@ -0,0 +1,121 @@
+"""
+Persistent checkpoint store for incremental syncs.
+
+This module tracks the last committed position (e.g. Gmail history ID) per
+key, with atomic compare-and-advance semantics shared across worker processes.
+"""
+
+import asyncio
+import os
+import sqlite3
+import threading
+import time
+from abc import ABC, abstractmethod
+from pathlib import Path
+from typing import Optional
+
+from core.logging import logger
+
+
+class CheckpointStore(ABC):
+    """Interface for checkpoint stores keyed by a string (e.g. email address)."""
+
+    @abstractmethod
+    async def get(self, key: str) -> Optional[int]:
+        """Returns the last committed checkpoint for `key`, or None if unseen."""
+
+    @abstractmethod
+    async def advance(self, key: str, expected: Optional[int], new: int) -> bool:
+        """Atomically moves `key` from `expected` to `new`.
+
+        Succeeds only if the stored value still equals `expected` (None meaning
+        "no checkpoint yet") and `new` moves the checkpoint forward.
+
+        Returns:
+            True if the checkpoint was advanced, False if another writer got
+            there first or `new` is not ahead of the stored value.
+        """
+
+    async def close(self) -> None:
+        """Releases any resources held by the store."""
+
+
+class SQLiteCheckpointStore(CheckpointStore):
+    """SQLite-backed checkpoint store.
+
+    The database file is shared by every uvicorn worker on the host; WAL mode
+    lets readers proceed while another worker commits, and each advance is a
+    single conditional statement, so it is atomic across processes.
+    """
+
+    def __init__(self, db_path: Optional[str] = None, namespace: str = "default"):
+        """
+        Args:
+            db_path: Path to the SQLite file. Falls back to CHECKPOINT_DB_PATH,
+                then to `data/checkpoints.sqlite3`.
+            namespace: Separates checkpoints of different syncs in one file.
+        """
+        self.db_path = db_path or os.getenv(
+            "CHECKPOINT_DB_PATH", "data/checkpoints.sqlite3"
+        )
+        self.namespace = namespace
+        Path(self.db_path).parent.mkdir(parents=True, exist_ok=True)
+
+        # One connection per store; calls are serialized and run off the loop
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(
+            self.db_path, timeout=30.0, check_same_thread=False, isolation_level=None
+        )
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute("""
+            CREATE TABLE IF NOT EXISTS checkpoints (
+                namespace TEXT NOT NULL,
+                key TEXT NOT NULL,
+                value INTEGER NOT NULL,
+                updated_at REAL NOT NULL,
+                PRIMARY KEY (namespace, key)
+            ) WITHOUT ROWID
+            """)
+
+    async def get(self, key: str) -> Optional[int]:
+        return await asyncio.to_thread(self._get, key)
+
+    async def advance(self, key: str, expected: Optional[int], new: int) -> bool:
+        advanced = await asyncio.to_thread(self._advance, key, expected, new)
+        if not advanced:
+            logger.debug(f"Checkpoint for {key} not advanced ({expected} -> {new})")
+        return advanced
+
+    async def close(self) -> None:
+        with self._lock:
+            self._conn.close()
+
+    def _get(self, key: str) -> Optional[int]:
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT value FROM checkpoints WHERE namespace = ? AND key = ?",
+                (self.namespace, key),
+            ).fetchone()
+        return row[0] if row else None
+
+    def _advance(self, key: str, expected: Optional[int], new: int) -> bool:
+        with self._lock:
+            if expected is None:
+                cursor = self._conn.execute(
+                    """
+                    INSERT INTO checkpoints (namespace, key, value, updated_at)
+                    VALUES (?, ?, ?, ?)
+                    ON CONFLICT (namespace, key) DO NOTHING
+                    """,
+                    (self.namespace, key, new, time.time()),
+                )
+            else:
+                cursor = self._conn.execute(
+                    """
+                    UPDATE checkpoints SET value = ?, updated_at = ?
+                    WHERE namespace = ? AND key = ? AND value = ? AND value < ?
+                    """,
+                    (new, time.time(), self.namespace, key, expected, new),
+                )
+        return cursor.rowcount == 1
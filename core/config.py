@@ -0,0 +1,27 @@
+"""
+Configuration helpers shared across the integrations and domains.
+
+This module reads typed settings from environment variables, falling back
+to the defaults declared next to the code that uses them.
+"""
+
+import os
+from typing import Any
+
+from core.logging import logger
+
+
+def env_number(name: str, default: float) -> Any:
+    """Reads a numeric env var, keeping the type (int/float) of the default.
+
+    An unset, empty or malformed value falls back to the default; a
+    malformed one is logged.
+    """
+    value = os.getenv(name)
+    if not value:
+        return default
+    try:
+        return type(default)(value)
+    except ValueError:
+        logger.warning(f"Ignoring {name}={value!r}, not a number; using {default}")
+        return default
@@ -0,0 +1,105 @@
+"""
+Work queue for processing webhook events outside the HTTP request.
+
+This module defines the `WorkQueue` interface and an in-process asyncio
+implementation with a bounded buffer and a pool of worker tasks.
+"""
+
+import asyncio
+from abc import ABC, abstractmethod
+from typing import Any, Awaitable, Callable, List, Optional
+
+from core.logging import logger
+
+Handler = Callable[[Any], Awaitable[None]]
+
+
+class QueueFullError(Exception):
+    """Raised when a work queue cannot accept more items (backpressure)."""
+
+
+class WorkQueue(ABC):
+    """Interface for work queues, so a Redis-backed queue can replace the
+    in-process one without touching producers or handlers."""
+
+    @abstractmethod
+    async def put(self, item: Any) -> None:
+        """Enqueues an item without waiting; raises QueueFullError when full."""
+
+    @abstractmethod
+    async def start(self, handler: Handler) -> None:
+        """Starts consuming items, calling `handler` once per item."""
+
+    @abstractmethod
+    async def stop(self) -> None:
+        """Stops consuming, draining in-flight items where possible."""
+
+
+class InProcessWorkQueue(WorkQueue):
+    """Bounded asyncio queue drained by a fixed pool of worker tasks."""
+
+    def __init__(
+        self,
+        maxsize: int = 1000,
+        workers: int = 4,
+        name: str = "work",
+        drain_timeout: float = 10.0,
+    ):
+        """
+        Args:
+            maxsize: Maximum queued items before `put` sheds load.
+            workers: Number of concurrent worker tasks.
+            name: Label used in log messages.
+            drain_timeout: Seconds `stop` waits for queued items to finish.
+        """
+        self.maxsize = maxsize
+        self.workers = workers
+        self.name = name
+        self.drain_timeout = drain_timeout
+        self._queue: asyncio.Queue = asyncio.Queue(maxsize=maxsize)
+        self._tasks: List[asyncio.Task] = []
+        self._handler: Optional[Handler] = None
+
+    def qsize(self) -> int:
+        """Returns the number of items waiting to be processed."""
+        return self._queue.qsize()
+
+    async def put(self, item: Any) -> None:
+        try:
+            self._queue.put_nowait(item)
+        except asyncio.QueueFull:
+            raise QueueFullError(f"{self.name} queue is full ({self.maxsize} items)")
+
+    async def start(self, handler: Handler) -> None:
+        self._handler = handler
+        self._tasks = [
+            asyncio.create_task(self._worker(index), name=f"{self.name}-worker-{index}")
+            for index in range(self.workers)
+        ]
+        logger.info(f"Started {self.workers} {self.name} queue workers")
+
+    async def stop(self) -> None:
+        try:
+            await asyncio.wait_for(self._queue.join(), timeout=self.drain_timeout)
+        except asyncio.TimeoutError:
+            logger.warning(
+                f"Dropping {self.qsize()} queued {self.name} items on shutdown"
+            )
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+
+    async def _worker(self, index: int) -> None:
+        while True:
+            item = await self._queue.get()
+            try:
+                await self._handler(item)
+            except Exception as e:
+                # A failed item must not take the worker down with it
+                logger.error(
+                    f"{self.name} worker {index} failed to process item: {e}",
+                    exc_info=True,
+                )
+            finally:
+                self._queue.task_done()
@@ -0,0 +1,115 @@
+"""
+Rate limiting primitives shared by the API integrations.
+
+This module provides an asyncio token bucket that adapts its rate to
+server feedback: it slows down on 429s, honors Retry-After, and creeps
+back up to the configured rate as requests succeed.
+"""
+
+import asyncio
+import time
+from email.utils import parsedate_to_datetime
+from typing import Dict, Optional
+
+
+class TokenBucket:
+    """Async token bucket with AIMD (additive-increase, multiplicative-decrease)
+    rate adaptation.
+
+    `acquire` waits for a token; `penalize` is called on throttling
+    responses and `reward` on successes. Waiters are served in FIFO order.
+    """
+
+    def __init__(
+        self,
+        rate: float,
+        burst: Optional[float] = None,
+        *,
+        min_rate: Optional[float] = None,
+        decrease_factor: float = 0.5,
+        increase_step: Optional[float] = None,
+    ):
+        """
+        Args:
+            rate: Target (and maximum) requests per second.
+            burst: Bucket capacity; defaults to one second worth of tokens.
+            min_rate: Floor for the adapted rate; defaults to 10% of `rate`.
+            decrease_factor: Rate multiplier applied by each `penalize`.
+            increase_step: Rate added back by each `reward`; defaults to 5%
+                of `rate`.
+        """
+        self.max_rate = rate
+        self.rate = rate
+        self.burst = burst or max(1.0, rate)
+        self.min_rate = min_rate or rate * 0.1
+        self.decrease_factor = decrease_factor
+        self.increase_step = increase_step or rate * 0.05
+        self._tokens = self.burst
+        self._updated = time.monotonic()
+        self._blocked_until = 0.0
+        self._lock = asyncio.Lock()
+        self._stats = {"acquired": 0, "waited_seconds": 0.0, "penalties": 0}
+
+    async def acquire(self) -> None:
+        """Waits until a request may be sent, then consumes one token."""
+        started = time.monotonic()
+        async with self._lock:
+            while True:
+                now = time.monotonic()
+                self._refill(now)
+                wait = self._blocked_until - now
+                if wait <= 0:
+                    if self._tokens >= 1:
+                        self._tokens -= 1
+                        break
+                    wait = (1 - self._tokens) / self.rate
+                await asyncio.sleep(wait)
+        self._stats["acquired"] += 1
+        self._stats["waited_seconds"] += time.monotonic() - started
+
+    def penalize(self, retry_after: Optional[float] = None) -> None:
+        """Backs off after a throttling or overload response.
+
+        Args:
+            retry_after: Seconds the server asked us to wait, if any; no
+                token is handed out before then.
+        """
+        self._stats["penalties"] += 1
+        self.rate = max(self.min_rate, self.rate * self.decrease_factor)
+        self._tokens = min(self._tokens, 0.0)
+        if retry_after:
+            self._blocked_until = max(
+                self._blocked_until, time.monotonic() + retry_after
+            )
+
+    def reward(self) -> None:
+        """Recovers the rate after a successful response."""
+        if self.rate < self.max_rate:
+            self.rate = min(self.max_rate, self.rate + self.increase_step)
+
+    def _refill(self, now: float) -> None:
+        self._tokens = min(self.burst, self._tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    @property
+    def stats(self) -> Dict[str, float]:
+        """Current rate plus acquire, wait and penalty counters."""
+        return {"rate": self.rate, **self._stats}
+
+
+def parse_retry_after(value: Optional[str]) -> Optional[float]:
+    """Parses a Retry-After header (delay in seconds or an HTTP date).
+
+    Returns:
+        Seconds to wait, or None if the header is absent or invalid.
+    """
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        return max(0.0, parsedate_to_datetime(value).timestamp() - time.time())
+    except (TypeError, ValueError):
+        return None
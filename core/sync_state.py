@@ -0,0 +1,283 @@
+"""
+Persistent sync state for the Buildium/Airtable sync.
+
+This module tracks, per (resource type, resource id), the last seen version
+and content hashes, the linked Airtable record and sync timestamps, behind
+an interface a Postgres backend can implement later.
+"""
+
+import asyncio
+import json
+import os
+import sqlite3
+import threading
+import time
+from abc import ABC, abstractmethod
+from pathlib import Path
+from typing import Dict, Iterable, List, NamedTuple, Optional
+
+# Rows per executemany()/IN (...) chunk, well under SQLite's variable limit
+_CHUNK_SIZE = 500
+
+
+class SyncRecord(NamedTuple):
+    """Sync state of one resource.
+
+    In upserts, None fields keep their stored value, so callers can update
+    e.g. only the hashes without knowing the Airtable record id.
+    """
+
+    resource_type: str
+    resource_id: str
+    airtable_record_id: Optional[str] = None
+    version: Optional[str] = None  # e.g. Buildium's LastUpdatedDateTime
+    record_hash: Optional[str] = None
+    field_hashes: Optional[Dict[str, str]] = None
+    status: Optional[str] = None  # e.g. "synced", "failed", "conflict"
+    last_seen_at: Optional[float] = None  # Last fetched from the source
+    last_synced_at: Optional[float] = None  # Last written to the destination
+    updated_at: Optional[float] = None  # Set by the repository on every write
+
+
+class SyncStateRepository(ABC):
+    """Interface for sync state storage keyed by (resource type, resource id)."""
+
+    @abstractmethod
+    async def get(self, resource_type: str, resource_id: str) -> Optional[SyncRecord]:
+        """Returns the sync state of one resource, or None if never synced."""
+
+    @abstractmethod
+    async def get_many(
+        self, resource_type: str, resource_ids: List[str]
+    ) -> Dict[str, SyncRecord]:
+        """Returns the sync state of the given resources that have one."""
+
+    @abstractmethod
+    async def get_by_airtable_id(self, airtable_record_id: str) -> Optional[SyncRecord]:
+        """Returns the resource linked to an Airtable record, if any."""
+
+    @abstractmethod
+    async def upsert_many(self, records: Iterable[SyncRecord]) -> int:
+        """Inserts or updates records in batched transactions.
+
+        Returns:
+            The number of records written.
+        """
+
+    @abstractmethod
+    async def delete(self, resource_type: str, resource_id: str) -> bool:
+        """Forgets a resource; returns False if it was not tracked."""
+
+    @abstractmethod
+    async def count(self, resource_type: Optional[str] = None) -> int:
+        """Returns the number of tracked resources, optionally of one type."""
+
+    async def upsert(self, record: SyncRecord) -> None:
+        """Inserts or updates a single record."""
+        await self.upsert_many([record])
+
+    async def close(self) -> None:
+        """Releases any resources held by the repository."""
+
+
+class SQLiteSyncStateRepository(SyncStateRepository):
+    """SQLite-backed sync state repository.
+
+    The primary key serves point and batch lookups; a partial index serves
+    reverse lookups from Airtable record ids, and another finds resources
+    by sync time for reconciliation. WAL mode lets readers proceed while
+    batched upserts commit.
+    """
+
+    def __init__(self, db_path: Optional[str] = None, batch_size: int = 10_000):
+        """
+        Args:
+            db_path: Path to the SQLite file. Falls back to SYNC_STATE_DB_PATH,
+                then to `data/sync_state.sqlite3`.
+            batch_size: Records committed per write transaction.
+        """
+        self.db_path = db_path or os.getenv(
+            "SYNC_STATE_DB_PATH", "data/sync_state.sqlite3"
+        )
+        self.batch_size = batch_size
+        Path(self.db_path).parent.mkdir(parents=True, exist_ok=True)
+
+        # One connection per repository; calls are serialized and run off the loop
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(
+            self.db_path, timeout=30.0, check_same_thread=False, isolation_level=None
+        )
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute("PRAGMA cache_size=-65536")  # 64 MiB page cache
+        self._conn.execute("""
+            CREATE TABLE IF NOT EXISTS sync_state (
+                resource_type TEXT NOT NULL,
+                resource_id TEXT NOT NULL,
+                airtable_record_id TEXT,
+                version TEXT,
+                record_hash TEXT,
+                field_hashes TEXT,
+                status TEXT,
+                last_seen_at REAL,
+                last_synced_at REAL,
+                updated_at REAL NOT NULL,
+                PRIMARY KEY (resource_type, resource_id)
+            )
+            """)
+        self._conn.execute("""
+            CREATE INDEX IF NOT EXISTS sync_state_airtable_record
+            ON sync_state (airtable_record_id)
+            WHERE airtable_record_id IS NOT NULL
+            """)
+        self._conn.execute("""
+            CREATE INDEX IF NOT EXISTS sync_state_last_synced
+            ON sync_state (resource_type, last_synced_at)
+            """)
+
+    async def get(self, resource_type: str, resource_id: str) -> Optional[SyncRecord]:
+        return await asyncio.to_thread(self._get, resource_type, resource_id)
+
+    async def get_many(
+        self, resource_type: str, resource_ids: List[str]
+    ) -> Dict[str, SyncRecord]:
+        return await asyncio.to_thread(self._get_many, resource_type, resource_ids)
+
+    async def get_by_airtable_id(self, airtable_record_id: str) -> Optional[SyncRecord]:
+        return await asyncio.to_thread(self._get_by_airtable_id, airtable_record_id)
+
+    async def upsert_many(self, records: Iterable[SyncRecord]) -> int:
+        return await asyncio.to_thread(self._upsert_many, list(records))
+
+    async def delete(self, resource_type: str, resource_id: str) -> bool:
+        return await asyncio.to_thread(self._delete, resource_type, resource_id)
+
+    async def count(self, resource_type: Optional[str] = None) -> int:
+        return await asyncio.to_thread(self._count, resource_type)
+
+    async def close(self) -> None:
+        with self._lock:
+            self._conn.close()
+
+    _COLUMNS = ", ".join(SyncRecord._fields)
+
+    def _get(self, resource_type: str, resource_id: str) -> Optional[SyncRecord]:
+        with self._lock:
+            row = self._conn.execute(
+                f"SELECT {self._COLUMNS} FROM sync_state "
+                "WHERE resource_type = ? AND resource_id = ?",
+                (resource_type, str(resource_id)),
+            ).fetchone()
+        return _to_record(row) if row else None
+
+    def _get_many(
+        self, resource_type: str, resource_ids: List[str]
+    ) -> Dict[str, SyncRecord]:
+        ids = [str(resource_id) for resource_id in resource_ids]
+        found: Dict[str, SyncRecord] = {}
+        with self._lock:
+            for start in range(0, len(ids), _CHUNK_SIZE):
+                chunk = ids[start : start + _CHUNK_SIZE]
+                rows = self._conn.execute(
+                    f"SELECT {self._COLUMNS} FROM sync_state "
+                    "WHERE resource_type = ? "
+                    f"AND resource_id IN ({', '.join('?' * len(chunk))})",
+                    (resource_type, *chunk),
+                ).fetchall()
+                for row in rows:
+                    found[row[1]] = _to_record(row)
+        return found
+
+    def _get_by_airtable_id(self, airtable_record_id: str) -> Optional[SyncRecord]:
+        with self._lock:
+            row = self._conn.execute(
+                f"SELECT {self._COLUMNS} FROM sync_state WHERE airtable_record_id = ?",
+                (airtable_record_id,),
+            ).fetchone()
+        return _to_record(row) if row else None
+
+    def _upsert_many(self, records: List[SyncRecord]) -> int:
+        now = time.time()
+        rows = [
+            (
+                record.resource_type,
+                str(record.resource_id),
+                record.airtable_record_id,
+                record.version,
+                record.record_hash,
+                (
+                    json.dumps(record.field_hashes, separators=(",", ":"))
+                    if record.field_hashes is not None
+                    else None
+                ),
+                record.status,
+                record.last_seen_at,
+                record.last_synced_at,
+                now,
+            )
+            for record in records
+        ]
+        with self._lock:
+            for start in range(0, len(rows), self.batch_size):
+                self._conn.execute("BEGIN IMMEDIATE")
+                try:
+                    self._conn.executemany(
+                        """
+                        INSERT INTO sync_state (
+                            resource_type, resource_id, airtable_record_id,
+                            version, record_hash, field_hashes, status,
+                            last_seen_at, last_synced_at, updated_at
+                        ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+                        ON CONFLICT (resource_type, resource_id) DO UPDATE SET
+                            airtable_record_id = COALESCE(
+                                excluded.airtable_record_id, airtable_record_id
+                            ),
+                            version = COALESCE(excluded.version, version),
+                            record_hash = COALESCE(excluded.record_hash, record_hash),
+                            field_hashes = COALESCE(
+                                excluded.field_hashes, field_hashes
+                            ),
+                            status = COALESCE(excluded.status, status),
+                            last_seen_at = COALESCE(
+                                excluded.last_seen_at, last_seen_at
+                            ),
+                            last_synced_at = COALESCE(
+                                excluded.last_synced_at, last_synced_at
+                            ),
+                            updated_at = excluded.updated_at
+                        """,
+                        rows[start : start + self.batch_size],
+                    )
+                except BaseException:
+                    self._conn.execute("ROLLBACK")
+                    raise
+                self._conn.execute("COMMIT")
+        return len(rows)
+
+    def _delete(self, resource_type: str, resource_id: str) -> bool:
+        with self._lock:
+            cursor = self._conn.execute(
+                "DELETE FROM sync_state WHERE resource_type = ? AND resource_id = ?",
+                (resource_type, str(resource_id)),
+            )
+        return cursor.rowcount == 1
+
+    def _count(self, resource_type: Optional[str]) -> int:
+        with self._lock:
+            if resource_type is None:
+                row = self._conn.execute("SELECT COUNT(*) FROM sync_state").fetchone()
+            else:
+                row = self._conn.execute(
+                    "SELECT COUNT(*) FROM sync_state WHERE resource_type = ?",
+                    (resource_type,),
+                ).fetchone()
+        return row[0]
+
+
+def _to_record(row: tuple) -> SyncRecord:
+    field_hashes = row[5]
+    return SyncRecord(
+        *row[:5],
+        json.loads(field_hashes) if field_hashes is not None else None,
+        *row[6:],
+    )
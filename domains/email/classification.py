@@ -0,0 +1,474 @@
+"""
+Rule-based email classification (lead, client, spam, internal, maintenance).
+
+Rules are hot-reloaded from a JSON config file and compiled into one
+multi-pattern matcher that scans each message once.
+"""
+
+import json
+import os
+import re
+import time
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional, Set, Tuple
+
+from domains.email.models import EmailClassification
+from domains.email.parsing import ParsedEmail
+from core.logging import logger
+
+DEFAULT_RULES_PATH = Path(__file__).with_name("classification_rules.json")
+UNCLASSIFIED = "unclassified"
+FIELDS = ("subject", "body")
+
+_TOKEN_RE = re.compile(r"[a-z0-9]+(?:'[a-z]+)?")
+_TAG_RE = re.compile(r"<[^>]+>")
+_COUNTED_REPEAT_RE = re.compile(r"\{\d*(?:,\d*)?\}")
+# Flags of a pattern compiled by CompiledRules without inline global flags
+_DEFAULT_FLAGS = re.compile("", re.IGNORECASE).flags
+
+# Kinds of top-level pattern atoms, see _pattern_atoms()
+_LITERAL, _BOUNDARY, _OTHER = "literal", "boundary", "other"
+
+
+class Rule:
+    """A single classification rule loaded from the config file."""
+
+    __slots__ = ("name", "category", "weight")
+
+    def __init__(self, name: str, category: str, weight: float):
+        self.name = name
+        self.category = category
+        self.weight = weight
+
+
+class CompiledRules:
+    r"""All rules compiled into per-field lookup structures.
+
+    - Keyword rules become one phrase index per field: a message's tokens
+      are looked up once per distinct phrase length, so cost does not grow
+      with the number of keywords.
+    - Regex rules with a literal word they cannot match without (e.g.
+      "unit" in `\bunit\s+#?\d+`) are anchored on it and only run when the
+      lowercased text contains it. Anchors delimited by word boundaries are
+      looked up by the text's words; the others of a field are found in one
+      scan with a trie-shaped pattern. The remaining regex patterns are
+      merged into one alternation per field used as a prefilter: each
+      pattern runs on its own only if the alternation matched somewhere, so
+      overlapping rules all fire. Patterns with groups or global inline
+      flags, whose meaning would change inside the alternation, always run.
+    - Sender-domain rules become a dict probed with the domain and its
+      parent domains.
+    """
+
+    def __init__(self, config: Dict[str, Any]):
+        self.rules: List[Rule] = []
+        self.phrases: Dict[str, Dict[str, List[int]]] = {f: {} for f in FIELDS}
+        self.phrase_lengths: Dict[str, List[int]] = {f: [] for f in FIELDS}
+        self.domains: Dict[str, List[int]] = {}
+        # Regex rules by required literal: whole words, and substrings
+        self.word_anchored: Dict[str, Dict[str, List[Tuple[int, re.Pattern]]]] = {
+            f: {} for f in FIELDS
+        }
+        self.anchored: Dict[str, Dict[str, List[Tuple[int, re.Pattern]]]] = {
+            f: {} for f in FIELDS
+        }
+        # Regex rules without an anchor, and the prefilter alternation parts
+        self.unanchored: Dict[str, List[Tuple[int, re.Pattern]]] = {
+            f: [] for f in FIELDS
+        }
+        self.always_run: Dict[str, List[Tuple[int, re.Pattern]]] = {
+            f: [] for f in FIELDS
+        }
+        prefilters: Dict[str, List[str]] = {f: [] for f in FIELDS}
+
+        for spec in config.get("rules", []):
+            index = len(self.rules)
+            self.rules.append(
+                Rule(spec["name"], spec["category"], float(spec.get("weight", 1.0)))
+            )
+            kind = spec.get("type", "keyword")
+            fields = FIELDS if spec.get("field", "any") == "any" else (spec["field"],)
+
+            if kind == "regex":
+                for pattern in spec["patterns"]:
+                    compiled = re.compile(pattern, re.IGNORECASE)
+                    literal = _required_literal(pattern)
+                    if literal is None:
+                        mergeable = _mergeable(compiled)
+                        for field in fields:
+                            if mergeable:
+                                self.unanchored[field].append((index, compiled))
+                                prefilters[field].append(f"(?:{pattern})")
+                            else:
+                                self.always_run[field].append((index, compiled))
+                        continue
+                    anchor, is_word = literal
+                    for field in fields:
+                        anchors = (self.word_anchored if is_word else self.anchored)[
+                            field
+                        ]
+                        anchors.setdefault(anchor, []).append((index, compiled))
+                continue
+
+            for pattern in spec["patterns"]:
+                if kind == "domain":
+                    self.domains.setdefault(pattern.lower(), []).append(index)
+                elif kind == "keyword":
+                    phrase = " ".join(_TOKEN_RE.findall(pattern.lower()))
+                    if not phrase:
+                        continue
+                    for field in fields:
+                        self.phrases[field].setdefault(phrase, []).append(index)
+                else:
+                    raise ValueError(f"Unknown rule type {kind!r} in {spec['name']}")
+
+        for field in FIELDS:
+            self.phrase_lengths[field] = sorted(
+                {phrase.count(" ") + 1 for phrase in self.phrases[field]}
+            )
+        # Anchor scanners report the longest anchor starting at each position;
+        # the shorter anchors that are its prefixes are present there too
+        self.anchor_scanners: Dict[str, Optional[re.Pattern]] = {}
+        self.anchor_prefixes: Dict[str, Dict[str, List[str]]] = {}
+        for field, anchored in self.anchored.items():
+            self.anchor_scanners[field] = (
+                re.compile(f"(?=({_trie_pattern(anchored)}))") if anchored else None
+            )
+            self.anchor_prefixes[field] = {
+                anchor: [
+                    anchor[:end]
+                    for end in range(1, len(anchor) + 1)
+                    if anchor[:end] in anchored
+                ]
+                for anchor in anchored
+            }
+        self.prefilters: Dict[str, Optional[re.Pattern]] = {
+            field: re.compile("|".join(patterns), re.IGNORECASE) if patterns else None
+            for field, patterns in prefilters.items()
+        }
+
+    def match(self, field: str, text: str, fired: Set[int]) -> None:
+        """Adds the indexes of every rule matching `text` in `field` to `fired`."""
+        if not text:
+            return
+
+        lowered = text.lower()
+        phrases = self.phrases[field]
+        word_anchored = self.word_anchored[field]
+        tokens = _TOKEN_RE.findall(lowered) if phrases or word_anchored else []
+        if phrases:
+            for length in self.phrase_lengths[field]:
+                if length == 1:
+                    for token in tokens:
+                        hit = phrases.get(token)
+                        if hit:
+                            fired.update(hit)
+                    continue
+                for start in range(len(tokens) - length + 1):
+                    hit = phrases.get(" ".join(tokens[start : start + length]))
+                    if hit:
+                        fired.update(hit)
+
+        candidates: List[Tuple[int, re.Pattern]] = []
+        if word_anchored:
+            words = set(tokens)
+            # Tokens keep a "'s"-like suffix; anchors are the words around it
+            for token in [token for token in words if "'" in token]:
+                words.update(token.split("'"))
+            for word in words:
+                hit = word_anchored.get(word)
+                if hit:
+                    candidates.extend(hit)
+        scanner = self.anchor_scanners[field]
+        if scanner is not None:
+            prefixes = self.anchor_prefixes[field]
+            present = set()
+            for longest in {found.group(1) for found in scanner.finditer(lowered)}:
+                present.update(prefixes[longest])
+            for anchor in present:
+                candidates.extend(self.anchored[field][anchor])
+        candidates.extend(self.always_run[field])
+        prefilter = self.prefilters[field]
+        if prefilter is not None and prefilter.search(text):
+            candidates.extend(self.unanchored[field])
+        for index, pattern in candidates:
+            if index not in fired and pattern.search(text):
+                fired.add(index)
+
+    def match_domain(self, domain: str, fired: Set[int]) -> None:
+        """Adds rules matching the sender domain or any of its parent domains."""
+        while domain:
+            hit = self.domains.get(domain)
+            if hit:
+                fired.update(hit)
+            domain = domain.partition(".")[2]
+
+
+class RuleEngine:
+    """Classifies parsed emails with hot-reloadable, compiled rules."""
+
+    def __init__(self, rules_path: Optional[str] = None, reload_interval: float = 5.0):
+        """
+        Args:
+            rules_path: JSON rules file. Falls back to EMAIL_RULES_PATH, then to
+                the `classification_rules.json` bundled next to this module.
+            reload_interval: Minimum seconds between checks for file changes.
+        """
+        self.rules_path = Path(
+            rules_path or os.getenv("EMAIL_RULES_PATH") or DEFAULT_RULES_PATH
+        )
+        self.reload_interval = reload_interval
+        self._mtime = 0.0
+        self._next_check = 0.0
+        self._compiled: Optional[CompiledRules] = None
+        self.maybe_reload(force=True)
+
+    def maybe_reload(self, force: bool = False) -> None:
+        """Recompiles the rules if the config file changed since the last load.
+
+        A missing or invalid file is logged and ignored, keeping the previous
+        rules.
+        """
+        now = time.monotonic()
+        if not force and now < self._next_check:
+            return
+        self._next_check = now + self.reload_interval
+
+        try:
+            mtime = self.rules_path.stat().st_mtime
+            if not force and mtime == self._mtime:
+                return
+            compiled = CompiledRules(json.loads(self.rules_path.read_text()))
+        except (OSError, ValueError, KeyError, re.error) as e:
+            if self._compiled is None:
+                raise
+            logger.error(
+                f"Keeping previous rules, failed to load {self.rules_path}: {e}"
+            )
+            return
+        self._compiled, self._mtime = compiled, mtime
+        logger.info(f"Loaded {len(compiled.rules)} email rules from {self.rules_path}")
+
+    def classify(self, email: ParsedEmail) -> EmailClassification:
+        """Classifies a single email."""
+        return self.classify_batch([email])[0]
+
+    def classify_batch(self, emails: List[ParsedEmail]) -> List[EmailClassification]:
+        """Classifies many emails with one reload check and one compiled rule set.
+
+        Args:
+            emails: Parsed emails, e.g. every message of one webhook.
+
+        Returns:
+            One classification per email, in the same order.
+        """
+        self.maybe_reload()
+        compiled = self._compiled
+        return [_classify(compiled, email) for email in emails]
+
+
+def _classify(compiled: CompiledRules, email: ParsedEmail) -> EmailClassification:
+    """Scores an email's fired rules per category and picks the best one."""
+    fired: Set[int] = set()
+    compiled.match("subject", email.subject, fired)
+    compiled.match("body", email.text or _TAG_RE.sub(" ", email.html), fired)
+    compiled.match_domain(_sender_domain(email.sender), fired)
+
+    if not fired:
+        return EmailClassification(category=UNCLASSIFIED, confidence=0.0)
+
+    scores: Dict[str, float] = {}
+    for index in fired:
+        rule = compiled.rules[index]
+        scores[rule.category] = scores.get(rule.category, 0.0) + rule.weight
+    category, score = max(scores.items(), key=lambda item: item[1])
+    return EmailClassification(
+        category=category,
+        confidence=round(score / sum(scores.values()), 3),
+        matched_rules=sorted(compiled.rules[index].name for index in fired),
+    )
+
+
+def _required_literal(pattern: str, min_length: int = 3) -> Optional[Tuple[str, bool]]:
+    """Finds a literal run every match of `pattern` must contain.
+
+    Only top-level literals count: anything inside a group or character
+    class, or under an optional quantifier, may be skipped by a match. The
+    run is lowercased, to be tested against lowercased text.
+
+    Returns:
+        (run, is_word), or None if the pattern has no usable anchor.
+        `is_word` means the run is ASCII and delimited on both sides by a
+        word boundary, whitespace or punctuation, so it always matches a
+        whole alphanumeric word of the text. Such runs are preferred, then
+        longer ones.
+    """
+    atoms = _pattern_atoms(pattern)
+    if atoms is None:
+        return None
+
+    runs: List[Tuple[str, bool]] = []
+    run, left, previous = "", False, _OTHER
+    for kind, char in [*atoms, (_OTHER, "")]:
+        if kind == _LITERAL:
+            if not run:
+                left = previous == _BOUNDARY
+            run += char.lower()
+        elif run:
+            runs.append((run, left and kind == _BOUNDARY and run.isascii()))
+            run = ""
+        previous = kind
+    runs = [item for item in runs if len(item[0]) >= min_length]
+    if not runs:
+        return None
+    return max(runs, key=lambda item: (item[1], len(item[0])))
+
+
+def _pattern_atoms(pattern: str) -> Optional[List[Tuple[str, str]]]:
+    """Splits a regex into top-level atoms for `_required_literal`.
+
+    Alphanumeric characters are `_LITERAL`; `\\b`, anchors, whitespace
+    classes and punctuation characters, which can never extend a word, are
+    `_BOUNDARY`; groups, classes, wildcards and anything quantified are
+    `_OTHER`. Returns None for patterns read differently than plainly
+    (top-level branches, inline flags, numeric and named escapes).
+    """
+    atoms: List[Tuple[str, str]] = []
+    depth = 0
+    i = 0
+    while i < len(pattern):
+        char = pattern[i]
+        kind = _OTHER
+        if char == "\\":
+            escaped = pattern[i + 1 : i + 2]
+            if not escaped or escaped in "xuUN" or escaped.isdigit():
+                return None
+            if escaped in "bsWAZntrfv" or not escaped.isalnum():
+                kind = _BOUNDARY
+            i += 2
+        elif char == "[":
+            i = _class_end(pattern, i)
+        elif char == "(":
+            if pattern.startswith("(?", i) and not pattern.startswith(
+                ("(?:", "(?=", "(?!", "(?<", "(?P"), i
+            ):
+                return None
+            depth += 1
+            i += 1
+        elif char == ")":
+            depth -= 1
+            i += 1
+        elif char in "?*+" or _COUNTED_REPEAT_RE.match(pattern, i):
+            repeat = _COUNTED_REPEAT_RE.match(pattern, i)
+            i = repeat.end() if repeat else i + 1
+            if char == "+" and atoms and atoms[-1][0] == _BOUNDARY:
+                continue  # Still required, and repeating it keeps it a boundary
+            if char != "+" and atoms:
+                atoms[-1] = (_OTHER, atoms[-1][1])  # Optional
+        elif char == "|":
+            if depth == 0:
+                return None
+            i += 1
+        else:
+            i += 1
+            if char.isalnum():
+                kind = _LITERAL
+            elif char != ".":
+                kind = _BOUNDARY
+        atoms.append((kind if depth == 0 else _OTHER, char))
+    return atoms
+
+
+def _mergeable(compiled: re.Pattern) -> bool:
+    """Whether a pattern matches the same inside a larger alternation.
+
+    Groups shift the numbers of backreferences (and named groups may clash
+    between rules); global inline flags like `(?i)` are only allowed at the
+    start of the whole expression.
+    """
+    return compiled.groups == 0 and compiled.flags == _DEFAULT_FLAGS
+
+
+def _class_end(pattern: str, start: int) -> int:
+    """Returns the position after the character class opening at `start`."""
+    i = start + 1
+    if pattern[i : i + 1] == "^":
+        i += 1
+    if pattern[i : i + 1] == "]":
+        i += 1  # A leading "]" is a literal member
+    while i < len(pattern) and pattern[i] != "]":
+        i += 2 if pattern[i] == "\\" else 1
+    return i + 1
+
+
+def _trie_pattern(words: Iterable[str]) -> str:
+    """Builds a regex matching the longest of `words` at a position.
+
+    Sharing prefixes keeps each branch point to one test per distinct next
+    character, so the scan does not slow down as words are added.
+    """
+    trie: Dict[str, Any] = {}
+    for word in words:
+        node = trie
+        for char in word:
+            node = node.setdefault(char, {})
+        node[""] = {}
+
+    def render(node: Dict[str, Any]) -> str:
+        branches = [
+            re.escape(char) + render(child)
+            for char, child in sorted(node.items())
+            if char
+        ]
+        if not branches:
+            return ""
+        body = branches[0] if len(branches) == 1 else f"(?:{'|'.join(branches)})"
+        # Greedy, so longer words are preferred over a word ending here
+        return f"(?:{body})?" if "" in node else body
+
+    return render(trie)
+
+
+def _sender_domain(sender: str) -> str:
+    """Extracts the lowercased domain from a From header value."""
+    address = sender.rpartition("<")[2].rstrip(">").strip()
+    return address.rpartition("@")[2].lower()
+
+
+# Process-wide engine shared by every webhook handled in this worker.
+_default_engine: Optional[RuleEngine] = None
+
+
+def get_default_engine() -> RuleEngine:
+    """Returns the process-wide RuleEngine, creating it on first use."""
+    global _default_engine
+    if _default_engine is None:
+        _default_engine = RuleEngine()
+    return _default_engine
+
+
+def classify_batch(emails: List[ParsedEmail]) -> List[EmailClassification]:
+    """Classifies emails with the process-wide rule engine.
+
+    Args:
+        emails: Parsed emails to classify.
+
+    Returns:
+        One classification per email, in the same order.
+    """
+    return get_default_engine().classify_batch(emails)
+
+
+def classify_email(email: ParsedEmail) -> EmailClassification:
+    """Classifies one email with the process-wide rule engine.
+
+    Args:
+        email: The parsed email to classify.
+
+    Returns:
+        The email's classification.
+    """
+    return get_default_engine().classify(email)
+
+
+__all__ = ["RuleEngine", "classify_batch", "classify_email"]
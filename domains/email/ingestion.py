@@ -1,12 +1,107 @@
+import asyncio
 import base64
 import json
-from typing import Any, Dict, List
+from contextlib import asynccontextmanager
+from typing import Any, AsyncIterator, Callable, Dict, List, NamedTuple, Optional
+
+import httpx
 
 from domains.email.models import PubSubPushRequest, PubSubMessageData
+from domains.email.classification import classify_batch
+from domains.email.parsing import parse_gmail_message
 from integrations.gmail import GmailClient
+from core.cache import IdempotencyCache
+from core.checkpoints import CheckpointStore
+from core.config import env_number
 from core.logging import logger
 
 
+class FetchLimiter:
+    """Caps concurrent Gmail message fetches globally and per mailbox.
+
+    A mailbox slot is acquired before a global slot so one busy mailbox
+    cannot park waiters on the global pool while others are starved.
+    """
+
+    def __init__(
+        self,
+        max_in_flight: Optional[int] = None,
+        max_per_mailbox: Optional[int] = None,
+    ):
+        """
+        Args:
+            max_in_flight: Maximum fetches in flight across all mailboxes.
+                Falls back to GMAIL_FETCH_MAX_IN_FLIGHT (default 20).
+            max_per_mailbox: Maximum fetches in flight for a single mailbox.
+                Falls back to GMAIL_FETCH_MAX_PER_MAILBOX (default 10).
+        """
+        self.max_in_flight = max_in_flight or env_number(
+            "GMAIL_FETCH_MAX_IN_FLIGHT", 20
+        )
+        self.max_per_mailbox = max_per_mailbox or env_number(
+            "GMAIL_FETCH_MAX_PER_MAILBOX", 10
+        )
+        self._global = asyncio.Semaphore(self.max_in_flight)
+        self._mailboxes: Dict[str, asyncio.Semaphore] = {}
+
+    @asynccontextmanager
+    async def slot(self, mailbox: str) -> AsyncIterator[None]:
+        """Holds one mailbox slot and one global slot for the block's duration."""
+        mailbox_sem = self._mailboxes.get(mailbox)
+        if mailbox_sem is None:
+            mailbox_sem = self._mailboxes[mailbox] = asyncio.Semaphore(
+                self.max_per_mailbox
+            )
+        async with mailbox_sem, self._global:
+            yield
+
+
+class MessageFetchResult(NamedTuple):
+    """Outcome of fetching one message; exactly one of message/error is set."""
+
+    message_id: str
+    message: Optional[Dict[str, Any]]
+    error: Optional[Exception]
+
+
+# Process-wide limiter shared by every webhook handled in this worker.
+_default_limiter: Optional[FetchLimiter] = None
+
+
+def get_default_limiter() -> FetchLimiter:
+    """Returns the process-wide FetchLimiter, creating it on first use."""
+    global _default_limiter
+    if _default_limiter is None:
+        _default_limiter = FetchLimiter()
+    return _default_limiter
+
+
+# Precedence values that mark bulk or automated mail
+BULK_PRECEDENCE = frozenset({"bulk", "list", "junk"})
+
+
+def needs_full_body(metadata: Dict[str, Any]) -> bool:
+    """Decides from headers alone whether a message's body is worth fetching.
+
+    Newsletters and automated notifications (List-Unsubscribe header or a
+    bulk Precedence) are triaged from their metadata; everything else gets
+    the full payload.
+
+    Args:
+        metadata: A Gmail message fetched with format="metadata".
+
+    Returns:
+        True if the full message should be downloaded.
+    """
+    for header in metadata.get("payload", {}).get("headers", []):
+        name = header["name"].lower()
+        if name == "list-unsubscribe":
+            return False
+        if name == "precedence" and header["value"].strip().lower() in BULK_PRECEDENCE:
+            return False
+    return True
+
+
 def decode_pubsub_message(payload: PubSubPushRequest) -> PubSubMessageData:
     """Extracts and decodes base64-encoded Gmail Pub/Sub message data.
 
@@ -21,22 +116,89 @@ def decode_pubsub_message(payload: PubSubPushRequest) -> PubSubMessageData:
     return PubSubMessageData(**data_json)
 
 
+async def fetch_message(
+    gmail_client: GmailClient,
+    mailbox: str,
+    message_id: str,
+    limiter: Optional[FetchLimiter] = None,
+    wants_body: Callable[[Dict[str, Any]], bool] = needs_full_body,
+) -> MessageFetchResult:
+    """Fetches one message metadata-first under the limiter's in-flight caps.
+
+    The headers are fetched first; the full payload is only downloaded when
+    `wants_body` says the downstream stages need it.
+
+    Args:
+        gmail_client: Authenticated Gmail client for API interactions.
+        mailbox: The email address of the mailbox to act as.
+        message_id: The Gmail message ID to fetch.
+        limiter: Concurrency limiter; defaults to the process-wide one.
+        wants_body: Predicate over the metadata deciding whether to fetch the
+            full message.
+
+    Returns:
+        The fetched message (full or metadata-only), or the error that
+        prevented fetching it.
+    """
+    limiter = limiter or get_default_limiter()
+    async with limiter.slot(mailbox):
+        logger.info(f"Fetching new message ID: {message_id}")
+        try:
+            email = await gmail_client.get_message_metadata(
+                user_id="me",
+                message_id=message_id,
+                user_to_impersonate=mailbox,
+            )
+            if wants_body(email):
+                email = await gmail_client.get_message(
+                    user_id="me",
+                    message_id=message_id,
+                    user_to_impersonate=mailbox,
+                )
+        except Exception as e:
+            return MessageFetchResult(message_id, None, e)
+    return MessageFetchResult(message_id, email, None)
+
+
 async def process_gmail_webhook(
-    payload: PubSubPushRequest, gmail_client: GmailClient
+    payload: PubSubPushRequest,
+    gmail_client: GmailClient,
+    limiter: Optional[FetchLimiter] = None,
+    checkpoint_store: Optional[CheckpointStore] = None,
+    dedupe: Optional[IdempotencyCache] = None,
+    wants_body: Callable[[Dict[str, Any]], bool] = needs_full_body,
 ) -> List[Dict[str, Any]]:
     """
     Main ingestion pipeline entry point for processing Gmail webhooks.
 
-    Processes incoming Pub/Sub notifications by decoding the message, fetching
-    Gmail history changes, and retrieving full email details for each new
-    message. Future enhancements will include parsing and classification.
+    Processes incoming Pub/Sub notifications by decoding the message, streaming
+    Gmail history changes page by page, and fetching each new message as soon
+    as it is seen: headers first, the full payload only when `wants_body`
+    asks for it. The fetched messages are then parsed and classified in one
+    batch, and the mailbox checkpoint is advanced.
 
     Args:
         payload: The Pub/Sub push request containing Gmail notification data.
         gmail_client: Authenticated Gmail client for API interactions.
+        limiter: Concurrency limiter for message fetches; defaults to the
+            process-wide one.
+        checkpoint_store: Per-mailbox history checkpoints. When given, only
+            the delta since the last committed history ID is fetched, and the
+            checkpoint is advanced once every message was fetched. A
+            checkpoint Gmail no longer keeps history for (404) is reset to
+            the notification's history ID; the messages in between are
+            logged as a gap and not fetched.
+        dedupe: Idempotency cache of already-fetched Gmail message IDs; seen
+            messages are skipped instead of being fetched again. The push
+            itself is marked once it was fully processed, so the webhook
+            acknowledges later redeliveries without requeueing them.
+        wants_body: Predicate over a message's metadata deciding whether its
+            full payload is downloaded.
 
     Returns:
-        List of raw Gmail message dictionaries for each newly received email.
+        List of raw Gmail message dictionaries for each newly received email,
+        metadata-only for messages triaged from their headers.
+        Messages that failed to fetch are logged and left out.
     """
     logger.info("---New Webhook Received---")
 
@@ -45,63 +207,135 @@ async def process_gmail_webhook(
     logger.info(f"Processing for: {gmail_data.email_address}")
     logger.info(f"History ID: {gmail_data.history_id}")
     processed_emails = []
+    fetches: List[asyncio.Task] = []
+    scheduled = set()  # Message IDs already queued during this run
+    skipped = 0
+
+    # Resumes from the mailbox's last committed checkpoint when one exists.
+    checkpoint = None
+    start_history_id = gmail_data.history_id
+    if checkpoint_store is not None:
+        checkpoint = await checkpoint_store.get(gmail_data.email_address)
+        if checkpoint is not None:
+            if checkpoint >= gmail_data.history_id:
+                logger.info(f"Already synced past history ID {checkpoint}.")
+                if dedupe is not None:
+                    await dedupe.mark(push_key(payload))
+                return []
+            start_history_id = checkpoint
+    latest_history_id = gmail_data.history_id
 
     try:
-        # Fetches Gmail history changes since the last processed history ID.
-        history_response = await gmail_client.list_history(
-            user_id="me",
-            start_history_id=gmail_data.history_id,
-            user_to_impersonate=gmail_data.email_address,
-        )
+        # Streams Gmail history changes since the last processed history ID and
+        # starts fetching each new message while later pages are still loading.
+        try:
+            async for item in gmail_client.iter_history(
+                user_id="me",
+                start_history_id=start_history_id,
+                user_to_impersonate=gmail_data.email_address,
+            ):
+                latest_history_id = max(latest_history_id, int(item["id"]))
+                for msg_summary in item.get("messagesAdded", []):
+                    msg_id = msg_summary["message"]["id"]
+                    if msg_id in scheduled or (
+                        dedupe is not None
+                        and await dedupe.seen(
+                            _message_key(gmail_data.email_address, msg_id)
+                        )
+                    ):
+                        skipped += 1
+                        continue
+                    scheduled.add(msg_id)
+                    fetches.append(
+                        asyncio.create_task(
+                            fetch_message(
+                                gmail_client,
+                                gmail_data.email_address,
+                                msg_id,
+                                limiter,
+                                wants_body,
+                            )
+                        )
+                    )
+        except httpx.HTTPStatusError as e:
+            # Gmail keeps about a week of history; an older start ID is gone
+            # for good, so retrying it would fail on every notification.
+            if e.response.status_code != 404:
+                raise
+            logger.warning(
+                f"History ID {start_history_id} of {gmail_data.email_address} "
+                f"has expired; skipping the gap up to history ID "
+                f"{gmail_data.history_id}"
+            )
 
-        history_items = history_response.get("history", [])
-        if not history_items:
+        # Waits for the in-flight fetches; results keep history order.
+        results = await asyncio.gather(*fetches)
+        if skipped:
+            logger.info(f"Skipped {skipped} already-fetched messages.")
+        if not results:
             logger.info("No new history items found.")
-            return []
-
-        # Iterates through history items to fetch full details for each new message.
-        for item in history_items:
-            messages_added = item.get("messagesAdded", [])
-            for msg_summary in messages_added:
-                msg_id = msg_summary["message"]["id"]
-                logger.info(f"Fetching new message ID: {msg_id}")
 
-                # Fetches the complete email message using the Gmail API.
-                email = await gmail_client.get_message(
-                    user_id="me",
-                    message_id=msg_id,
-                    user_to_impersonate=gmail_data.email_address,
+        parsed_emails = []
+        for result in results:
+            if result.error is not None:
+                logger.warning(
+                    f"Failed to fetch message {result.message_id}: {result.error}"
                 )
+                continue
 
-                logger.info(f"  -> Fetched Subject: {get_subject(email)}")
-                processed_emails.append(email)
-
-                # TODO(phase-3): Parse email content and extract structured data.
-                # parsed_email = parse_gmail_message(email)
+            email = result.message
+            # Parses email content and extracts structured data.
+            parsed_emails.append(parse_gmail_message(email))
+            processed_emails.append(email)
+            if dedupe is not None:
+                await dedupe.mark(
+                    _message_key(gmail_data.email_address, result.message_id)
+                )
 
-                # TODO(phase-4): Classify email type and route to appropriate handler.
-                # classification = classify_email(parsed_email)
+        # Classifies the whole webhook's messages in one pass over the rules.
+        for parsed_email, classification in zip(
+            parsed_emails, classify_batch(parsed_emails)
+        ):
+            logger.info(
+                f"  -> {parsed_email.subject or '[No Subject]'}: "
+                f"{classification.category} ({classification.confidence:.2f})"
+            )
 
     except Exception as e:
+        for fetch in fetches:
+            fetch.cancel()
         logger.error(f"Error processing email ingestion: {e}", exc_info=True)
         # Re-raises exception to be handled by the API router layer.
         raise e
 
+    # Commits the new checkpoint only if nothing was dropped along the way, so
+    # a failed fetch is retried from the same point on the next notification.
+    # Only then is the push marked done; until that point a redelivery of the
+    # same push is queued again instead of being acknowledged as a duplicate.
+    if len(processed_emails) == len(results):
+        if checkpoint_store is not None:
+            await checkpoint_store.advance(
+                gmail_data.email_address, checkpoint, latest_history_id
+            )
+        if dedupe is not None:
+            await dedupe.mark(push_key(payload))
+
     logger.info(f"--- Successfully processed {len(processed_emails)} emails ---")
     return processed_emails
 
 
-def get_subject(message: Dict[str, Any]) -> str:
-    """Extracts the Subject header from a Gmail message.
+def _message_key(mailbox: str, message_id: str) -> str:
+    """Builds the idempotency key for a Gmail message in a given mailbox."""
+    return f"gmail:{mailbox}:{message_id}"
+
+
+def push_key(payload: PubSubPushRequest) -> str:
+    """Builds the idempotency key for a Pub/Sub push delivery.
 
     Args:
-        message: Raw Gmail message dictionary from the API.
+        payload: The Pub/Sub push request.
 
     Returns:
-        The email subject line, or "[No Subject]" if not found.
+        A key that is identical across redeliveries of the same push.
     """
-    headers = message.get("payload", {}).get("headers", [])
-    for header in headers:
-        if header["name"].lower() == "subject":
-            return header["value"]
-    return "[No Subject]"
+    return f"pubsub:{payload.subscription}:{payload.message.message_id}"
@@ -1,3 +1,5 @@
+from typing import List
+
 from pydantic import BaseModel, Field
 
 
@@ -33,3 +35,15 @@ class PubSubPushRequest(BaseModel):
 
     message: PubSubMessage
     subscription: str
+
+
+class EmailClassification(BaseModel):
+    """Result of classifying a parsed email with the rule engine.
+
+    Holds the winning category, its share of the total rule score as a
+    confidence value, and the names of the rules that fired.
+    """
+
+    category: str
+    confidence: float
+    matched_rules: List[str] = Field(default_factory=list)
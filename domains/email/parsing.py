@@ -0,0 +1,260 @@
+"""
+Parser for Gmail API message resources.
+
+Walks the `payload.parts` MIME tree iteratively, indexes headers once and
+defers base64url body decoding until a body is actually read.
+"""
+
+import base64
+from typing import Any, Dict, Iterator, List, Optional
+
+
+class HeaderMap:
+    """Case-insensitive, read-only view over a message's headers.
+
+    Headers are indexed once at construction; repeated headers (e.g.
+    Received) keep every value in order.
+    """
+
+    __slots__ = ("_index",)
+
+    def __init__(self, headers: List[Dict[str, str]]):
+        index: Dict[str, List[str]] = {}
+        for header in headers:
+            index.setdefault(header["name"].lower(), []).append(header["value"])
+        self._index = index
+
+    def get(self, name: str, default: Optional[str] = None) -> Optional[str]:
+        """Returns the first value of a header, or `default` if absent."""
+        values = self._index.get(name.lower())
+        return values[0] if values else default
+
+    def get_all(self, name: str) -> List[str]:
+        """Returns every value of a header, in message order."""
+        return list(self._index.get(name.lower(), ()))
+
+    def __contains__(self, name: str) -> bool:
+        return name.lower() in self._index
+
+    def __getitem__(self, name: str) -> str:
+        return self._index[name.lower()][0]
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self._index)
+
+    def __len__(self) -> int:
+        return len(self._index)
+
+
+class BodyPart:
+    """A text body whose base64url data is decoded only on first access."""
+
+    __slots__ = ("mime_type", "charset", "size", "_data", "_text")
+
+    def __init__(self, mime_type: str, charset: str, size: int, data: str):
+        self.mime_type = mime_type
+        self.charset = charset
+        self.size = size
+        self._data = data  # Reference into the API response, not a copy
+        self._text: Optional[str] = None
+
+    @property
+    def text(self) -> str:
+        """The decoded body text."""
+        if self._text is None:
+            raw = base64.urlsafe_b64decode(self._data + "=" * (-len(self._data) % 4))
+            try:
+                self._text = raw.decode(self.charset, errors="replace")
+            except LookupError:
+                # Unknown charset label in the message
+                self._text = raw.decode("utf-8", errors="replace")
+            self._data = ""
+        return self._text
+
+
+class Attachment:
+    """Attachment metadata; the attachment data itself is never decoded."""
+
+    __slots__ = ("part_id", "filename", "mime_type", "size", "attachment_id")
+
+    def __init__(
+        self,
+        part_id: str,
+        filename: str,
+        mime_type: str,
+        size: int,
+        attachment_id: Optional[str],
+    ):
+        self.part_id = part_id
+        self.filename = filename
+        self.mime_type = mime_type
+        self.size = size
+        self.attachment_id = attachment_id
+
+    def __repr__(self) -> str:
+        return f"Attachment({self.filename!r}, {self.mime_type!r}, {self.size})"
+
+
+class ParsedEmail:
+    """Structured view of a Gmail message (sender, subject, bodies, attachments)."""
+
+    __slots__ = (
+        "id",
+        "thread_id",
+        "label_ids",
+        "snippet",
+        "internal_date",
+        "headers",
+        "attachments",
+        "_text_part",
+        "_html_part",
+    )
+
+    def __init__(
+        self,
+        id: str,
+        thread_id: Optional[str],
+        label_ids: List[str],
+        snippet: str,
+        internal_date: Optional[int],
+        headers: HeaderMap,
+        attachments: List[Attachment],
+        text_part: Optional[BodyPart],
+        html_part: Optional[BodyPart],
+    ):
+        self.id = id
+        self.thread_id = thread_id
+        self.label_ids = label_ids
+        self.snippet = snippet
+        self.internal_date = internal_date
+        self.headers = headers
+        self.attachments = attachments
+        self._text_part = text_part
+        self._html_part = html_part
+
+    @property
+    def subject(self) -> str:
+        return self.headers.get("subject", "")
+
+    @property
+    def sender(self) -> str:
+        return self.headers.get("from", "")
+
+    @property
+    def to(self) -> str:
+        return self.headers.get("to", "")
+
+    @property
+    def date(self) -> Optional[str]:
+        return self.headers.get("date")
+
+    @property
+    def message_id(self) -> Optional[str]:
+        return self.headers.get("message-id")
+
+    @property
+    def has_body(self) -> bool:
+        """False for metadata-only fetches, which carry headers but no parts."""
+        return self._text_part is not None or self._html_part is not None
+
+    @property
+    def text(self) -> str:
+        """The plain-text body, decoded on first access."""
+        return self._text_part.text if self._text_part else ""
+
+    @property
+    def html(self) -> str:
+        """The HTML body, decoded on first access."""
+        return self._html_part.text if self._html_part else ""
+
+    def __repr__(self) -> str:
+        return f"ParsedEmail(id={self.id!r}, subject={self.subject!r})"
+
+
+def parse_gmail_message(message: Dict[str, Any]) -> ParsedEmail:
+    """Parses a Gmail API message resource into a ParsedEmail.
+
+    The MIME tree is walked with an explicit stack, so deeply nested
+    multiparts cannot hit the recursion limit. The first inline text/plain
+    and text/html parts become the bodies; parts with a filename or an
+    attachment ID are recorded as attachments without touching their data.
+
+    Args:
+        message: Raw Gmail message dictionary (format "full" or "metadata").
+
+    Returns:
+        The parsed email.
+    """
+    payload = message.get("payload", {})
+    text_part = None
+    html_part = None
+    attachments: List[Attachment] = []
+
+    stack: List[Dict[str, Any]] = [payload]
+    while stack:
+        part = stack.pop()
+        children = part.get("parts")
+        if children:
+            # Reversed so parts are visited in document order
+            stack.extend(reversed(children))
+            continue
+
+        mime_type = part.get("mimeType", "")
+        body = part.get("body", {})
+        filename = part.get("filename", "")
+        if filename or body.get("attachmentId"):
+            attachments.append(
+                Attachment(
+                    part.get("partId", ""),
+                    filename,
+                    mime_type,
+                    body.get("size", 0),
+                    body.get("attachmentId"),
+                )
+            )
+            continue
+
+        data = body.get("data")
+        if not data:
+            continue
+        if mime_type == "text/plain" and text_part is None:
+            text_part = _body_part(part, mime_type, body, data)
+        elif mime_type == "text/html" and html_part is None:
+            html_part = _body_part(part, mime_type, body, data)
+
+    internal_date = message.get("internalDate")
+    return ParsedEmail(
+        id=message.get("id", ""),
+        thread_id=message.get("threadId"),
+        label_ids=message.get("labelIds", []),
+        snippet=message.get("snippet", ""),
+        internal_date=int(internal_date) if internal_date else None,
+        headers=HeaderMap(payload.get("headers", [])),
+        attachments=attachments,
+        text_part=text_part,
+        html_part=html_part,
+    )
+
+
+def _body_part(
+    part: Dict[str, Any], mime_type: str, body: Dict[str, Any], data: str
+) -> BodyPart:
+    """Builds a lazy BodyPart, reading the charset from the part's headers."""
+    charset = "utf-8"
+    for header in part.get("headers", ()):
+        if header["name"].lower() == "content-type":
+            charset = _content_type_charset(header["value"]) or charset
+            break
+    return BodyPart(mime_type, charset, body.get("size", 0), data)
+
+
+def _content_type_charset(content_type: str) -> Optional[str]:
+    """Extracts the charset parameter from a Content-Type header value."""
+    for param in content_type.split(";")[1:]:
+        key, _, value = param.strip().partition("=")
+        if key.lower() == "charset":
+            return value.strip().strip('"')
+    return None
+
+
+__all__ = ["Attachment", "BodyPart", "HeaderMap", "ParsedEmail", "parse_gmail_message"]
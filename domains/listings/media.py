@@ -0,0 +1,687 @@
+"""
+Listing media pipeline backed by a content-addressed on-disk store.
+
+This module downloads listing photos and other media with bounded
+concurrency and conditional requests, streaming each body into a store
+keyed by its SHA-256 digest so identical files are kept once, and evicts
+the least recently used files once the store outgrows its size budget.
+"""
+
+import asyncio
+import hashlib
+import os
+import random
+import sqlite3
+import threading
+import time
+import uuid
+from pathlib import Path
+from typing import (
+    Any,
+    AsyncIterator,
+    Dict,
+    Iterable,
+    List,
+    NamedTuple,
+    Optional,
+    Tuple,
+    Union,
+)
+
+import httpx
+
+from core.config import env_number
+from core.logging import logger
+from core.rate_limit import parse_retry_after
+from domains.property_management._fields import get_field
+
+# Rows per executemany()/IN (...) chunk, well under SQLite's variable limit
+_CHUNK_SIZE = 500
+
+# Result statuses
+NEW = "new"  # Downloaded for a key without a stored file
+CHANGED = "changed"  # Downloaded content differs from what the key had
+UNCHANGED = "unchanged"  # 304, or a 200 with the same content
+SKIPPED = "skipped"  # Metadata unchanged; no request was made
+FAILED = "failed"
+
+
+class MediaRecord(NamedTuple):
+    """What the store knows about one media key (e.g. a RESO MediaKey)."""
+
+    key: str
+    url: str
+    digest: Optional[str]  # None once the file was evicted
+    size: Optional[int]
+    etag: Optional[str]
+    last_modified: Optional[str]
+    version: Optional[str]  # e.g. the Media ModificationTimestamp
+    fetched_at: float
+
+
+class MediaResult(NamedTuple):
+    """Outcome of refreshing one media key."""
+
+    key: str
+    url: str
+    status: str  # NEW, CHANGED, UNCHANGED, SKIPPED or FAILED
+    digest: Optional[str] = None
+    size: Optional[int] = None
+    downloaded: int = 0  # Body bytes received over the network
+    error: Optional[str] = None
+
+
+class BlobWriter:
+    """Streams one body to a temporary file while hashing it.
+
+    Obtained from `MediaStore.writer()`; `MediaStore.commit()` moves the
+    file to its content address, or drops it if that file already exists.
+    """
+
+    def __init__(self, path: Path):
+        self.path = path
+        self.size = 0
+        self._hash = hashlib.sha256()
+        self._file = open(path, "wb")
+
+    def write(self, chunk: Union[bytes, bytearray]) -> None:
+        self._hash.update(chunk)
+        self._file.write(chunk)
+        self.size += len(chunk)
+
+    @property
+    def digest(self) -> str:
+        return self._hash.hexdigest()
+
+    def close(self) -> None:
+        if not self._file.closed:
+            self._file.close()
+
+    def abort(self) -> None:
+        """Discards the partial file."""
+        self.close()
+        self.path.unlink(missing_ok=True)
+
+
+class MediaStore:
+    """Content-addressed media files with a SQLite index and LRU eviction.
+
+    Files live at `root/ab/cd/abcd...` after their SHA-256 digest, so the
+    same image shared by several listings (or re-uploaded under a new URL)
+    is stored once. The index maps media keys to their digest and HTTP
+    validators, and tracks the size and last access of every file. Once the
+    files outgrow `max_bytes`, the least recently accessed ones are deleted
+    down to `LOW_WATER` of the budget, and the keys pointing at them lose
+    their validators so the next refresh downloads them again.
+    """
+
+    # Eviction stops at this fraction of max_bytes, so it runs in batches
+    LOW_WATER = 0.9
+    DEFAULT_MAX_BYTES = 10 * 1024**3
+
+    def __init__(
+        self,
+        root: Optional[str] = None,
+        max_bytes: Optional[int] = None,
+        db_path: Optional[str] = None,
+    ):
+        """
+        Args:
+            root: Directory of the files. Falls back to MEDIA_STORE_PATH, then
+                to `data/media`.
+            max_bytes: Size budget of the files, or MEDIA_STORE_MAX_BYTES
+                (10 GiB by default).
+            db_path: SQLite index; defaults to `index.sqlite3` under `root`.
+        """
+        self.root = Path(root or os.getenv("MEDIA_STORE_PATH", "data/media"))
+        self.max_bytes = max_bytes or env_number(
+            "MEDIA_STORE_MAX_BYTES", self.DEFAULT_MAX_BYTES
+        )
+        self._tmp = self.root / "tmp"
+        self._tmp.mkdir(parents=True, exist_ok=True)
+        # Leftovers of downloads interrupted by a crash
+        for leftover in self._tmp.iterdir():
+            leftover.unlink(missing_ok=True)
+
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(
+            db_path or str(self.root / "index.sqlite3"),
+            timeout=30.0,
+            check_same_thread=False,
+            isolation_level=None,
+        )
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute("""
+            CREATE TABLE IF NOT EXISTS media (
+                key TEXT PRIMARY KEY,
+                url TEXT NOT NULL,
+                digest TEXT,
+                etag TEXT,
+                last_modified TEXT,
+                version TEXT,
+                fetched_at REAL NOT NULL
+            ) WITHOUT ROWID
+            """)
+        self._conn.execute("CREATE INDEX IF NOT EXISTS media_digest ON media (digest)")
+        self._conn.execute("""
+            CREATE TABLE IF NOT EXISTS blobs (
+                digest TEXT PRIMARY KEY,
+                size INTEGER NOT NULL,
+                last_access REAL NOT NULL
+            ) WITHOUT ROWID
+            """)
+        self._conn.execute(
+            "CREATE INDEX IF NOT EXISTS blobs_last_access ON blobs (last_access)"
+        )
+        self.total_bytes = self._conn.execute(
+            "SELECT COALESCE(SUM(size), 0) FROM blobs"
+        ).fetchone()[0]
+        self._evictions = 0
+
+    def path(self, digest: str) -> Path:
+        """Location of the file with the given digest."""
+        return self.root / digest[:2] / digest[2:4] / digest
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
+
+    @property
+    def stats(self) -> Dict[str, int]:
+        """Stored files, their total size and evictions so far."""
+        with self._lock:
+            files = self._conn.execute("SELECT COUNT(*) FROM blobs").fetchone()[0]
+        return {
+            "files": files,
+            "bytes": self.total_bytes,
+            "evictions": self._evictions,
+        }
+
+    # --- Index ---
+
+    _COLUMNS = (
+        "m.key, m.url, m.digest, b.size, m.etag, m.last_modified, m.version, "
+        "m.fetched_at"
+    )
+
+    def get(self, key: str) -> Optional[MediaRecord]:
+        """Returns the stored state of a media key, or None if never fetched."""
+        return self.get_many([key]).get(key)
+
+    def get_many(self, keys: Iterable[str]) -> Dict[str, MediaRecord]:
+        """Returns the stored state of the given keys that have one."""
+        keys = list(keys)
+        found: Dict[str, MediaRecord] = {}
+        with self._lock:
+            for start in range(0, len(keys), _CHUNK_SIZE):
+                chunk = keys[start : start + _CHUNK_SIZE]
+                rows = self._conn.execute(
+                    f"SELECT {self._COLUMNS} FROM media m "
+                    "LEFT JOIN blobs b ON b.digest = m.digest "
+                    f"WHERE m.key IN ({', '.join('?' * len(chunk))})",
+                    chunk,
+                ).fetchall()
+                for row in rows:
+                    found[row[0]] = MediaRecord(*row)
+        return found
+
+    def touch(self, digests: Iterable[str]) -> None:
+        """Marks files as recently used."""
+        now = time.time()
+        rows = [(now, digest) for digest in set(digests)]
+        with self._lock:
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                self._conn.executemany(
+                    "UPDATE blobs SET last_access = ? WHERE digest = ?", rows
+                )
+            except BaseException:
+                self._conn.execute("ROLLBACK")
+                raise
+            self._conn.execute("COMMIT")
+
+    def forget(self, key: str) -> bool:
+        """Drops a media key; its file stays until evicted. False if unknown."""
+        with self._lock:
+            cursor = self._conn.execute("DELETE FROM media WHERE key = ?", (key,))
+        return cursor.rowcount > 0
+
+    # --- Files ---
+
+    def writer(self) -> BlobWriter:
+        """Starts a new body; see `commit()`."""
+        return BlobWriter(self._tmp / uuid.uuid4().hex)
+
+    def commit(
+        self,
+        blob: BlobWriter,
+        key: str,
+        url: str,
+        etag: Optional[str] = None,
+        last_modified: Optional[str] = None,
+        version: Optional[str] = None,
+    ) -> bool:
+        """Stores a completed body under its digest and points `key` at it.
+
+        Returns:
+            True if the file was written, False if an identical file was
+            already stored (the body is then discarded).
+        """
+        blob.close()
+        digest, path = blob.digest, self.path(blob.digest)
+        now = time.time()
+        with self._lock:
+            known = self._conn.execute(
+                "SELECT 1 FROM blobs WHERE digest = ?", (digest,)
+            ).fetchone()
+            stored = not (known and path.exists())
+            if stored:
+                path.parent.mkdir(parents=True, exist_ok=True)
+                os.replace(blob.path, path)
+            else:
+                blob.path.unlink(missing_ok=True)
+
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                if not known:
+                    self.total_bytes += blob.size
+                self._conn.execute(
+                    """
+                    INSERT INTO blobs (digest, size, last_access) VALUES (?, ?, ?)
+                    ON CONFLICT (digest) DO UPDATE SET last_access = excluded.last_access
+                    """,
+                    (digest, blob.size, now),
+                )
+                self._conn.execute(
+                    """
+                    INSERT OR REPLACE INTO media (
+                        key, url, digest, etag, last_modified, version, fetched_at
+                    ) VALUES (?, ?, ?, ?, ?, ?, ?)
+                    """,
+                    (key, url, digest, etag, last_modified, version, now),
+                )
+            except BaseException:
+                self._conn.execute("ROLLBACK")
+                raise
+            self._conn.execute("COMMIT")
+            if self.total_bytes > self.max_bytes:
+                self._evict(keep=digest)
+        return stored
+
+    def revalidated(
+        self, key: str, url: str, version: Optional[str] = None
+    ) -> Optional[MediaRecord]:
+        """Records a 304 for `key`: its file is touched and its URL and version
+        updated. Returns None if the file was evicted meanwhile."""
+        now = time.time()
+        with self._lock:
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                self._conn.execute(
+                    """
+                    UPDATE media SET url = ?, version = COALESCE(?, version),
+                        fetched_at = ?
+                    WHERE key = ? AND digest IS NOT NULL
+                    """,
+                    (url, version, now, key),
+                )
+                self._conn.execute(
+                    """
+                    UPDATE blobs SET last_access = ?
+                    WHERE digest = (SELECT digest FROM media WHERE key = ?)
+                    """,
+                    (now, key),
+                )
+            except BaseException:
+                self._conn.execute("ROLLBACK")
+                raise
+            self._conn.execute("COMMIT")
+        return self.get(key)
+
+    def _evict(self, keep: str) -> None:
+        """Deletes least recently used files down to the low-water mark.
+
+        Must be called with the lock held.
+        """
+        target = self.max_bytes * self.LOW_WATER
+        victims: List[Tuple[str, int]] = []
+        freed = 0
+        rows = self._conn.execute(
+            "SELECT digest, size FROM blobs WHERE digest != ? ORDER BY last_access",
+            (keep,),
+        )
+        for digest, size in rows:
+            if self.total_bytes - freed <= target:
+                break
+            victims.append((digest, size))
+            freed += size
+        rows.close()
+
+        self._conn.execute("BEGIN IMMEDIATE")
+        try:
+            for start in range(0, len(victims), _CHUNK_SIZE):
+                chunk = [digest for digest, _ in victims[start : start + _CHUNK_SIZE]]
+                marks = ", ".join("?" * len(chunk))
+                self._conn.execute(
+                    f"DELETE FROM blobs WHERE digest IN ({marks})", chunk
+                )
+                # Keys lose their validators so the next refresh downloads again
+                self._conn.execute(
+                    "UPDATE media SET digest = NULL, etag = NULL, "
+                    f"last_modified = NULL, version = NULL WHERE digest IN ({marks})",
+                    chunk,
+                )
+        except BaseException:
+            self._conn.execute("ROLLBACK")
+            raise
+        self._conn.execute("COMMIT")
+        for digest, _ in victims:
+            self.path(digest).unlink(missing_ok=True)
+        self.total_bytes -= freed
+        self._evictions += len(victims)
+        logger.debug(
+            f"Evicted {len(victims)} media files ({freed:,} bytes); "
+            f"{self.total_bytes:,} bytes stored"
+        )
+
+
+class MediaPipeline:
+    """Refreshes listing media into a `MediaStore`.
+
+    Downloads share one pooled httpx client and run at most `concurrency`
+    at a time. A medium whose metadata version (e.g. RESO Media
+    ModificationTimestamp) is unchanged is not requested at all; others are
+    requested with If-None-Match / If-Modified-Since, so unchanged files
+    come back as bodiless 304s. Bodies are streamed to the store in
+    buffered writes that run off the event loop, and only new content is
+    persisted.
+    """
+
+    DEFAULT_CONCURRENCY = 16
+    # Body bytes buffered before each write to the store's temporary file
+    WRITE_BUFFER_BYTES = 256 * 1024
+    DEFAULT_MAX_RETRIES = 3
+    BACKOFF_BASE = 0.5
+    BACKOFF_MAX = 30.0
+    RETRYABLE_STATUSES = frozenset({429, 500, 502, 503, 504})
+
+    # RESO Media fields
+    MEDIA_KEY = "MediaKey"
+    MEDIA_URL = "MediaURL"
+    MODIFICATION_TIMESTAMP = "ModificationTimestamp"
+
+    def __init__(
+        self,
+        store: Optional[MediaStore] = None,
+        *,
+        concurrency: Optional[int] = None,
+        max_retries: Optional[int] = None,
+        timeout: float = 60.0,
+        transport: Optional[httpx.AsyncBaseTransport] = None,
+    ):
+        """
+        Args:
+            store: Where media is kept; a `MediaStore` with its defaults when
+                omitted.
+            concurrency: Maximum downloads in flight, or MEDIA_CONCURRENCY.
+                The connection pool is sized to match.
+            max_retries: Retries for 429, 5xx and transport errors.
+            timeout: Per-request timeout in seconds.
+            transport: Optional custom transport (e.g. `httpx.MockTransport`).
+        """
+        self.store = store or MediaStore()
+        self.concurrency = concurrency or env_number(
+            "MEDIA_CONCURRENCY", self.DEFAULT_CONCURRENCY
+        )
+        self.max_retries = (
+            max_retries
+            if max_retries is not None
+            else env_number("MEDIA_MAX_RETRIES", self.DEFAULT_MAX_RETRIES)
+        )
+        self.client = httpx.AsyncClient(
+            timeout=timeout,
+            follow_redirects=True,
+            limits=httpx.Limits(
+                max_connections=self.concurrency,
+                max_keepalive_connections=self.concurrency,
+            ),
+            transport=transport,
+        )
+        self._slots = asyncio.Semaphore(self.concurrency)
+        self.stats: Dict[str, int] = {
+            "requests": 0,
+            "not_modified": 0,
+            "downloaded_bytes": 0,
+            "stored_bytes": 0,
+            "deduplicated": 0,
+            "skipped": 0,
+            "failed": 0,
+        }
+
+    async def close(self) -> None:
+        """Closes the pooled HTTP connections. Safe to call more than once."""
+        if not self.client.is_closed:
+            await self.client.aclose()
+
+    # --- Refresh ---
+
+    async def refresh(
+        self, media: Iterable[Union[str, Dict[str, Any], Any]]
+    ) -> AsyncIterator[MediaResult]:
+        """
+        Yields the result of each medium as its refresh completes.
+
+        Args:
+            media: RESO Media records (MediaKey, MediaURL and
+                ModificationTimestamp; dicts or models) or plain URLs, which
+                are then their own key and have no version. Records without
+                a MediaURL are reported as FAILED without a request.
+        """
+        items = []
+        invalid: List[MediaResult] = []
+        for medium in media:
+            try:
+                items.append(self._describe(medium))
+            except ValueError as e:
+                key = get_field(medium, self.MEDIA_KEY)
+                invalid.append(MediaResult(str(key or ""), "", FAILED, error=str(e)))
+        if invalid:
+            self.stats["failed"] += len(invalid)
+            logger.warning(f"Skipping {len(invalid)} media records without a URL")
+            for result in invalid:
+                yield result
+
+        known = await asyncio.to_thread(
+            self.store.get_many, [key for key, _, _ in items]
+        )
+
+        pending = []
+        fresh: List[MediaResult] = []
+        for key, url, version in items:
+            record = known.get(key)
+            if (
+                record is not None
+                and record.digest is not None
+                and version is not None
+                and record.version == version
+            ):
+                fresh.append(MediaResult(key, url, SKIPPED, record.digest, record.size))
+            else:
+                pending.append((key, url, version, record))
+        if fresh:
+            await asyncio.to_thread(
+                self.store.touch, [result.digest for result in fresh]
+            )
+            self.stats["skipped"] += len(fresh)
+            for result in fresh:
+                yield result
+
+        tasks = [asyncio.ensure_future(self._guarded_fetch(*args)) for args in pending]
+        try:
+            for next_done in asyncio.as_completed(tasks):
+                yield await next_done
+        finally:
+            for task in tasks:
+                task.cancel()
+
+    async def refresh_all(
+        self, media: Iterable[Union[str, Dict[str, Any], Any]]
+    ) -> List[MediaResult]:
+        """Refreshes every medium and returns the results in completion order."""
+        return [result async for result in self.refresh(media)]
+
+    async def fetch(
+        self, url: str, key: Optional[str] = None, version: Optional[str] = None
+    ) -> MediaResult:
+        """Refreshes a single medium, conditionally if its file is stored."""
+        key = key or url
+        record = await asyncio.to_thread(self.store.get, key)
+        return await self._guarded_fetch(key, url, version, record)
+
+    def _describe(
+        self, medium: Union[str, Dict[str, Any], Any]
+    ) -> Tuple[str, str, Optional[str]]:
+        """(key, url, version) of a RESO Media record or URL."""
+        if isinstance(medium, str):
+            return medium, medium, None
+        url = get_field(medium, self.MEDIA_URL)
+        if not url:
+            raise ValueError(f"Media record without {self.MEDIA_URL}: {medium!r}")
+        key = get_field(medium, self.MEDIA_KEY) or url
+        version = get_field(medium, self.MODIFICATION_TIMESTAMP)
+        return str(key), url, str(version) if version is not None else None
+
+    async def _guarded_fetch(
+        self,
+        key: str,
+        url: str,
+        version: Optional[str],
+        record: Optional[MediaRecord],
+    ) -> MediaResult:
+        async with self._slots:
+            try:
+                return await self._fetch(key, url, version, record)
+            except (httpx.HTTPError, OSError) as e:
+                self.stats["failed"] += 1
+                logger.warning(f"Media {key} ({url}) failed: {e}")
+                return MediaResult(key, url, FAILED, error=str(e))
+
+    async def _fetch(
+        self,
+        key: str,
+        url: str,
+        version: Optional[str],
+        record: Optional[MediaRecord],
+    ) -> MediaResult:
+        headers = {}
+        if record is not None and record.digest is not None:
+            if record.etag:
+                headers["If-None-Match"] = record.etag
+            if record.last_modified:
+                headers["If-Modified-Since"] = record.last_modified
+
+        response = await self._open(url, headers)
+        try:
+            if response.status_code == 304:
+                self.stats["not_modified"] += 1
+                current = await asyncio.to_thread(
+                    self.store.revalidated, key, url, version
+                )
+                if current is not None and current.digest is not None:
+                    return MediaResult(
+                        key, url, UNCHANGED, current.digest, current.size
+                    )
+                # Evicted between the lookup and the 304; fetch it whole
+                await response.aclose()
+                response = await self._open(url, {})
+
+            blob = await asyncio.to_thread(self.store.writer)
+            try:
+                buffer = bytearray()
+                async for chunk in response.aiter_bytes():
+                    buffer += chunk
+                    if len(buffer) >= self.WRITE_BUFFER_BYTES:
+                        data, buffer = buffer, bytearray()
+                        await asyncio.to_thread(blob.write, data)
+                if buffer:
+                    await asyncio.to_thread(blob.write, buffer)
+            except BaseException:
+                blob.abort()
+                raise
+        finally:
+            await response.aclose()
+
+        self.stats["downloaded_bytes"] += blob.size
+        stored = await asyncio.to_thread(
+            self.store.commit,
+            blob,
+            key,
+            url,
+            response.headers.get("ETag"),
+            response.headers.get("Last-Modified"),
+            version,
+        )
+        if stored:
+            self.stats["stored_bytes"] += blob.size
+        else:
+            self.stats["deduplicated"] += 1
+
+        if record is None or record.digest is None:
+            status = NEW
+        elif record.digest == blob.digest:
+            status = UNCHANGED
+        else:
+            status = CHANGED
+        return MediaResult(key, url, status, blob.digest, blob.size, blob.size)
+
+    async def _open(self, url: str, headers: Dict[str, str]) -> httpx.Response:
+        """
+        Sends a GET and returns the response (2xx or 304) with its body not
+        yet read, retrying 429, 5xx and transport errors with backoff.
+        """
+        attempt = 0
+        while True:
+            request = self.client.build_request("GET", url, headers=headers)
+            self.stats["requests"] += 1
+            try:
+                response = await self.client.send(request, stream=True)
+            except httpx.TransportError:
+                if attempt == self.max_retries:
+                    raise
+                await asyncio.sleep(self._backoff(attempt))
+                attempt += 1
+                continue
+
+            if response.status_code not in self.RETRYABLE_STATUSES:
+                if response.is_error:
+                    await response.aclose()
+                    response.raise_for_status()
+                return response
+
+            await response.aclose()
+            if attempt == self.max_retries:
+                response.raise_for_status()
+            retry_after = parse_retry_after(response.headers.get("Retry-After"))
+            await asyncio.sleep(
+                retry_after if retry_after is not None else self._backoff(attempt)
+            )
+            attempt += 1
+
+    def _backoff(self, attempt: int) -> float:
+        """Exponential backoff with full jitter."""
+        return random.uniform(0, min(self.BACKOFF_MAX, self.BACKOFF_BASE * 2**attempt))
+
+
+__all__ = [
+    "NEW",
+    "CHANGED",
+    "UNCHANGED",
+    "SKIPPED",
+    "FAILED",
+    "MediaRecord",
+    "MediaResult",
+    "BlobWriter",
+    "MediaStore",
+    "MediaPipeline",
+]
@@ -0,0 +1,21 @@
+"""
+Field access shared by the property-management indexes and engines.
+
+Buildium entities reach them either as pydantic models or as raw API dicts.
+"""
+
+from typing import Any
+
+
+def get_field(entity: Any, name: str) -> Any:
+    """Reads a field from a pydantic model or a raw API dict."""
+    if isinstance(entity, dict):
+        return entity.get(name)
+    return getattr(entity, name, None)
+
+
+def get_id(entity: Any) -> Any:
+    """Reads an entity's id, which Buildium spells "Id" on most resources and
+    "id" on some (e.g. GL accounts and tenants); None if it has neither."""
+    value = get_field(entity, "Id")
+    return get_field(entity, "id") if value is None else value
@@ -0,0 +1,29 @@
+"""
+Accounting models for the Buildium property management API.
+"""
+
+from .models import (
+    GLAccount,
+    CheckPrintingInfo,
+    ElectronicPayment,
+    BankAccount,
+    AccountingEntityUnit,
+    AccountingEntity,
+    BillMarkup,
+    BillLineItems,
+    Bill,
+    BillPayments,
+)
+
+__all__ = [
+    "GLAccount",
+    "CheckPrintingInfo",
+    "ElectronicPayment",
+    "BankAccount",
+    "AccountingEntityUnit",
+    "AccountingEntity",
+    "BillMarkup",
+    "BillLineItems",
+    "Bill",
+    "BillPayments",
+]
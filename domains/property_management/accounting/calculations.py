@@ -0,0 +1,383 @@
+"""
+Monthly NOI and balance-sheet calculations over the columnar ledger.
+
+The GL account hierarchy is flattened once into lookup arrays (category,
+contra sign, root account); property x month x category totals are then
+computed in one vectorized pass and kept up to date cell by cell.
+"""
+
+from datetime import date
+from typing import (
+    TYPE_CHECKING,
+    Any,
+    Dict,
+    Iterable,
+    List,
+    NamedTuple,
+    Optional,
+    Sequence,
+    Set,
+    Tuple,
+    Union,
+)
+
+import numpy as np
+
+from domains.property_management._fields import get_field, get_id
+from domains.property_management.accounting.ledger import Ledger
+
+if TYPE_CHECKING:
+    from domains.property_management.accounting import GLAccount
+    from domains.property_management.rentals import Transaction
+
+# Category codes, in the order of the totals' last axis
+INCOME, EXPENSE, ASSET, LIABILITY, EQUITY, OTHER = range(6)
+CATEGORIES = ("income", "expense", "asset", "liability", "equity", "other")
+_CATEGORY_BY_TYPE = {
+    "income": INCOME,
+    "revenue": INCOME,
+    "expense": EXPENSE,
+    "asset": ASSET,
+    "liability": LIABILITY,
+    "equity": EQUITY,
+}
+# Categories reported as running balances rather than monthly flows
+BALANCE_CATEGORIES = (ASSET, LIABILITY, EQUITY)
+
+MonthLike = Union[str, date, np.datetime64]
+
+
+class GLRollup:
+    """Flattened GL account hierarchy as sorted lookup arrays.
+
+    Every account, including nested `SubAccounts`, maps to its category
+    (inherited from the nearest ancestor with a Type), a sign (-1 for
+    contra accounts) and its top-level root account.
+    """
+
+    def __init__(
+        self,
+        ids: np.ndarray,
+        categories: np.ndarray,
+        signs: np.ndarray,
+        roots: np.ndarray,
+        non_operating: np.ndarray,
+    ):
+        self.ids = ids
+        self.categories = categories
+        self.signs = signs
+        self.roots = roots
+        self.non_operating = non_operating
+
+    @classmethod
+    def from_accounts(
+        cls,
+        accounts: Iterable["GLAccount"],
+        non_operating_subtypes: Iterable[str] = (),
+    ) -> "GLRollup":
+        """Builds the rollup from GLAccount models (or raw API dicts).
+
+        Args:
+            accounts: GL accounts; nested `SubAccounts` entries carrying their
+                own fields are included, parent links use `ParentGLAccountId`.
+            non_operating_subtypes: Expense SubTypes left out of NOI (e.g.
+                mortgage interest or depreciation).
+        """
+        non_operating_subtypes = {s.lower() for s in non_operating_subtypes}
+        by_id: Dict[int, Dict[str, Any]] = {}
+        stack: List[Tuple[Any, Optional[int]]] = [(a, None) for a in accounts]
+        while stack:
+            account, parent_id = stack.pop()
+            account_id = get_id(account)
+            if account_id is None:
+                continue
+            account_id = int(account_id)
+            parent = get_field(account, "ParentGLAccountId") or parent_id
+            by_id[account_id] = {
+                "parent": int(parent) if parent else None,
+                "type": (get_field(account, "Type") or "").lower(),
+                "subtype": (get_field(account, "SubType") or "").lower(),
+                "contra": bool(get_field(account, "IsContraAccount")),
+            }
+            for sub in get_field(account, "SubAccounts") or ():
+                # Entries that are only references are covered by their own
+                # top-level account and its ParentGLAccountId
+                if isinstance(sub, dict) and "Type" not in sub:
+                    continue
+                stack.append((sub, account_id))
+
+        ids = np.array(sorted(by_id), dtype=np.int64)
+        categories = np.empty(len(ids), dtype=np.int8)
+        signs = np.empty(len(ids), dtype=np.int8)
+        roots = np.empty(len(ids), dtype=np.int64)
+        non_operating = np.zeros(len(ids), dtype=bool)
+        for index, account_id in enumerate(ids.tolist()):
+            info = by_id[account_id]
+            category, root, seen = None, account_id, {account_id}
+            node = info
+            while True:
+                if category is None and node["type"] in _CATEGORY_BY_TYPE:
+                    category = _CATEGORY_BY_TYPE[node["type"]]
+                parent = node["parent"]
+                if parent is None or parent not in by_id or parent in seen:
+                    break
+                seen.add(parent)
+                root, node = parent, by_id[parent]
+            categories[index] = OTHER if category is None else category
+            signs[index] = -1 if info["contra"] else 1
+            roots[index] = root
+            non_operating[index] = info["subtype"] in non_operating_subtypes
+        return cls(ids, categories, signs, roots, non_operating)
+
+    def lookup(self, gl_account_ids: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        """Maps GL account ids to (category, sign) arrays; unknown ids are OTHER.
+
+        Non-operating expenses are reported as OTHER so they stay out of NOI.
+        """
+        if not len(self.ids):
+            return (
+                np.full(len(gl_account_ids), OTHER, dtype=np.int8),
+                np.ones(len(gl_account_ids), dtype=np.int8),
+            )
+        index = np.searchsorted(self.ids, gl_account_ids)
+        index = np.minimum(index, len(self.ids) - 1)
+        known = self.ids[index] == gl_account_ids
+        categories = np.where(
+            known & ~self.non_operating[index], self.categories[index], OTHER
+        )
+        signs = np.where(known, self.signs[index], 1)
+        return categories.astype(np.int8), signs.astype(np.int8)
+
+
+class PropertyMonth(NamedTuple):
+    property_id: int
+    month: str  # "YYYY-MM"
+    income: float
+    expense: float
+    noi: float
+    assets: float
+    liabilities: float
+    equity: float
+
+
+class FinancialsEngine:
+    """Per property and month: income, expense, NOI and balance-sheet totals.
+
+    `compute` fills a (property, month, category) array of monthly flows
+    from the ledger in one pass; balance-sheet totals are opening balances
+    plus running sums of those flows. `update` applies re-synced
+    transactions and recomputes only the property-month cells they touch.
+    """
+
+    def __init__(self, ledger: Ledger, rollup: GLRollup):
+        self.ledger = ledger
+        self.rollup = rollup
+        self.property_ids = np.zeros(0, dtype=np.int64)
+        self.months = np.zeros(0, dtype="datetime64[M]")
+        self.flows = np.zeros((0, 0, len(CATEGORIES)))  # Currency units
+        self.opening = np.zeros((0, len(CATEGORIES)))  # Balances before months[0]
+
+    # --- Computation ---
+
+    def compute(
+        self,
+        start: MonthLike,
+        end: MonthLike,
+        property_ids: Optional[Sequence[int]] = None,
+    ) -> None:
+        """Computes every cell for months `start`..`end` (inclusive).
+
+        Args:
+            start: First month, e.g. "2025-01".
+            end: Last month, e.g. "2025-12".
+            property_ids: Properties to report; defaults to every property
+                in the ledger.
+        """
+        first = np.datetime64(start, "M")
+        self.months = np.arange(first, np.datetime64(end, "M") + 1)
+        if property_ids is None:
+            live = self.ledger.column("live")
+            property_ids = np.unique(self.ledger.column("property_id")[live])
+        self.property_ids = np.unique(np.asarray(property_ids, dtype=np.int64))
+
+        self.flows = self._aggregate(np.flatnonzero(self.ledger.column("live")))
+        self.opening = self._opening_balances(first)
+
+    def _aggregate(
+        self, rows: np.ndarray, cells: Optional[np.ndarray] = None
+    ) -> np.ndarray:
+        """Sums `rows` into a flows array, optionally only into `cells`.
+
+        Args:
+            rows: Ledger row indexes to aggregate.
+            cells: Flat (property index * months + month index) ids to keep;
+                rows outside these cells are ignored.
+        """
+        n_properties, n_months = len(self.property_ids), len(self.months)
+        shape = (n_properties, n_months, len(CATEGORIES))
+        if not n_properties or not n_months or not len(rows):
+            return np.zeros(shape)
+
+        property_index, month_index, in_range = self._locate(rows)
+        rows = rows[in_range]
+        cell = property_index[in_range] * n_months + month_index[in_range]
+        if cells is not None:
+            keep = np.isin(cell, cells)
+            rows, cell = rows[keep], cell[keep]
+
+        categories, signs = self.rollup.lookup(
+            self.ledger.column("gl_account_id")[rows]
+        )
+        amounts = self.ledger.column("amount_cents")[rows] * signs
+        totals = np.bincount(
+            cell * len(CATEGORIES) + categories,
+            weights=amounts,
+            minlength=n_properties * n_months * len(CATEGORIES),
+        )
+        return totals.reshape(shape) / 100
+
+    def _locate(self, rows: np.ndarray) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """Maps ledger rows to (property index, month index, in-range mask)."""
+        properties = self.ledger.column("property_id")[rows]
+        property_index = np.searchsorted(self.property_ids, properties)
+        property_index = np.minimum(property_index, len(self.property_ids) - 1)
+        months = self.ledger.column("date")[rows].astype("datetime64[M]")
+        month_index = (months - self.months[0]).astype(np.int64)
+        in_range = (
+            (self.property_ids[property_index] == properties)
+            & (month_index >= 0)
+            & (month_index < len(self.months))
+        )
+        return property_index, month_index, in_range
+
+    def _opening_balances(self, first: np.datetime64) -> np.ndarray:
+        """Balance-sheet totals per property from all lines before `first`."""
+        opening = np.zeros((len(self.property_ids), len(CATEGORIES)))
+        if not len(self.property_ids):
+            return opening
+        mask = self.ledger.mask(end=first - np.timedelta64(1, "D"))
+        rows = np.flatnonzero(mask)
+        properties = self.ledger.column("property_id")[rows]
+        index = np.minimum(
+            np.searchsorted(self.property_ids, properties), len(self.property_ids) - 1
+        )
+        known = self.property_ids[index] == properties
+        rows, index = rows[known], index[known]
+        categories, signs = self.rollup.lookup(
+            self.ledger.column("gl_account_id")[rows]
+        )
+        totals = np.bincount(
+            index * len(CATEGORIES) + categories,
+            weights=self.ledger.column("amount_cents")[rows] * signs,
+            minlength=opening.size,
+        )
+        return totals.reshape(opening.shape) / 100
+
+    # --- Incremental updates ---
+
+    def update(self, transactions: Sequence["Transaction"]) -> int:
+        """Applies re-synced transactions to the ledger and the computed cells.
+
+        Only the property-month cells holding the transactions' old or new
+        lines are re-aggregated; balance-sheet running totals follow from
+        the updated flows. Lines outside the computed properties and months
+        are written to the ledger but not reported until the next `compute`.
+
+        Returns:
+            The number of cells recomputed.
+        """
+        ids = [int(get_field(transaction, "Id")) for transaction in transactions]
+        old_rows = self.ledger.rows_of(ids)
+        old_cells = self._cells(old_rows)
+        old_before = self._rows_before_range(old_rows)
+
+        self.ledger.upsert(transactions)
+        new_rows = self.ledger.rows_of(ids)
+        cells = np.union1d(old_cells, self._cells(new_rows))
+
+        if len(old_before) or len(self._rows_before_range(new_rows)):
+            # History before the first month changed: opening balances move too
+            self.opening = self._opening_balances(self.months[0])
+        if not len(cells):
+            return 0
+
+        # Re-aggregate every live row of the affected cells
+        n_months = len(self.months)
+        affected_properties = self.property_ids[np.unique(cells // n_months)]
+        months = self.months[np.unique(cells % n_months)]
+        mask = self.ledger.mask(
+            months.min().astype("datetime64[D]"),
+            (months.max() + 1).astype("datetime64[D]") - np.timedelta64(1, "D"),
+            property_ids=affected_properties,
+        )
+        fresh = self._aggregate(np.flatnonzero(mask), cells)
+        property_index, month_index = np.divmod(cells, n_months)
+        self.flows[property_index, month_index] = fresh[property_index, month_index]
+        return len(cells)
+
+    def _cells(self, rows: np.ndarray) -> np.ndarray:
+        """Flat cell ids (property index * months + month index) of rows."""
+        if not len(rows) or not len(self.property_ids) or not len(self.months):
+            return np.zeros(0, dtype=np.int64)
+        property_index, month_index, in_range = self._locate(rows)
+        return np.unique(
+            property_index[in_range] * len(self.months) + month_index[in_range]
+        )
+
+    def _rows_before_range(self, rows: np.ndarray) -> np.ndarray:
+        if not len(rows) or not len(self.months):
+            return rows[:0]
+        dates = self.ledger.column("date")[rows]
+        return rows[dates < self.months[0].astype("datetime64[D]")]
+
+    # --- Results ---
+
+    @property
+    def income(self) -> np.ndarray:
+        """(property, month) income."""
+        return self.flows[:, :, INCOME]
+
+    @property
+    def expense(self) -> np.ndarray:
+        """(property, month) operating expenses."""
+        return self.flows[:, :, EXPENSE]
+
+    @property
+    def noi(self) -> np.ndarray:
+        """(property, month) net operating income: income - operating expenses."""
+        return self.income - self.expense
+
+    @property
+    def balances(self) -> np.ndarray:
+        """(property, month, category) month-end balances (balance categories)."""
+        return self.opening[:, None, :] + np.cumsum(self.flows, axis=1)
+
+    def records(self) -> List[PropertyMonth]:
+        """One row per property and month, e.g. for the Airtable NOI table."""
+        balances = self.balances
+        noi = self.noi
+        months = [str(month) for month in self.months]
+        rows = []
+        for p, property_id in enumerate(self.property_ids.tolist()):
+            for m, month in enumerate(months):
+                rows.append(
+                    PropertyMonth(
+                        property_id,
+                        month,
+                        round(float(self.flows[p, m, INCOME]), 2),
+                        round(float(self.flows[p, m, EXPENSE]), 2),
+                        round(float(noi[p, m]), 2),
+                        round(float(balances[p, m, ASSET]), 2),
+                        round(float(balances[p, m, LIABILITY]), 2),
+                        round(float(balances[p, m, EQUITY]), 2),
+                    )
+                )
+        return rows
+
+
+__all__ = [
+    "CATEGORIES",
+    "FinancialsEngine",
+    "GLRollup",
+    "PropertyMonth",
+]
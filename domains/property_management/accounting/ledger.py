@@ -0,0 +1,365 @@
+"""
+Columnar ledger of Buildium transaction journal lines for analytics.
+
+Each journal line becomes one row across NumPy column arrays (amounts in
+cents, dates, property/unit/GL account ids) with dictionary-encoded strings,
+so group-by sums and date filters run vectorized instead of over objects.
+"""
+
+import sys
+from datetime import date, datetime
+from typing import (
+    TYPE_CHECKING,
+    Any,
+    Dict,
+    Iterable,
+    List,
+    NamedTuple,
+    Optional,
+    Sequence,
+    Tuple,
+    Union,
+)
+
+import numpy as np
+
+from domains.property_management._fields import get_field, get_id
+
+if TYPE_CHECKING:
+    from domains.property_management.rentals import Transaction
+
+# Stands in for a missing id (e.g. a line with no unit) in integer columns
+NULL_ID = -1
+
+DateLike = Union[date, datetime, str, np.datetime64]
+
+
+class StringDictionary:
+    """Dictionary encoding for a low-cardinality string column.
+
+    Each distinct string gets a small integer code; code 0 is None.
+    """
+
+    __slots__ = ("values", "_codes")
+
+    def __init__(self):
+        self.values: List[Optional[str]] = [None]
+        self._codes: Dict[Optional[str], int] = {None: 0}
+
+    def encode(self, value: Optional[str]) -> int:
+        code = self._codes.get(value)
+        if code is None:
+            code = self._codes[value] = len(self.values)
+            self.values.append(value)
+        return code
+
+    def code(self, value: Optional[str]) -> int:
+        """Returns the code of `value`, or -1 if it never occurred."""
+        return self._codes.get(value, -1)
+
+    def decode(self, codes: np.ndarray) -> List[Optional[str]]:
+        return [self.values[code] for code in codes.tolist()]
+
+    def __len__(self) -> int:
+        return len(self.values)
+
+
+class GroupSums(NamedTuple):
+    """Result of a group-by: one array per key column plus summed amounts."""
+
+    keys: Dict[str, np.ndarray]
+    amounts: np.ndarray  # In currency units, aligned with the key arrays
+
+    def to_dict(self) -> Dict[Any, float]:
+        """Maps each group key (a scalar, or a tuple for several keys) to its sum."""
+        columns = [values.tolist() for values in self.keys.values()]
+        keys = columns[0] if len(columns) == 1 else list(zip(*columns))
+        return dict(zip(keys, self.amounts.tolist()))
+
+
+class Ledger:
+    """Columnar store of transaction journal lines.
+
+    Columns grow by doubling, so appending a synced page is amortized
+    O(rows). Re-synced transactions are updated by tombstoning their old
+    rows and appending the new ones; `compact` reclaims tombstoned rows and
+    runs automatically once they make up a quarter of the store.
+    """
+
+    # Integer columns, all int64 so ids never overflow
+    ID_COLUMNS = (
+        "transaction_id",
+        "lease_id",
+        "property_id",
+        "unit_id",
+        "gl_account_id",
+    )
+    # String columns, dictionary-encoded into int32 codes
+    STRING_COLUMNS = ("transaction_type", "payment_method", "memo")
+
+    def __init__(self, capacity: int = 1024):
+        """
+        Args:
+            capacity: Rows preallocated before the first resize.
+        """
+        self._size = 0
+        self._live_rows = 0
+        self._columns: Dict[str, np.ndarray] = {
+            "amount_cents": np.zeros(capacity, dtype=np.int64),
+            "date": np.zeros(capacity, dtype="datetime64[D]"),
+            "is_cash": np.zeros(capacity, dtype=bool),
+            "live": np.zeros(capacity, dtype=bool),
+        }
+        for name in self.ID_COLUMNS:
+            self._columns[name] = np.full(capacity, NULL_ID, dtype=np.int64)
+        self.dictionaries: Dict[str, StringDictionary] = {}
+        for name in self.STRING_COLUMNS:
+            self._columns[name] = np.zeros(capacity, dtype=np.int32)
+            self.dictionaries[name] = StringDictionary()
+        # transaction id -> its lines' contiguous rows, packed as start << 16 | count
+        self._rows: Dict[int, int] = {}
+
+    @classmethod
+    def from_transactions(cls, transactions: Iterable["Transaction"]) -> "Ledger":
+        """Builds a ledger from Transaction models (or raw API dicts)."""
+        ledger = cls()
+        ledger.upsert(transactions)
+        return ledger
+
+    # --- Writes ---
+
+    def upsert(self, transactions: Iterable["Transaction"]) -> int:
+        """Appends transactions, replacing the lines of any already stored.
+
+        Args:
+            transactions: Transaction models or raw API dicts with `Journal.Lines`.
+
+        Returns:
+            The number of journal lines written.
+        """
+        rows: Dict[str, list] = {name: [] for name in self._columns if name != "live"}
+        line_counts: List[Tuple[int, int]] = []
+
+        for transaction in transactions:
+            transaction_id = int(get_field(transaction, "Id"))
+            when = get_field(transaction, "Date")
+            day = np.datetime64(
+                when.date() if isinstance(when, datetime) else when, "D"
+            )
+            lease_id = get_field(transaction, "LeaseId")
+            journal = get_field(transaction, "Journal")
+            lines = (get_field(journal, "Lines") if journal is not None else None) or ()
+
+            strings = {
+                "transaction_type": get_field(transaction, "TransactionTypeEnum"),
+                "payment_method": get_field(transaction, "PaymentMethod"),
+            }
+            for line in lines:
+                gl_account = get_field(line, "GLAccount")
+                gl_account_id = get_id(gl_account) if gl_account else None
+                unit_id = get_field(line, "UnitId")
+                rows["transaction_id"].append(transaction_id)
+                rows["lease_id"].append(NULL_ID if lease_id is None else lease_id)
+                rows["property_id"].append(get_field(line, "PropertyId"))
+                rows["unit_id"].append(NULL_ID if unit_id is None else unit_id)
+                rows["gl_account_id"].append(
+                    NULL_ID if gl_account_id is None else gl_account_id
+                )
+                rows["amount_cents"].append(round(get_field(line, "Amount") * 100))
+                rows["date"].append(day)
+                rows["is_cash"].append(bool(get_field(line, "IsCashPosting")))
+                for name, value in strings.items():
+                    rows[name].append(self.dictionaries[name].encode(value))
+                rows["memo"].append(
+                    self.dictionaries["memo"].encode(get_field(line, "Memo"))
+                )
+            line_counts.append((transaction_id, len(lines)))
+
+        count = len(rows["transaction_id"])
+        start = self._size
+        self._reserve(start + count)
+        for name, values in rows.items():
+            column = self._columns[name]
+            column[start : start + count] = np.asarray(values, dtype=column.dtype)
+        self._columns["live"][start : start + count] = True
+        self._size += count
+        self._live_rows += count
+
+        offset = start
+        for transaction_id, lines in line_counts:
+            # Also drops an earlier copy of the transaction in this same batch
+            self._tombstone(transaction_id)
+            self._rows[transaction_id] = (offset << 16) | lines
+            offset += lines
+
+        if self._size - self._live_rows > self._size // 4:
+            self.compact()
+        return count
+
+    def remove(self, transaction_ids: Iterable[int]) -> None:
+        """Drops transactions, e.g. after they were deleted in Buildium."""
+        for transaction_id in transaction_ids:
+            self._tombstone(int(transaction_id))
+
+    def _tombstone(self, transaction_id: int) -> None:
+        packed = self._rows.pop(transaction_id, None)
+        if packed:
+            start, count = packed >> 16, packed & 0xFFFF
+            self._columns["live"][start : start + count] = False
+            self._live_rows -= count
+
+    def _reserve(self, size: int) -> None:
+        capacity = len(self._columns["live"])
+        if size <= capacity:
+            return
+        while capacity < size:
+            capacity *= 2
+        for name, column in self._columns.items():
+            grown = np.full(
+                capacity, NULL_ID if name in self.ID_COLUMNS else 0, dtype=column.dtype
+            )
+            grown[: self._size] = column[: self._size]
+            self._columns[name] = grown
+
+    def compact(self) -> None:
+        """Removes tombstoned rows and renumbers the remaining ones."""
+        live = self._columns["live"][: self._size]
+        keep = np.flatnonzero(live)
+        # Rows keep their order, so each transaction's lines stay contiguous
+        new_start = np.cumsum(live) - 1
+        for column in self._columns.values():
+            column[: len(keep)] = column[keep]
+        self._rows = {
+            transaction_id: (
+                (int(new_start[packed >> 16]) << 16) | (packed & 0xFFFF)
+                if packed & 0xFFFF
+                else 0
+            )
+            for transaction_id, packed in self._rows.items()
+        }
+        self._size = len(keep)
+        self._columns["live"][self._size :] = False
+
+    # --- Reads ---
+
+    def column(self, name: str) -> np.ndarray:
+        """Returns a read-only view of a column over live and dead rows."""
+        view = self._columns[name][: self._size]
+        view.flags.writeable = False
+        return view
+
+    def rows_of(self, transaction_ids: Iterable[int]) -> np.ndarray:
+        """Returns the live row indexes of the given transactions' lines."""
+        ranges = []
+        for transaction_id in transaction_ids:
+            packed = self._rows.get(int(transaction_id))
+            if packed:
+                start = packed >> 16
+                ranges.append(np.arange(start, start + (packed & 0xFFFF)))
+        return np.concatenate(ranges) if ranges else np.zeros(0, dtype=np.int64)
+
+    def mask(
+        self,
+        start: Optional[DateLike] = None,
+        end: Optional[DateLike] = None,
+        *,
+        property_ids: Optional[Sequence[int]] = None,
+        gl_account_ids: Optional[Sequence[int]] = None,
+        transaction_types: Optional[Sequence[str]] = None,
+        cash_only: bool = False,
+    ) -> np.ndarray:
+        """Builds a boolean row filter over live rows.
+
+        Args:
+            start: First included date.
+            end: Last included date (inclusive).
+            property_ids: Only rows of these properties.
+            gl_account_ids: Only rows posted to these GL accounts.
+            transaction_types: Only these `TransactionTypeEnum` values.
+            cash_only: Only cash postings.
+
+        Returns:
+            A boolean array with one entry per stored row.
+        """
+        size = self._size
+        result = self._columns["live"][:size].copy()
+        dates = self._columns["date"][:size]
+        if start is not None:
+            result &= dates >= np.datetime64(start, "D")
+        if end is not None:
+            result &= dates <= np.datetime64(end, "D")
+        if property_ids is not None:
+            result &= np.isin(self._columns["property_id"][:size], property_ids)
+        if gl_account_ids is not None:
+            result &= np.isin(self._columns["gl_account_id"][:size], gl_account_ids)
+        if transaction_types is not None:
+            codes = [
+                self.dictionaries["transaction_type"].code(t) for t in transaction_types
+            ]
+            result &= np.isin(self._columns["transaction_type"][:size], codes)
+        if cash_only:
+            result &= self._columns["is_cash"][:size]
+        return result
+
+    def sum_by(
+        self, keys: Union[str, Sequence[str]], mask: Optional[np.ndarray] = None
+    ) -> GroupSums:
+        """Sums amounts grouped by one or more columns.
+
+        Args:
+            keys: Column name(s), e.g. ("property_id", "gl_account_id").
+                String columns are grouped by code and decoded in the result.
+            mask: Row filter from `mask`; defaults to every live row.
+
+        Returns:
+            The distinct key combinations and their summed amounts.
+        """
+        keys = (keys,) if isinstance(keys, str) else tuple(keys)
+        rows = self._columns["live"][: self._size] if mask is None else mask
+        amounts = self._columns["amount_cents"][: self._size][rows]
+
+        # Densify each key, then combine them into one mixed-radix group code
+        combined = np.zeros(len(amounts), dtype=np.int64)
+        uniques = []
+        for name in keys:
+            values, inverse = np.unique(
+                self._columns[name][: self._size][rows], return_inverse=True
+            )
+            uniques.append(values)
+            combined = combined * len(values) + inverse
+        groups, group_index = np.unique(combined, return_inverse=True)
+        sums = np.bincount(group_index, weights=amounts, minlength=len(groups))
+
+        result: Dict[str, Any] = {}
+        for name, values in reversed(list(zip(keys, uniques))):
+            groups, digit = np.divmod(groups, len(values))
+            result[name] = values[digit]
+        result = {name: result[name] for name in keys}
+        for name in keys:
+            if name in self.dictionaries:
+                result[name] = np.array(
+                    self.dictionaries[name].decode(result[name]), dtype=object
+                )
+        return GroupSums(result, np.round(sums) / 100)
+
+    def total(self, mask: Optional[np.ndarray] = None) -> float:
+        """Sums the amounts of the selected (default: all live) rows."""
+        rows = self._columns["live"][: self._size] if mask is None else mask
+        return int(self._columns["amount_cents"][: self._size][rows].sum()) / 100
+
+    def __len__(self) -> int:
+        """The number of live journal lines."""
+        return self._live_rows
+
+    @property
+    def transaction_count(self) -> int:
+        return len(self._rows)
+
+    @property
+    def nbytes(self) -> int:
+        """Approximate memory used by the column arrays and row index."""
+        columns = sum(column.nbytes for column in self._columns.values())
+        return columns + sys.getsizeof(self._rows) + 32 * len(self._rows)
+
+
+__all__ = ["GroupSums", "Ledger", "NULL_ID", "StringDictionary"]
@@ -0,0 +1,310 @@
+"""
+Address index for spotting which Property or Unit an email refers to.
+
+Street addresses are normalized into (house number, street name) keys at
+build time, so a message is matched with one token scan and dict probes,
+independent of how many properties are indexed.
+"""
+
+import re
+from typing import Dict, Iterable, List, NamedTuple, Optional, Set, Tuple
+
+from domains.property_management._fields import get_field
+
+_TOKEN_RE = re.compile(r"#|[a-z0-9]+")
+
+# USPS-style abbreviations applied to both indexed addresses and email text
+_ABBREVIATIONS = {
+    "street": "st",
+    "avenue": "ave",
+    "av": "ave",
+    "road": "rd",
+    "drive": "dr",
+    "boulevard": "blvd",
+    "lane": "ln",
+    "court": "ct",
+    "place": "pl",
+    "terrace": "ter",
+    "parkway": "pkwy",
+    "highway": "hwy",
+    "circle": "cir",
+    "square": "sq",
+    "north": "n",
+    "south": "s",
+    "east": "e",
+    "west": "w",
+    "northeast": "ne",
+    "northwest": "nw",
+    "southeast": "se",
+    "southwest": "sw",
+    "first": "1st",
+    "second": "2nd",
+    "third": "3rd",
+    "fourth": "4th",
+    "fifth": "5th",
+    "apartment": "apt",
+    "suite": "ste",
+}
+STREET_SUFFIXES = frozenset(
+    {"st", "ave", "rd", "dr", "blvd", "ln", "ct", "pl", "ter", "pkwy", "hwy"}
+    | {"cir", "sq", "way"}
+)
+UNIT_MARKERS = frozenset({"unit", "apt", "ste", "#", "no"})
+# Markers that are also common words ("No Name Rd") count only before a number
+_NUMBERED_MARKERS = frozenset({"no"})
+
+# Score contributions, normalized by their sum into a 0..1 score
+STREET_SCORE = 3.0
+SUFFIX_SCORE = 0.5
+POSTAL_SCORE = 1.0
+CITY_SCORE = 0.5
+UNIT_SCORE = 2.0
+_MAX_SCORE = STREET_SCORE + SUFFIX_SCORE + POSTAL_SCORE + CITY_SCORE + UNIT_SCORE
+
+# A postal code alone only yields candidates when its bucket is this small
+MAX_POSTAL_ONLY_CANDIDATES = 5
+
+
+class AddressMatch(NamedTuple):
+    property_id: int
+    unit_id: Optional[int]
+    score: float
+
+
+class _Street:
+    """An indexed street address (everything after the house number)."""
+
+    __slots__ = ("name", "suffix", "property_id", "unit_id")
+
+    def __init__(
+        self,
+        name: Tuple[str, ...],
+        suffix: Optional[str],
+        property_id: int,
+        unit_id: Optional[int],
+    ):
+        self.name = name
+        self.suffix = suffix
+        self.property_id = property_id
+        self.unit_id = unit_id
+
+
+def normalize_tokens(text: str) -> List[str]:
+    """Lowercases and tokenizes text, applying street abbreviations."""
+    return [_ABBREVIATIONS.get(t, t) for t in _TOKEN_RE.findall(text.lower())]
+
+
+def normalize_unit(unit_number: str) -> str:
+    """Normalizes a unit number ("Apt. #4-B" -> "4b")."""
+    tokens = normalize_tokens(unit_number)
+    return "".join(
+        token
+        for position, token in enumerate(tokens)
+        if not _is_unit_marker(tokens, position)
+    )
+
+
+class AddressIndex:
+    """Index of Property and Unit addresses for free-text matching.
+
+    - Streets are keyed by house number; each number holds the few streets
+      sharing it, compared token-by-token after the number.
+    - Postal codes bucket properties, boosting street matches and, for
+      small buckets, suggesting candidates on their own.
+    - Unit numbers are indexed per property and attributed when a unit
+      mention ("Unit 4B", "Apt #12") follows in the same message.
+    """
+
+    def __init__(self):
+        self._streets: Dict[str, List[_Street]] = {}
+        self._postal: Dict[str, Set[int]] = {}
+        self._property_postal: Dict[int, str] = {}
+        self._property_city: Dict[int, Tuple[str, ...]] = {}
+        self._units: Dict[int, Dict[str, int]] = {}
+
+    @classmethod
+    def build(
+        cls, properties: Iterable[object], units: Iterable[object] = ()
+    ) -> "AddressIndex":
+        """Builds an index from Property and Unit models (or raw API dicts).
+
+        Args:
+            properties: Buildium rental properties.
+            units: Buildium rental units; their own address is indexed too
+                when it differs from the property's (e.g. separate buildings).
+
+        Returns:
+            A populated AddressIndex.
+        """
+        index = cls()
+        for prop in properties:
+            index.add_property(prop)
+        for unit in units:
+            index.add_unit(unit)
+        return index
+
+    def add_property(self, prop: object) -> None:
+        """Indexes one property's address."""
+        property_id = int(get_field(prop, "Id"))
+        address = get_field(prop, "Address")
+        if address is None:
+            return
+        self._add_street(get_field(address, "AddressLine1") or "", property_id, None)
+
+        postal = _postal_code(get_field(address, "PostalCode") or "")
+        if postal:
+            self._postal.setdefault(postal, set()).add(property_id)
+            self._property_postal[property_id] = postal
+        city = tuple(normalize_tokens(get_field(address, "City") or ""))
+        if city:
+            self._property_city[property_id] = city
+
+    def add_unit(self, unit: object) -> None:
+        """Indexes one unit's number and, if distinct, its street address."""
+        unit_id = int(get_field(unit, "Id"))
+        property_id = int(get_field(unit, "PropertyId"))
+        number = normalize_unit(get_field(unit, "UnitNumber") or "")
+        if number:
+            self._units.setdefault(property_id, {})[number] = unit_id
+
+        address = get_field(unit, "Address")
+        line1 = get_field(address, "AddressLine1") if address is not None else None
+        if line1:
+            self._add_street(line1, property_id, unit_id)
+
+    def _add_street(self, line: str, property_id: int, unit_id: Optional[int]):
+        tokens = normalize_tokens(line)
+        if len(tokens) < 2 or not tokens[0][0].isdigit():
+            return
+        house, name = tokens[0], tokens[1:]
+        # Drop anything after an inline unit marker ("12 Oak St Apt 3")
+        for position in range(len(name)):
+            if _is_unit_marker(name, position):
+                name = name[:position]
+                break
+        suffix = name[-1] if len(name) > 1 and name[-1] in STREET_SUFFIXES else None
+        if suffix:
+            name = name[:-1]
+        if not name:
+            return
+
+        streets = self._streets.setdefault(house, [])
+        for street in streets:
+            # Units sharing their property's address add nothing
+            if street.name == tuple(name) and street.property_id == property_id:
+                return
+        streets.append(_Street(tuple(name), suffix, property_id, unit_id))
+
+    def match(self, text: str, limit: int = 5) -> List[AddressMatch]:
+        """Finds the properties and units a message most likely refers to.
+
+        Args:
+            text: Email subject and/or body.
+            limit: Maximum number of matches returned.
+
+        Returns:
+            Matches sorted by descending score (0..1); a match's `unit_id` is
+            set when a unit mention or unit address matched too.
+        """
+        tokens = normalize_tokens(text)
+        token_set = set(tokens)
+        scores: Dict[int, float] = {}
+        units: Dict[int, int] = {}
+
+        for position, token in enumerate(tokens):
+            streets = self._streets.get(token)
+            if not streets:
+                continue
+            start = position + 1
+            for street in streets:
+                end = start + len(street.name)
+                if tuple(tokens[start:end]) != street.name:
+                    continue
+                score = STREET_SCORE
+                if street.suffix and tokens[end : end + 1] == [street.suffix]:
+                    score += SUFFIX_SCORE
+                if score > scores.get(street.property_id, 0.0):
+                    scores[street.property_id] = score
+                if street.unit_id is not None:
+                    units[street.property_id] = street.unit_id
+
+        for token in token_set:
+            bucket = self._postal.get(token)
+            if not bucket:
+                continue
+            if len(bucket) <= MAX_POSTAL_ONLY_CANDIDATES:
+                for property_id in bucket:
+                    scores.setdefault(property_id, 0.0)
+
+        if not scores:
+            return []
+
+        mentions = _unit_mentions(tokens)
+        matches = []
+        for property_id, score in scores.items():
+            if self._property_postal.get(property_id) in token_set:
+                score += POSTAL_SCORE
+            city = self._property_city.get(property_id)
+            if city and token_set.issuperset(city):
+                score += CITY_SCORE
+
+            unit_id = units.get(property_id)
+            known_units = self._units.get(property_id)
+            if known_units:
+                for mention in mentions:
+                    if mention in known_units:
+                        unit_id = known_units[mention]
+                        score += UNIT_SCORE
+                        break
+            if score > 0:
+                matches.append(
+                    AddressMatch(property_id, unit_id, round(score / _MAX_SCORE, 3))
+                )
+
+        matches.sort(key=lambda match: match.score, reverse=True)
+        return matches[:limit]
+
+    def __len__(self) -> int:
+        """The number of indexed street addresses."""
+        return sum(len(streets) for streets in self._streets.values())
+
+
+def _unit_mentions(tokens: List[str]) -> List[str]:
+    """Unit numbers mentioned in the text ("unit 4b", "apt # 12", "#3")."""
+    mentions = []
+    for position in range(len(tokens) - 1):
+        if not _is_unit_marker(tokens, position):
+            continue
+        rest = tokens[position + 1 : position + 4]
+        if rest[0] == "#":
+            rest = rest[1:]
+        if not rest or not any(c.isdigit() for c in rest[0]):
+            continue
+        # "4-B" tokenizes as ["4", "b"], indexed as "4b"
+        if len(rest) > 1 and len(rest[1]) == 1 and rest[1].isalpha():
+            mentions.append(rest[0] + rest[1])
+        mentions.append(rest[0])
+    return mentions
+
+
+def _is_unit_marker(tokens: List[str], position: int) -> bool:
+    """Whether the token at `position` introduces a unit number; "no" only
+    does when a number follows ("no 4", "no. 4", "no #4")."""
+    token = tokens[position]
+    if token not in UNIT_MARKERS:
+        return False
+    if token not in _NUMBERED_MARKERS:
+        return True
+    rest = tokens[position + 1 : position + 3]
+    if rest[:1] == ["#"]:
+        rest = rest[1:]
+    return bool(rest) and rest[0][0].isdigit()
+
+
+def _postal_code(postal_code: str) -> Optional[str]:
+    """The 5-digit ZIP code of a postal code ("10001-1234" -> "10001")."""
+    tokens = _TOKEN_RE.findall(postal_code.lower())
+    return tokens[0] if tokens else None
+
+
+__all__ = ["AddressIndex", "AddressMatch", "normalize_tokens", "normalize_unit"]
@@ -0,0 +1,236 @@
+"""
+In-memory index resolving email senders to Tenants, Owners and Vendors.
+
+Addresses are normalized (case, plus-addressing, Gmail dots) and mapped to
+compact integer entity keys, so a lookup is a single dict probe.
+"""
+
+from email.utils import parseaddr
+from typing import (
+    TYPE_CHECKING,
+    Dict,
+    Iterable,
+    List,
+    NamedTuple,
+    Optional,
+    Tuple,
+    Union,
+)
+
+from core.logging import logger
+from domains.property_management._fields import get_field, get_id
+
+if TYPE_CHECKING:
+    from domains.property_management.maintenance.models import Vendor
+    from domains.property_management.rentals.models import Owner, Tenant
+
+TENANT = "tenant"
+OWNER = "owner"
+VENDOR = "vendor"
+
+# Entity type -> (code packed into the key, email attributes)
+_ENTITY_FIELDS: Dict[str, Tuple[int, Tuple[str, ...]]] = {
+    TENANT: (0, ("Email", "AlternateEmail")),
+    OWNER: (1, ("Email", "AlternateEmail")),
+    VENDOR: (2, ("PrimaryEmail", "AlternateEmail")),
+}
+_TYPE_BY_CODE = {code: entity_type for entity_type, (code, _) in _ENTITY_FIELDS.items()}
+_TYPE_BITS = 2
+
+# Domains where dots in the local part are ignored by the mail provider
+GMAIL_DOMAINS = frozenset({"gmail.com", "googlemail.com"})
+
+# An address maps to one packed key, or a tuple of them when shared
+# (e.g. an owner who is also a tenant, or a couple using one inbox).
+_Keys = Union[int, Tuple[int, ...]]
+
+
+class ContactMatch(NamedTuple):
+    entity_type: str
+    entity_id: int
+
+
+def normalize_address(address: Optional[str]) -> Optional[str]:
+    """Normalizes an email address for matching.
+
+    Lowercases, drops a `+tag` from the local part and, for Gmail domains,
+    removes dots from the local part and folds googlemail.com into
+    gmail.com.
+
+    Args:
+        address: A bare address such as "Jane.Doe+rent@GMail.com".
+
+    Returns:
+        The normalized address ("janedoe@gmail.com"), or None if `address`
+        is empty or not an address.
+    """
+    if not address:
+        return None
+    local, at, domain = address.strip().lower().rpartition("@")
+    if not at or not local or not domain:
+        return None
+    local = local.partition("+")[0]
+    if domain in GMAIL_DOMAINS:
+        local = local.replace(".", "")
+        domain = "gmail.com"
+    if not local:
+        return None
+    return f"{local}@{domain}"
+
+
+class ContactIndex:
+    """Sender address -> Tenant/Owner/Vendor index.
+
+    Entities are stored as packed integer keys (`id << 2 | type`) rather
+    than model instances, keeping ~100k contacts to a few tens of MB. A
+    reverse map from key to addresses lets single records be updated or
+    removed without a rebuild.
+    """
+
+    __slots__ = ("_by_address", "_by_key")
+
+    def __init__(self):
+        self._by_address: Dict[str, _Keys] = {}
+        self._by_key: Dict[int, Tuple[str, ...]] = {}
+
+    @classmethod
+    def build(
+        cls,
+        tenants: Iterable["Tenant"] = (),
+        owners: Iterable["Owner"] = (),
+        vendors: Iterable["Vendor"] = (),
+    ) -> "ContactIndex":
+        """Builds an index in bulk, e.g. from full Buildium list pulls.
+
+        Args:
+            tenants: Tenant models (or dicts with the same fields).
+            owners: Owner models (or dicts with the same fields).
+            vendors: Vendor models (or dicts with the same fields).
+
+        Returns:
+            A new, populated index.
+        """
+        index = cls()
+        for entity_type, entities in (
+            (TENANT, tenants),
+            (OWNER, owners),
+            (VENDOR, vendors),
+        ):
+            for entity in entities:
+                index.upsert(entity_type, entity)
+        return index
+
+    def replace(self, other: "ContactIndex") -> None:
+        """Swaps in the contents of a freshly built index in one step."""
+        self._by_address, self._by_key = other._by_address, other._by_key
+
+    def upsert(self, entity_type: str, entity: object) -> None:
+        """Adds or updates one entity, replacing any addresses it had before.
+
+        Entities without an id are logged and skipped.
+
+        Args:
+            entity_type: TENANT, OWNER or VENDOR.
+            entity: The model (or a dict with the same fields).
+        """
+        code, email_fields = _ENTITY_FIELDS[entity_type]
+        entity_id = get_id(entity)
+        if entity_id is None:
+            logger.warning(f"Skipping {entity_type} without an id in contact index")
+            return
+        addresses = []
+        for email_field in email_fields:
+            address = normalize_address(get_field(entity, email_field))
+            if address and address not in addresses:
+                addresses.append(address)
+
+        key = (int(entity_id) << _TYPE_BITS) | code
+        self._unlink(key)
+        if not addresses:
+            return
+        self._by_key[key] = tuple(addresses)
+        for address in addresses:
+            current = self._by_address.get(address)
+            if current is None:
+                self._by_address[address] = key
+            elif isinstance(current, int):
+                self._by_address[address] = (current, key)
+            else:
+                self._by_address[address] = current + (key,)
+
+    def upsert_tenant(self, tenant: "Tenant") -> None:
+        self.upsert(TENANT, tenant)
+
+    def upsert_owner(self, owner: "Owner") -> None:
+        self.upsert(OWNER, owner)
+
+    def upsert_vendor(self, vendor: "Vendor") -> None:
+        self.upsert(VENDOR, vendor)
+
+    def remove(self, entity_type: str, entity_id: Optional[int]) -> None:
+        """Removes an entity, e.g. after it was deleted in Buildium."""
+        if entity_id is None:
+            logger.warning(
+                f"Cannot remove {entity_type} without an id from contact index"
+            )
+            return
+        self._unlink((int(entity_id) << _TYPE_BITS) | _ENTITY_FIELDS[entity_type][0])
+
+    def resolve(self, address: Optional[str]) -> List[ContactMatch]:
+        """Returns every entity using `address`, after normalization.
+
+        Args:
+            address: A bare email address.
+
+        Returns:
+            Matching entities; empty when the address is unknown.
+        """
+        normalized = normalize_address(address)
+        keys = self._by_address.get(normalized) if normalized else None
+        if keys is None:
+            return []
+        if isinstance(keys, int):
+            return [_unpack(keys)]
+        return [_unpack(key) for key in keys]
+
+    def resolve_sender(self, sender: str) -> List[ContactMatch]:
+        """Like `resolve`, for a From header value ("Jane <jane@example.com>")."""
+        return self.resolve(parseaddr(sender)[1])
+
+    def _unlink(self, key: int) -> None:
+        for address in self._by_key.pop(key, ()):
+            current = self._by_address.get(address)
+            if current == key:
+                del self._by_address[address]
+            elif isinstance(current, tuple):
+                remaining = tuple(k for k in current if k != key)
+                self._by_address[address] = (
+                    remaining[0] if len(remaining) == 1 else remaining
+                )
+
+    def __len__(self) -> int:
+        """The number of indexed entities."""
+        return len(self._by_key)
+
+    def __contains__(self, address: str) -> bool:
+        normalized = normalize_address(address)
+        return normalized is not None and normalized in self._by_address
+
+    @property
+    def stats(self) -> Dict[str, int]:
+        """Entity and address counts, for logging."""
+        return {"entities": len(self._by_key), "addresses": len(self._by_address)}
+
+
+def _unpack(key: int) -> ContactMatch:
+    return ContactMatch(_TYPE_BY_CODE[key & 0b11], key >> _TYPE_BITS)
+
+
+__all__ = [
+    "OWNER",
+    "TENANT",
+    "VENDOR",
+    "ContactIndex",
+    "ContactMatch",
+    "normalize_address",
+]
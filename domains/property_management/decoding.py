@@ -0,0 +1,116 @@
+"""
+Bulk decoding of Buildium list payloads into pydantic models.
+
+Raw response bytes are validated straight into `list[Model]` by cached
+TypeAdapters, skipping the intermediate `json.loads` dict tree. An opt-in
+trusted mode reuses the models of payloads that were already validated.
+"""
+
+from collections import OrderedDict
+from functools import lru_cache
+from hashlib import blake2b
+from typing import Dict, List, Optional, Type, TypeVar, Union
+
+from pydantic import BaseModel, TypeAdapter
+
+M = TypeVar("M", bound=BaseModel)
+
+
+@lru_cache(maxsize=None)
+def list_adapter(model: Type[M]) -> TypeAdapter:
+    """Returns the (cached) TypeAdapter validating `list[model]`.
+
+    Building an adapter compiles the model's validator, so it is done once
+    per model rather than per response.
+    """
+    return TypeAdapter(List[model])
+
+
+class DecodeCache:
+    """LRU of validated pages keyed by a digest of their raw bytes.
+
+    Models handed out from the cache are shared between callers and must be
+    treated as read-only.
+    """
+
+    def __init__(self, max_entries: int = 256):
+        """
+        Args:
+            max_entries: Maximum number of decoded pages kept.
+        """
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[bytes, List[BaseModel]]" = OrderedDict()
+        self._hits = 0
+        self._misses = 0
+
+    def get(self, key: bytes) -> Optional[List[BaseModel]]:
+        models = self._entries.get(key)
+        if models is None:
+            self._misses += 1
+            return None
+        self._hits += 1
+        self._entries.move_to_end(key)
+        return models
+
+    def put(self, key: bytes, models: List[BaseModel]) -> None:
+        self._entries[key] = models
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    @property
+    def stats(self) -> Dict[str, int]:
+        """Hit, miss and size counters."""
+        return {"hits": self._hits, "misses": self._misses, "size": len(self._entries)}
+
+
+# Process-wide cache used by trusted decodes unless one is passed in.
+_default_cache = DecodeCache()
+
+
+def get_default_cache() -> DecodeCache:
+    """Returns the process-wide DecodeCache used by trusted decodes."""
+    return _default_cache
+
+
+def decode_list(
+    model: Type[M],
+    data: Union[bytes, str],
+    *,
+    trusted: bool = False,
+    cache: Optional[DecodeCache] = None,
+) -> List[M]:
+    """Validates a JSON array payload into a list of models.
+
+    Args:
+        model: The model of each item, e.g. `Lease`.
+        data: Raw JSON response body (e.g. `response.content`).
+        trusted: Reuses the models of an identical payload validated before
+            instead of validating again. Only for data from our own API
+            pulls; the returned models are shared and must not be mutated.
+        cache: Cache for trusted mode; defaults to the process-wide one.
+
+    Returns:
+        The validated models, in payload order.
+
+    Raises:
+        pydantic.ValidationError: If the payload does not match the model.
+    """
+    adapter = list_adapter(model)
+    if not trusted:
+        return adapter.validate_json(data)
+
+    cache = cache or _default_cache
+    raw = data.encode() if isinstance(data, str) else data
+    key = (
+        f"{model.__module__}.{model.__qualname__}".encode()
+        + blake2b(raw, digest_size=16).digest()
+    )
+    models = cache.get(key)
+    if models is None:
+        models = adapter.validate_json(raw)
+        cache.put(key, models)
+    return list(models)
+
+
+__all__ = ["DecodeCache", "decode_list", "get_default_cache", "list_adapter"]
@@ -0,0 +1,242 @@
+"""
+Field-level change detection between Buildium resources and synced rows.
+
+Each synced record keeps a content hash per top-level field plus a record
+hash. Comparing a fresh Buildium payload against the stored hashes tells
+which fields changed without reading the Airtable row back.
+"""
+
+import json
+import time
+from abc import ABC, abstractmethod
+from hashlib import blake2b
+from typing import Any, Dict, Iterable, List, NamedTuple, Optional, Tuple, Union
+
+from pydantic import BaseModel
+
+from core.sync_state import SyncRecord, SyncStateRepository
+
+ResourceId = Union[int, str]
+
+
+class Fingerprint(NamedTuple):
+    record_hash: str
+    field_hashes: Dict[str, str]
+
+
+class Delta(NamedTuple):
+    resource_type: str
+    resource_id: str
+    changed: Dict[str, Any]  # Field name -> new value (JSON-compatible)
+    removed: List[str]  # Fields present last sync but missing now
+    is_new: bool
+    fingerprint: Fingerprint
+
+
+class FingerprintStore(ABC):
+    """Interface for persisting record fingerprints alongside the sync state."""
+
+    @abstractmethod
+    async def get_fingerprints(
+        self, resource_type: str, resource_ids: List[str]
+    ) -> Dict[str, Fingerprint]:
+        """Returns the stored fingerprints of the given records that have one."""
+
+    @abstractmethod
+    async def put_fingerprints(
+        self, resource_type: str, fingerprints: Dict[str, Fingerprint]
+    ) -> None:
+        """Stores fingerprints, replacing any previous ones."""
+
+
+class InMemoryFingerprintStore(FingerprintStore):
+    """Process-local fingerprint store, for tests and one-off syncs."""
+
+    def __init__(self):
+        self._fingerprints: Dict[Tuple[str, str], Fingerprint] = {}
+
+    async def get_fingerprints(
+        self, resource_type: str, resource_ids: List[str]
+    ) -> Dict[str, Fingerprint]:
+        found = {}
+        for resource_id in resource_ids:
+            fingerprint = self._fingerprints.get((resource_type, resource_id))
+            if fingerprint is not None:
+                found[resource_id] = fingerprint
+        return found
+
+    async def put_fingerprints(
+        self, resource_type: str, fingerprints: Dict[str, Fingerprint]
+    ) -> None:
+        for resource_id, fingerprint in fingerprints.items():
+            self._fingerprints[(resource_type, resource_id)] = fingerprint
+
+
+class SyncStateFingerprintStore(FingerprintStore):
+    """Keeps fingerprints in the sync state repository, next to each record's
+    Airtable id and timestamps."""
+
+    def __init__(self, repository: SyncStateRepository):
+        self.repository = repository
+
+    async def get_fingerprints(
+        self, resource_type: str, resource_ids: List[str]
+    ) -> Dict[str, Fingerprint]:
+        records = await self.repository.get_many(resource_type, resource_ids)
+        return {
+            resource_id: Fingerprint(record.record_hash, record.field_hashes or {})
+            for resource_id, record in records.items()
+            if record.record_hash is not None
+        }
+
+    async def put_fingerprints(
+        self, resource_type: str, fingerprints: Dict[str, Fingerprint]
+    ) -> None:
+        now = time.time()
+        await self.repository.upsert_many(
+            SyncRecord(
+                resource_type,
+                resource_id,
+                record_hash=fingerprint.record_hash,
+                field_hashes=fingerprint.field_hashes,
+                last_synced_at=now,
+            )
+            for resource_id, fingerprint in fingerprints.items()
+        )
+
+
+def dump_record(record: Union[BaseModel, Dict[str, Any]]) -> Dict[str, Any]:
+    """Returns a JSON-compatible dict for a pydantic model or raw API dict."""
+    if isinstance(record, BaseModel):
+        return record.model_dump(mode="json")
+    return record
+
+
+def field_hash(value: Any) -> str:
+    """Stable hash of one field value (key order and whitespace independent)."""
+    encoded = json.dumps(
+        value, sort_keys=True, separators=(",", ":"), ensure_ascii=False, default=str
+    ).encode()
+    return blake2b(encoded, digest_size=8).hexdigest()
+
+
+def fingerprint(fields: Dict[str, Any]) -> Fingerprint:
+    """Hashes every top-level field and derives the record hash from them."""
+    field_hashes = {name: field_hash(value) for name, value in fields.items()}
+    record = blake2b(digest_size=16)
+    for name in sorted(field_hashes):
+        record.update(f"{name}={field_hashes[name]};".encode())
+    return Fingerprint(record.hexdigest(), field_hashes)
+
+
+class DeltaEngine:
+    """Computes per-field deltas of resources against their last synced state.
+
+    Typical use: `diff_many` the fetched resources, write each delta's
+    `changed` fields to Airtable, then `commit` the deltas that were written
+    so the next run compares against them.
+    """
+
+    def __init__(
+        self,
+        store: FingerprintStore,
+        include: Optional[Dict[str, Iterable[str]]] = None,
+        exclude: Optional[Dict[str, Iterable[str]]] = None,
+    ):
+        """
+        Args:
+            store: Where fingerprints are persisted between syncs.
+            include: Per resource type, the only fields that are synced.
+            exclude: Per resource type, fields never synced (e.g. volatile
+                timestamps that would make every record look changed).
+        """
+        self.store = store
+        self.include = {k: frozenset(v) for k, v in (include or {}).items()}
+        self.exclude = {k: frozenset(v) for k, v in (exclude or {}).items()}
+
+    def _tracked_fields(self, resource_type: str, record: Any) -> Dict[str, Any]:
+        fields = dump_record(record)
+        include = self.include.get(resource_type)
+        exclude = self.exclude.get(resource_type, frozenset())
+        return {
+            name: value
+            for name, value in fields.items()
+            if (include is None or name in include) and name not in exclude
+        }
+
+    async def diff(
+        self, resource_type: str, resource_id: ResourceId, record: Any
+    ) -> Optional[Delta]:
+        """Returns the changes of one record, or None if nothing changed."""
+        deltas = await self.diff_many(resource_type, [(resource_id, record)])
+        return deltas[0] if deltas else None
+
+    async def diff_many(
+        self,
+        resource_type: str,
+        records: Iterable[Tuple[ResourceId, Union[BaseModel, Dict[str, Any]]]],
+    ) -> List[Delta]:
+        """Computes deltas for many records with a single store lookup.
+
+        Args:
+            resource_type: e.g. "lease" or "transaction".
+            records: (resource id, model or raw dict) pairs.
+
+        Returns:
+            Deltas for the new and changed records only; unchanged records
+            are skipped, so no write (or read) is needed for them.
+        """
+        pending = [
+            (str(resource_id), self._tracked_fields(resource_type, record))
+            for resource_id, record in records
+        ]
+        previous = await self.store.get_fingerprints(
+            resource_type, [resource_id for resource_id, _ in pending]
+        )
+
+        deltas = []
+        for resource_id, fields in pending:
+            current = fingerprint(fields)
+            before = previous.get(resource_id)
+            if before is None:
+                deltas.append(
+                    Delta(resource_type, resource_id, fields, [], True, current)
+                )
+                continue
+            if before.record_hash == current.record_hash:
+                continue
+
+            old_hashes = before.field_hashes
+            changed = {
+                name: fields[name]
+                for name, digest in current.field_hashes.items()
+                if old_hashes.get(name) != digest
+            }
+            removed = [name for name in old_hashes if name not in fields]
+            deltas.append(
+                Delta(resource_type, resource_id, changed, removed, False, current)
+            )
+        return deltas
+
+    async def commit(self, deltas: Iterable[Delta]) -> None:
+        """Stores the fingerprints of deltas that were written successfully."""
+        by_type: Dict[str, Dict[str, Fingerprint]] = {}
+        for delta in deltas:
+            by_type.setdefault(delta.resource_type, {})[
+                delta.resource_id
+            ] = delta.fingerprint
+        for resource_type, fingerprints in by_type.items():
+            await self.store.put_fingerprints(resource_type, fingerprints)
+
+
+__all__ = [
+    "Delta",
+    "DeltaEngine",
+    "Fingerprint",
+    "FingerprintStore",
+    "InMemoryFingerprintStore",
+    "SyncStateFingerprintStore",
+    "dump_record",
+    "field_hash",
+    "fingerprint",
+]
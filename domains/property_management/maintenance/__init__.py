@@ -0,0 +1,29 @@
+"""
+Maintenance models for the Buildium property management API.
+"""
+
+from .models import (
+    TaskSubCategory,
+    TaskCategory,
+    UnitAgreement,
+    UserEntity,
+    Property,
+    Task,
+    ResidentRequest,
+    VendorInsuranceDetails,
+    VendorCategory,
+    Vendor,
+)
+
+__all__ = [
+    "TaskSubCategory",
+    "TaskCategory",
+    "UnitAgreement",
+    "UserEntity",
+    "Property",
+    "Task",
+    "ResidentRequest",
+    "VendorInsuranceDetails",
+    "VendorCategory",
+    "Vendor",
+]
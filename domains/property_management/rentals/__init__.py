@@ -0,0 +1,79 @@
+"""
+Rentals models for the Buildium property management API.
+"""
+
+from .models import (
+    Address,
+    PhoneNumber,
+    RentalManager,
+    Property,
+    Unit,
+    Amenities,
+    Image,
+    Appliance,
+    ApplianceServiceHistory,
+    TaxInformation,
+    Owner,
+    EmergencyContact,
+    LeaseAccountDetails,
+    Cosigner,
+    MoveOutData,
+    Lease,
+    Tenant,
+    JournalLineItems,
+    TransactionJournal,
+    Transaction,
+    ChargeLineItems,
+    Charge,
+    PayeePayer,
+    RefundLineItems,
+    Refund,
+    RecurringTransactionLineItems,
+    RecurringTransaction,
+    RecurringCharge,
+    RecurringCredit,
+    RecurringPayment,
+    OutstandingBalanceLineItems,
+    OutstandingBalance,
+    PaymentSettings,
+    EFTPaymentSettings,
+    CreditCardPaymentSettings,
+)
+
+__all__ = [
+    "Address",
+    "PhoneNumber",
+    "RentalManager",
+    "Property",
+    "Unit",
+    "Amenities",
+    "Image",
+    "Appliance",
+    "ApplianceServiceHistory",
+    "TaxInformation",
+    "Owner",
+    "EmergencyContact",
+    "LeaseAccountDetails",
+    "Cosigner",
+    "MoveOutData",
+    "Lease",
+    "Tenant",
+    "JournalLineItems",
+    "TransactionJournal",
+    "Transaction",
+    "ChargeLineItems",
+    "Charge",
+    "PayeePayer",
+    "RefundLineItems",
+    "Refund",
+    "RecurringTransactionLineItems",
+    "RecurringTransaction",
+    "RecurringCharge",
+    "RecurringCredit",
+    "RecurringPayment",
+    "OutstandingBalanceLineItems",
+    "OutstandingBalance",
+    "PaymentSettings",
+    "EFTPaymentSettings",
+    "CreditCardPaymentSettings",
+]
@@ -0,0 +1,480 @@
+"""
+Local receivables aging for leases, maintained from synced transactions.
+
+Open charge items are kept per lease and GL account in NumPy columns and
+paid down FIFO as payments arrive, so the 0-30/31-60/61-90/90+ buckets of
+`OutstandingBalance` are available without re-pulling them from Buildium.
+"""
+
+from bisect import bisect_left
+from collections import deque
+from datetime import date, datetime
+from typing import (
+    TYPE_CHECKING,
+    Any,
+    Deque,
+    Dict,
+    Iterable,
+    List,
+    Optional,
+    Sequence,
+    Tuple,
+    Union,
+)
+
+import numpy as np
+
+from domains.property_management._fields import get_field, get_id
+from domains.property_management.rentals.models import (
+    OutstandingBalance,
+    OutstandingBalanceLineItems,
+)
+
+if TYPE_CHECKING:
+    from domains.property_management.rentals import Charge, Refund, Transaction
+
+# First day of each aging bucket: 0-30, 31-60, 61-90 and over 90 days
+BUCKET_STARTS = (0, 31, 61, 91)
+_BUCKET_ENDS = (30, 60, 90)
+_BUCKET_EDGES = np.array(_BUCKET_ENDS)
+# Transaction types that pay down a lease's open charges
+PAYMENT_TYPES = frozenset({"Payment", "Credit", "ApplyDeposit"})
+# Stands in for a missing property or unit id
+NULL_ID = -1
+# Kinds of applied records, kept to replay a lease when one of them changes
+_CHARGE, _PAYMENT, _REFUND = "charge", "payment", "refund"
+
+DateLike = Union[str, date, datetime, np.datetime64]
+
+
+class AgingEngine:
+    """Per-lease aging buckets from charges, payments and refunds.
+
+    Charges open items per (lease, GL account). Payments pay down the open
+    items of the GL accounts on their lines oldest first, then any other
+    open item of the lease; what remains is kept as a lease credit that
+    later charges consume. Every change adjusts the lease's bucket totals
+    in place, and `rollover` re-buckets all open items at once when the day
+    changes. A record fed in again unchanged (by Buildium transaction id)
+    is ignored, so overlapping sync pages are safe; one that changed, e.g.
+    an edited amount or date, replaces its earlier application by replaying
+    the records of its lease.
+    """
+
+    def __init__(self, today: Optional[DateLike] = None, capacity: int = 1024):
+        """
+        Args:
+            today: The day open items are aged against; defaults to today.
+            capacity: Leases and open items preallocated before resizing.
+        """
+        self.today = _day(today or date.today())
+        # Leases: one row each
+        self._lease_rows: Dict[int, int] = {}
+        self._lease_ids = np.zeros(capacity, dtype=np.int64)
+        self._property_ids = np.full(capacity, NULL_ID, dtype=np.int64)
+        self._unit_ids = np.full(capacity, NULL_ID, dtype=np.int64)
+        self._buckets = np.zeros((capacity, len(BUCKET_STARTS)), dtype=np.int64)
+        self._credit = np.zeros(capacity, dtype=np.int64)  # Unapplied, in cents
+        self._lease_count = 0
+        # Open items: one row per charge line, remaining amount in cents
+        self._item_lease = np.zeros(capacity, dtype=np.int64)
+        self._item_gl = np.zeros(capacity, dtype=np.int64)
+        self._item_date = np.zeros(capacity, dtype="datetime64[D]")
+        self._item_remaining = np.zeros(capacity, dtype=np.int64)
+        self._item_count = 0
+        self._closed_items = 0
+        # Lease row -> GL account id -> open item rows, oldest first
+        self._queues: Dict[int, Dict[int, Deque[int]]] = {}
+        # Record id -> (lease row, operation), and each lease's record ids
+        self._records: Dict[int, Tuple[int, tuple]] = {}
+        self._history: Dict[int, List[int]] = {}
+
+    # --- Leases ---
+
+    def add_lease(self, lease: Any) -> None:
+        """Registers a Lease model (or raw dict) so its property is known."""
+        self._lease_row(
+            int(get_field(lease, "Id")),
+            get_field(lease, "PropertyId"),
+            get_field(lease, "UnitId"),
+        )
+
+    def _lease_row(
+        self,
+        lease_id: int,
+        property_id: Optional[int] = None,
+        unit_id: Optional[int] = None,
+    ) -> int:
+        row = self._lease_rows.get(lease_id)
+        if row is None:
+            row = self._lease_count
+            if row == len(self._lease_ids):
+                self._grow_leases()
+            self._lease_rows[lease_id] = row
+            self._lease_ids[row] = lease_id
+            self._lease_count += 1
+        if property_id is not None:
+            self._property_ids[row] = property_id
+        if unit_id is not None:
+            self._unit_ids[row] = unit_id
+        return row
+
+    def _grow_leases(self) -> None:
+        size = 2 * len(self._lease_ids)
+        self._lease_ids = _resized(self._lease_ids, size, 0)
+        self._property_ids = _resized(self._property_ids, size, NULL_ID)
+        self._unit_ids = _resized(self._unit_ids, size, NULL_ID)
+        self._buckets = _resized(self._buckets, size, 0)
+        self._credit = _resized(self._credit, size, 0)
+
+    # --- Incremental updates ---
+
+    def add_charge(
+        self,
+        lease_id: int,
+        charge: "Charge",
+        property_id: Optional[int] = None,
+        unit_id: Optional[int] = None,
+    ) -> bool:
+        """Opens an item per charge line, consuming any lease credit first.
+
+        Buildium lists charges per lease without carrying the lease id, so
+        it is passed in. Negative lines (e.g. adjustments) pay down the
+        lease like a payment would.
+
+        Returns:
+            False if the charge was already applied unchanged.
+        """
+        row = self._lease_row(int(lease_id), property_id, unit_id)
+        operation = (
+            _CHARGE,
+            _day(get_field(charge, "Date")),
+            tuple(_lines(charge, "GLAccountId")),
+        )
+        return self._record(int(get_field(charge, "Id")), row, operation)
+
+    def add_transaction(self, transaction: "Transaction") -> bool:
+        """Applies a lease payment (or credit) FIFO to the lease's open items.
+
+        Transactions of other types, including `Charge` transactions that
+        arrive through `add_charge`, are ignored.
+
+        Returns:
+            False if the transaction was ignored or already applied unchanged.
+        """
+        lease_id = get_field(transaction, "LeaseId")
+        if (
+            lease_id is None
+            or get_field(transaction, "TransactionTypeEnum") not in PAYMENT_TYPES
+        ):
+            return False
+
+        journal = get_field(transaction, "Journal")
+        allocations = []
+        for line in (
+            get_field(journal, "Lines") if journal is not None else None
+        ) or ():
+            gl_account = get_field(line, "GLAccount")
+            gl_account_id = get_id(gl_account) if gl_account else None
+            allocations.append((gl_account_id, round(get_field(line, "Amount") * 100)))
+        if not allocations:
+            total = get_field(transaction, "TotalAmount")
+            allocations.append((None, round(total * 100)))
+        return self._record(
+            int(get_field(transaction, "Id")),
+            self._lease_row(int(lease_id)),
+            (_PAYMENT, tuple(allocations)),
+        )
+
+    def add_refund(self, lease_id: int, refund: "Refund") -> bool:
+        """Pays out lease credit; refunds beyond the credit open new items.
+
+        Returns:
+            False if the refund was already applied unchanged.
+        """
+        operation = (
+            _REFUND,
+            _day(get_field(refund, "Date")),
+            tuple(_lines(refund, "GLAccountId")),
+        )
+        return self._record(
+            int(get_field(refund, "Id")), self._lease_row(int(lease_id)), operation
+        )
+
+    def _record(self, record_id: int, row: int, operation: tuple) -> bool:
+        """Applies a record, or replaces the earlier application of its id."""
+        previous = self._records.get(record_id)
+        if previous == (row, operation):
+            return False
+        self._records[record_id] = (row, operation)
+        if previous is None:
+            self._history.setdefault(row, []).append(record_id)
+            self._apply(row, operation)
+        else:
+            if previous[0] != row:
+                # Moved to another lease
+                self._history[previous[0]].remove(record_id)
+                self._history.setdefault(row, []).append(record_id)
+                self._replay(previous[0])
+            self._replay(row)
+        self._maybe_compact()
+        return True
+
+    def _apply(self, row: int, operation: tuple) -> None:
+        kind = operation[0]
+        if kind == _PAYMENT:
+            self._pay(row, operation[1])
+            return
+        _, day, lines = operation
+        for gl_account_id, cents in lines:
+            if kind == _CHARGE and cents < 0:
+                self._pay(row, [(gl_account_id, -cents)])
+            else:
+                self._open(row, gl_account_id, day, cents)
+
+    def _replay(self, row: int) -> None:
+        """Closes a lease's open items and re-applies its records in order."""
+        for queue in self._queues.pop(row, {}).values():
+            for item in queue:
+                self._item_remaining[item] = 0
+                self._closed_items += 1
+        self._buckets[row] = 0
+        self._credit[row] = 0
+        for record_id in self._history.get(row, ()):
+            self._apply(row, self._records[record_id][1])
+
+    def _open(self, row: int, gl_account_id: int, day: np.datetime64, cents: int):
+        used = min(int(self._credit[row]), cents)
+        if used:
+            self._credit[row] -= used
+            self._buckets[row, 0] += used
+            cents -= used
+        if cents <= 0:
+            return
+
+        item = self._item_count
+        if item == len(self._item_remaining):
+            self._grow_items()
+        self._item_lease[item] = row
+        self._item_gl[item] = gl_account_id
+        self._item_date[item] = day
+        self._item_remaining[item] = cents
+        self._item_count += 1
+        self._buckets[row, self._bucket(day)] += cents
+        self._queues.setdefault(row, {}).setdefault(gl_account_id, deque()).append(item)
+
+    def _pay(self, row: int, allocations: Iterable[Tuple[Optional[int], int]]):
+        """Pays down open items FIFO; leftovers go to other items, then credit."""
+        leftover = 0
+        for gl_account_id, cents in allocations:
+            if gl_account_id is None:
+                leftover += cents
+            else:
+                leftover += self._pay_queue(row, gl_account_id, cents)
+        if leftover <= 0:
+            return
+
+        # Spill over to the lease's other open items, oldest first
+        queues = self._queues.get(row, {})
+        while leftover and queues:
+            gl_account_id = min(queues, key=lambda gl: self._item_date[queues[gl][0]])
+            leftover = self._pay_queue(row, gl_account_id, leftover)
+        if leftover:
+            self._credit[row] += leftover
+            self._buckets[row, 0] -= leftover
+
+    def _pay_queue(self, row: int, gl_account_id: int, cents: int) -> int:
+        """Pays down one GL account's open items; returns the unused amount."""
+        queues = self._queues.get(row, {})
+        queue = queues.get(gl_account_id)
+        while cents > 0 and queue:
+            item = queue[0]
+            paid = min(int(self._item_remaining[item]), cents)
+            self._item_remaining[item] -= paid
+            self._buckets[row, self._bucket(self._item_date[item])] -= paid
+            cents -= paid
+            if not self._item_remaining[item]:
+                queue.popleft()
+                self._closed_items += 1
+        if queue is not None and not queue:
+            del queues[gl_account_id]
+        return cents
+
+    def _bucket(self, day: np.datetime64) -> int:
+        return bisect_left(_BUCKET_ENDS, (self.today - day).item().days)
+
+    def _grow_items(self) -> None:
+        size = 2 * len(self._item_remaining)
+        self._item_lease = _resized(self._item_lease, size, 0)
+        self._item_gl = _resized(self._item_gl, size, 0)
+        self._item_date = _resized(self._item_date, size, 0)
+        self._item_remaining = _resized(self._item_remaining, size, 0)
+
+    def _maybe_compact(self) -> None:
+        if self._item_count > 1024 and self._closed_items > self._item_count // 2:
+            self.compact()
+
+    def compact(self) -> None:
+        """Drops fully paid items and renumbers the open ones."""
+        size = self._item_count
+        keep = np.flatnonzero(self._item_remaining[:size] > 0)
+        new_row = np.cumsum(self._item_remaining[:size] > 0) - 1
+        for column in (
+            self._item_lease,
+            self._item_gl,
+            self._item_date,
+            self._item_remaining,
+        ):
+            column[: len(keep)] = column[keep]
+        self._queues = {
+            row: {
+                gl_account_id: deque(new_row[list(queue)].tolist())
+                for gl_account_id, queue in queues.items()
+            }
+            for row, queues in self._queues.items()
+        }
+        self._item_count = len(keep)
+        self._closed_items = 0
+
+    # --- Day rollover ---
+
+    def rollover(self, today: Optional[DateLike] = None) -> None:
+        """Re-buckets every open item against a new day in one pass."""
+        self.today = _day(today or date.today())
+        size, leases = self._item_count, self._lease_count
+        remaining = self._item_remaining[:size]
+        ages = (self.today - self._item_date[:size]).astype(np.int64)
+        cells = self._item_lease[:size] * len(BUCKET_STARTS) + np.searchsorted(
+            _BUCKET_EDGES, ages
+        )
+        totals = np.bincount(
+            cells, weights=remaining, minlength=leases * len(BUCKET_STARTS)
+        )
+        self._buckets[:leases] = np.rint(totals).astype(np.int64).reshape(leases, -1)
+        self._buckets[:leases, 0] -= self._credit[:leases]
+
+    # --- Queries ---
+
+    def buckets(self, lease_id: int) -> Tuple[float, float, float, float]:
+        """A lease's 0-30, 31-60, 61-90 and 90+ day balances."""
+        row = self._lease_rows.get(int(lease_id))
+        if row is None:
+            return (0.0, 0.0, 0.0, 0.0)
+        return tuple((self._buckets[row] / 100).tolist())
+
+    def outstanding_balance(self, lease_id: int) -> Optional[OutstandingBalance]:
+        """The lease's balance in the shape of Buildium's OutstandingBalance.
+
+        Unapplied credit is reported as a negative 0-30 day balance so the
+        buckets add up to `TotalBalance`. Notice and eviction fields are not
+        tracked here and are left empty.
+        """
+        row = self._lease_rows.get(int(lease_id))
+        if row is None:
+            return None
+        by_gl = {
+            gl_account_id: int(self._item_remaining[list(queue)].sum())
+            for gl_account_id, queue in self._queues.get(row, {}).items()
+        }
+        current, days_31_60, days_61_90, over_90 = self.buckets(lease_id)
+        property_id = int(self._property_ids[row])
+        unit_id = int(self._unit_ids[row])
+        return OutstandingBalance(
+            LeaseId=int(lease_id),
+            PropertyId=property_id,
+            UnitId=None if unit_id == NULL_ID else unit_id,
+            Balance0To30Days=current,
+            Balance31To60Days=days_31_60,
+            Balance61To90Days=days_61_90,
+            BalanceOver90Days=over_90,
+            TotalBalance=round(current + days_31_60 + days_61_90 + over_90, 2),
+            Balances=[
+                OutstandingBalanceLineItems(GLAccountId=gl, TotalBalance=cents / 100)
+                for gl, cents in sorted(by_gl.items())
+            ],
+            PastDueEmailSentDate=None,
+            EvictionPendingDate=None,
+            IsNoticeGiven=False,
+        )
+
+    def delinquent(
+        self,
+        min_days: int = 31,
+        min_amount: float = 0.0,
+        property_ids: Optional[Sequence[int]] = None,
+    ) -> List[Tuple[int, float]]:
+        """Leases owing more than `min_amount` that is at least `min_days` old.
+
+        Args:
+            min_days: Start of the oldest buckets counted; one of BUCKET_STARTS.
+            min_amount: Past-due amount a lease must exceed.
+            property_ids: Only leases of these properties.
+
+        Returns:
+            (lease id, past-due amount) pairs, largest amount first.
+
+        Raises:
+            ValueError: If `min_days` is not a bucket start.
+        """
+        if min_days not in BUCKET_STARTS:
+            raise ValueError(f"min_days must be one of {BUCKET_STARTS}")
+        leases = self._lease_count
+        past_due = self._buckets[:leases, BUCKET_STARTS.index(min_days) :].sum(axis=1)
+        selected = past_due > round(min_amount * 100)
+        if property_ids is not None:
+            selected &= np.isin(self._property_ids[:leases], property_ids)
+        rows = np.flatnonzero(selected)
+        rows = rows[np.argsort(-past_due[rows], kind="stable")]
+        return list(
+            zip(self._lease_ids[rows].tolist(), (past_due[rows] / 100).tolist())
+        )
+
+    def totals(self, property_ids: Optional[Sequence[int]] = None) -> Dict[str, float]:
+        """Portfolio-wide (or per-property-set) balances per bucket."""
+        leases = self._lease_count
+        buckets = self._buckets[:leases]
+        if property_ids is not None:
+            buckets = buckets[np.isin(self._property_ids[:leases], property_ids)]
+        sums = buckets.sum(axis=0) / 100
+        return {
+            "Balance0To30Days": float(sums[0]),
+            "Balance31To60Days": float(sums[1]),
+            "Balance61To90Days": float(sums[2]),
+            "BalanceOver90Days": float(sums[3]),
+            "TotalBalance": float(sums.sum()),
+        }
+
+    def __len__(self) -> int:
+        """Number of leases tracked."""
+        return self._lease_count
+
+    @property
+    def open_items(self) -> int:
+        """Number of charge lines not yet fully paid."""
+        return self._item_count - self._closed_items
+
+
+def _lines(record: Any, gl_field: str) -> List[Tuple[int, int]]:
+    """(GL account id, amount in cents) per line, or the total if no lines."""
+    lines = get_field(record, "Lines")
+    if not lines:
+        return [(NULL_ID, round(get_field(record, "TotalAmount") * 100))]
+    return [
+        (int(get_field(line, gl_field)), round(get_field(line, "Amount") * 100))
+        for line in lines
+    ]
+
+
+def _day(value: DateLike) -> np.datetime64:
+    if isinstance(value, datetime):
+        value = value.date()
+    return np.datetime64(value, "D")
+
+
+def _resized(column: np.ndarray, size: int, fill: Any) -> np.ndarray:
+    grown = np.full((size,) + column.shape[1:], fill, dtype=column.dtype)
+    grown[: len(column)] = column
+    return grown
+
+
+__all__ = ["AgingEngine", "BUCKET_STARTS", "PAYMENT_TYPES"]
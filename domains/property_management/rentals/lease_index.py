@@ -0,0 +1,389 @@
+"""
+Sorted-array index over lease terms for rent-roll queries.
+
+Lease terms are kept in NumPy columns with orderings by start and end date,
+so expirations, point-in-time occupancy and vacancy questions are answered
+with binary searches over the index instead of scans over Lease models.
+Webhook updates go to a small pending set that is merged in periodically.
+"""
+
+from datetime import date, datetime
+from typing import (
+    TYPE_CHECKING,
+    Any,
+    Dict,
+    Iterable,
+    List,
+    NamedTuple,
+    Optional,
+    Sequence,
+    Tuple,
+    Union,
+)
+
+import numpy as np
+
+from domains.property_management._fields import get_field
+
+if TYPE_CHECKING:
+    from domains.property_management.rentals import Lease, Unit
+
+# Stands in for a missing unit id
+NULL_ID = -1
+
+DateLike = Union[str, date, datetime, np.datetime64]
+
+
+class _Units(NamedTuple):
+    ids: np.ndarray  # Sorted unit ids
+    properties: np.ndarray  # Property id of each unit
+    property_ids: np.ndarray  # Distinct property ids, sorted
+    property_index: np.ndarray  # Position of each unit's property in property_ids
+
+
+class LeaseIndex:
+    """Lease terms keyed by property and unit, indexed by start and end date.
+
+    The sorted orderings cover the leases present at the last merge. Leases
+    upserted or removed since then are tracked separately and folded into
+    every query, and merged into the orderings once there are more than
+    `merge_threshold` of them. A webhook update is O(1); queries
+    binary-search the orderings and filter only the candidates they select.
+    """
+
+    def __init__(self, capacity: int = 1024, merge_threshold: int = 1024):
+        """
+        Args:
+            capacity: Leases preallocated before the first resize.
+            merge_threshold: Pending changes tolerated before the sorted
+                orderings are rebuilt.
+        """
+        self.merge_threshold = merge_threshold
+        self._size = 0
+        self._lease_ids = np.zeros(capacity, dtype=np.int64)
+        self._property_ids = np.zeros(capacity, dtype=np.int64)
+        self._unit_ids = np.full(capacity, NULL_ID, dtype=np.int64)
+        self._starts = np.zeros(capacity, dtype="datetime64[D]")
+        self._ends = np.zeros(capacity, dtype="datetime64[D]")
+        self._statuses = np.zeros(capacity, dtype=np.int32)
+        self._live = np.zeros(capacity, dtype=bool)
+        self.statuses: List[str] = []  # Status code -> LeaseStatus
+        self._status_codes: Dict[str, int] = {}
+        self._rows: Dict[int, int] = {}  # Lease id -> current row
+        # Rows ordered by start and by end date, as of the last merge
+        self._by_start = np.zeros(0, dtype=np.int64)
+        self._by_end = np.zeros(0, dtype=np.int64)
+        self._sorted_starts = np.zeros(0, dtype="datetime64[D]")
+        self._sorted_ends = np.zeros(0, dtype="datetime64[D]")
+        self._merged_size = 0
+        self._pending: List[int] = []  # Rows appended since the last merge
+        self._removed = 0  # Merged rows tombstoned since the last merge
+        # Unit id -> property id, from units and leases
+        self._units: Dict[int, int] = {}
+        self._unit_columns: Optional[_Units] = None
+
+    # --- Writes ---
+
+    @classmethod
+    def from_leases(
+        cls, leases: Iterable["Lease"], units: Iterable["Unit"] = ()
+    ) -> "LeaseIndex":
+        """Builds an index from Lease and Unit models (or raw API dicts)."""
+        index = cls()
+        for unit in units:
+            index.add_unit(unit)
+        # Merge once at the end rather than every `merge_threshold` leases
+        threshold, index.merge_threshold = index.merge_threshold, float("inf")
+        for lease in leases:
+            index.upsert(lease)
+        index.merge_threshold = threshold
+        index.merge()
+        return index
+
+    def add_unit(self, unit: "Unit") -> None:
+        """Registers a unit so it is counted when it has no lease."""
+        self._units[int(get_field(unit, "Id"))] = int(get_field(unit, "PropertyId"))
+        self._unit_columns = None
+
+    def upsert(self, lease: "Lease") -> None:
+        """Adds a lease or replaces its term and status, e.g. from a webhook."""
+        lease_id = int(get_field(lease, "Id"))
+        self._tombstone(lease_id)
+
+        row = self._size
+        if row == len(self._live):
+            self._grow()
+        status = get_field(lease, "LeaseStatus")
+        code = self._status_codes.get(status)
+        if code is None:
+            code = self._status_codes[status] = len(self.statuses)
+            self.statuses.append(status)
+        property_id = int(get_field(lease, "PropertyId"))
+        unit_id = get_field(lease, "UnitId")
+        self._lease_ids[row] = lease_id
+        self._property_ids[row] = property_id
+        self._unit_ids[row] = NULL_ID if unit_id is None else unit_id
+        self._starts[row] = _day(get_field(lease, "LeaseFromDate"))
+        self._ends[row] = _day(get_field(lease, "LeaseToDate"))
+        self._statuses[row] = code
+        self._live[row] = True
+        self._size += 1
+        self._rows[lease_id] = row
+        self._pending.append(row)
+        if unit_id is not None and int(unit_id) not in self._units:
+            self._units[int(unit_id)] = property_id
+            self._unit_columns = None
+        self._maybe_merge()
+
+    def remove(self, lease_id: int) -> bool:
+        """Drops a lease, e.g. on a delete webhook; False if it was unknown."""
+        found = self._tombstone(int(lease_id))
+        self._maybe_merge()
+        return found
+
+    def _tombstone(self, lease_id: int) -> bool:
+        row = self._rows.pop(lease_id, None)
+        if row is None:
+            return False
+        self._live[row] = False
+        if row < self._merged_size:
+            self._removed += 1
+        else:
+            self._pending.remove(row)
+        return True
+
+    def _grow(self) -> None:
+        size = 2 * len(self._live)
+        for name in (
+            "_lease_ids",
+            "_property_ids",
+            "_unit_ids",
+            "_starts",
+            "_ends",
+            "_statuses",
+            "_live",
+        ):
+            column = getattr(self, name)
+            grown = np.full(size, NULL_ID if name == "_unit_ids" else 0, column.dtype)
+            grown[: len(column)] = column
+            setattr(self, name, grown)
+
+    def _maybe_merge(self) -> None:
+        if len(self._pending) + self._removed > self.merge_threshold:
+            self.merge()
+
+    def merge(self) -> None:
+        """Compacts away replaced leases and rebuilds the sorted orderings."""
+        keep = np.flatnonzero(self._live[: self._size])
+        for name in (
+            "_lease_ids",
+            "_property_ids",
+            "_unit_ids",
+            "_starts",
+            "_ends",
+            "_statuses",
+        ):
+            column = getattr(self, name)
+            column[: len(keep)] = column[keep]
+        self._live[: len(keep)] = True
+        self._live[len(keep) : self._size] = False
+        self._size = self._merged_size = len(keep)
+        self._rows = dict(zip(self._lease_ids[: len(keep)].tolist(), range(len(keep))))
+        self._by_start = np.argsort(self._starts[: len(keep)], kind="stable")
+        self._by_end = np.argsort(self._ends[: len(keep)], kind="stable")
+        self._sorted_starts = self._starts[self._by_start]
+        self._sorted_ends = self._ends[self._by_end]
+        self._pending = []
+        self._removed = 0
+
+    # --- Queries ---
+
+    def _active_rows(self, on: np.datetime64) -> np.ndarray:
+        """Rows whose term contains `on` (LeaseFromDate <= on <= LeaseToDate)."""
+        merged = self._merged_size
+        started = np.searchsorted(self._sorted_starts, on, "right")
+        ended = np.searchsorted(self._sorted_ends, on, "left")
+        # Filter whichever candidate set is smaller on the other bound
+        if started <= merged - ended:
+            rows = self._by_start[:started]
+            rows = rows[self._ends[rows] >= on]
+        else:
+            rows = self._by_end[ended:]
+            rows = rows[self._starts[rows] <= on]
+        return self._with_pending(
+            rows, lambda r: (self._starts[r] <= on) & (self._ends[r] >= on)
+        )
+
+    def _with_pending(self, rows: np.ndarray, matches) -> np.ndarray:
+        """Drops tombstoned merged rows and adds matching pending rows."""
+        if self._removed:
+            rows = rows[self._live[rows]]
+        if self._pending:
+            pending = np.array(self._pending, dtype=np.int64)
+            rows = np.concatenate([rows, pending[matches(pending)]])
+        return rows
+
+    def _filter(
+        self,
+        rows: np.ndarray,
+        property_ids: Optional[Sequence[int]],
+        statuses: Optional[Sequence[str]],
+    ) -> np.ndarray:
+        if property_ids is not None:
+            rows = rows[np.isin(self._property_ids[rows], property_ids)]
+        if statuses is not None:
+            codes = [self._status_codes[s] for s in statuses if s in self._status_codes]
+            rows = rows[np.isin(self._statuses[rows], codes)]
+        return rows
+
+    def active(
+        self,
+        on: DateLike,
+        property_ids: Optional[Sequence[int]] = None,
+        statuses: Optional[Sequence[str]] = None,
+    ) -> np.ndarray:
+        """Ids of leases whose term includes the day `on`.
+
+        Args:
+            on: The day to check.
+            property_ids: Only leases of these properties.
+            statuses: Only leases with these LeaseStatus values.
+        """
+        rows = self._active_rows(_day(on))
+        return self._lease_ids[self._filter(rows, property_ids, statuses)]
+
+    def overlapping(
+        self,
+        start: DateLike,
+        end: DateLike,
+        property_ids: Optional[Sequence[int]] = None,
+        statuses: Optional[Sequence[str]] = None,
+    ) -> np.ndarray:
+        """Ids of leases whose term overlaps `start`..`end` (inclusive)."""
+        start, end = _day(start), _day(end)
+        started = np.searchsorted(self._sorted_starts, end, "right")
+        rows = self._by_start[:started]
+        rows = rows[self._ends[rows] >= start]
+        rows = self._with_pending(
+            rows, lambda r: (self._starts[r] <= end) & (self._ends[r] >= start)
+        )
+        return self._lease_ids[self._filter(rows, property_ids, statuses)]
+
+    def expiring(
+        self,
+        start: DateLike,
+        end: DateLike,
+        property_ids: Optional[Sequence[int]] = None,
+        statuses: Optional[Sequence[str]] = ("Active",),
+        renewed: Optional[bool] = None,
+    ) -> np.ndarray:
+        """Ids of leases whose LeaseToDate falls in `start`..`end`, soonest first.
+
+        Args:
+            start: First day of the window, e.g. today.
+            end: Last day of the window, e.g. 60 days from today.
+            property_ids: Only leases of these properties.
+            statuses: Only leases with these LeaseStatus values; active
+                leases by default, None for any.
+            renewed: True for only leases whose unit already has a later
+                lease, False for only those without one (renewals still to
+                chase), None for both.
+        """
+        start, end = _day(start), _day(end)
+        rows = self._by_end[
+            np.searchsorted(self._sorted_ends, start, "left") : np.searchsorted(
+                self._sorted_ends, end, "right"
+            )
+        ]
+        rows = self._with_pending(
+            rows, lambda r: (self._ends[r] >= start) & (self._ends[r] <= end)
+        )
+        rows = self._filter(rows, property_ids, statuses)
+        if renewed is not None:
+            has_next = self._has_later_lease(rows)
+            rows = rows[has_next if renewed else ~has_next]
+        rows = rows[np.argsort(self._ends[rows], kind="stable")]
+        return self._lease_ids[rows]
+
+    def _has_later_lease(self, rows: np.ndarray) -> np.ndarray:
+        """Whether each row's unit has a lease starting after the row's does."""
+        live = np.flatnonzero(self._live[: self._size])
+        units, inverse = np.unique(self._unit_ids[live], return_inverse=True)
+        latest = np.full(len(units), np.datetime64("1900-01-01", "D"))
+        np.maximum.at(latest, inverse, self._starts[live])
+        position = np.searchsorted(units, self._unit_ids[rows])
+        return (self._unit_ids[rows] != NULL_ID) & (
+            latest[position] > self._starts[rows]
+        )
+
+    def occupancy(
+        self, on: DateLike, property_ids: Optional[Sequence[int]] = None
+    ) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """Occupied and total units per property on the day `on`.
+
+        A unit counts as occupied when any lease covering `on` is on it,
+        whatever the lease's status; Buildium's IsUnitOccupied snapshot is
+        not used, so past and future dates can be asked about.
+
+        Returns:
+            (property ids, occupied units, total units) arrays.
+        """
+        units = self._unit_arrays()
+        occupied = self._occupied_units(_day(on))
+        counts = np.bincount(units.property_index, minlength=len(units.property_ids))
+        occupied_counts = np.bincount(
+            units.property_index[occupied], minlength=len(units.property_ids)
+        )
+        present = counts > 0
+        if property_ids is not None:
+            present &= np.isin(units.property_ids, property_ids)
+        return units.property_ids[present], occupied_counts[present], counts[present]
+
+    def vacant_units(
+        self, on: DateLike, property_ids: Optional[Sequence[int]] = None
+    ) -> np.ndarray:
+        """Ids of units with no lease covering the day `on`."""
+        units = self._unit_arrays()
+        vacant = ~self._occupied_units(_day(on))
+        if property_ids is not None:
+            vacant &= np.isin(units.properties, property_ids)
+        return units.ids[vacant]
+
+    def _occupied_units(self, on: np.datetime64) -> np.ndarray:
+        """Mask over the sorted unit ids of units with a lease covering `on`."""
+        units = self._unit_arrays()
+        # Sorted needles keep the binary searches cache-friendly
+        active = np.sort(self._unit_ids[self._active_rows(on)])
+        position = np.searchsorted(units.ids, active)
+        found = position < len(units.ids)
+        found[found] = units.ids[position[found]] == active[found]
+        occupied = np.zeros(len(units.ids), dtype=bool)
+        occupied[position[found]] = True
+        return occupied
+
+    def _unit_arrays(self) -> "_Units":
+        """Every known unit sorted by id, cached until a unit is added."""
+        if self._unit_columns is None:
+            ids = np.fromiter(self._units.keys(), np.int64, len(self._units))
+            properties = np.fromiter(self._units.values(), np.int64, len(ids))
+            order = np.argsort(ids)
+            ids, properties = ids[order], properties[order]
+            property_ids, property_index = np.unique(properties, return_inverse=True)
+            self._unit_columns = _Units(ids, properties, property_ids, property_index)
+        return self._unit_columns
+
+    def __len__(self) -> int:
+        """Number of leases indexed."""
+        return len(self._rows)
+
+    def __contains__(self, lease_id: int) -> bool:
+        return int(lease_id) in self._rows
+
+
+def _day(value: DateLike) -> np.datetime64:
+    if isinstance(value, datetime):
+        value = value.date()
+    return np.datetime64(value, "D")
+
+
+__all__ = ["LeaseIndex"]
@@ -146,7 +146,7 @@ class Cosigner(BaseModel):
 
 
 class MoveOutData(BaseModel):
-    TenantId: id
+    TenantId: int
     MoveOutDate: Optional[datetime]
     NoticeGivenDate: Optional[datetime]
 
@@ -359,3 +359,7 @@ class EFTPaymentSettings(BaseModel):
 
 class CreditCardPaymentSettings(BaseModel):
     PaymentsEnabled: Optional[PaymentSettings]
+
+
+# Lease and Tenant reference each other, so Lease is completed once Tenant exists
+Lease.model_rebuild()
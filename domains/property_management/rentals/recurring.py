@@ -0,0 +1,522 @@
+"""
+Expansion of recurring lease schedules into dated postings for forecasting.
+
+Recurring charges, credits and payments only carry their next occurrence,
+frequency and limits. This module generates their occurrences lazily, or
+expands all schedules vectorized into a calendar index for a forecast window
+that is patched in place when a single schedule changes.
+"""
+
+import calendar
+from datetime import date, datetime, timedelta
+from typing import (
+    TYPE_CHECKING,
+    Any,
+    Dict,
+    Iterator,
+    List,
+    NamedTuple,
+    Optional,
+    Sequence,
+    Tuple,
+    Union,
+)
+
+import numpy as np
+
+from domains.property_management._fields import get_field
+
+if TYPE_CHECKING:
+    from domains.property_management.rentals import (
+        RecurringCharge,
+        RecurringCredit,
+        RecurringPayment,
+        RecurringTransaction,
+    )
+
+    Schedule = Union[
+        RecurringCharge, RecurringCredit, RecurringPayment, RecurringTransaction
+    ]
+
+# Kinds of posting a schedule produces; credits reduce what is owed
+CHARGE, CREDIT, PAYMENT = KINDS = ("charge", "credit", "payment")
+_SIGNS = {CHARGE: 1, CREDIT: -1, PAYMENT: 1}
+
+# Buildium frequency -> (months, days) between occurrences
+FREQUENCIES: Dict[str, Tuple[int, int]] = {
+    "Daily": (0, 1),
+    "Weekly": (0, 7),
+    "Every2Weeks": (0, 14),
+    "Every4Weeks": (0, 28),
+    "Monthly": (1, 0),
+    "Every2Months": (2, 0),
+    "Quarterly": (3, 0),
+    "Every6Months": (6, 0),
+    "Yearly": (12, 0),
+    "OneTime": (0, 0),
+}
+# Buildium durations: until the lease ends, or a fixed number of occurrences
+UNTIL_END_OF_TERM = "UntilEndOfTerm"
+SPECIFIC_NUMBER = "SpecificNumber"
+# Stands in for a missing lease, property or GL account id
+NULL_ID = -1
+
+DateLike = Union[str, date, datetime, np.datetime64]
+
+
+class Posting(NamedTuple):
+    due_date: date
+    post_date: date  # Due date less the schedule's PostDaysInAdvance
+    kind: str
+    schedule_id: int
+    lease_id: int
+    property_id: int
+    gl_account_id: int
+    amount: float  # Negative for credits
+
+
+class ScheduleLine(NamedTuple):
+    """One GL account line of a schedule, normalized for expansion."""
+
+    kind: str
+    schedule_id: int
+    lease_id: int
+    property_id: int
+    gl_account_id: int
+    amount_cents: int  # Signed
+    first: date  # Next occurrence
+    months: int  # Months between occurrences (or 0)
+    days: int  # Days between occurrences (or 0)
+    remaining: int  # Occurrences left, -1 if unlimited
+    until: Optional[date]  # Last possible occurrence day
+    post_days: int
+
+
+def schedule_kind(schedule: Any) -> str:
+    """Infers whether a schedule model (or raw dict) posts charges, credits
+    or payments."""
+    if get_field(schedule, "CreditType") is not None:
+        return CREDIT
+    if get_field(schedule, "PaymentMethod") is not None:
+        return PAYMENT
+    transaction_type = (get_field(schedule, "TransactionType") or "").lower()
+    return transaction_type if transaction_type in _SIGNS else CHARGE
+
+
+def schedule_lines(
+    schedule: "Schedule",
+    *,
+    kind: Optional[str] = None,
+    lease_id: Optional[int] = None,
+    property_id: Optional[int] = None,
+    end_date: Optional[DateLike] = None,
+) -> List[ScheduleLine]:
+    """Normalizes a recurring schedule into one ScheduleLine per GL line.
+
+    Args:
+        schedule: A RecurringCharge, RecurringCredit, RecurringPayment or
+            RecurringTransaction model, or the raw API dict of one.
+        kind: CHARGE, CREDIT or PAYMENT; inferred when omitted.
+        lease_id: Lease of schedules that do not carry `LeaseId`.
+        property_id: Property the postings are attributed to.
+        end_date: Last day occurrences may fall on, e.g. the lease's
+            LeaseToDate. Ignored for a SpecificNumber duration, which only
+            stops after `OccurrencesRemaining` occurrences.
+
+    Raises:
+        ValueError: If the schedule's frequency is unknown, or it has a
+            SpecificNumber duration without `OccurrencesRemaining`.
+    """
+    kind = kind or schedule_kind(schedule)
+    frequency = get_field(schedule, "Frequency")
+    if frequency not in FREQUENCIES:
+        raise ValueError(f"Unknown recurring frequency: {frequency!r}")
+    months, days = FREQUENCIES[frequency]
+    remaining = get_field(schedule, "OccurrencesRemaining")
+    duration = get_field(schedule, "Duration")
+    if duration == UNTIL_END_OF_TERM:
+        # Runs until the term ends; the remaining count is not a limit
+        remaining = None
+    elif duration == SPECIFIC_NUMBER:
+        if remaining is None:
+            raise ValueError(
+                f"Schedule {get_field(schedule, 'Id')} has a {SPECIFIC_NUMBER} "
+                "duration but no OccurrencesRemaining"
+            )
+        end_date = None
+    if not months and not days:
+        # A one-time schedule occurs once on its next occurrence date
+        days, remaining = 1, 1 if remaining is None else min(remaining, 1)
+
+    lines = get_field(schedule, "Lines")
+    if isinstance(lines, (dict, tuple)) or hasattr(lines, "GLAccountId"):
+        lines = [lines]  # RecurringPayment carries a single line
+    if lines:
+        amounts = [(get_field(l, "GLAccountId"), get_field(l, "Amount")) for l in lines]
+    else:
+        amounts = [(get_field(schedule, "GLAccountId"), get_field(schedule, "Amount"))]
+
+    lease_id = get_field(schedule, "LeaseId") if lease_id is None else lease_id
+    sign = _SIGNS[kind]
+    return [
+        ScheduleLine(
+            kind,
+            int(get_field(schedule, "Id")),
+            NULL_ID if lease_id is None else int(lease_id),
+            NULL_ID if property_id is None else int(property_id),
+            NULL_ID if gl_account_id is None else int(gl_account_id),
+            sign * round(abs(amount) * 100),
+            _date(get_field(schedule, "NextOccurrenceDate")),
+            months,
+            days,
+            -1 if remaining is None else int(remaining),
+            _date(end_date) if end_date is not None else None,
+            get_field(schedule, "PostDaysInAdvance") or 0,
+        )
+        for gl_account_id, amount in amounts
+    ]
+
+
+def occurrences(
+    line: ScheduleLine,
+    start: Optional[DateLike] = None,
+    end: Optional[DateLike] = None,
+) -> Iterator[date]:
+    """Lazily yields a schedule line's due dates, from `start` if given.
+
+    Occurrences before `start` are skipped arithmetically rather than
+    generated, so starting far into the future is cheap. Without `end`,
+    `until` or an occurrence limit the generator is infinite.
+    """
+    start = _date(start) if start is not None else line.first
+    last = _date(end) if end is not None else None
+    if line.until is not None and (last is None or line.until < last):
+        last = line.until
+
+    if line.months:
+        months_to_start = (start.year - line.first.year) * 12 + (
+            start.month - line.first.month
+        )
+        n = max(0, -(-months_to_start // line.months))
+    else:
+        n = max(0, -(-(start - line.first).days // line.days))
+
+    while line.remaining < 0 or n < line.remaining:
+        if line.months:
+            day = _add_months(line.first, n * line.months)
+        else:
+            day = line.first + timedelta(days=n * line.days)
+        if last is not None and day > last:
+            return
+        if day >= start:
+            yield day
+        n += 1
+
+
+class CalendarIndex:
+    """Postings of a forecast window as NumPy columns sorted by due date.
+
+    Each schedule's postings can be swapped out without re-expanding the
+    others, which is how `RecurringForecast` applies schedule changes.
+    """
+
+    def __init__(
+        self,
+        start: date,
+        end: date,
+        columns: Dict[str, np.ndarray],
+        keys: List[Tuple[str, int]],
+    ):
+        """
+        Args:
+            start: First day of the window.
+            end: Last day of the window.
+            columns: Unsorted posting columns, as produced by expansion.
+            keys: (kind, schedule id) of each code in the "schedule" column.
+        """
+        self.start = start
+        self.end = end
+        self.keys = keys
+        order = np.argsort(columns["due_date"], kind="stable")
+        self._columns = {name: column[order] for name, column in columns.items()}
+
+    def replace(self, schedules: Sequence[int], columns: Dict[str, np.ndarray]):
+        """Drops the postings of `schedules` and merges in `columns`."""
+        keep = ~np.isin(self._columns["schedule"], schedules)
+        due_dates = self._columns["due_date"][keep]
+        order = np.argsort(columns["due_date"], kind="stable")
+        positions = np.searchsorted(due_dates, columns["due_date"][order], "right")
+        self._columns = {
+            name: np.insert(column[keep], positions, columns[name][order])
+            for name, column in self._columns.items()
+        }
+
+    def column(self, name: str) -> np.ndarray:
+        """Returns a read-only view of a column."""
+        view = self._columns[name][:]
+        view.flags.writeable = False
+        return view
+
+    def _slice(self, start: DateLike, end: DateLike) -> slice:
+        due_dates = self._columns["due_date"]
+        return slice(
+            np.searchsorted(due_dates, np.datetime64(_date(start), "D"), "left"),
+            np.searchsorted(due_dates, np.datetime64(_date(end), "D"), "right"),
+        )
+
+    def postings(
+        self, start: DateLike, end: Optional[DateLike] = None
+    ) -> List[Posting]:
+        """Postings due on `start`, or from `start` to `end` (inclusive)."""
+        rows = self._slice(start, end if end is not None else start)
+        columns = {
+            name: column[rows].tolist() for name, column in self._columns.items()
+        }
+        return [
+            Posting(
+                due_date,
+                post_date,
+                KINDS[kind],
+                self.keys[schedule][1],
+                lease_id,
+                property_id,
+                gl_account_id,
+                amount_cents / 100,
+            )
+            for (
+                due_date,
+                post_date,
+                kind,
+                schedule,
+                lease_id,
+                property_id,
+                gl_account_id,
+                amount_cents,
+            ) in zip(*columns.values())
+        ]
+
+    def totals_by_month(
+        self,
+        by: Optional[str] = "property_id",
+        kinds: Sequence[str] = (CHARGE, CREDIT),
+    ) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """Sums postings per month, optionally per a grouping column.
+
+        Args:
+            by: Id column to group by (e.g. "property_id", "lease_id"), or
+                None for portfolio totals.
+            kinds: Posting kinds included; charges and credits by default,
+                since recurring payments settle those same charges.
+
+        Returns:
+            (group keys, months, amounts) where amounts has one row per key
+            and one column per month of the window.
+        """
+        codes = [KINDS.index(kind) for kind in kinds]
+        selected = np.isin(self._columns["kind"], codes)
+        months = np.arange(
+            np.datetime64(self.start, "M"), np.datetime64(self.end, "M") + 1
+        )
+        month_index = (
+            self._columns["due_date"][selected].astype("datetime64[M]") - months[0]
+        ).astype(np.int64)
+        if by is None:
+            keys = np.zeros(1, dtype=np.int64)
+            inverse = np.zeros(len(month_index), dtype=np.int64)
+        else:
+            keys, inverse = np.unique(self._columns[by][selected], return_inverse=True)
+        sums = np.bincount(
+            inverse * len(months) + month_index,
+            weights=self._columns["amount_cents"][selected],
+            minlength=len(keys) * len(months),
+        )
+        return keys, months, sums.reshape(len(keys), len(months)) / 100
+
+    def __len__(self) -> int:
+        return len(self._columns["due_date"])
+
+
+class RecurringForecast:
+    """Recurring schedules of a portfolio, expandable into a CalendarIndex.
+
+    Typical use: `upsert` every schedule from a sync, call `index` for the
+    forecast window, then keep calling `upsert`/`remove` as schedules
+    change; the cached index is patched for just those schedules.
+    """
+
+    def __init__(self):
+        self._lines: Dict[Tuple[str, int], List[ScheduleLine]] = {}
+        self._codes: Dict[Tuple[str, int], int] = {}
+        self._keys: List[Tuple[str, int]] = []
+        self._index: Optional[CalendarIndex] = None
+        self._window: Optional[Tuple[date, date]] = None
+
+    def upsert(
+        self,
+        schedule: "Schedule",
+        *,
+        kind: Optional[str] = None,
+        lease_id: Optional[int] = None,
+        property_id: Optional[int] = None,
+        end_date: Optional[DateLike] = None,
+    ) -> None:
+        """Adds or replaces a schedule; see `schedule_lines` for the arguments."""
+        lines = schedule_lines(
+            schedule,
+            kind=kind,
+            lease_id=lease_id,
+            property_id=property_id,
+            end_date=end_date,
+        )
+        key = (lines[0].kind, lines[0].schedule_id)
+        self._lines[key] = lines
+        code = self._code(key)
+        if self._index is not None:
+            self._index.replace(
+                [code], _expand(lines, [code] * len(lines), *self._window)
+            )
+
+    def remove(self, kind: str, schedule_id: int) -> bool:
+        """Drops a schedule, e.g. once it expired; False if it was unknown."""
+        key = (kind, int(schedule_id))
+        if self._lines.pop(key, None) is None:
+            return False
+        if self._index is not None:
+            self._index.replace([self._codes[key]], _expand([], [], *self._window))
+        return True
+
+    def index(self, start: DateLike, end: DateLike) -> CalendarIndex:
+        """Returns the calendar index of `start`..`end` (inclusive).
+
+        The index for the same window is cached and kept current by
+        `upsert` and `remove`; a new window expands every schedule again.
+        """
+        window = (_date(start), _date(end))
+        if self._index is None or self._window != window:
+            lines, codes = [], []
+            for key, schedule in self._lines.items():
+                lines.extend(schedule)
+                codes.extend([self._codes[key]] * len(schedule))
+            self._window = window
+            self._index = CalendarIndex(
+                *window, _expand(lines, codes, *window), self._keys
+            )
+        return self._index
+
+    def _code(self, key: Tuple[str, int]) -> int:
+        code = self._codes.get(key)
+        if code is None:
+            code = self._codes[key] = len(self._keys)
+            self._keys.append(key)
+        return code
+
+    def __len__(self) -> int:
+        """Number of schedules."""
+        return len(self._lines)
+
+
+def _expand(
+    lines: Sequence[ScheduleLine], codes: Sequence[int], start: date, end: date
+) -> Dict[str, np.ndarray]:
+    """Vectorized expansion of schedule lines into the postings of a window."""
+    count = len(lines)
+    first = np.array([line.first for line in lines], dtype="datetime64[D]")
+    months = np.fromiter((line.months for line in lines), np.int64, count)
+    days = np.fromiter((line.days for line in lines), np.int64, count)
+    remaining = np.fromiter((line.remaining for line in lines), np.int64, count)
+    last = np.array(
+        [min(line.until, end) if line.until else end for line in lines],
+        dtype="datetime64[D]",
+    )
+    window_start = np.datetime64(start, "D")
+    by_month = months > 0
+    step = np.where(by_month, months, np.maximum(days, 1))
+
+    # First and last occurrence numbers inside the window, per line
+    first_month = first.astype("datetime64[M]")
+    anchor_day = (first - first_month.astype("datetime64[D]")).astype(np.int64)
+    months_to_start = (np.datetime64(start, "M") - first_month).astype(np.int64)
+    months_to_end = (last.astype("datetime64[M]") - first_month).astype(np.int64)
+    days_to_start = (window_start - first).astype(np.int64)
+    days_to_end = (last - first).astype(np.int64)
+
+    n_first = np.maximum(
+        0, -(-np.where(by_month, months_to_start, days_to_start) // step)
+    )
+    n_last = np.where(by_month, months_to_end, days_to_end) // step
+    if by_month.any():
+        # Month steps can land before the window start or after its end
+        # within the boundary months
+        n_first += by_month & (
+            _dates(first_month, anchor_day, n_first * months) < window_start
+        )
+        n_last -= by_month & (_dates(first_month, anchor_day, n_last * months) > last)
+    n_last = np.where(remaining >= 0, np.minimum(n_last, remaining - 1), n_last)
+    counts = np.maximum(n_last - n_first + 1, 0)
+
+    # One row per occurrence
+    rows = np.repeat(np.arange(count), counts)
+    offsets = np.cumsum(counts) - counts
+    n = n_first[rows] + np.arange(counts.sum()) - offsets[rows]
+    due = np.where(
+        by_month[rows],
+        _dates(first_month[rows], anchor_day[rows], n * months[rows]),
+        first[rows] + n * days[rows],
+    )
+    post_days = np.fromiter((line.post_days for line in lines), np.int64, count)
+
+    def per_line(values, dtype):
+        return np.fromiter(values, dtype, count)[rows]
+
+    return {
+        "due_date": due,
+        "post_date": due - post_days[rows],
+        "kind": per_line((KINDS.index(line.kind) for line in lines), np.int8),
+        "schedule": np.asarray(codes, dtype=np.int64)[rows],
+        "lease_id": per_line((line.lease_id for line in lines), np.int64),
+        "property_id": per_line((line.property_id for line in lines), np.int64),
+        "gl_account_id": per_line((line.gl_account_id for line in lines), np.int64),
+        "amount_cents": per_line((line.amount_cents for line in lines), np.int64),
+    }
+
+
+def _dates(
+    first_month: np.ndarray, anchor_day: np.ndarray, offsets: np.ndarray
+) -> np.ndarray:
+    """Day `anchor_day` of the month `offsets` after `first_month`, clamped to
+    the month's last day (so the 31st falls on Feb 28)."""
+    month = first_month + offsets
+    month_start = month.astype("datetime64[D]")
+    month_length = ((month + 1).astype("datetime64[D]") - month_start).astype(np.int64)
+    return month_start + np.minimum(anchor_day, month_length - 1)
+
+
+def _add_months(day: date, months: int) -> date:
+    month = day.month - 1 + months
+    year, month = day.year + month // 12, month % 12 + 1
+    return date(year, month, min(day.day, calendar.monthrange(year, month)[1]))
+
+
+def _date(value: DateLike) -> date:
+    if isinstance(value, datetime):
+        return value.date()
+    if isinstance(value, date):
+        return value
+    return np.datetime64(value, "D").item()
+
+
+__all__ = [
+    "CHARGE",
+    "CREDIT",
+    "CalendarIndex",
+    "FREQUENCIES",
+    "PAYMENT",
+    "Posting",
+    "RecurringForecast",
+    "SPECIFIC_NUMBER",
+    "ScheduleLine",
+    "UNTIL_END_OF_TERM",
+    "occurrences",
+    "schedule_kind",
+    "schedule_lines",
+]
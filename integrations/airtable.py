@@ -0,0 +1,327 @@
+import asyncio
+import json
+import os
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional, Set, Tuple
+
+from dotenv import load_dotenv
+from pyairtable import Api
+
+from core.logging import logger
+from core.rate_limit import TokenBucket
+
+load_dotenv()
+
+Fields = Dict[str, Any]
+
+CREATE = "create"
+UPDATE = "update"
+UPSERT = "upsert"
+
+
+class _Pending:
+    """One queued record write and the futures of every caller merged into it."""
+
+    __slots__ = ("record_id", "fields", "futures")
+
+    def __init__(self, record_id: Optional[str], fields: Fields):
+        self.record_id = record_id
+        self.fields = dict(fields)
+        self.futures: List[asyncio.Future] = []
+
+
+# (table name, operation, upsert key fields)
+_GroupKey = Tuple[str, str, Tuple[str, ...]]
+
+
+class _BaseQueue:
+    """Pending writes for one Airtable base, grouped by table and operation."""
+
+    def __init__(self, rate_limit: float):
+        self.groups: Dict[_GroupKey, "OrderedDict[Any, _Pending]"] = {}
+        self.bucket = TokenBucket(rate_limit)
+        self.wakeup = asyncio.Event()
+        self.task: Optional[asyncio.Task] = None
+        self.in_flight: Set[Tuple[str, Any]] = set()  # (table, merge key)
+        self.sending: Set[asyncio.Task] = set()
+
+
+class AirtableWriter:
+    """
+    Coalescing write pipeline for Airtable.
+
+    Individual create/update/upsert calls from any coroutine are queued per
+    base and table, merged (repeated updates to one record, or upserts with
+    the same key values, become one write) and flushed as 10-record batch
+    requests through a per-base token bucket. Each call returns a future
+    resolving to the written Airtable record.
+    """
+
+    MAX_BATCH_SIZE = 10  # Records per request accepted by Airtable
+    DEFAULT_RATE_LIMIT = 5.0  # Requests per second per base
+    DEFAULT_LINGER = 0.05  # Seconds to wait for a partial batch to fill up
+
+    def __init__(
+        self,
+        api_key: Optional[str] = None,
+        *,
+        api: Optional[Api] = None,
+        rate_limit: float = DEFAULT_RATE_LIMIT,
+        linger: float = DEFAULT_LINGER,
+        typecast: bool = True,
+    ):
+        """
+        Args:
+            api_key: Airtable personal access token, or AIRTABLE_API_KEY.
+            api: A preconfigured pyairtable `Api` (e.g. pointing at a mock
+                server via `endpoint_url`); `api_key` is ignored when given.
+            rate_limit: Requests per second per base.
+            linger: Seconds a partial batch waits for more records before it
+                is flushed; full batches are sent immediately.
+            typecast: Lets Airtable convert string values to field types.
+        """
+        if api is None:
+            api_key = api_key or os.getenv("AIRTABLE_API_KEY")
+            if not api_key:
+                raise ValueError(
+                    "Airtable API key not found. "
+                    "Provide via parameter or AIRTABLE_API_KEY env var"
+                )
+            api = Api(api_key)
+        self.api = api
+        self.rate_limit = rate_limit
+        self.linger = linger
+        self.typecast = typecast
+        self._bases: Dict[str, _BaseQueue] = {}
+        self._closed = False
+
+    # --- Public API ---
+
+    def create(self, base_id: str, table: str, fields: Fields) -> asyncio.Future:
+        """Queues a record creation.
+
+        Returns:
+            A future resolving to the created record.
+        """
+        return self._enqueue(base_id, (table, CREATE, ()), None, None, fields)
+
+    def update(
+        self, base_id: str, table: str, record_id: str, fields: Fields
+    ) -> asyncio.Future:
+        """Queues a partial update, merged with other pending updates of the record.
+
+        Returns:
+            A future resolving to the updated record.
+        """
+        return self._enqueue(base_id, (table, UPDATE, ()), record_id, record_id, fields)
+
+    def upsert(
+        self, base_id: str, table: str, fields: Fields, key_fields: List[str]
+    ) -> asyncio.Future:
+        """Queues an upsert matched on `key_fields`.
+
+        Pending upserts with the same key values are merged into one. Key
+        values are compared by their JSON form, so list (e.g. linked record)
+        and dict values can be keys too.
+
+        Returns:
+            A future resolving to the created or updated record.
+        """
+        group = (table, UPSERT, tuple(sorted(key_fields)))
+        merge_key = tuple(
+            json.dumps(fields.get(name), sort_keys=True, default=str)
+            for name in group[2]
+        )
+        return self._enqueue(base_id, group, merge_key, None, fields)
+
+    async def flush(self) -> None:
+        """Waits until every write queued so far has been sent.
+
+        Raises:
+            Exception: The error that stopped a base's flush task while
+                writes were still queued; those writes fail with it too.
+        """
+        for base_id, queue in list(self._bases.items()):
+            while queue.groups or queue.sending:
+                if queue.groups and queue.task is not None and queue.task.done():
+                    self._fail_queued(base_id, queue)
+                queue.wakeup.set()
+                await asyncio.sleep(self.linger)
+
+    async def close(self) -> None:
+        """Flushes pending writes and stops the per-base flush tasks."""
+        if self._closed:
+            return
+        try:
+            await self.flush()
+        finally:
+            self._closed = True
+            for queue in self._bases.values():
+                if queue.task is not None:
+                    queue.task.cancel()
+            await asyncio.gather(
+                *(q.task for q in self._bases.values() if q.task),
+                return_exceptions=True,
+            )
+
+    # --- Queueing ---
+
+    def _enqueue(
+        self,
+        base_id: str,
+        group: _GroupKey,
+        merge_key: Any,
+        record_id: Optional[str],
+        fields: Fields,
+    ) -> asyncio.Future:
+        if self._closed:
+            raise RuntimeError("AirtableWriter is closed")
+
+        queue = self._bases.get(base_id)
+        if queue is None:
+            queue = self._bases[base_id] = _BaseQueue(self.rate_limit)
+        if queue.task is None or queue.task.done():
+            queue.task = asyncio.create_task(
+                self._run(base_id, queue), name=f"airtable-writer-{base_id}"
+            )
+
+        pending = queue.groups.setdefault(group, OrderedDict())
+        entry = pending.get(merge_key) if merge_key is not None else None
+        if entry is None:
+            entry = _Pending(record_id, fields)
+            # Creates are never merged, so each gets its own key
+            pending[merge_key if merge_key is not None else object()] = entry
+        else:
+            entry.fields.update(fields)
+
+        future = asyncio.get_running_loop().create_future()
+        entry.futures.append(future)
+        queue.wakeup.set()
+        return future
+
+    def _fail_queued(self, base_id: str, queue: _BaseQueue) -> None:
+        """Fails the queued writes of a base whose flush task died, and raises."""
+        task = queue.task
+        error = None if task.cancelled() else task.exception()
+        if error is None:
+            error = RuntimeError(f"Airtable flush task for {base_id} stopped")
+        logger.error(f"Airtable flush task for {base_id} died: {error!r}")
+        for pending in queue.groups.values():
+            for entry in pending.values():
+                for future in entry.futures:
+                    if not future.done():
+                        future.set_exception(error)
+        queue.groups.clear()
+        raise error
+
+    async def _run(self, base_id: str, queue: _BaseQueue) -> None:
+        """Flush loop for one base: collects batches and sends them rate-limited."""
+        while True:
+            await queue.wakeup.wait()
+            queue.wakeup.clear()
+
+            # Lets partial batches fill up, unless one is already full
+            if not any(len(p) >= self.MAX_BATCH_SIZE for p in queue.groups.values()):
+                await asyncio.sleep(self.linger)
+
+            while True:
+                batch = self._take_batch(queue)
+                if batch is None:
+                    break
+                await queue.bucket.acquire()
+                task = asyncio.create_task(self._send(base_id, queue, *batch))
+                queue.sending.add(task)
+                task.add_done_callback(queue.sending.discard)
+
+    def _take_batch(
+        self, queue: _BaseQueue
+    ) -> Optional[Tuple[_GroupKey, List[Tuple[Any, _Pending]]]]:
+        """Pops up to 10 records of one group, skipping records still in flight.
+
+        A record with a request in flight stays queued, so writes to the
+        same record are applied in order.
+        """
+        for group, pending in list(queue.groups.items()):
+            table = group[0]
+            batch = []
+            for merge_key, entry in list(pending.items()):
+                if (table, merge_key) in queue.in_flight:
+                    continue
+                batch.append((merge_key, pending.pop(merge_key)))
+                if len(batch) == self.MAX_BATCH_SIZE:
+                    break
+            if not pending:
+                del queue.groups[group]
+            if batch:
+                for merge_key, _ in batch:
+                    queue.in_flight.add((table, merge_key))
+                return group, batch
+        return None
+
+    async def _send(
+        self,
+        base_id: str,
+        queue: _BaseQueue,
+        group: _GroupKey,
+        batch: List[Tuple[Any, _Pending]],
+    ) -> None:
+        """Sends one batch and resolves its callers' futures."""
+        table_name, operation, key_fields = group
+        table = self.api.table(base_id, table_name)
+        entries = [entry for _, entry in batch]
+        try:
+            if operation == CREATE:
+                records = await asyncio.to_thread(
+                    table.batch_create,
+                    [entry.fields for entry in entries],
+                    typecast=self.typecast,
+                )
+            elif operation == UPDATE:
+                records = await asyncio.to_thread(
+                    table.batch_update,
+                    [{"id": e.record_id, "fields": e.fields} for e in entries],
+                    typecast=self.typecast,
+                )
+            else:
+                result = await asyncio.to_thread(
+                    table.batch_upsert,
+                    [{"fields": entry.fields} for entry in entries],
+                    key_fields=list(key_fields),
+                    typecast=self.typecast,
+                )
+                records = result["records"]
+        except Exception as e:
+            if getattr(getattr(e, "response", None), "status_code", None) == 429:
+                queue.bucket.penalize()
+            logger.error(
+                f"Airtable {operation} of {len(entries)} records "
+                f"in {base_id}/{table_name} failed: {e}"
+            )
+            for entry in entries:
+                for future in entry.futures:
+                    if not future.done():
+                        future.set_exception(e)
+        else:
+            queue.bucket.reward()
+            for entry, record in zip(entries, records):
+                for future in entry.futures:
+                    if not future.done():
+                        future.set_result(record)
+        finally:
+            for merge_key, _ in batch:
+                queue.in_flight.discard((table_name, merge_key))
+            # Records skipped while this batch was in flight can go now
+            if queue.groups:
+                queue.wakeup.set()
+
+    @property
+    def stats(self) -> Dict[str, Dict[str, Any]]:
+        """Per-base queued record counts and rate limiter state."""
+        return {
+            base_id: {
+                "queued": sum(len(p) for p in queue.groups.values()),
+                "in_flight": len(queue.in_flight),
+                **queue.bucket.stats,
+            }
+            for base_id, queue in self._bases.items()
+        }
@@ -0,0 +1,360 @@
+import asyncio
+import os
+import random
+import time
+from typing import Any, AsyncIterator, Dict, List, Optional
+
+import httpx
+from dotenv import load_dotenv
+
+from core.config import env_number
+from core.logging import logger
+from core.rate_limit import TokenBucket, parse_retry_after
+
+load_dotenv()
+
+
+class BuildiumClient:
+    # --- Class constants ---
+    BASE_URL = "https://api.buildium.com/v1"
+
+    # Offset-paginated list endpoints used by the sync jobs
+    PROPERTIES = "/rentals"
+    UNITS = "/rentals/units"
+    OWNERS = "/rentals/owners"
+    LEASES = "/leases"
+    TENANTS = "/leases/tenants"
+    TRANSACTIONS = "/leases/transactions"
+    BILLS = "/bills"
+    GL_ACCOUNTS = "/glaccounts"
+    VENDORS = "/vendors"
+
+    # --- Pagination defaults ---
+    MAX_PAGE_SIZE = 1000  # Largest `limit` accepted by list endpoints
+    DEFAULT_PAGE_CONCURRENCY = 8
+
+    # --- Rate limiting and retry defaults (overridable via params or env vars) ---
+    DEFAULT_RATE_LIMIT = 10.0  # Requests per second across the account
+    DEFAULT_MAX_RETRIES = 5
+    BACKOFF_BASE = 0.5
+    BACKOFF_MAX = 30.0
+    RETRYABLE_STATUSES = frozenset({429, 500, 502, 503, 504})
+
+    # --- Token settings ---
+    TOKEN_EXPIRY_BUFFER = 60  # Tokens this close to expiry are treated as expired
+
+    def __init__(
+        self,
+        client_id: Optional[str] = None,
+        client_secret: Optional[str] = None,
+        *,
+        base_url: Optional[str] = None,
+        token_url: Optional[str] = None,
+        rate_limit: Optional[float] = None,
+        endpoint_rate_limit: Optional[float] = None,
+        page_concurrency: Optional[int] = None,
+        max_retries: Optional[int] = None,
+        max_connections: int = 20,
+        transport: Optional[httpx.AsyncBaseTransport] = None,
+    ):
+        """
+        Creates a Buildium client backed by a pooled, long-lived httpx client.
+
+        Buildium's API authenticates every request with the client ID and
+        secret headers. When `token_url` is set, the credentials are instead
+        exchanged for an OAuth client-credentials bearer token, which is
+        cached until shortly before it expires.
+
+        Args:
+            client_id: API client ID, or BUILDIUM_CLIENT_ID.
+            client_secret: API client secret, or BUILDIUM_CLIENT_SECRET.
+            base_url: API root, or BUILDIUM_BASE_URL (e.g. a local mock server).
+            token_url: OAuth token endpoint, or BUILDIUM_TOKEN_URL.
+            rate_limit: Requests per second across all endpoints, or
+                BUILDIUM_RATE_LIMIT.
+            endpoint_rate_limit: Requests per second per endpoint, or
+                BUILDIUM_ENDPOINT_RATE_LIMIT; defaults to `rate_limit`.
+            page_concurrency: Pages fetched at once per list pull, or
+                BUILDIUM_PAGE_CONCURRENCY.
+            max_retries: Retries for 429, 5xx and transport errors.
+            max_connections: Maximum number of concurrent connections.
+            transport: Optional custom transport (e.g. `httpx.MockTransport`).
+        """
+        self.client_id = client_id or os.getenv("BUILDIUM_CLIENT_ID")
+        self.client_secret = client_secret or os.getenv("BUILDIUM_CLIENT_SECRET")
+        if not self.client_id or not self.client_secret:
+            raise ValueError(
+                "Buildium credentials not found. Provide via parameters or "
+                "BUILDIUM_CLIENT_ID and BUILDIUM_CLIENT_SECRET env vars"
+            )
+        self.token_url = token_url or os.getenv("BUILDIUM_TOKEN_URL")
+
+        self.rate_limit = rate_limit or env_number(
+            "BUILDIUM_RATE_LIMIT", self.DEFAULT_RATE_LIMIT
+        )
+        self.endpoint_rate_limit = endpoint_rate_limit or env_number(
+            "BUILDIUM_ENDPOINT_RATE_LIMIT", self.rate_limit
+        )
+        self.page_concurrency = page_concurrency or env_number(
+            "BUILDIUM_PAGE_CONCURRENCY", self.DEFAULT_PAGE_CONCURRENCY
+        )
+        self.max_retries = (
+            max_retries
+            if max_retries is not None
+            else env_number("BUILDIUM_MAX_RETRIES", self.DEFAULT_MAX_RETRIES)
+        )
+
+        self.client = httpx.AsyncClient(
+            base_url=base_url or os.getenv("BUILDIUM_BASE_URL") or self.BASE_URL,
+            timeout=30.0,
+            limits=httpx.Limits(
+                max_connections=max_connections,
+                max_keepalive_connections=max_connections,
+            ),
+            transport=transport,
+        )
+
+        # Account-wide limiter plus one limiter per endpoint, created lazily
+        self._limiter = TokenBucket(self.rate_limit)
+        self._endpoint_limiters: Dict[str, TokenBucket] = {}
+
+        # OAuth token cache: {"token": "...", "expires_at": 123456.78}
+        self._token: Optional[Dict[str, Any]] = None
+        self._token_lock = asyncio.Lock()
+
+    async def close(self) -> None:
+        """Closes the pooled HTTP connections. Safe to call more than once."""
+        if not self.client.is_closed:
+            await self.client.aclose()
+
+    # --- Authentication ---
+
+    async def _auth_headers(self) -> Dict[str, str]:
+        """Returns the headers authenticating a request."""
+        if not self.token_url:
+            return {
+                "x-buildium-client-id": self.client_id,
+                "x-buildium-client-secret": self.client_secret,
+            }
+        return {"Authorization": f"Bearer {await self.ensure_token()}"}
+
+    async def ensure_token(self) -> str:
+        """
+        Gets a valid OAuth access token, fetching one if the cache is empty
+        or about to expire. Concurrent callers share a single token request.
+        """
+        if self._token and self._token["expires_at"] > time.time() + (
+            self.TOKEN_EXPIRY_BUFFER
+        ):
+            return self._token["token"]
+
+        async with self._token_lock:
+            # Another caller may have refreshed while we waited for the lock
+            if self._token and self._token["expires_at"] > time.time() + (
+                self.TOKEN_EXPIRY_BUFFER
+            ):
+                return self._token["token"]
+
+            logger.debug("Requesting Buildium access token")
+            response = await self.client.post(
+                self.token_url,
+                data={"grant_type": "client_credentials"},
+                auth=(self.client_id, self.client_secret),
+            )
+            response.raise_for_status()
+            payload = response.json()
+            self._token = {
+                "token": payload["access_token"],
+                "expires_at": time.time() + float(payload.get("expires_in", 3600)),
+            }
+            return self._token["token"]
+
+    # --- Requests ---
+
+    def _endpoint_limiter(self, path: str) -> TokenBucket:
+        """Returns the limiter for an endpoint, sharing one across record IDs."""
+        endpoint = "/".join(
+            "{id}" if segment.isdigit() else segment for segment in path.split("/")
+        )
+        limiter = self._endpoint_limiters.get(endpoint)
+        if limiter is None:
+            limiter = TokenBucket(self.endpoint_rate_limit)
+            self._endpoint_limiters[endpoint] = limiter
+        return limiter
+
+    async def _request(self, method: str, path: str, **kwargs) -> httpx.Response:
+        """
+        Makes a rate-limited, authenticated request with adaptive retries.
+
+        - Waits on the account-wide and per-endpoint token buckets.
+        - On 429, honors Retry-After and slows both buckets down.
+        - On 5xx and transport errors, backs off exponentially with jitter.
+        - Raises for any other error status, or once retries run out.
+        """
+        endpoint_limiter = self._endpoint_limiter(path)
+        extra_headers = kwargs.pop("headers", {})
+        attempt = 0
+        while True:
+            await self._limiter.acquire()
+            await endpoint_limiter.acquire()
+            headers = {**extra_headers, **await self._auth_headers()}
+
+            try:
+                response = await self.client.request(
+                    method, path, headers=headers, **kwargs
+                )
+            except httpx.TransportError as e:
+                if attempt == self.max_retries:
+                    logger.error(f"Buildium {method} {path} failed: {e}")
+                    raise
+                logger.warning(f"Buildium {method} {path} transport error: {e}")
+                await asyncio.sleep(self._backoff(attempt))
+                attempt += 1
+                continue
+
+            if response.status_code not in self.RETRYABLE_STATUSES:
+                self._limiter.reward()
+                endpoint_limiter.reward()
+                response.raise_for_status()
+                return response
+
+            if attempt == self.max_retries:
+                logger.error(
+                    f"Buildium {method} {path} still failing after "
+                    f"{self.max_retries} retries: {response.status_code}"
+                )
+                response.raise_for_status()
+
+            retry_after = parse_retry_after(response.headers.get("Retry-After"))
+            if response.status_code == 429:
+                self._limiter.penalize(retry_after)
+                endpoint_limiter.penalize(retry_after)
+            delay = retry_after if retry_after is not None else self._backoff(attempt)
+            logger.warning(
+                f"Buildium {method} {path} returned {response.status_code}, "
+                f"retrying in {delay:.2f}s"
+            )
+            await asyncio.sleep(delay)
+            attempt += 1
+
+    def _backoff(self, attempt: int) -> float:
+        """Exponential backoff with full jitter."""
+        return random.uniform(0, min(self.BACKOFF_MAX, self.BACKOFF_BASE * 2**attempt))
+
+    async def get(self, path: str, params: Optional[Dict[str, Any]] = None) -> Any:
+        """Makes a GET request and returns the decoded JSON body."""
+        response = await self._request("GET", path, params=params)
+        return response.json()
+
+    # --- Pagination ---
+
+    async def iter_pages(
+        self,
+        path: str,
+        params: Optional[Dict[str, Any]] = None,
+        page_size: int = MAX_PAGE_SIZE,
+    ) -> AsyncIterator[List[Dict[str, Any]]]:
+        """
+        Yields every page of an offset-paginated list endpoint.
+
+        - Fetches the first page, reading the total from `X-Total-Count`.
+        - Then requests all remaining offsets concurrently (bounded by
+          `page_concurrency` and the rate limiters), yielding pages as they
+          complete, so page order is not preserved.
+        - Without `X-Total-Count`, falls back to walking pages in order
+          until a short page.
+
+        Args:
+            path: List endpoint, e.g. `BuildiumClient.LEASES`.
+            params: Extra query parameters (filters).
+            page_size: Records per request (at most 1000).
+
+        Yields:
+            Lists of records, one per page.
+        """
+        page_size = min(page_size, self.MAX_PAGE_SIZE)
+        params = dict(params or {})
+
+        async def fetch(offset: int) -> httpx.Response:
+            return await self._request(
+                "GET", path, params={**params, "limit": page_size, "offset": offset}
+            )
+
+        first = await fetch(0)
+        page = first.json()
+        yield page
+
+        total = first.headers.get("X-Total-Count")
+        if total is None:
+            offset = len(page)
+            while len(page) == page_size:
+                page = (await fetch(offset)).json()
+                offset += len(page)
+                yield page
+            return
+
+        offsets = range(page_size, int(total), page_size)
+        if not offsets:
+            return
+        semaphore = asyncio.Semaphore(self.page_concurrency)
+
+        async def fetch_bounded(offset: int) -> List[Dict[str, Any]]:
+            async with semaphore:
+                return (await fetch(offset)).json()
+
+        tasks = [asyncio.create_task(fetch_bounded(offset)) for offset in offsets]
+        try:
+            for next_page in asyncio.as_completed(tasks):
+                yield await next_page
+        finally:
+            # Stops outstanding fetches if the caller bails out early or one fails
+            for task in tasks:
+                task.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
+
+    async def iter_records(
+        self,
+        path: str,
+        params: Optional[Dict[str, Any]] = None,
+        page_size: int = MAX_PAGE_SIZE,
+    ) -> AsyncIterator[Dict[str, Any]]:
+        """Yields the records of every page of a list endpoint (unordered)."""
+        async for page in self.iter_pages(path, params, page_size):
+            for record in page:
+                yield record
+
+    async def list_all(
+        self, path: str, params: Optional[Dict[str, Any]] = None
+    ) -> List[Dict[str, Any]]:
+        """Collects every record of a list endpoint."""
+        return [record async for record in self.iter_records(path, params)]
+
+    # --- Resources ---
+
+    def iter_properties(self, **filters) -> AsyncIterator[List[Dict[str, Any]]]:
+        """Yields pages of rental properties."""
+        return self.iter_pages(self.PROPERTIES, filters)
+
+    def iter_leases(self, **filters) -> AsyncIterator[List[Dict[str, Any]]]:
+        """Yields pages of leases (e.g. `propertyids=[...]`, `leasestatuses=...`)."""
+        return self.iter_pages(self.LEASES, filters)
+
+    def iter_transactions(self, **filters) -> AsyncIterator[List[Dict[str, Any]]]:
+        """Yields pages of lease transactions."""
+        return self.iter_pages(self.TRANSACTIONS, filters)
+
+    def iter_bills(self, **filters) -> AsyncIterator[List[Dict[str, Any]]]:
+        """Yields pages of bills."""
+        return self.iter_pages(self.BILLS, filters)
+
+    def iter_gl_accounts(self, **filters) -> AsyncIterator[List[Dict[str, Any]]]:
+        """Yields pages of general ledger accounts."""
+        return self.iter_pages(self.GL_ACCOUNTS, filters)
+
+    @property
+    def rate_limit_stats(self) -> Dict[str, Dict[str, float]]:
+        """Rate limiter state for the account and each endpoint used."""
+        stats = {"account": self._limiter.stats}
+        for path, limiter in self._endpoint_limiters.items():
+            stats[path] = limiter.stats
+        return stats
@@ -1,11 +1,18 @@
 import httpx
 import os
 import asyncio
+import importlib.util
+import json
 import time
-from typing import Optional, Dict, Any
+import uuid
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from datetime import timezone
+from typing import AsyncIterator, Optional, Dict, Any, List, Tuple
 from google.oauth2 import service_account
 from google.auth.transport.requests import Request
 from dotenv import load_dotenv
+from core.config import env_number
 from core.logging import logger
 
 load_dotenv()
@@ -14,9 +21,65 @@ load_dotenv()
 class GmailClient:
     # --- Class constants ---
     BASE_URL = "https://www.googleapis.com/gmail/v1"
+    BATCH_URL = "https://www.googleapis.com/batch/gmail/v1"
     SCOPES = ["https://www.googleapis.com/auth/gmail.readonly"]
 
-    def __init__(self, sa_json_path: Optional[str] = None):
+    # --- Connection pool defaults (overridable via params or env vars) ---
+    DEFAULT_MAX_CONNECTIONS = 100
+    DEFAULT_MAX_KEEPALIVE_CONNECTIONS = 20
+    DEFAULT_KEEPALIVE_EXPIRY = 30.0
+
+    # --- Token refresh settings ---
+    TOKEN_EXPIRY_BUFFER = 60  # Tokens this close to expiry are treated as expired
+    TOKEN_REFRESH_AHEAD = 300  # Tokens this close to expiry refresh in the background
+    DEFAULT_REFRESH_WORKERS = 4
+
+    # --- Message fetch settings ---
+    # Headers requested by the metadata tier: identity fields plus the bulk-mail
+    # markers used to triage newsletters without downloading their bodies.
+    METADATA_HEADERS = [
+        "From",
+        "To",
+        "Subject",
+        "Date",
+        "Message-ID",
+        "List-Unsubscribe",
+        "Precedence",
+    ]
+    MESSAGE_CACHE_SIZE = 1000
+
+    # --- Batch request settings ---
+    MAX_BATCH_SIZE = 100  # Hard limit enforced by the Gmail batch endpoint
+    RETRYABLE_STATUSES = frozenset({429, 500, 502, 503, 504})
+
+    def __init__(
+        self,
+        sa_json_path: Optional[str] = None,
+        *,
+        max_connections: Optional[int] = None,
+        max_keepalive_connections: Optional[int] = None,
+        keepalive_expiry: Optional[float] = None,
+        http2: Optional[bool] = None,
+        transport: Optional[httpx.AsyncBaseTransport] = None,
+        refresh_workers: Optional[int] = None,
+    ):
+        """
+        Creates a Gmail client backed by a pooled, long-lived httpx client.
+
+        The client is meant to be created once per process (see the lifespan
+        hook in `main.py`) so the TLS connections and token cache are reused
+        across webhook deliveries.
+
+        Args:
+            sa_json_path: Path to the service account JSON file.
+            max_connections: Maximum number of concurrent connections.
+            max_keepalive_connections: Maximum number of idle connections kept open.
+            keepalive_expiry: Seconds an idle connection is kept before closing.
+            http2: Enables HTTP/2 when the optional `h2` package is installed.
+            transport: Optional custom transport (e.g. `httpx.MockTransport`).
+            refresh_workers: Size of the thread pool that runs blocking OAuth
+                token refreshes.
+        """
 
         # Load service account JSON file
         sa_json_path = sa_json_path or os.getenv("GMAIL_SERVICE_ACCOUNT_FILE")
@@ -31,58 +94,161 @@ class GmailClient:
             sa_json_path, scopes=self.SCOPES
         )
 
-        # Initialize httpx.AsyncClient
-        self.client = httpx.AsyncClient(base_url=self.BASE_URL, timeout=30.0)
+        # Initialize the pooled httpx.AsyncClient
+        limits = httpx.Limits(
+            max_connections=max_connections
+            or env_number("GMAIL_HTTP_MAX_CONNECTIONS", self.DEFAULT_MAX_CONNECTIONS),
+            max_keepalive_connections=max_keepalive_connections
+            or env_number(
+                "GMAIL_HTTP_MAX_KEEPALIVE_CONNECTIONS",
+                self.DEFAULT_MAX_KEEPALIVE_CONNECTIONS,
+            ),
+            keepalive_expiry=keepalive_expiry
+            or env_number("GMAIL_HTTP_KEEPALIVE_EXPIRY", self.DEFAULT_KEEPALIVE_EXPIRY),
+        )
+        if http2 is None:
+            http2 = os.getenv("GMAIL_HTTP2", "false").lower() in ("1", "true", "yes")
+        if http2 and importlib.util.find_spec("h2") is None:
+            # HTTP/2 needs the optional `h2` package (`httpx[http2]`)
+            logger.warning(
+                "GMAIL_HTTP2 requested but `h2` is not installed; using HTTP/1.1"
+            )
+            http2 = False
+
+        self.client = httpx.AsyncClient(
+            base_url=self.BASE_URL,
+            timeout=30.0,
+            limits=limits,
+            http2=http2,
+            transport=transport,
+        )
 
         # Initialize token cache directory
         # This will store: user_email -> { "token": "...", "expires_at": 123456.78 }
         self.__token_cache: Dict[str, Dict[str, Any]] = {}
 
+        # In-flight refreshes (user_email -> task) so concurrent callers share one
+        self._refresh_tasks: Dict[str, asyncio.Task] = {}
+        self._refresh_executor = ThreadPoolExecutor(
+            max_workers=refresh_workers
+            or env_number("GMAIL_TOKEN_REFRESH_WORKERS", self.DEFAULT_REFRESH_WORKERS),
+            thread_name_prefix="gmail-token-refresh",
+        )
+        self._refresh_stats = {
+            "count": 0,
+            "failures": 0,
+            "total_seconds": 0.0,
+            "max_seconds": 0.0,
+        }
+
+        # Cache of the metadata tier only, evicted least-recently-used. Full
+        # payloads can be megabytes each and are not worth holding on to.
+        # (user_email, message_id) -> metadata message
+        self._metadata_cache: "OrderedDict[Tuple[str, str], Dict[str, Any]]" = (
+            OrderedDict()
+        )
+
     async def ensure_token(self, user_to_impersonate: str) -> str:
         """
         Gets a valid, non-expired access token for a user
         - Checks if there is a valid token in the cache.
-        - If not found or expired, refreshes the token in a separate thread.
+        - If it is close to expiry, refreshes it in the background and returns
+          the cached token so the hot path never waits on OAuth.
+        - If not found or expired, waits on a single shared refresh per user.
         - Caches the new token and its expiration time
 
         Args:
-            user_to_impersonate (str): _description_
+            user_to_impersonate (str): The email address of the user to act as.
 
         Returns:
-            str: _description_
+            str: A valid access token for the user.
         """
         # --- 1. Check the cache for an existing token ---
         cached_token_info = self.__token_cache.get(user_to_impersonate)
+        now = time.time()
 
-        # Get the current timestamp
         # Add 60 second buffer to avoid network race conditions
-        now = time.time() + 60
-
-        if cached_token_info and cached_token_info["expires_at"] > now:
+        if (
+            cached_token_info
+            and cached_token_info["expires_at"] > now + self.TOKEN_EXPIRY_BUFFER
+        ):
             # --- 2. CACHE HIT: Token found and not expired ---
+            if cached_token_info["expires_at"] <= now + self.TOKEN_REFRESH_AHEAD:
+                # Near expiry: refresh proactively without blocking this caller
+                self._start_refresh(user_to_impersonate)
             return cached_token_info["token"]
 
         # --- 3. CACHE MISS or Expired Token ---
-        # If we're here, we need a new token, and to update the cache
+        # Joins the in-flight refresh for this user, or starts one.
+        # Shielded so one cancelled caller doesn't cancel everyone's refresh.
+        return await asyncio.shield(self._start_refresh(user_to_impersonate))
+
+    @property
+    def token_refresh_stats(self) -> Dict[str, float]:
+        """Token refresh latency metrics (count, failures, avg/max/total seconds)."""
+        stats = dict(self._refresh_stats)
+        stats["avg_seconds"] = (
+            stats["total_seconds"] / stats["count"] if stats["count"] else 0.0
+        )
+        return stats
+
+    def _start_refresh(self, user_to_impersonate: str) -> asyncio.Task:
+        """
+        Returns the in-flight refresh task for a user, starting one if needed.
+        """
+        task = self._refresh_tasks.get(user_to_impersonate)
+        if task is not None and not task.done():
+            return task
+
+        task = asyncio.create_task(self._refresh_token(user_to_impersonate))
+        self._refresh_tasks[user_to_impersonate] = task
+
+        def on_done(done: asyncio.Task) -> None:
+            if self._refresh_tasks.get(user_to_impersonate) is done:
+                del self._refresh_tasks[user_to_impersonate]
+            if not done.cancelled():
+                done.exception()  # Marks background failures as retrieved
 
+        task.add_done_callback(on_done)
+        return task
+
+    async def _refresh_token(self, user_to_impersonate: str) -> str:
+        """
+        Refreshes a user's token on the bounded refresh pool and caches it.
+        """
         # Create a delegated credentials object
         delegated_creds = self.base_credentials.with_subject(user_to_impersonate)
 
         # Refresh Token Asynchronously
         logger.debug(f"Refreshing token for {user_to_impersonate}")
+        loop = asyncio.get_running_loop()
+        started = time.perf_counter()
         try:
-            await asyncio.to_thread(delegated_creds.refresh, Request())
+            await loop.run_in_executor(
+                self._refresh_executor, delegated_creds.refresh, Request()
+            )
         except Exception as e:
             # Handle case where DwD isn't set-up properly, user doesn't exist, etc
+            self._refresh_stats["failures"] += 1
             logger.error(f"Error refreshing token for {user_to_impersonate}: {e}")
             raise ValueError(f"Failed to refresh token: {e}")
+        finally:
+            elapsed = time.perf_counter() - started
+            self._refresh_stats["count"] += 1
+            self._refresh_stats["total_seconds"] += elapsed
+            self._refresh_stats["max_seconds"] = max(
+                self._refresh_stats["max_seconds"], elapsed
+            )
+        logger.debug(f"Refreshed token for {user_to_impersonate} in {elapsed:.3f}s")
 
         # --- 4. Cache new token ---
-        # delegated_creds.expiry is a datetime object which
+        # delegated_creds.expiry is a naive UTC datetime which
         # needs to converted to a standard UNIX timestamp
         new_token_info = {
             "token": delegated_creds.token,
-            "expires_at": delegated_creds.expiry.timestamp(),
+            "expires_at": delegated_creds.expiry.replace(
+                tzinfo=timezone.utc
+            ).timestamp(),
         }
 
         self.__token_cache[user_to_impersonate] = new_token_info
@@ -133,59 +299,290 @@ class GmailClient:
             raise e
 
     async def list_history(
-        self, user_id: str, start_history_id: int, user_to_impersonate: str
+        self,
+        user_id: str,
+        start_history_id: int,
+        user_to_impersonate: str,
+        page_token: Optional[str] = None,
     ) -> Dict[str, Any]:
         """
-        Fetches all history records for a user since a given history ID.
+        Fetches one page of history records for a user since a given history ID.
 
         Args:
             user_id: The user's email address, or "me".
             start_history_id: The ID to start the history search from.
             user_to_impersonate: The email address of the user to act as.
+            page_token: The `nextPageToken` of the previous page, if any.
 
         Returns:
-            A dictionary containing the list of history records.
+            A dictionary containing the page's history records and, when more
+            pages exist, a `nextPageToken`.
         """
+        params = {
+            "startHistoryId": str(start_history_id),
+            "historyTypes": "messageAdded",  # only gets new messages
+        }
+        if page_token:
+            params["pageToken"] = page_token
+
         return await self._request(
             method="GET",
             endpoint=f"/users/{user_id}/history",
             user_to_impersonate=user_to_impersonate,
-            params={
-                "startHistoryId": str(start_history_id),
-                "historyTypes": "messageAdded",  # only gets new messages
-            },
+            params=params,
         )
 
+    async def iter_history(
+        self, user_id: str, start_history_id: int, user_to_impersonate: str
+    ) -> AsyncIterator[Dict[str, Any]]:
+        """
+        Yields every history record since a given history ID, page by page.
+
+        - Follows `nextPageToken` until the last page.
+        - Prefetches the next page while the caller consumes the current one.
+        - Holds at most two pages in memory at a time.
+
+        Args:
+            user_id: The user's email address, or "me".
+            start_history_id: The ID to start the history search from.
+            user_to_impersonate: The email address of the user to act as.
+
+        Yields:
+            Individual history records, in history order.
+        """
+
+        def fetch_page(page_token: Optional[str]) -> asyncio.Task:
+            return asyncio.create_task(
+                self.list_history(
+                    user_id, start_history_id, user_to_impersonate, page_token
+                )
+            )
+
+        next_page: Optional[asyncio.Task] = fetch_page(None)
+        try:
+            while next_page is not None:
+                page = await next_page
+                page_token = page.get("nextPageToken")
+                next_page = fetch_page(page_token) if page_token else None
+                for record in page.get("history", []):
+                    yield record
+        finally:
+            # Stops the prefetch if the caller bails out early
+            if next_page is not None and not next_page.done():
+                next_page.cancel()
+
     async def get_message(
-        self, user_id: str, message_id: str, user_to_impersonate: str
+        self,
+        user_id: str,
+        message_id: str,
+        user_to_impersonate: str,
+        format: str = "full",
     ) -> Dict[str, Any]:
         """
-        Gets a single, full email message object.
+        Gets a single email message object at the requested tier.
+
+        - "full" downloads the whole MIME tree and bodies.
+        - "metadata" downloads only the `METADATA_HEADERS` (no bodies).
+        - Only the metadata tier is cached; full messages are always fetched.
 
         Args:
             user_id: The user's email address, or "me".
             message_id: The ID of the message to fetch.
             user_to_impersonate: The email address of the user to act as.
+            format: The fetch tier, "full" or "metadata".
 
         Returns:
-            A dictionary containing the full message resource.
+            A dictionary containing the message resource.
         """
-        return await self._request(
+        cache_key = (user_to_impersonate, message_id)
+        params: Dict[str, Any] = {"format": format}
+        if format == "metadata":
+            cached = self._metadata_cache.get(cache_key)
+            if cached is not None:
+                self._metadata_cache.move_to_end(cache_key)
+                return cached
+            params["metadataHeaders"] = self.METADATA_HEADERS
+
+        message = await self._request(
             method="GET",
             endpoint=f"/users/{user_id}/messages/{message_id}",
             user_to_impersonate=user_to_impersonate,
-            params={"format": "full"},  # Request the full email payload
+            params=params,
+        )
+
+        if format == "metadata":
+            self._cache_metadata(user_to_impersonate, message_id, message)
+        return message
+
+    def _cache_metadata(
+        self, user_to_impersonate: str, message_id: str, message: dict
+    ) -> None:
+        """Stores a message's metadata tier, evicting the LRU messages."""
+        cache_key = (user_to_impersonate, message_id)
+        self._metadata_cache[cache_key] = message
+        self._metadata_cache.move_to_end(cache_key)
+        while len(self._metadata_cache) > self.MESSAGE_CACHE_SIZE:
+            self._metadata_cache.popitem(last=False)
+
+    async def get_message_metadata(
+        self, user_id: str, message_id: str, user_to_impersonate: str
+    ) -> Dict[str, Any]:
+        """
+        Gets a message's headers only (the cheap first fetch tier).
+
+        Args:
+            user_id: The user's email address, or "me".
+            message_id: The ID of the message to fetch.
+            user_to_impersonate: The email address of the user to act as.
+
+        Returns:
+            A dictionary containing the message resource with payload headers
+            but no body data.
+        """
+        return await self.get_message(
+            user_id, message_id, user_to_impersonate, format="metadata"
         )
 
+    async def get_messages_batch(
+        self,
+        message_ids: List[str],
+        user_to_impersonate: str,
+        user_id: str = "me",
+        format: str = "full",
+        batch_size: int = MAX_BATCH_SIZE,
+        max_retries: int = 3,
+    ) -> Dict[str, Dict[str, Any]]:
+        """
+        Gets many messages through the Gmail batch endpoint.
+
+        - Packs up to `batch_size` `messages.get` calls into one multipart/mixed request.
+        - Stream-parses the multipart response back into per-message dicts.
+        - Retries only the sub-requests that failed with a retryable status,
+          and the whole chunk when the batch call itself is throttled (429),
+          fails with a 5xx or cannot reach the server.
+
+        Args:
+            message_ids: The IDs of the messages to fetch.
+            user_to_impersonate: The email address of the user to act as.
+            user_id: The user's email address, or "me".
+            format: The Gmail message format ("full", "metadata", "minimal").
+            batch_size: Sub-requests per HTTP call (at most 100).
+            max_retries: Retry rounds for retryable failures.
+
+        Returns:
+            A dictionary mapping message ID to message resource. Messages that
+            still failed after all retries are logged and left out.
+
+        Raises:
+            httpx.HTTPStatusError: If a batch call fails with a non-retryable
+                status (e.g. 401 or 403).
+        """
+        batch_size = min(batch_size, self.MAX_BATCH_SIZE)
+        params: Dict[str, Any] = {"format": format}
+        if format == "metadata":
+            params["metadataHeaders"] = self.METADATA_HEADERS
+        pending = list(dict.fromkeys(message_ids))
+        results: Dict[str, Dict[str, Any]] = {}
+
+        for attempt in range(max_retries + 1):
+            retry: List[str] = []
+            for start in range(0, len(pending), batch_size):
+                chunk = pending[start : start + batch_size]
+                try:
+                    responses = await self._send_batch(
+                        chunk, user_id, user_to_impersonate, params
+                    )
+                except httpx.HTTPStatusError as e:
+                    if e.response.status_code not in self.RETRYABLE_STATUSES:
+                        raise
+                    logger.warning(f"Batch of {len(chunk)} messages failed: {e}")
+                    retry.extend(chunk)
+                    continue
+                except httpx.TransportError as e:
+                    logger.warning(f"Batch of {len(chunk)} messages failed: {e!r}")
+                    retry.extend(chunk)
+                    continue
+                for msg_id in chunk:
+                    status_code, body = responses.get(msg_id, (0, None))
+                    if status_code == 200:
+                        results[msg_id] = body
+                        if format == "metadata":
+                            self._cache_metadata(user_to_impersonate, msg_id, body)
+                    elif status_code in self.RETRYABLE_STATUSES or status_code == 0:
+                        retry.append(msg_id)
+                    else:
+                        logger.error(
+                            f"Batch get failed for message {msg_id}: {status_code}"
+                        )
+
+            if not retry:
+                break
+            if attempt == max_retries:
+                logger.error(f"Giving up on {len(retry)} messages after retries")
+                break
+
+            # Backs off exponentially before retrying only the failed messages
+            await asyncio.sleep(2**attempt)
+            pending = retry
+
+        return results
+
+    async def _send_batch(
+        self,
+        message_ids: List[str],
+        user_id: str,
+        user_to_impersonate: str,
+        params: Dict[str, Any],
+    ) -> Dict[str, Tuple[int, Optional[Dict[str, Any]]]]:
+        """
+        Sends one multipart/mixed batch and maps each message ID to its
+        (status code, JSON body) pair.
+        """
+        token = await self.ensure_token(user_to_impersonate)
+        boundary = f"batch_{uuid.uuid4().hex}"
+        query = str(httpx.QueryParams(params))
+        paths = [
+            f"/gmail/v1/users/{user_id}/messages/{msg_id}?{query}"
+            for msg_id in message_ids
+        ]
+
+        responses: Dict[str, Tuple[int, Optional[Dict[str, Any]]]] = {}
+        async with self.client.stream(
+            "POST",
+            self.BATCH_URL,
+            content=_build_batch_body(paths, boundary),
+            headers={
+                "Authorization": f"Bearer {token}",
+                "Content-Type": f"multipart/mixed; boundary={boundary}",
+            },
+        ) as response:
+            response.raise_for_status()
+            response_boundary = _get_boundary(response.headers["Content-Type"])
+            async for part in _iter_multipart_parts(
+                response.aiter_bytes(), response_boundary
+            ):
+                index, status_code, body = _parse_batch_part(part)
+                if index is not None and index < len(message_ids):
+                    responses[message_ids[index]] = (status_code, body)
+
+        return responses
+
     # --- Cleanup and context management ---
 
     async def close(self):
         """
         Saves and closes the underlying httpx client.
+        Safe to call more than once (e.g. from both the lifespan hook and tests).
         """
+        if self.client.is_closed:
+            return
         logger.debug("Closing httpx client...")
         await self.client.aclose()
+        for task in self._refresh_tasks.values():
+            task.cancel()
+        self._refresh_executor.shutdown(wait=False, cancel_futures=True)
         self.__token_cache.clear()  # Clear the token cache
+        self._metadata_cache.clear()
 
     async def __aenter__(self):
         """
@@ -199,3 +596,90 @@ class GmailClient:
         Cleans up the client when the `async with` block is exited.
         """
         await self.close()
+
+
+# --- Multipart batch helpers ---
+
+
+def _build_batch_body(paths: List[str], boundary: str) -> bytes:
+    """Builds a multipart/mixed body with one `GET` sub-request per path."""
+    parts = [
+        f"--{boundary}\r\n"
+        "Content-Type: application/http\r\n"
+        f"Content-ID: <item{index}>\r\n"
+        "\r\n"
+        f"GET {path}\r\n"
+        "\r\n"
+        for index, path in enumerate(paths)
+    ]
+    parts.append(f"--{boundary}--\r\n")
+    return "".join(parts).encode()
+
+
+def _get_boundary(content_type: str) -> str:
+    """Extracts the boundary parameter from a multipart Content-Type header."""
+    for param in content_type.split(";")[1:]:
+        key, _, value = param.strip().partition("=")
+        if key.lower() == "boundary":
+            return value.strip('"')
+    raise ValueError(f"No multipart boundary in Content-Type: {content_type}")
+
+
+async def _iter_multipart_parts(
+    chunks: AsyncIterator[bytes], boundary: str
+) -> AsyncIterator[bytes]:
+    """
+    Yields the raw bytes of each multipart part as soon as it is complete,
+    without buffering the whole response body.
+    """
+    delimiter = f"--{boundary}".encode()
+    buffer = bytearray()
+    search_from = 0
+    started = False
+    async for chunk in chunks:
+        buffer += chunk
+        while True:
+            index = buffer.find(delimiter, search_from)
+            if index == -1:
+                # Only rescan the tail that could hold a split delimiter
+                search_from = max(0, len(buffer) - len(delimiter) + 1)
+                break
+            if started:
+                yield bytes(buffer[:index]).strip(b"\r\n")
+            started = True
+            del buffer[: index + len(delimiter)]
+            search_from = 0
+            if buffer.startswith(b"--"):
+                # Closing delimiter: everything after it is epilogue
+                return
+
+
+def _parse_batch_part(
+    part: bytes,
+) -> Tuple[Optional[int], int, Optional[Dict[str, Any]]]:
+    """
+    Parses one batch response part into (sub-request index, status, JSON body).
+
+    A part is a MIME header block followed by an embedded HTTP response
+    (status line, headers, blank line, body).
+    """
+    part = part.replace(b"\r\n", b"\n")
+    mime_headers, _, http_response = part.partition(b"\n\n")
+
+    index = None
+    for line in mime_headers.split(b"\n"):
+        name, _, value = line.decode().partition(":")
+        if name.strip().lower() == "content-id":
+            # Responses echo the request ID as <response-itemN>
+            content_id = value.strip().strip("<>")
+            index = int(content_id.rsplit("item", 1)[-1])
+
+    head, _, body = http_response.partition(b"\n\n")
+    status_line = head.split(b"\n", 1)[0].decode()
+    status_code = int(status_line.split()[1])
+
+    try:
+        payload = json.loads(body) if body.strip() else None
+    except ValueError:
+        payload = None
+    return index, status_code, payload
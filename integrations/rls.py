@@ -0,0 +1,486 @@
+import asyncio
+import codecs
+import json
+import os
+import random
+import re
+import time
+from datetime import datetime, timezone
+from typing import Any, AsyncIterator, Dict, List, Optional, Sequence, Union
+
+import httpx
+from dotenv import load_dotenv
+
+from core.checkpoints import CheckpointStore
+from core.config import env_number
+from core.logging import logger
+from core.rate_limit import TokenBucket, parse_retry_after
+
+load_dotenv()
+
+# Envelope tokens: complete strings, brackets, or the start of a string that
+# continues in the next chunk
+_ENVELOPE_TOKENS = re.compile(r'"(?:[^"\\]|\\.)*"|[{}\[\]]|"', re.S)
+_WHITESPACE = re.compile(r"\s*")
+_SEPARATORS = re.compile(r"[\s,]*")
+
+
+class ODataPageParser:
+    """Incremental parser of an OData JSON page.
+
+    Fed the response body chunk by chunk, it returns each entity of the
+    `value` array as soon as its closing brace arrives, so a page is never
+    held in memory as a whole. String annotations of the envelope (such as
+    `@odata.nextLink`, before or after `value`) are collected in
+    `annotations`.
+    """
+
+    def __init__(self):
+        self.annotations: Dict[str, Any] = {}
+        self._text = codecs.getincrementaldecoder("utf-8")()
+        self._json = json.JSONDecoder()
+        self._buffer = ""
+        self._pos = 0  # Next unread position in the buffer
+        self._depth = 0
+        self._key: Optional[str] = None  # Last envelope key seen
+        self._in_value = False
+
+    def feed(self, data: bytes) -> List[Dict[str, Any]]:
+        """Consumes a chunk of the body and returns the entities it completed."""
+        self._buffer += self._text.decode(data)
+        items: List[Dict[str, Any]] = []
+        while self._read_items(items) if self._in_value else self._read_envelope():
+            pass
+        # Drops everything consumed; at most one partial entity is kept
+        self._buffer = self._buffer[self._pos :]
+        self._pos = 0
+        return items
+
+    def close(self) -> None:
+        """Checks that the body ended with the envelope closed.
+
+        Raises:
+            ValueError: If the body was truncated or not an OData page.
+        """
+        self._buffer += self._text.decode(b"", final=True)
+        if self._in_value or self._depth or self._buffer[self._pos :].strip():
+            raise ValueError("Truncated or malformed OData response body")
+
+    def _read_items(self, items: List[Dict[str, Any]]) -> bool:
+        """Decodes complete entities; True once the value array is closed."""
+        buffer, pos = self._buffer, self._pos
+        while True:
+            pos = _SEPARATORS.match(buffer, pos).end()
+            if pos == len(buffer):
+                self._pos = pos
+                return False
+            if buffer[pos] == "]":
+                self._in_value = False
+                self._depth -= 1
+                self._pos = pos + 1
+                return True
+            try:
+                item, pos_after = self._json.raw_decode(buffer, pos)
+            except json.JSONDecodeError:
+                # The entity continues in the next chunk
+                self._pos = pos
+                return False
+            items.append(item)
+            pos = pos_after
+
+    def _read_envelope(self) -> bool:
+        """Walks the envelope; True once the value array is entered."""
+        buffer = self._buffer
+        for match in _ENVELOPE_TOKENS.finditer(buffer, self._pos):
+            token = match.group()
+            if token == '"':
+                self._pos = match.start()
+                return False
+            if token[0] == '"':
+                if self._depth != 1:
+                    continue
+                after = _WHITESPACE.match(buffer, match.end()).end()
+                if after == len(buffer):
+                    # Key or value is only known once the next character arrives
+                    self._pos = match.start()
+                    return False
+                if buffer[after] == ":":
+                    self._key = json.loads(token)
+                elif self._key is not None:
+                    self.annotations[self._key] = json.loads(token)
+            elif token in "{[":
+                self._depth += 1
+                if token == "[" and self._depth == 2 and self._key == "value":
+                    self._in_value = True
+                    self._pos = match.end()
+                    return True
+            else:
+                self._depth -= 1
+        self._pos = len(buffer)
+        return False
+
+
+def parse_timestamp(value: str) -> int:
+    """Converts an OData DateTimeOffset to UTC epoch microseconds."""
+    moment = datetime.fromisoformat(value.replace("Z", "+00:00"))
+    if moment.tzinfo is None:
+        moment = moment.replace(tzinfo=timezone.utc)
+    delta = moment - datetime(1970, 1, 1, tzinfo=timezone.utc)
+    return (delta.days * 86_400 + delta.seconds) * 1_000_000 + delta.microseconds
+
+
+def format_timestamp(micros: int) -> str:
+    """Formats UTC epoch microseconds as an OData DateTimeOffset literal."""
+    moment = datetime.fromtimestamp(micros / 1_000_000, tz=timezone.utc)
+    return moment.isoformat(timespec="microseconds").replace("+00:00", "Z")
+
+
+class RLSClient:
+    """Async client for the CoreLogic Trestle RESO Web API (OData).
+
+    Queries are async iterators over entities. Pages are streamed and parsed
+    entity by entity, and `@odata.nextLink` is followed until exhausted, so
+    memory stays bounded by one entity rather than one page or result set.
+    """
+
+    # --- Class constants ---
+    BASE_URL = "https://api-trestle.corelogic.com/trestle/odata"
+    TOKEN_URL = "https://api-trestle.corelogic.com/trestle/oidc/connect/token"
+
+    # RESO resources
+    PROPERTY = "Property"
+    MEMBER = "Member"
+    OFFICE = "Office"
+    MEDIA = "Media"
+    OPEN_HOUSE = "OpenHouse"
+
+    MODIFICATION_TIMESTAMP = "ModificationTimestamp"
+
+    # --- Paging and rate limiting defaults (overridable via params or env vars) ---
+    DEFAULT_PAGE_SIZE = 1000  # `$top` per request; Trestle caps JSON pages at 1000
+    DEFAULT_RATE_LIMIT = 2.0  # Requests per second
+    DEFAULT_MAX_RETRIES = 5
+    BACKOFF_BASE = 0.5
+    BACKOFF_MAX = 30.0
+    RETRYABLE_STATUSES = frozenset({429, 500, 502, 503, 504})
+
+    # --- Token settings ---
+    TOKEN_EXPIRY_BUFFER = 60  # Tokens this close to expiry are treated as expired
+
+    def __init__(
+        self,
+        client_id: Optional[str] = None,
+        client_secret: Optional[str] = None,
+        *,
+        base_url: Optional[str] = None,
+        token_url: Optional[str] = None,
+        scope: str = "api",
+        page_size: Optional[int] = None,
+        rate_limit: Optional[float] = None,
+        max_retries: Optional[int] = None,
+        checkpoint_store: Optional[CheckpointStore] = None,
+        max_connections: int = 10,
+        transport: Optional[httpx.AsyncBaseTransport] = None,
+    ):
+        """
+        Creates a Trestle client backed by a pooled, long-lived httpx client.
+
+        Requests carry an OAuth client-credentials bearer token, cached until
+        shortly before it expires and refreshed once if a request is rejected
+        with 401.
+
+        Args:
+            client_id: API client ID, or RLS_CLIENT_ID.
+            client_secret: API client secret, or RLS_CLIENT_SECRET.
+            base_url: OData service root, or RLS_BASE_URL (e.g. a local fake
+                server).
+            token_url: OAuth token endpoint, or RLS_TOKEN_URL.
+            scope: OAuth scope requested with the token.
+            page_size: `$top` of the first request, or RLS_PAGE_SIZE.
+            rate_limit: Requests per second, or RLS_RATE_LIMIT.
+            max_retries: Retries for 429, 5xx and transport errors.
+            checkpoint_store: Where `replicate` keeps its high-water marks;
+                kept in memory when omitted.
+            max_connections: Maximum number of concurrent connections.
+            transport: Optional custom transport (e.g. `httpx.MockTransport`).
+        """
+        self.client_id = client_id or os.getenv("RLS_CLIENT_ID")
+        self.client_secret = client_secret or os.getenv("RLS_CLIENT_SECRET")
+        if not self.client_id or not self.client_secret:
+            raise ValueError(
+                "RLS credentials not found. Provide via parameters or "
+                "RLS_CLIENT_ID and RLS_CLIENT_SECRET env vars"
+            )
+        self.token_url = token_url or os.getenv("RLS_TOKEN_URL") or self.TOKEN_URL
+        self.scope = scope
+
+        self.page_size = page_size or env_number(
+            "RLS_PAGE_SIZE", self.DEFAULT_PAGE_SIZE
+        )
+        self.rate_limit = rate_limit or env_number(
+            "RLS_RATE_LIMIT", self.DEFAULT_RATE_LIMIT
+        )
+        self.max_retries = (
+            max_retries
+            if max_retries is not None
+            else env_number("RLS_MAX_RETRIES", self.DEFAULT_MAX_RETRIES)
+        )
+        self.checkpoint_store = checkpoint_store
+
+        base_url = base_url or os.getenv("RLS_BASE_URL") or self.BASE_URL
+        self.client = httpx.AsyncClient(
+            # Trailing slash so resource names resolve under the service root
+            base_url=base_url.rstrip("/") + "/",
+            timeout=60.0,
+            limits=httpx.Limits(
+                max_connections=max_connections,
+                max_keepalive_connections=max_connections,
+            ),
+            transport=transport,
+        )
+        self._limiter = TokenBucket(self.rate_limit)
+
+        # OAuth token cache: {"token": "...", "expires_at": 123456.78}
+        self._token: Optional[Dict[str, Any]] = None
+        self._token_lock = asyncio.Lock()
+        # High-water marks when no checkpoint store is given
+        self._marks: Dict[str, int] = {}
+
+    async def close(self) -> None:
+        """Closes the pooled HTTP connections. Safe to call more than once."""
+        if not self.client.is_closed:
+            await self.client.aclose()
+
+    # --- Authentication ---
+
+    async def ensure_token(self, refresh: bool = False) -> str:
+        """
+        Gets a valid OAuth access token, fetching one if the cache is empty,
+        about to expire, or `refresh` is set. Concurrent callers share a
+        single token request.
+        """
+        cached = self._token
+        if (
+            not refresh
+            and cached
+            and cached["expires_at"] > time.time() + self.TOKEN_EXPIRY_BUFFER
+        ):
+            return cached["token"]
+
+        async with self._token_lock:
+            # Another caller may have refreshed while we waited for the lock
+            if self._token and self._token is not cached:
+                return self._token["token"]
+
+            logger.debug("Requesting RLS access token")
+            response = await self.client.post(
+                self.token_url,
+                data={
+                    "grant_type": "client_credentials",
+                    "scope": self.scope,
+                    "client_id": self.client_id,
+                    "client_secret": self.client_secret,
+                },
+            )
+            response.raise_for_status()
+            payload = response.json()
+            self._token = {
+                "token": payload["access_token"],
+                "expires_at": time.time() + float(payload.get("expires_in", 3600)),
+            }
+            return self._token["token"]
+
+    # --- Requests ---
+
+    async def _open(
+        self, url: str, params: Optional[Dict[str, Any]] = None
+    ) -> httpx.Response:
+        """
+        Sends a rate-limited, authenticated GET and returns the response with
+        its body not yet read.
+
+        - On 401, refreshes the token and retries once.
+        - On 429, honors Retry-After and slows the limiter down.
+        - On 5xx and transport errors, backs off exponentially with jitter.
+        - Raises for any other error status, or once retries run out.
+        """
+        attempt = 0
+        refreshed = False
+        while True:
+            await self._limiter.acquire()
+            token = await self.ensure_token()
+            request = self.client.build_request(
+                "GET",
+                url,
+                params=params,
+                headers={
+                    "Authorization": f"Bearer {token}",
+                    "Accept": "application/json",
+                },
+            )
+            try:
+                response = await self.client.send(request, stream=True)
+            except httpx.TransportError as e:
+                if attempt == self.max_retries:
+                    logger.error(f"RLS GET {url} failed: {e}")
+                    raise
+                logger.warning(f"RLS GET {url} transport error: {e}")
+                await asyncio.sleep(self._backoff(attempt))
+                attempt += 1
+                continue
+
+            if response.status_code == 401 and not refreshed:
+                await response.aclose()
+                await self.ensure_token(refresh=True)
+                refreshed = True
+                continue
+            if response.status_code not in self.RETRYABLE_STATUSES:
+                self._limiter.reward()
+                if response.is_error:
+                    await response.aread()
+                    response.raise_for_status()
+                return response
+
+            await response.aclose()
+            if attempt == self.max_retries:
+                logger.error(
+                    f"RLS GET {url} still failing after {self.max_retries} "
+                    f"retries: {response.status_code}"
+                )
+                response.raise_for_status()
+
+            retry_after = parse_retry_after(response.headers.get("Retry-After"))
+            if response.status_code == 429:
+                self._limiter.penalize(retry_after)
+            delay = retry_after if retry_after is not None else self._backoff(attempt)
+            logger.warning(
+                f"RLS GET {url} returned {response.status_code}, "
+                f"retrying in {delay:.2f}s"
+            )
+            await asyncio.sleep(delay)
+            attempt += 1
+
+    def _backoff(self, attempt: int) -> float:
+        """Exponential backoff with full jitter."""
+        return random.uniform(0, min(self.BACKOFF_MAX, self.BACKOFF_BASE * 2**attempt))
+
+    # --- Queries ---
+
+    async def query(
+        self,
+        resource: str,
+        *,
+        select: Optional[Sequence[str]] = None,
+        filter: Optional[str] = None,
+        expand: Optional[Union[str, Sequence[str]]] = None,
+        orderby: Optional[str] = None,
+        top: Optional[int] = None,
+    ) -> AsyncIterator[Dict[str, Any]]:
+        """
+        Yields the entities of an OData query, following `@odata.nextLink`.
+
+        Projection and filtering are pushed to the server; each page is
+        streamed and its entities are yielded as they are parsed.
+
+        Args:
+            resource: Entity set, e.g. `RLSClient.PROPERTY`.
+            select: Fields to return (`$select`).
+            filter: OData filter expression (`$filter`), e.g.
+                "StandardStatus eq 'Active'".
+            expand: Navigation properties to inline (`$expand`), e.g. "Media".
+            orderby: Sort expression (`$orderby`).
+            top: Page size of the first request; defaults to `page_size`.
+        """
+        params: Dict[str, Any] = {"$top": top or self.page_size}
+        if select:
+            params["$select"] = ",".join(select)
+        if filter:
+            params["$filter"] = filter
+        if expand:
+            params["$expand"] = expand if isinstance(expand, str) else ",".join(expand)
+        if orderby:
+            params["$orderby"] = orderby
+
+        url: Optional[str] = resource
+        pages = 0
+        while url:
+            parser = ODataPageParser()
+            response = await self._open(url, params)
+            try:
+                async for chunk in response.aiter_bytes():
+                    for entity in parser.feed(chunk):
+                        yield entity
+                parser.close()
+            finally:
+                await response.aclose()
+            pages += 1
+            # The next link carries the query options itself
+            url, params = parser.annotations.get("@odata.nextLink"), None
+        logger.debug(f"RLS {resource} query done after {pages} page(s)")
+
+    # --- Incremental replication ---
+
+    async def high_water_mark(self, key: str) -> Optional[int]:
+        """Returns the replicated ModificationTimestamp of `key` (epoch micros)."""
+        if self.checkpoint_store is not None:
+            return await self.checkpoint_store.get(key)
+        return self._marks.get(key)
+
+    async def replicate(
+        self,
+        resource: str = PROPERTY,
+        *,
+        select: Optional[Sequence[str]] = None,
+        filter: Optional[str] = None,
+        expand: Optional[Union[str, Sequence[str]]] = None,
+        key: Optional[str] = None,
+    ) -> AsyncIterator[Dict[str, Any]]:
+        """
+        Yields the entities modified since the last completed replication.
+
+        Entities are requested in ModificationTimestamp order, newer than the
+        stored high-water mark (everything on the first run). The mark moves
+        to the newest timestamp seen only once the iterator is exhausted, so
+        a run that fails or is abandoned is repeated in full next time.
+
+        Args:
+            resource: Entity set, e.g. `RLSClient.PROPERTY`.
+            select: Fields to return; ModificationTimestamp is always added.
+            filter: Extra filter, combined with the timestamp condition.
+            expand: Navigation properties to inline.
+            key: Name of the high-water mark; defaults to `resource`, use
+                distinct keys for differently filtered replications.
+        """
+        key = key or resource
+        mark = await self.high_water_mark(key)
+        conditions = [f"({filter})"] if filter else []
+        if mark is not None:
+            conditions.append(
+                f"{self.MODIFICATION_TIMESTAMP} gt {format_timestamp(mark)}"
+            )
+        if select and self.MODIFICATION_TIMESTAMP not in select:
+            select = [*select, self.MODIFICATION_TIMESTAMP]
+
+        newest = mark
+        count = 0
+        async for entity in self.query(
+            resource,
+            select=select,
+            filter=" and ".join(conditions) or None,
+            expand=expand,
+            orderby=f"{self.MODIFICATION_TIMESTAMP} asc",
+        ):
+            modified = entity.get(self.MODIFICATION_TIMESTAMP)
+            if modified:
+                timestamp = parse_timestamp(modified)
+                if newest is None or timestamp > newest:
+                    newest = timestamp
+            count += 1
+            yield entity
+
+        logger.info(f"RLS {key} replication: {count} changed entities")
+        if newest is not None and newest != mark:
+            if self.checkpoint_store is None:
+                self._marks[key] = newest
+            elif not await self.checkpoint_store.advance(key, mark, newest):
+                logger.warning(f"RLS {key} high-water mark was moved by another run")
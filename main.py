@@ -1,15 +1,65 @@
+import os
+from contextlib import asynccontextmanager
+from functools import partial
+
 from fastapi import FastAPI
-from core.logging import setup_logging
+from core.logging import logger, setup_logging
 from api.v1.routers import email
+from core.cache import IdempotencyCache
+from core.checkpoints import SQLiteCheckpointStore
+from core.events import InProcessWorkQueue
+from domains.email.ingestion import process_gmail_webhook
+from integrations.gmail import GmailClient
 
 # Configures application-wide logging before initializing the FastAPI app.
 setup_logging()
 
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """
+    Creates shared resources once per worker and closes them on shutdown.
+
+    Resources are stored on `app.state` and injected into routes through the
+    dependencies in `api/v1/dependencies.py`.
+    """
+    logger.info("Starting up: creating shared GmailClient...")
+    app.state.gmail_client = GmailClient()
+    app.state.gmail_checkpoints = SQLiteCheckpointStore(namespace="gmail_history")
+    app.state.email_dedupe = IdempotencyCache(
+        db_path=os.getenv("IDEMPOTENCY_DB_PATH", "data/idempotency.sqlite3")
+    )
+
+    # Webhook pushes are acknowledged immediately and ingested by these workers.
+    app.state.gmail_queue = InProcessWorkQueue(
+        maxsize=int(os.getenv("GMAIL_QUEUE_MAXSIZE", "1000")),
+        workers=int(os.getenv("GMAIL_QUEUE_WORKERS", "4")),
+        name="gmail",
+    )
+    await app.state.gmail_queue.start(
+        partial(
+            process_gmail_webhook,
+            gmail_client=app.state.gmail_client,
+            checkpoint_store=app.state.gmail_checkpoints,
+            dedupe=app.state.email_dedupe,
+        )
+    )
+    try:
+        yield
+    finally:
+        logger.info("Shutting down: closing shared GmailClient...")
+        await app.state.gmail_queue.stop()
+        await app.state.gmail_client.close()
+        await app.state.gmail_checkpoints.close()
+        app.state.email_dedupe.close()
+
+
 # Initializes the main FastAPI application instance.
 app = FastAPI(
     title="Wonderstreet API",
     description="API for managing agent workflows.",
     version="0.1.0",
+    lifespan=lifespan,
 )
 
 # Registers the email router with all routes available under the /api/v1 prefix.
@@ -23,15 +73,3 @@ async def read_root():
     Root health check endpoint.
     """
     return {"status": "ok", "message": "API is running"}
-
-
-# --- Future Enhancements ---
-# @app.on_event("startup")
-# async def startup_event():
-#     # Creates shared resources (e.g., database pool, GmailClient) using app.state.
-#     pass
-
-# @app.on_event("shutdown")
-# async def shutdown_event():
-#     # Closes shared resources created during startup.
-#     pass
@@ -0,0 +1,91 @@
+"""
+Benchmark for the aging engine in domains/property_management/rentals/aging.py.
+
+Feeds a year of monthly rent charges, late fees and (mostly on-time)
+payments for 20,000 leases through AgingEngine, then times the day
+rollover, portfolio totals and delinquency queries, and checks the
+incrementally maintained buckets against a full re-bucket.
+
+Usage: python -m scripts.bench_aging [--leases 20000]
+"""
+
+import argparse
+import random
+import time
+from datetime import date
+
+import numpy as np
+
+from domains.property_management.rentals.aging import AgingEngine
+
+RENT_GL, LATE_FEE_GL, UTILITIES_GL = 4001, 4002, 4003
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--leases", type=int, default=20_000)
+    args = parser.parse_args()
+
+    rng = random.Random(11)
+    engine = AgingEngine(today=date(2025, 12, 31))
+    next_id = 0
+    charges = payments = 0
+
+    started = time.perf_counter()
+    for lease_id in range(1, args.leases + 1):
+        property_id = lease_id % 500 + 1
+        rent = rng.randrange(900, 3000)
+        # Roughly 1 in 10 tenants fall behind, paying only part of the rent
+        behind = rng.random() < 0.1
+        for month in range(1, 13):
+            lines = [{"GLAccountId": RENT_GL, "Amount": rent}]
+            if rng.random() < 0.3:
+                lines.append({"GLAccountId": UTILITIES_GL, "Amount": 85.5})
+            next_id += 1
+            engine.add_charge(
+                lease_id,
+                {"Id": next_id, "Date": date(2025, month, 1), "Lines": lines},
+                property_id=property_id,
+            )
+            charges += 1
+            paid = rent * (rng.uniform(0.3, 0.9) if behind else 1.0)
+            next_id += 1
+            engine.add_transaction(
+                {
+                    "Id": next_id,
+                    "LeaseId": lease_id,
+                    "TransactionTypeEnum": "Payment",
+                    "TotalAmount": round(paid, 2),
+                    "Journal": {
+                        "Lines": [
+                            {"GLAccount": {"id": RENT_GL}, "Amount": round(paid, 2)}
+                        ]
+                    },
+                }
+            )
+            payments += 1
+    ingest_seconds = time.perf_counter() - started
+    print(
+        f"{args.leases:,} leases, {charges:,} charges, {payments:,} payments "
+        f"ingested in {ingest_seconds:.2f} s ({engine.open_items:,} open items)"
+    )
+
+    incremental = engine._buckets[: len(engine)].copy()
+    started = time.perf_counter()
+    engine.rollover(date(2025, 12, 31))
+    print(
+        f"Rollover (re-bucket all leases): {(time.perf_counter() - started) * 1000:.1f} ms"
+    )
+    assert np.array_equal(incremental, engine._buckets[: len(engine)])
+
+    engine.rollover(date(2026, 1, 31))
+    started = time.perf_counter()
+    totals = engine.totals()
+    late = engine.delinquent(min_days=61, min_amount=500)
+    subset = engine.delinquent(property_ids=list(range(1, 51)))
+    query_seconds = time.perf_counter() - started
+    print(
+        f"Portfolio totals + 2 delinquency queries: {query_seconds * 1000:.2f} ms "
+        f"({len(late):,} leases over $500 at 61+ days, "
+        f"total balance ${totals['TotalBalance']:,.2f})"
+    )
@@ -0,0 +1,155 @@
+"""
+Benchmark for bulk decoding in domains/property_management/decoding.py.
+
+Decodes 10k leases (with nested tenants) and 10k transactions four ways:
+json.loads + per-item `Model(**d)`, json.loads + one TypeAdapter call,
+bulk `validate_json` on the raw bytes, and a trusted-mode cache hit.
+
+Usage: python -m scripts.bench_decoding [--count 10000] [--repeat 3]
+"""
+
+import argparse
+import json
+import time
+from typing import Any, Callable, Dict, List
+
+from domains.property_management.decoding import (
+    DecodeCache,
+    decode_list,
+    list_adapter,
+)
+from domains.property_management.rentals import Lease, Transaction
+
+ADDRESS = {
+    "AddressLine1": "123 Main St",
+    "AddressLine2": None,
+    "AddressLine3": None,
+    "City": "Springfield",
+    "State": "IL",
+    "PostalCode": "62701",
+    "Country": "UnitedStates",
+}
+
+
+def tenant(i: int) -> Dict[str, Any]:
+    return {
+        "id": i,
+        "FirstName": "Jane",
+        "LastName": f"Tenant{i}",
+        "Email": f"tenant{i}@example.com",
+        "AlternateEmail": None,
+        "PhoneNumbers": [{"Number": "555-0100", "Type": "Cell"}],
+        "CreatedDateTime": "2024-01-15T10:30:00Z",
+        "EmergencyContact": None,
+        "DateOfBirth": None,
+        "SMSOptInStatus": None,
+        "Address": ADDRESS,
+        "AlternateAddress": None,
+        "MailingPreference": "PrimaryAddress",
+        "Leases": None,
+        "Comment": None,
+        "TaxId": None,
+    }
+
+
+def lease(i: int) -> Dict[str, Any]:
+    return {
+        "Id": i,
+        "PropertyId": i % 1000,
+        "UnitId": i,
+        "UnitNumber": f"{i % 40}B",
+        "LeaseFromDate": "2025-01-01T00:00:00",
+        "LeaseToDate": "2025-12-31T00:00:00",
+        "LeaseType": "Fixed",
+        "LeaseStatus": "Active",
+        "IsEvictionPending": False,
+        "TermType": "Fixed",
+        "RenewalOfferStatus": None,
+        "CurrentTenants": [tenant(i * 2), tenant(i * 2 + 1)],
+        "CurrentNumberOfOccupants": 2,
+        "AccountDetails": {"SecurityDeposit": 1500, "Rent": 1500},
+        "Cosigners": [],
+        "AutomaticallyMoveOutTenants": False,
+        "CreatedDateTime": "2024-12-01T12:00:00Z",
+        "LastUpdatedDateTime": "2025-06-01T12:00:00Z",
+        "MoveOutData": [],
+        "PaymentDueDay": 1,
+        "Tenants": None,
+    }
+
+
+def transaction(i: int) -> Dict[str, Any]:
+    return {
+        "Id": i,
+        "Date": "2025-06-01T00:00:00",
+        "TransactionType": "Payment",
+        "TransactionTypeEnum": "Payment",
+        "TotalAmount": 1500.0,
+        "CheckNumber": None,
+        "LeaseId": i % 5000,
+        "PayeeTenantId": i,
+        "PaymentMethod": "ElectronicPayment",
+        "Journal": {
+            "Memo": None,
+            "Lines": [
+                {
+                    "GLAccount": None,
+                    "Amount": 1500.0,
+                    "IsCashPosting": True,
+                    "ReferenceNumber": None,
+                    "Memo": "Rent",
+                    "PropertyId": i % 1000,
+                    "UnitId": i,
+                }
+            ],
+        },
+    }
+
+
+def bench(name: str, run: Callable[[], List[Any]], repeat: int, count: int) -> None:
+    """Runs `run` `repeat` times and prints the best items/second."""
+    best = float("inf")
+    for _ in range(repeat):
+        started = time.perf_counter()
+        result = run()
+        best = min(best, time.perf_counter() - started)
+        assert len(result) == count
+    print(f"  {name:<34} {count / best:>12,.0f} items/s  ({best * 1000:7.1f} ms)")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--count", type=int, default=10_000)
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    for model, factory in ((Lease, lease), (Transaction, transaction)):
+        payload = json.dumps([factory(i) for i in range(args.count)]).encode()
+        print(f"{model.__name__}: {args.count:,} items, {len(payload) / 1e6:.1f} MB")
+        cache = DecodeCache()
+        decode_list(model, payload, trusted=True, cache=cache)  # Warms the cache
+
+        bench(
+            "json.loads + Model(**d)",
+            lambda: [model(**d) for d in json.loads(payload)],
+            args.repeat,
+            args.count,
+        )
+        bench(
+            "json.loads + adapter.validate_python",
+            lambda: list_adapter(model).validate_python(json.loads(payload)),
+            args.repeat,
+            args.count,
+        )
+        bench(
+            "decode_list (validate_json)",
+            lambda: decode_list(model, payload),
+            args.repeat,
+            args.count,
+        )
+        bench(
+            "decode_list trusted (cache hit)",
+            lambda: decode_list(model, payload, trusted=True, cache=cache),
+            args.repeat,
+            args.count,
+        )
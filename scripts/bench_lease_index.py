@@ -0,0 +1,126 @@
+"""
+Benchmark for the lease term index in domains/property_management/rentals/lease_index.py.
+
+Generates five years of lease history for 1,000 properties (20 units each),
+then compares rent-roll queries (expirations in the next 60 days, occupancy
+per property, vacant units) between scans over the lease dicts and the
+LeaseIndex, and times webhook-style updates.
+
+Usage: python -m scripts.bench_lease_index [--properties 1000] [--units 20]
+"""
+
+import argparse
+import random
+import time
+from collections import defaultdict
+from datetime import datetime, timedelta
+
+import numpy as np
+
+from domains.property_management.rentals.lease_index import LeaseIndex
+
+TODAY = datetime(2026, 6, 15)
+
+
+def make_history(properties: int, units_per_property: int, rng: random.Random):
+    """Back-to-back leases per unit with occasional vacancies, 2022-2027."""
+    units, leases = [], []
+    for property_id in range(1, properties + 1):
+        for number in range(units_per_property):
+            unit_id = property_id * 1000 + number
+            units.append({"Id": unit_id, "PropertyId": property_id})
+            start = datetime(2022, 1, 1) + timedelta(days=rng.randrange(60))
+            while start < datetime(2027, 1, 1):
+                end = start + timedelta(days=rng.choice([180, 365, 365, 730]) - 1)
+                status = (
+                    "Past" if end < TODAY else "Future" if start > TODAY else "Active"
+                )
+                leases.append(
+                    {
+                        "Id": len(leases) + 1,
+                        "PropertyId": property_id,
+                        "UnitId": unit_id,
+                        "LeaseFromDate": start,
+                        "LeaseToDate": end,
+                        "LeaseStatus": status,
+                    }
+                )
+                start = end + timedelta(days=1 + rng.choice([0, 0, 0, 15, 45]))
+    return units, leases
+
+
+def scan(units, leases):
+    """The same queries as plain loops over the lease dicts."""
+    horizon = TODAY + timedelta(days=60)
+    expiring = [
+        lease["Id"]
+        for lease in leases
+        if lease["LeaseStatus"] == "Active" and TODAY <= lease["LeaseToDate"] <= horizon
+    ]
+    occupied = {
+        lease["UnitId"]
+        for lease in leases
+        if lease["LeaseFromDate"] <= TODAY <= lease["LeaseToDate"]
+    }
+    occupancy = defaultdict(int)
+    for unit in units:
+        occupancy[unit["PropertyId"]] += unit["Id"] in occupied
+    vacant = [unit["Id"] for unit in units if unit["Id"] not in occupied]
+    return expiring, occupancy, vacant
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--properties", type=int, default=1000)
+    parser.add_argument("--units", type=int, default=20)
+    args = parser.parse_args()
+
+    rng = random.Random(23)
+    units, leases = make_history(args.properties, args.units, rng)
+
+    started = time.perf_counter()
+    index = LeaseIndex.from_leases(leases, units)
+    build_seconds = time.perf_counter() - started
+    print(
+        f"{len(units):,} units, {len(leases):,} leases; "
+        f"index built in {build_seconds * 1000:.0f} ms"
+    )
+
+    started = time.perf_counter()
+    expected_expiring, expected_occupancy, expected_vacant = scan(units, leases)
+    scan_seconds = time.perf_counter() - started
+
+    started = time.perf_counter()
+    expiring = index.expiring(TODAY, TODAY + timedelta(days=60))
+    properties, occupied, total = index.occupancy(TODAY)
+    vacant = index.vacant_units(TODAY)
+    index_seconds = time.perf_counter() - started
+
+    assert sorted(expiring.tolist()) == sorted(expected_expiring)
+    assert sorted(vacant.tolist()) == sorted(expected_vacant)
+    assert dict(zip(properties.tolist(), occupied.tolist())) == {
+        p: expected_occupancy.get(p, 0) for p in properties.tolist()
+    }
+    print("Expiring in 60 days + occupancy per property + vacant units:")
+    print(f"  scan over lease dicts  {scan_seconds * 1000:8.1f} ms")
+    print(f"  LeaseIndex             {index_seconds * 1000:8.1f} ms")
+
+    # Webhooks: extend 500 expiring leases by a year
+    renewals = [
+        lease for lease in leases if lease["Id"] in set(expiring[:500].tolist())
+    ]
+    started = time.perf_counter()
+    for lease in renewals:
+        index.upsert(
+            {**lease, "LeaseToDate": lease["LeaseToDate"] + timedelta(days=365)}
+        )
+    update_seconds = time.perf_counter() - started
+    started = time.perf_counter()
+    still_expiring = index.expiring(TODAY, TODAY + timedelta(days=60))
+    query_seconds = time.perf_counter() - started
+    assert len(still_expiring) == len(expiring) - len(renewals)
+    print(
+        f"{len(renewals)} renewal webhooks applied in {update_seconds * 1000:.1f} ms; "
+        f"next expiring query {query_seconds * 1000:.2f} ms "
+        f"({len(still_expiring):,} leases)"
+    )
@@ -0,0 +1,129 @@
+"""
+Benchmark for the columnar ledger in domains/property_management/accounting/ledger.py.
+
+Builds a year of synthetic transactions (10k/month across 1,000 properties)
+as pydantic models, then compares memory use and property x GL account
+group-by sums between the object graph and the columnar Ledger.
+
+Usage: python -m scripts.bench_ledger [--transactions 120000]
+"""
+
+import argparse
+import gc
+import random
+import time
+import tracemalloc
+from collections import defaultdict
+from datetime import datetime, timedelta
+from typing import List
+
+from domains.property_management.accounting.ledger import Ledger
+from domains.property_management.rentals import Transaction
+
+GL_ACCOUNTS = list(range(1, 41))
+TYPES = ["Charge", "Payment", "Credit", "Refund"]
+
+
+def make_transactions(count: int) -> List[Transaction]:
+    """Generates Transactions with two to four journal lines each."""
+    rng = random.Random(3)
+    start = datetime(2025, 1, 1)
+    transactions = []
+    for i in range(count):
+        property_id = rng.randrange(1, 1001)
+        lines = [
+            {
+                "GLAccount": {
+                    "id": rng.choice(GL_ACCOUNTS),
+                    "AccountNumber": None,
+                    "Name": None,
+                    "Description": None,
+                    "Type": "Income",
+                    "SubType": None,
+                    "IsDefaultGLAccount": None,
+                    "DefaultAccountName": None,
+                    "IsContraAccount": None,
+                    "IsBankAccount": None,
+                    "CashFlowClassification": None,
+                    "ExcludeFromCashBalance": None,
+                    "SubAccounts": None,
+                    "IsActive": True,
+                    "ParentGLAccountId": None,
+                },
+                "Amount": round(rng.uniform(-2000, 2000), 2),
+                "IsCashPosting": rng.random() < 0.5,
+                "ReferenceNumber": None,
+                "Memo": rng.choice(["Rent", "Late fee", "Repair", None]),
+                "PropertyId": property_id,
+                "UnitId": property_id * 10 + rng.randrange(10),
+            }
+            for _ in range(rng.randint(2, 4))
+        ]
+        transactions.append(
+            Transaction(
+                Id=i,
+                Date=start + timedelta(minutes=rng.randrange(525_600)),
+                TransactionType=None,
+                TransactionTypeEnum=rng.choice(TYPES),
+                TotalAmount=0.0,
+                CheckNumber=None,
+                LeaseId=rng.randrange(5000),
+                PayeeTenantId=None,
+                PaymentMethod=None,
+                Journal={"Memo": None, "Lines": lines},
+            )
+        )
+    return transactions
+
+
+def measure(build):
+    """Returns (result, bytes allocated by `build`)."""
+    gc.collect()
+    tracemalloc.start()
+    result = build()
+    size = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    return result, size
+
+
+def python_group_by(transactions: List[Transaction], start, end):
+    sums = defaultdict(float)
+    for transaction in transactions:
+        if not start <= transaction.Date < end:
+            continue
+        for line in transaction.Journal.Lines:
+            sums[(line.PropertyId, line.GLAccount.id)] += line.Amount
+    return sums
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--transactions", type=int, default=120_000)
+    args = parser.parse_args()
+
+    transactions, model_bytes = measure(lambda: make_transactions(args.transactions))
+    ledger, ledger_bytes = measure(lambda: Ledger.from_transactions(transactions))
+    print(f"{args.transactions:,} transactions, {len(ledger):,} journal lines")
+    print(f"  pydantic object graph  {model_bytes / 1e6:8.1f} MB")
+    print(f"  columnar ledger        {ledger_bytes / 1e6:8.1f} MB")
+
+    start, end = datetime(2025, 3, 1), datetime(2025, 4, 1)
+    started = time.perf_counter()
+    expected = python_group_by(transactions, start, end)
+    loop_seconds = time.perf_counter() - started
+
+    started = time.perf_counter()
+    mask = ledger.mask(start.date(), (end - timedelta(days=1)).date())
+    sums = ledger.sum_by(("property_id", "gl_account_id"), mask).to_dict()
+    ledger_seconds = time.perf_counter() - started
+    assert len(sums) == len(expected)
+
+    print("March sums by property x GL account:")
+    print(f"  python loop over models {loop_seconds * 1000:8.1f} ms")
+    print(f"  ledger mask + sum_by    {ledger_seconds * 1000:8.1f} ms")
+
+    started = time.perf_counter()
+    ledger.upsert(transactions[:1000])
+    print(
+        f"Re-sync of 1,000 transactions {(time.perf_counter() - started) * 1000:.1f} ms"
+    )
@@ -0,0 +1,218 @@
+"""
+Benchmark for the listing media pipeline in domains/listings/media.py.
+
+Serves listing photos from a fake CDN (ETag/Last-Modified validators, 304s,
+per-request latency, chunked bodies) through an httpx mock transport, some
+of them shared between listings under different URLs. Times a cold
+download of every photo, then a refresh after a few photos changed, with
+RESO Media metadata and with bare URLs, and finally fills a store smaller
+than the photo set to exercise LRU eviction.
+
+Usage: python -m scripts.bench_media [--listings 300] [--photos 10] [--latency-ms 10]
+"""
+
+import argparse
+import asyncio
+import hashlib
+import os
+import random
+import tempfile
+import time
+from collections import Counter
+from datetime import datetime, timedelta, timezone
+from email.utils import format_datetime
+from typing import Any, Dict, List, Tuple
+
+import httpx
+
+from core.logging import logger
+from domains.listings.media import MediaPipeline, MediaStore
+
+CDN_URL = "https://media.rls.test"
+CHUNK_SIZE = 16_384
+
+
+class FakeCDN:
+    """Photos by URL, answering conditional GETs like a CDN would."""
+
+    def __init__(self, latency: float):
+        self.latency = latency
+        self.files: Dict[str, Tuple[bytes, str, str]] = {}
+        self.requests = 0
+        self.not_modified = 0
+        self.served = 0
+        self._moment = datetime(2026, 1, 1, tzinfo=timezone.utc)
+
+    def put(self, url: str, body: bytes) -> None:
+        self._moment += timedelta(seconds=1)
+        etag = f'"{hashlib.md5(body).hexdigest()}"'
+        self.files[url] = (body, etag, format_datetime(self._moment, usegmt=True))
+
+    async def handle(self, request: httpx.Request) -> httpx.Response:
+        self.requests += 1
+        await asyncio.sleep(self.latency)
+        body, etag, last_modified = self.files[str(request.url)]
+        headers = {"ETag": etag, "Last-Modified": last_modified}
+        if request.headers.get("If-None-Match") == etag:
+            self.not_modified += 1
+            return httpx.Response(304, headers=headers)
+        self.served += len(body)
+
+        async def chunks():
+            for start in range(0, len(body), CHUNK_SIZE):
+                yield body[start : start + CHUNK_SIZE]
+
+        return httpx.Response(200, headers=headers, content=chunks())
+
+
+def make_media(
+    cdn: FakeCDN, listings: int, photos: int, rng: random.Random
+) -> List[Dict[str, Any]]:
+    """RESO Media records; about 15% reuse another listing's photo bytes."""
+    media: List[Dict[str, Any]] = []
+    bodies: List[bytes] = []
+    for listing in range(listings):
+        for order in range(photos):
+            if bodies and rng.random() < 0.15:
+                body = rng.choice(bodies)
+            else:
+                body = os.urandom(rng.randrange(8_000, 40_000))
+                bodies.append(body)
+            key = f"M{listing:05d}-{order:02d}"
+            url = f"{CDN_URL}/photos/L{listing:05d}/{order}.jpg"
+            cdn.put(url, body)
+            media.append(
+                {
+                    "MediaKey": key,
+                    "ResourceRecordKey": f"L{listing:05d}",
+                    "MediaURL": url,
+                    "Order": order,
+                    "ModificationTimestamp": "2026-01-01T00:00:00Z",
+                }
+            )
+    return media
+
+
+async def refresh(pipeline: MediaPipeline, media) -> Counter:
+    statuses: Counter = Counter()
+    async for result in pipeline.refresh(media):
+        statuses[result.status] += 1
+    return statuses
+
+
+async def run(pipeline: MediaPipeline, media) -> Tuple[Counter, float]:
+    started = time.perf_counter()
+    statuses = await refresh(pipeline, media)
+    return statuses, time.perf_counter() - started
+
+
+def make_pipeline(cdn: FakeCDN, store: MediaStore, concurrency: int) -> MediaPipeline:
+    return MediaPipeline(
+        store,
+        concurrency=concurrency,
+        transport=httpx.MockTransport(cdn.handle),
+    )
+
+
+def reset(cdn: FakeCDN) -> None:
+    cdn.requests = cdn.not_modified = cdn.served = 0
+
+
+async def main(args: argparse.Namespace) -> None:
+    rng = random.Random(31)
+    cdn = FakeCDN(args.latency_ms / 1000)
+    media = make_media(cdn, args.listings, args.photos, rng)
+    total = sum(len(body) for body, _, _ in cdn.files.values())
+    unique = len({etag for _, etag, _ in cdn.files.values()})
+
+    with tempfile.TemporaryDirectory() as tmp:
+        # Bounded concurrency against one request at a time, on a sample
+        sample = media[:200]
+        for concurrency in (1, 16):
+            store = MediaStore(os.path.join(tmp, f"sample-{concurrency}"))
+            pipeline = make_pipeline(cdn, store, concurrency)
+            _, seconds = await run(pipeline, sample)
+            print(
+                f"Cold download of {len(sample)} photos, concurrency "
+                f"{concurrency:>2}: {seconds:.2f} s"
+            )
+            await pipeline.close()
+            store.close()
+
+        store = MediaStore(os.path.join(tmp, "store"))
+        pipeline = make_pipeline(cdn, store, 16)
+        reset(cdn)
+        statuses, seconds = await run(pipeline, media)
+        print(
+            f"Cold refresh: {len(media):,} photos ({total / 1e6:.1f} MB) in "
+            f"{seconds:.2f} s; {store.stats['files']:,} files stored "
+            f"({store.total_bytes / 1e6:.1f} MB), "
+            f"{pipeline.stats['deduplicated']} duplicates not stored again"
+        )
+        assert statuses["new"] == len(media)
+        assert store.stats["files"] == unique
+
+        # 2% of the photos are replaced; 5% get a new timestamp, same bytes
+        for record in rng.sample(media, len(media) * 7 // 100):
+            record["ModificationTimestamp"] = "2026-02-01T00:00:00Z"
+        replaced = rng.sample(media, len(media) * 2 // 100)
+        for record in replaced:
+            cdn.put(record["MediaURL"], os.urandom(rng.randrange(8_000, 40_000)))
+            record["ModificationTimestamp"] = "2026-02-01T00:00:00Z"
+        reset(cdn)
+        statuses, seconds = await run(pipeline, media)
+        print(
+            f"Metadata refresh: {dict(statuses)} in {seconds * 1000:.0f} ms; "
+            f"{cdn.requests} requests ({cdn.not_modified} not modified), "
+            f"{cdn.served / 1e6:.2f} MB downloaded"
+        )
+        assert statuses["changed"] == len(replaced)
+        assert cdn.requests == statuses["changed"] + statuses["unchanged"]
+
+        # Bare URLs are their own keys: the first pass downloads every photo
+        # again but stores no new file, later ones only revalidate
+        urls = [record["MediaURL"] for record in media]
+        stored = store.total_bytes
+        await run(pipeline, urls)
+        assert store.total_bytes == stored
+        reset(cdn)
+        statuses, seconds = await run(pipeline, urls)
+        print(
+            f"URL-only refresh: {cdn.requests:,} conditional requests in "
+            f"{seconds:.2f} s ({cdn.not_modified:,} not modified), "
+            f"{cdn.served / 1e6:.2f} MB downloaded"
+        )
+        assert statuses["unchanged"] == len(media) and cdn.served == 0
+        await pipeline.close()
+        store.close()
+
+        # LRU eviction under a budget of a third of the photo set
+        budget = total // 3
+        store = MediaStore(os.path.join(tmp, "small"), max_bytes=budget)
+        pipeline = make_pipeline(cdn, store, 16)
+        await run(pipeline, media)
+        print(
+            f"Store capped at {budget / 1e6:.1f} MB: {store.stats['files']:,} "
+            f"files ({store.total_bytes / 1e6:.1f} MB) after "
+            f"{store.stats['evictions']:,} evictions"
+        )
+        assert store.total_bytes <= budget
+        on_disk = sum(
+            os.path.getsize(os.path.join(directory, name))
+            for directory, _, names in os.walk(store.root)
+            for name in names
+            if len(name) == 64
+        )
+        assert on_disk == store.total_bytes
+        await pipeline.close()
+        store.close()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--listings", type=int, default=300)
+    parser.add_argument("--photos", type=int, default=10)
+    parser.add_argument("--latency-ms", type=float, default=10.0)
+    args = parser.parse_args()
+    logger.remove()
+    asyncio.run(main(args))
@@ -0,0 +1,153 @@
+"""
+Benchmark for the monthly NOI engine in domains/property_management/accounting/calculations.py.
+
+Builds a GL account tree and a year of synthetic transactions for 500
+properties, times the full property x month computation, then re-syncs one
+month of one property's transactions and times the incremental update
+against a full recompute.
+
+Usage: python -m scripts.bench_noi [--properties 500] [--transactions-per-month 20]
+"""
+
+import argparse
+import random
+import time
+from datetime import date
+from typing import Any, Dict, List
+
+import numpy as np
+
+from domains.property_management.accounting.calculations import (
+    FinancialsEngine,
+    GLRollup,
+)
+from domains.property_management.accounting.ledger import Ledger
+
+
+def gl_account(id: int, type: str, parent: int = None, **fields) -> Dict[str, Any]:
+    return {
+        "id": id,
+        "Type": type,
+        "SubType": fields.get("SubType"),
+        "IsContraAccount": fields.get("IsContraAccount", False),
+        "SubAccounts": fields.get("SubAccounts"),
+        "IsActive": True,
+        "ParentGLAccountId": parent,
+    }
+
+
+def make_accounts() -> List[Dict[str, Any]]:
+    """Top-level accounts per type, each with nested sub-accounts."""
+    accounts = []
+    for root, type in ((1000, "Asset"), (2000, "Liability"), (3000, "Equity")):
+        accounts.append(gl_account(root, type))
+    accounts.append(
+        gl_account(
+            4000,
+            "Income",
+            SubAccounts=[gl_account(4000 + i, None) for i in range(1, 6)],
+        )
+    )
+    accounts.append(gl_account(4100, "Income", IsContraAccount=True))  # Concessions
+    accounts.append(gl_account(5000, "Expense"))
+    accounts.extend(gl_account(5000 + i, None, parent=5000) for i in range(1, 15))
+    accounts.append(gl_account(6000, "Expense", SubType="NonOperatingExpense"))
+    return accounts
+
+
+POSTING_ACCOUNTS = [1000, 2000, 3000, 4100, 6000]
+POSTING_ACCOUNTS += [4000 + i for i in range(1, 6)]
+POSTING_ACCOUNTS += [5000 + i for i in range(1, 15)]
+
+
+def make_transactions(
+    properties: int, per_month: int, rng: random.Random, first_id: int = 0
+) -> List[Dict[str, Any]]:
+    transactions = []
+    for property_id in range(1, properties + 1):
+        for month in range(1, 13):
+            for _ in range(per_month):
+                transactions.append(
+                    make_transaction(
+                        first_id + len(transactions), property_id, month, rng
+                    )
+                )
+    return transactions
+
+
+def make_transaction(
+    id: int, property_id: int, month: int, rng: random.Random
+) -> Dict[str, Any]:
+    lines = [
+        {
+            "GLAccount": {"id": rng.choice(POSTING_ACCOUNTS)},
+            "Amount": round(rng.uniform(10, 2000), 2),
+            "IsCashPosting": True,
+            "Memo": None,
+            "PropertyId": property_id,
+            "UnitId": None,
+        }
+        for _ in range(rng.randint(2, 4))
+    ]
+    return {
+        "Id": id,
+        "Date": date(2025, month, rng.randint(1, 28)),
+        "TransactionTypeEnum": "Charge",
+        "PaymentMethod": None,
+        "LeaseId": None,
+        "Journal": {"Lines": lines},
+    }
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--properties", type=int, default=500)
+    parser.add_argument("--transactions-per-month", type=int, default=20)
+    args = parser.parse_args()
+
+    rng = random.Random(5)
+    rollup = GLRollup.from_accounts(
+        make_accounts(), non_operating_subtypes=["NonOperatingExpense"]
+    )
+    transactions = make_transactions(args.properties, args.transactions_per_month, rng)
+
+    started = time.perf_counter()
+    ledger = Ledger.from_transactions(transactions)
+    load_seconds = time.perf_counter() - started
+    print(
+        f"{args.properties} properties, {len(transactions):,} transactions, "
+        f"{len(ledger):,} journal lines (ledger load {load_seconds:.2f} s)"
+    )
+
+    engine = FinancialsEngine(ledger, rollup)
+    started = time.perf_counter()
+    engine.compute("2025-04", "2025-12")
+    records = engine.records()
+    full_seconds = time.perf_counter() - started
+    print(
+        f"Full compute, {len(records):,} property-months "
+        f"(Apr-Dec, Jan-Mar as opening balances): {full_seconds * 1000:.1f} ms"
+    )
+
+    # Re-sync June of property 7: rewrite its transactions with new amounts
+    june = [
+        make_transaction(t["Id"], 7, 6, rng)
+        for t in transactions
+        if t["Date"].month == 6 and t["Journal"]["Lines"][0]["PropertyId"] == 7
+    ]
+    started = time.perf_counter()
+    cells = engine.update(june)
+    update_seconds = time.perf_counter() - started
+    print(
+        f"Incremental update of {len(june)} transactions, {cells} cell(s): "
+        f"{update_seconds * 1000:.2f} ms"
+    )
+
+    expected = FinancialsEngine(ledger, rollup)
+    started = time.perf_counter()
+    expected.compute("2025-04", "2025-12")
+    print(
+        f"Full recompute after the change: {(time.perf_counter() - started) * 1000:.1f} ms"
+    )
+    assert np.allclose(engine.flows, expected.flows)
+    assert np.allclose(engine.balances, expected.balances)
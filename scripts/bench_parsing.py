@@ -0,0 +1,136 @@
+"""
+Microbenchmark for the Gmail message parser in domains/email/parsing.py.
+
+Parses a synthetic corpus (small plain-text, large HTML, many attachments,
+deeply nested multiparts) and reports parse throughput on a single core.
+
+Usage: python -m scripts.bench_parsing [--seconds 2]
+"""
+
+import argparse
+import base64
+import time
+from typing import Any, Dict, List
+
+from domains.email.parsing import parse_gmail_message
+
+
+def _b64(text: str) -> str:
+    return base64.urlsafe_b64encode(text.encode()).decode().rstrip("=")
+
+
+def _headers(subject: str) -> List[Dict[str, str]]:
+    headers = [
+        {"name": "From", "value": "Jane Tenant <jane@example.com>"},
+        {"name": "To", "value": "leasing@wonder-st.com"},
+        {"name": "Subject", "value": subject},
+        {"name": "Date", "value": "Mon, 6 Oct 2025 09:30:00 -0400"},
+        {"name": "Message-ID", "value": "<abc123@mail.example.com>"},
+    ]
+    headers += [{"name": "Received", "value": f"from relay{i}"} for i in range(8)]
+    return headers
+
+
+def small_message() -> Dict[str, Any]:
+    return {
+        "id": "small",
+        "payload": {
+            "mimeType": "text/plain",
+            "headers": _headers("Leaky faucet in unit 4B"),
+            "body": {"size": 120, "data": _b64("The kitchen faucet is leaking.\n")},
+        },
+    }
+
+
+def large_html_message() -> Dict[str, Any]:
+    html = "<html><body>" + "<p>Weekly market update.</p>" * 8000 + "</body></html>"
+    text = "Weekly market update.\n" * 8000
+    return {
+        "id": "large-html",
+        "payload": {
+            "mimeType": "multipart/alternative",
+            "headers": _headers("Your weekly newsletter"),
+            "parts": [
+                {
+                    "mimeType": "text/plain",
+                    "body": {"size": len(text), "data": _b64(text)},
+                },
+                {
+                    "mimeType": "text/html",
+                    "body": {"size": len(html), "data": _b64(html)},
+                },
+            ],
+        },
+    }
+
+
+def many_attachments_message() -> Dict[str, Any]:
+    attachments = [
+        {
+            "partId": f"1.{i}",
+            "mimeType": "image/jpeg",
+            "filename": f"photo_{i}.jpg",
+            "body": {"size": 250_000, "attachmentId": f"ANGjdJ{i:04d}"},
+        }
+        for i in range(50)
+    ]
+    return {
+        "id": "attachments",
+        "payload": {
+            "mimeType": "multipart/mixed",
+            "headers": _headers("Move-in inspection photos"),
+            "parts": [
+                {
+                    "mimeType": "text/plain",
+                    "body": {"size": 40, "data": _b64("Photos attached.")},
+                },
+                *attachments,
+            ],
+        },
+    }
+
+
+def deeply_nested_message(depth: int = 5000) -> Dict[str, Any]:
+    part: Dict[str, Any] = {
+        "mimeType": "text/plain",
+        "body": {"size": 5, "data": _b64("deep")},
+    }
+    for _ in range(depth):
+        part = {"mimeType": "multipart/mixed", "parts": [part]}
+    part["headers"] = _headers("Deeply nested")
+    return {"id": "nested", "payload": part}
+
+
+def bench(name: str, message: Dict[str, Any], seconds: float, read_body: bool) -> None:
+    """Parses `message` repeatedly for `seconds` and prints messages/second."""
+
+    def run() -> Any:
+        parsed = parse_gmail_message(message)
+        return parsed.text if read_body else parsed.subject
+
+    count = 0
+    started = time.perf_counter()
+    deadline = started + seconds
+    while time.perf_counter() < deadline:
+        for _ in range(50):
+            run()
+        count += 50
+    elapsed = time.perf_counter() - started
+    mode = "parse+body" if read_body else "parse"
+    print(f"{name:<14} {mode:<11} {count / elapsed:>12,.0f} msg/s")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--seconds", type=float, default=2.0)
+    args = parser.parse_args()
+
+    corpus = {
+        "small": small_message(),
+        "large-html": large_html_message(),
+        "attachments": many_attachments_message(),
+        "nested-5000": deeply_nested_message(),
+    }
+    for name, message in corpus.items():
+        bench(name, message, args.seconds, read_body=False)
+        bench(name, message, args.seconds, read_body=True)
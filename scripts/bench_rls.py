@@ -0,0 +1,192 @@
+"""
+Benchmark for the streaming OData client in integrations/rls.py.
+
+Serves a fake Trestle OData API (token endpoint, `$select`/`$filter`/
+`$orderby`/`$top` and `@odata.nextLink` paging, chunked bodies) from an
+httpx mock transport. Times a full replication of 50,000 listings and
+compares its peak memory with decoding whole pages, then modifies a few
+listings and runs the hourly incremental replication.
+
+Usage: python -m scripts.bench_rls [--listings 50000]
+"""
+
+import argparse
+import asyncio
+import json
+import random
+import re
+import time
+import tracemalloc
+from datetime import datetime, timedelta, timezone
+from typing import Any, Dict, List
+from urllib.parse import urlencode
+
+import httpx
+
+from core.logging import logger
+from integrations.rls import RLSClient, parse_timestamp
+
+BASE_URL = "https://rls.test/odata"
+CHUNK_SIZE = 16_384
+
+
+class FakeODataServer:
+    """In-memory Property entity set behind the OData query options used."""
+
+    def __init__(self, listings: int, rng: random.Random):
+        self.rng = rng
+        self.requests = 0
+        self.served = 0
+        start = datetime(2025, 1, 1, tzinfo=timezone.utc)
+        self.entities: List[Dict[str, Any]] = [
+            self._listing(i, start + timedelta(seconds=i * 30)) for i in range(listings)
+        ]
+
+    def _listing(self, i: int, modified: datetime) -> Dict[str, Any]:
+        rng = self.rng
+        return {
+            "ListingKey": f"L{i:07d}",
+            "ListingId": str(100000 + i),
+            "StandardStatus": rng.choice(["Active", "Pending", "Closed"]),
+            "ListPrice": rng.randrange(150_000, 2_000_000, 1000),
+            "BedroomsTotal": rng.randint(1, 6),
+            "BathroomsTotalInteger": rng.randint(1, 4),
+            "LivingArea": rng.randrange(600, 5000),
+            "UnparsedAddress": f"{rng.randint(1, 9999)} Main St",
+            "City": rng.choice(["Austin", "Dallas", "Houston"]),
+            "PostalCode": f"7{rng.randint(1000, 9999)}",
+            "PublicRemarks": 'Bright {corner} unit, "updated" kitchen. ' * 20,
+            "ModificationTimestamp": modified.isoformat().replace("+00:00", "Z"),
+        }
+
+    def touch(self, count: int) -> None:
+        """Modifies `count` random listings one hour after the newest one."""
+        newest = max(parse_timestamp(e["ModificationTimestamp"]) for e in self.entities)
+        moment = datetime.fromtimestamp(newest / 1e6, tz=timezone.utc)
+        for i, entity in enumerate(self.rng.sample(self.entities, count)):
+            entity["ListPrice"] -= 5000
+            modified = moment + timedelta(hours=1, seconds=i)
+            entity["ModificationTimestamp"] = modified.isoformat().replace(
+                "+00:00", "Z"
+            )
+
+    def handle(self, request: httpx.Request) -> httpx.Response:
+        if request.url.path.endswith("/token"):
+            return httpx.Response(
+                200, json={"access_token": "fake", "expires_in": 3600}
+            )
+        assert request.headers["Authorization"] == "Bearer fake"
+        self.requests += 1
+        params = request.url.params
+        entities = self.entities
+        match = re.search(r"ModificationTimestamp gt (\S+)", params.get("$filter", ""))
+        if match:
+            since = parse_timestamp(match.group(1))
+            entities = [
+                e
+                for e in entities
+                if parse_timestamp(e["ModificationTimestamp"]) > since
+            ]
+        if params.get("$orderby", "").startswith("ModificationTimestamp"):
+            entities = sorted(entities, key=lambda e: e["ModificationTimestamp"])
+        top, skip = int(params.get("$top", 1000)), int(params.get("$skip", 0))
+        page = entities[skip : skip + top]
+        if "$select" in params:
+            fields = params["$select"].split(",")
+            page = [{f: e[f] for f in fields} for e in page]
+        self.served += len(page)
+
+        body: Dict[str, Any] = {"@odata.context": f"{BASE_URL}/$metadata#Property"}
+        body["value"] = page
+        if skip + top < len(entities):
+            query = {k: v for k, v in params.items() if k != "$skip"}
+            query["$skip"] = skip + top
+            body["@odata.nextLink"] = f"{BASE_URL}/Property?{urlencode(query)}"
+        encoded = json.dumps(body).encode()
+
+        async def chunks():
+            for start in range(0, len(encoded), CHUNK_SIZE):
+                yield encoded[start : start + CHUNK_SIZE]
+
+        return httpx.Response(200, content=chunks())
+
+
+async def replicate(client: RLSClient, select=None) -> int:
+    count = 0
+    async for _ in client.replicate(RLSClient.PROPERTY, select=select):
+        count += 1
+    return count
+
+
+async def whole_pages(server: FakeODataServer) -> int:
+    """Baseline: decodes each page with response.json() and keeps the list."""
+    async with httpx.AsyncClient(transport=httpx.MockTransport(server.handle)) as http:
+        url = f"{BASE_URL}/Property?$top=1000"
+        entities = []
+        while url:
+            body = (
+                await http.get(url, headers={"Authorization": "Bearer fake"})
+            ).json()
+            entities.extend(body["value"])
+            url = body.get("@odata.nextLink")
+        return len(entities)
+
+
+def measure(make_coroutine):
+    """Returns (result, seconds, peak traced bytes) of a coroutine.
+
+    Time and memory come from separate runs, as tracing allocations slows
+    decoding down several times.
+    """
+    started = time.perf_counter()
+    result = asyncio.run(make_coroutine())
+    seconds = time.perf_counter() - started
+    tracemalloc.start()
+    asyncio.run(make_coroutine())
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return result, seconds, peak
+
+
+def make_client(server: FakeODataServer) -> RLSClient:
+    return RLSClient(
+        "id",
+        "secret",
+        base_url=BASE_URL,
+        token_url=f"{BASE_URL}/token",
+        rate_limit=1000,
+        transport=httpx.MockTransport(server.handle),
+    )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--listings", type=int, default=50_000)
+    args = parser.parse_args()
+    logger.remove()
+
+    server = FakeODataServer(args.listings, random.Random(29))
+    count, seconds, peak = measure(lambda: replicate(make_client(server)))
+    print(
+        f"Full replication: {count:,} listings in {seconds:.2f} s, "
+        f"peak {peak / 1e6:.1f} MB"
+    )
+    collected, seconds, peak = measure(lambda: whole_pages(server))
+    print(
+        f"Whole-page decoding into a list: {collected:,} listings in "
+        f"{seconds:.2f} s, peak {peak / 1e6:.1f} MB"
+    )
+
+    client = make_client(server)
+    asyncio.run(replicate(client))
+    server.touch(250)
+    server.requests = server.served = 0
+    started = time.perf_counter()
+    count = asyncio.run(replicate(client))
+    print(
+        f"Hourly replication: {count} changed listings, {server.requests} "
+        f"request(s), {server.served} entities served in "
+        f"{(time.perf_counter() - started) * 1000:.0f} ms"
+    )
+    assert count == 250
+    assert asyncio.run(replicate(client)) == 0
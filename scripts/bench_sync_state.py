@@ -0,0 +1,108 @@
+"""
+Benchmark for the SQLite sync state repository in core/sync_state.py.
+
+Bulk-upserts 1M records into a fresh database, then measures point lookups,
+100-id batch lookups, Airtable-id reverse lookups and incremental upserts
+against the full table.
+
+Usage: python -m scripts.bench_sync_state [--rows 1000000] [--lookups 10000]
+"""
+
+import argparse
+import asyncio
+import os
+import random
+import statistics
+import tempfile
+import time
+from typing import Iterator, List
+
+from core.sync_state import SQLiteSyncStateRepository, SyncRecord
+
+RESOURCE_TYPES = ["lease", "transaction", "bill", "property"]
+FIELDS = ["Id", "Amount", "Date", "Memo", "Status", "PropertyId", "UnitId"]
+
+
+def make_records(count: int, start: int = 0) -> Iterator[SyncRecord]:
+    """Generates sync records spread over the resource types."""
+    now = time.time()
+    for i in range(start, start + count):
+        yield SyncRecord(
+            resource_type=RESOURCE_TYPES[i % len(RESOURCE_TYPES)],
+            resource_id=str(i),
+            airtable_record_id=f"rec{i:014d}",
+            version="2025-10-06T09:30:00Z",
+            record_hash=f"{i:032x}",
+            field_hashes={name: f"{i:016x}" for name in FIELDS},
+            status="synced",
+            last_seen_at=now,
+            last_synced_at=now,
+        )
+
+
+def report(name: str, samples: List[float]) -> None:
+    """Prints p50/p99/max latency in milliseconds."""
+    samples = sorted(samples)
+    p99 = samples[int(len(samples) * 0.99) - 1]
+    print(
+        f"{name:<28} p50 {statistics.median(samples) * 1000:7.3f} ms"
+        f"  p99 {p99 * 1000:7.3f} ms  max {samples[-1] * 1000:7.3f} ms"
+    )
+
+
+async def main(rows: int, lookups: int) -> None:
+    with tempfile.TemporaryDirectory() as tmp:
+        db_path = os.path.join(tmp, "sync_state.sqlite3")
+        repo = SQLiteSyncStateRepository(db_path)
+        rng = random.Random(42)
+
+        started = time.perf_counter()
+        chunk = 100_000
+        for start in range(0, rows, chunk):
+            await repo.upsert_many(make_records(min(chunk, rows - start), start))
+        elapsed = time.perf_counter() - started
+        print(f"bulk upsert {rows:,} rows        {rows / elapsed:>10,.0f} rows/s")
+        print(f"database size                {os.path.getsize(db_path) / 1e6:.0f} MB")
+
+        samples = []
+        for _ in range(lookups):
+            i = rng.randrange(rows)
+            t = time.perf_counter()
+            record = await repo.get(RESOURCE_TYPES[i % len(RESOURCE_TYPES)], str(i))
+            samples.append(time.perf_counter() - t)
+            assert record is not None
+        report("point lookup", samples)
+
+        samples = []
+        for _ in range(lookups // 100):
+            ids = [str(rng.randrange(rows // 4) * 4) for _ in range(100)]
+            t = time.perf_counter()
+            await repo.get_many("lease", ids)
+            samples.append(time.perf_counter() - t)
+        report("get_many (100 ids)", samples)
+
+        samples = []
+        for _ in range(lookups // 10):
+            i = rng.randrange(rows)
+            t = time.perf_counter()
+            await repo.get_by_airtable_id(f"rec{i:014d}")
+            samples.append(time.perf_counter() - t)
+        report("airtable id lookup", samples)
+
+        samples = []
+        for _ in range(lookups // 100):
+            start = rng.randrange(rows - 1000)
+            t = time.perf_counter()
+            await repo.upsert_many(make_records(1000, start))
+            samples.append(time.perf_counter() - t)
+        report("incremental upsert (1,000)", samples)
+
+        await repo.close()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--rows", type=int, default=1_000_000)
+    parser.add_argument("--lookups", type=int, default=10_000)
+    args = parser.parse_args()
+    asyncio.run(main(args.rows, args.lookups))
@@ -0,0 +1,55 @@
+import pytest
+
+from domains.property_management.address_index import AddressIndex, normalize_unit
+
+PROPERTIES = [
+    {
+        "Id": 1,
+        "Address": {
+            "AddressLine1": "12 No Name Rd",
+            "PostalCode": "10001",
+            "City": "Springfield",
+        },
+    },
+    {"Id": 2, "Address": {"AddressLine1": "40 West Second Street Apt 3"}},
+]
+UNITS = [
+    {"Id": 7, "PropertyId": 1, "UnitNumber": "No. 4"},
+    {"Id": 8, "PropertyId": 2, "UnitNumber": "Apt. #4-B"},
+]
+
+
+@pytest.fixture
+def index():
+    return AddressIndex.build(PROPERTIES, UNITS)
+
+
+@pytest.mark.parametrize(
+    "unit_number, expected",
+    [("Apt. #4-B", "4b"), ("No. 4", "4"), ("no #12", "12"), ("Unit No", "no")],
+)
+def test_normalize_unit(unit_number, expected):
+    assert normalize_unit(unit_number) == expected
+
+
+def test_street_named_no_is_not_cut_at_the_marker(index):
+    (match,) = index.match("The gate at 12 No Name Rd is broken")
+    assert match.property_id == 1
+    assert match.unit_id is None
+
+
+@pytest.mark.parametrize("mention", ["no 4", "No. 4", "no #4", "unit 4"])
+def test_no_followed_by_number_is_a_unit_mention(index, mention):
+    (match,) = index.match(f"Leak at 12 No Name Rd, {mention}")
+    assert match.unit_id == 7
+
+
+def test_abbreviations_and_inline_unit_markers(index):
+    (match,) = index.match("Re: 40 W 2nd St unit 4-B")
+    assert (match.property_id, match.unit_id) == (2, 8)
+
+
+def test_postal_code_and_city_raise_the_score(index):
+    plain = index.match("12 No Name Rd")[0].score
+    full = index.match("12 No Name Rd, Springfield 10001")[0].score
+    assert full > plain
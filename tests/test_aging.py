@@ -0,0 +1,129 @@
+from datetime import date
+
+import pytest
+
+from domains.property_management.rentals.aging import AgingEngine
+
+
+def charge(charge_id, day, *lines):
+    return {
+        "Id": charge_id,
+        "Date": day,
+        "TotalAmount": sum(amount for _, amount in lines),
+        "Lines": [{"GLAccountId": gl, "Amount": amount} for gl, amount in lines],
+    }
+
+
+def payment(transaction_id, amount, gl_account_id=None, lease_id=10, kind="Payment"):
+    lines = []
+    if gl_account_id is not None:
+        lines = [{"GLAccount": {"Id": gl_account_id}, "Amount": amount}]
+    return {
+        "Id": transaction_id,
+        "LeaseId": lease_id,
+        "TransactionTypeEnum": kind,
+        "TotalAmount": amount,
+        "Journal": {"Lines": lines},
+    }
+
+
+def make_engine():
+    engine = AgingEngine(today=date(2026, 4, 30))
+    engine.add_lease({"Id": 10, "PropertyId": 1, "UnitId": 5})
+    engine.add_charge(10, charge(1, date(2026, 1, 1), (4000, 1000.0)))
+    engine.add_charge(10, charge(2, date(2026, 3, 1), (4000, 1000.0), (4100, 50.0)))
+    engine.add_charge(10, charge(3, date(2026, 4, 1), (4000, 1000.0)))
+    return engine
+
+
+def test_charges_are_bucketed_by_age():
+    assert make_engine().buckets(10) == (1000.0, 1050.0, 0.0, 1000.0)
+
+
+def test_payments_pay_down_oldest_items_of_their_gl_account_first():
+    engine = make_engine()
+    assert engine.add_transaction(payment(100, 1500.0, gl_account_id=4000))
+    assert engine.buckets(10) == (1000.0, 550.0, 0.0, 0.0)
+    # Other transaction types, and replays, are ignored
+    assert not engine.add_transaction(payment(100, 1500.0, gl_account_id=4000))
+    assert not engine.add_transaction(payment(101, 10.0, kind="Charge"))
+    assert not engine.add_charge(10, charge(1, date(2026, 1, 1), (4000, 1000.0)))
+    assert engine.buckets(10) == (1000.0, 550.0, 0.0, 0.0)
+
+
+def test_overpayment_becomes_credit_consumed_by_later_charges():
+    engine = make_engine()
+    engine.add_transaction(payment(100, 3100.0))
+    assert engine.buckets(10) == (-50.0, 0.0, 0.0, 0.0)
+    assert engine.open_items == 0
+    engine.add_charge(10, charge(4, date(2026, 4, 30), (4000, 30.0)))
+    assert engine.buckets(10) == (-20.0, 0.0, 0.0, 0.0)
+    engine.add_refund(10, {"Id": 5, "Date": date(2026, 4, 30), "TotalAmount": 25.0})
+    assert engine.buckets(10) == (5.0, 0.0, 0.0, 0.0)
+
+
+def test_rollover_rebuckets_open_items():
+    engine = make_engine()
+    engine.add_transaction(payment(100, 3100.0))
+    engine.add_charge(10, charge(4, date(2026, 4, 1), (4000, 500.0)))
+    engine.add_transaction(payment(101, 20.0))
+    engine.rollover(date(2026, 5, 15))
+    # The credit left over was used up by the new charge
+    assert engine.buckets(10) == (0.0, 430.0, 0.0, 0.0)
+
+    engine = make_engine()
+    engine.rollover(date(2026, 6, 1))
+    assert engine.buckets(10) == (0.0, 0.0, 1000.0, 2050.0)
+
+
+def test_outstanding_balance_and_delinquency():
+    engine = make_engine()
+    engine.add_lease({"Id": 11, "PropertyId": 2, "UnitId": None})
+    engine.add_charge(11, charge(6, date(2026, 2, 15), (4000, 200.0)))
+
+    balance = engine.outstanding_balance(10)
+    assert balance.TotalBalance == 3050.0
+    assert balance.UnitId == 5
+    assert [(b.GLAccountId, b.TotalBalance) for b in balance.Balances] == [
+        (4000, 3000.0),
+        (4100, 50.0),
+    ]
+    assert engine.outstanding_balance(99) is None
+
+    assert engine.delinquent() == [(10, 2050.0), (11, 200.0)]
+    assert engine.delinquent(min_days=91) == [(10, 1000.0)]
+    assert engine.delinquent(min_amount=500, property_ids=[2]) == []
+    assert engine.totals(property_ids=[2])["Balance61To90Days"] == 200.0
+    with pytest.raises(ValueError):
+        engine.delinquent(min_days=45)
+
+
+def test_edited_charges_and_payments_replace_their_earlier_application():
+    engine = make_engine()
+    engine.add_transaction(payment(100, 1500.0, gl_account_id=4000))
+    # The March charge is re-synced with a new amount, then moved to April
+    assert engine.add_charge(10, charge(2, date(2026, 3, 1), (4000, 800.0)))
+    assert engine.buckets(10) == (1000.0, 300.0, 0.0, 0.0)
+    assert engine.add_charge(10, charge(2, date(2026, 4, 15), (4000, 800.0)))
+    assert engine.buckets(10) == (1300.0, 0.0, 0.0, 0.0)
+    assert not engine.add_charge(10, charge(2, date(2026, 4, 15), (4000, 800.0)))
+
+    assert engine.add_transaction(payment(100, 1000.0, gl_account_id=4000))
+    assert engine.buckets(10) == (1800.0, 0.0, 0.0, 0.0)
+    assert engine.open_items == 2
+
+
+def test_charge_moved_to_another_lease_leaves_the_first_one():
+    engine = make_engine()
+    engine.add_charge(11, charge(3, date(2026, 4, 1), (4000, 1000.0)))
+    assert engine.buckets(10) == (0.0, 1050.0, 0.0, 1000.0)
+    assert engine.buckets(11) == (1000.0, 0.0, 0.0, 0.0)
+
+
+def test_payment_lines_pay_their_own_gl_account():
+    engine = make_engine()
+    engine.add_transaction(payment(100, 50.0, gl_account_id=4100))
+    balance = engine.outstanding_balance(10)
+    assert [(b.GLAccountId, b.TotalBalance) for b in balance.Balances] == [
+        (4000, 3000.0)
+    ]
@@ -0,0 +1,103 @@
+import asyncio
+
+import pytest
+
+from integrations.airtable import AirtableWriter
+
+
+class FakeTable:
+    def __init__(self, calls):
+        self.calls = calls
+
+    def batch_create(self, records, typecast):
+        self.calls.append(("create", records))
+        return [{"id": f"rec{i}", "fields": f} for i, f in enumerate(records)]
+
+    def batch_update(self, records, typecast):
+        self.calls.append(("update", records))
+        return [{"id": r["id"], "fields": r["fields"]} for r in records]
+
+    def batch_upsert(self, records, key_fields, typecast):
+        self.calls.append(("upsert", records))
+        return {
+            "records": [
+                {"id": f"rec{i}", "fields": r["fields"]} for i, r in enumerate(records)
+            ]
+        }
+
+
+class FakeApi:
+    def __init__(self):
+        self.calls = []
+
+    def table(self, base_id, name):
+        return FakeTable(self.calls)
+
+
+def make_writer():
+    return AirtableWriter(api=FakeApi(), rate_limit=1000, linger=0.001)
+
+
+def test_updates_to_one_record_are_merged():
+    async def scenario():
+        writer = make_writer()
+        first = writer.update("app1", "Leases", "rec1", {"Rent": 1000})
+        second = writer.update("app1", "Leases", "rec1", {"Status": "Active"})
+        await writer.close()
+        return writer.api.calls, await first, await second
+
+    calls, first, second = asyncio.run(scenario())
+    fields = {"Rent": 1000, "Status": "Active"}
+    assert calls == [("update", [{"id": "rec1", "fields": fields}])]
+    assert first == second == {"id": "rec1", "fields": fields}
+
+
+def test_upserts_merge_on_list_and_dict_key_values():
+    async def scenario():
+        writer = make_writer()
+        key = ["Owners"]
+        writer.upsert("app1", "Owners", {"Owners": ["recA"], "Name": "A"}, key)
+        writer.upsert("app1", "Owners", {"Owners": ["recA"], "Phone": "1"}, key)
+        writer.upsert("app1", "Owners", {"Owners": {"id": 1, "x": 2}}, key)
+        writer.upsert("app1", "Owners", {"Owners": {"x": 2, "id": 1}}, key)
+        writer.upsert("app1", "Owners", {"Owners": ["recB"]}, key)
+        await writer.close()
+        return writer.api.calls
+
+    ((operation, records),) = asyncio.run(scenario())
+    assert operation == "upsert"
+    assert [record["fields"] for record in records] == [
+        {"Owners": ["recA"], "Name": "A", "Phone": "1"},
+        {"Owners": {"x": 2, "id": 1}},
+        {"Owners": ["recB"]},
+    ]
+
+
+def test_creates_are_batched_by_ten():
+    async def scenario():
+        writer = make_writer()
+        futures = [writer.create("app1", "Tasks", {"N": n}) for n in range(25)]
+        await writer.close()
+        return writer.api.calls, await asyncio.gather(*futures)
+
+    calls, records = asyncio.run(scenario())
+    assert [len(batch) for _, batch in calls] == [10, 10, 5]
+    assert [record["fields"]["N"] for record in records] == list(range(25))
+
+
+def test_flush_raises_when_flush_task_died():
+    async def scenario():
+        writer = make_writer()
+
+        def broken(queue):
+            raise KeyError("broken batch")
+
+        writer._take_batch = broken
+        future = writer.create("app1", "Tasks", {"N": 1})
+        with pytest.raises(KeyError, match="broken batch"):
+            await asyncio.wait_for(writer.flush(), timeout=5)
+        with pytest.raises(KeyError):
+            await future
+        await writer.close()
+
+    asyncio.run(scenario())
@@ -0,0 +1,112 @@
+import asyncio
+
+import httpx
+import pytest
+
+from integrations.buildium import BuildiumClient
+
+RECORDS = [{"Id": i} for i in range(25)]
+
+
+def make_client(handler, **kwargs):
+    client = BuildiumClient(
+        "id",
+        "secret",
+        base_url="https://buildium.test/v1",
+        rate_limit=1000,
+        transport=httpx.MockTransport(handler),
+        **kwargs,
+    )
+    client.BACKOFF_BASE = 0.001
+    return client
+
+
+def paged(total_header=True, fail_first=()):
+    requests = []
+    failures = list(fail_first)
+
+    def handler(request):
+        requests.append(request)
+        if failures:
+            return httpx.Response(failures.pop(0))
+        limit = int(request.url.params["limit"])
+        offset = int(request.url.params["offset"])
+        headers = {"X-Total-Count": str(len(RECORDS))} if total_header else {}
+        return httpx.Response(
+            200, json=RECORDS[offset : offset + limit], headers=headers
+        )
+
+    return handler, requests
+
+
+def collect(client, **kwargs):
+    async def scenario():
+        try:
+            pages = [page async for page in client.iter_pages("/leases", **kwargs)]
+        finally:
+            await client.close()
+        return pages
+
+    return asyncio.run(scenario())
+
+
+@pytest.mark.parametrize("total_header", [True, False])
+def test_iter_pages_collects_every_record(total_header):
+    handler, requests = paged(total_header)
+    pages = collect(
+        make_client(handler), params={"leasestatuses": "Active"}, page_size=10
+    )
+    assert sorted(r["Id"] for page in pages for r in page) == list(range(25))
+    assert sorted(int(r.url.params["offset"]) for r in requests) == [0, 10, 20]
+    assert {r.url.params["leasestatuses"] for r in requests} == {"Active"}
+    assert requests[0].headers["x-buildium-client-id"] == "id"
+
+
+def test_retries_server_errors_then_succeeds():
+    handler, requests = paged(fail_first=[503, 429])
+    pages = collect(make_client(handler), page_size=100)
+    assert [len(page) for page in pages] == [25]
+    assert len(requests) == 3
+
+
+def test_gives_up_after_max_retries_and_does_not_retry_client_errors():
+    handler, requests = paged(fail_first=[503] * 3)
+    with pytest.raises(httpx.HTTPStatusError):
+        collect(make_client(handler, max_retries=2))
+    assert len(requests) == 3
+
+    handler, requests = paged(fail_first=[404])
+    with pytest.raises(httpx.HTTPStatusError):
+        collect(make_client(handler))
+    assert len(requests) == 1
+
+
+def test_oauth_token_is_fetched_once_for_concurrent_requests():
+    token_requests = []
+
+    def handler(request):
+        if request.url.path == "/oauth/token":
+            token_requests.append(request)
+            return httpx.Response(200, json={"access_token": "t", "expires_in": 3600})
+        assert request.headers["Authorization"] == "Bearer t"
+        return httpx.Response(200, json={"Id": 1})
+
+    async def scenario():
+        client = make_client(handler, token_url="https://buildium.test/oauth/token")
+        results = await asyncio.gather(*(client.get(f"/leases/{i}") for i in range(5)))
+        stats = client.rate_limit_stats
+        await client.close()
+        return results, stats
+
+    results, stats = asyncio.run(scenario())
+    assert results == [{"Id": 1}] * 5
+    assert len(token_requests) == 1
+    # Record ids share one endpoint limiter
+    assert set(stats) == {"account", "/leases/{id}"}
+
+
+def test_missing_credentials_raise(monkeypatch):
+    monkeypatch.delenv("BUILDIUM_CLIENT_ID", raising=False)
+    monkeypatch.delenv("BUILDIUM_CLIENT_SECRET", raising=False)
+    with pytest.raises(ValueError):
+        BuildiumClient()
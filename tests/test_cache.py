@@ -0,0 +1,78 @@
+import asyncio
+
+from core.cache import IdempotencyCache
+
+
+def test_mark_then_seen():
+    async def scenario():
+        cache = IdempotencyCache()
+        assert not await cache.seen("a")
+        await cache.mark("a")
+        assert await cache.seen("a")
+        return cache.stats
+
+    assert asyncio.run(scenario()) == {
+        "hits": 1,
+        "disk_hits": 0,
+        "misses": 1,
+        "size": 1,
+    }
+
+
+def test_entries_expire_after_ttl():
+    async def scenario():
+        cache = IdempotencyCache(ttl_seconds=0)
+        await cache.mark("a")
+        return await cache.seen("a"), cache.stats["size"]
+
+    assert asyncio.run(scenario()) == (False, 0)
+
+
+def test_least_recently_used_key_is_evicted():
+    async def scenario():
+        cache = IdempotencyCache(max_entries=2)
+        await cache.mark("a")
+        await cache.mark("b")
+        assert await cache.seen("a")  # "b" is now least recently used
+        await cache.mark("c")
+        return [await cache.seen(key) for key in ("a", "b", "c")]
+
+    assert asyncio.run(scenario()) == [True, False, True]
+
+
+def test_disk_tier_survives_restart(tmp_path):
+    db_path = str(tmp_path / "idempotency.sqlite3")
+
+    async def scenario():
+        cache = IdempotencyCache(db_path=db_path)
+        await cache.mark("a")
+        cache.close()
+
+        restarted = IdempotencyCache(max_entries=1, db_path=db_path)
+        try:
+            assert await restarted.seen("a")
+            assert await restarted.seen("a")  # promoted into memory
+            assert not await restarted.seen("b")
+            return restarted.stats
+        finally:
+            restarted.close()
+
+    stats = asyncio.run(scenario())
+    assert stats["disk_hits"] == 1
+    assert stats["hits"] == 2
+    assert stats["misses"] == 1
+
+
+def test_expired_disk_rows_are_ignored(tmp_path):
+    db_path = str(tmp_path / "idempotency.sqlite3")
+
+    async def scenario():
+        cache = IdempotencyCache(ttl_seconds=0, db_path=db_path)
+        try:
+            await cache.mark("a")
+            cache._entries.clear()
+            return await cache.seen("a")
+        finally:
+            cache.close()
+
+    assert asyncio.run(scenario()) is False
@@ -0,0 +1,113 @@
+from datetime import date
+
+import numpy as np
+
+from domains.property_management.accounting.calculations import (
+    ASSET,
+    INCOME,
+    OTHER,
+    FinancialsEngine,
+    GLRollup,
+)
+from domains.property_management.accounting.ledger import Ledger
+
+ACCOUNTS = [
+    {
+        "Id": 4000,
+        "Type": "Income",
+        "SubAccounts": [{"id": 4100, "Type": None, "SubType": "Fees"}, {"id": 4000}],
+    },
+    {"id": 5000, "Type": "Expense", "SubType": "Repairs"},
+    {"id": 5100, "Type": "Expense", "SubType": "MortgageInterest"},
+    {"id": 1000, "Type": "Asset"},
+    {"id": 1010, "ParentGLAccountId": 1000, "IsContraAccount": True},
+]
+
+
+def make_transaction(transaction_id, day, lines):
+    return {
+        "Id": transaction_id,
+        "Date": day,
+        "LeaseId": None,
+        "TransactionTypeEnum": "Charge",
+        "PaymentMethod": None,
+        "Journal": {
+            "Lines": [
+                {
+                    "GLAccount": {"id": gl_account_id},
+                    "UnitId": None,
+                    "PropertyId": property_id,
+                    "Amount": amount,
+                    "IsCashPosting": False,
+                    "Memo": None,
+                }
+                for property_id, gl_account_id, amount in lines
+            ]
+        },
+    }
+
+
+def make_engine():
+    ledger = Ledger.from_transactions(
+        [
+            make_transaction(1, date(2025, 12, 15), [(1, 1000, 500.0)]),
+            make_transaction(2, date(2026, 1, 5), [(1, 4000, 1000.0), (1, 4100, 50.0)]),
+            make_transaction(
+                3, date(2026, 1, 20), [(1, 5000, 200.0), (1, 5100, 300.0)]
+            ),
+            make_transaction(4, date(2026, 2, 1), [(1, 1000, 100.0), (1, 1010, 40.0)]),
+            make_transaction(5, date(2026, 2, 3), [(2, 4000, 700.0), (2, 9999, 5.0)]),
+        ]
+    )
+    rollup = GLRollup.from_accounts(
+        ACCOUNTS, non_operating_subtypes=["mortgageinterest"]
+    )
+    engine = FinancialsEngine(ledger, rollup)
+    engine.compute("2026-01", "2026-02")
+    return engine
+
+
+def test_rollup_inherits_categories_and_flags_contra_accounts():
+    rollup = GLRollup.from_accounts(
+        ACCOUNTS, non_operating_subtypes=["MortgageInterest"]
+    )
+    categories, signs = rollup.lookup(np.array([4100, 5100, 1010, 9999]))
+    # 4100 inherits income, 5100 is left out of NOI, 9999 is unknown
+    assert categories.tolist() == [INCOME, OTHER, ASSET, OTHER]
+    assert signs.tolist() == [1, 1, -1, 1]
+    assert rollup.roots[np.searchsorted(rollup.ids, [4100, 1010])].tolist() == [
+        4000,
+        1000,
+    ]
+
+
+def test_monthly_noi_and_balances():
+    records = {(r.property_id, r.month): r for r in make_engine().records()}
+    january = records[(1, "2026-01")]
+    assert (january.income, january.expense, january.noi) == (1050.0, 200.0, 850.0)
+    assert january.assets == 500.0  # Opening balance from December
+    assert records[(1, "2026-02")].assets == 560.0
+    assert records[(2, "2026-02")].noi == 700.0
+    assert records[(2, "2026-01")].noi == 0.0
+
+
+def test_update_recomputes_only_touched_cells():
+    engine = make_engine()
+    before = engine.flows.copy()
+    cells = engine.update([make_transaction(3, date(2026, 2, 10), [(1, 5000, 250.0)])])
+    assert cells == 2  # Property 1 in January (old lines) and February (new)
+    assert engine.expense[0].tolist() == [0.0, 250.0]
+    assert np.array_equal(engine.flows[1], before[1])
+
+    fresh = FinancialsEngine(engine.ledger, engine.rollup)
+    fresh.compute("2026-01", "2026-02")
+    assert np.array_equal(engine.flows, fresh.flows)
+
+
+def test_update_before_range_moves_opening_balances():
+    engine = make_engine()
+    assert (
+        engine.update([make_transaction(1, date(2025, 12, 15), [(1, 1000, 800.0)])])
+        == 0
+    )
+    assert engine.balances[0, :, ASSET].tolist() == [800.0, 860.0]
@@ -0,0 +1,62 @@
+import asyncio
+
+from core.checkpoints import SQLiteCheckpointStore
+
+
+def test_compare_and_advance(tmp_path):
+    async def scenario():
+        store = SQLiteCheckpointStore(str(tmp_path / "checkpoints.sqlite3"))
+        try:
+            assert await store.get("mailbox") is None
+            assert await store.advance("mailbox", None, 100)
+            assert not await store.advance("mailbox", None, 200)  # already created
+            assert not await store.advance("mailbox", 99, 200)  # stale expectation
+            assert not await store.advance("mailbox", 100, 100)  # not forward
+            assert not await store.advance("mailbox", 100, 50)
+            assert await store.advance("mailbox", 100, 200)
+            return await store.get("mailbox")
+        finally:
+            await store.close()
+
+    assert asyncio.run(scenario()) == 200
+
+
+def test_namespaces_and_restart(tmp_path):
+    db_path = str(tmp_path / "checkpoints.sqlite3")
+
+    async def scenario():
+        gmail = SQLiteCheckpointStore(db_path, namespace="gmail_history")
+        rls = SQLiteCheckpointStore(db_path, namespace="rls")
+        await gmail.advance("key", None, 1)
+        await rls.advance("key", None, 2)
+        await gmail.close()
+        await rls.close()
+
+        reopened = SQLiteCheckpointStore(db_path, namespace="gmail_history")
+        try:
+            return await reopened.get("key")
+        finally:
+            await reopened.close()
+
+    assert asyncio.run(scenario()) == 1
+
+
+def test_concurrent_writers_advance_once_per_value(tmp_path):
+    db_path = str(tmp_path / "checkpoints.sqlite3")
+
+    async def scenario():
+        # Separate stores stand in for separate worker processes
+        stores = [SQLiteCheckpointStore(db_path) for _ in range(4)]
+        await stores[0].advance("mailbox", None, 0)
+        try:
+            for step in range(20):
+                results = await asyncio.gather(
+                    *(store.advance("mailbox", step, step + 1) for store in stores)
+                )
+                assert results.count(True) == 1
+            return await stores[-1].get("mailbox")
+        finally:
+            for store in stores:
+                await store.close()
+
+    assert asyncio.run(scenario()) == 20
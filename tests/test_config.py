@@ -0,0 +1,23 @@
+import pytest
+
+from core.config import env_number
+
+
+@pytest.mark.parametrize(
+    "value, default, expected",
+    [
+        (None, 20, 20),
+        ("", 20, 20),
+        ("8", 20, 8),
+        ("2.5", 10.0, 2.5),
+        ("lots", 20, 20),
+        ("2.5", 20, 20),
+    ],
+)
+def test_env_number(monkeypatch, value, default, expected):
+    if value is None:
+        monkeypatch.delenv("TEST_NUMBER", raising=False)
+    else:
+        monkeypatch.setenv("TEST_NUMBER", value)
+    result = env_number("TEST_NUMBER", default)
+    assert result == expected and type(result) is type(default)
@@ -0,0 +1,89 @@
+from types import SimpleNamespace
+
+import pytest
+
+from domains.property_management.contact_index import (
+    OWNER,
+    TENANT,
+    VENDOR,
+    ContactIndex,
+    ContactMatch,
+    normalize_address,
+)
+
+
+@pytest.mark.parametrize(
+    "address, expected",
+    [
+        ("Jane.Doe+rent@GMail.com", "janedoe@gmail.com"),
+        ("jane.doe@googlemail.com", "janedoe@gmail.com"),
+        (" Bob.Smith+x@Example.com ", "bob.smith@example.com"),
+        ("+tag@example.com", None),
+        ("not-an-address", None),
+        ("", None),
+        (None, None),
+    ],
+)
+def test_normalize_address(address, expected):
+    assert normalize_address(address) == expected
+
+
+@pytest.fixture
+def index():
+    return ContactIndex.build(
+        tenants=[
+            {"Id": 1, "Email": "jane.doe@gmail.com", "AlternateEmail": "jane@work.com"},
+            {"Id": 2, "Email": "family@example.com"},
+        ],
+        owners=[{"Id": 1, "Email": "family@example.com", "AlternateEmail": None}],
+        vendors=[{"Id": 7, "PrimaryEmail": "Plumber@Example.com"}],
+    )
+
+
+def test_resolves_senders(index):
+    assert index.resolve_sender("Jane <JaneDoe+lease@gmail.com>") == [
+        ContactMatch(TENANT, 1)
+    ]
+    assert index.resolve("jane@work.com") == [ContactMatch(TENANT, 1)]
+    assert index.resolve("plumber@example.com") == [ContactMatch(VENDOR, 7)]
+    assert index.resolve("stranger@example.com") == []
+    assert "plumber@example.com" in index
+
+
+def test_shared_addresses_resolve_to_every_entity(index):
+    assert index.resolve("family@example.com") == [
+        ContactMatch(TENANT, 2),
+        ContactMatch(OWNER, 1),
+    ]
+
+
+def test_upsert_replaces_old_addresses(index):
+    index.upsert(TENANT, {"Id": 1, "Email": "jane@new.com"})
+    assert index.resolve("jane.doe@gmail.com") == []
+    assert index.resolve("jane@work.com") == []
+    assert index.resolve("jane@new.com") == [ContactMatch(TENANT, 1)]
+
+
+def test_remove_unlinks_shared_and_single_addresses(index):
+    index.remove(OWNER, 1)
+    assert index.resolve("family@example.com") == [ContactMatch(TENANT, 2)]
+    index.remove(TENANT, 2)
+    assert "family@example.com" not in index
+    assert index.stats == {"entities": 2, "addresses": 3}
+
+
+def test_replace_swaps_in_a_rebuilt_index(index):
+    index.replace(
+        ContactIndex.build(vendors=[{"Id": 9, "PrimaryEmail": "hvac@example.com"}])
+    )
+    assert len(index) == 1
+    assert index.resolve("hvac@example.com") == [ContactMatch(VENDOR, 9)]
+
+
+def test_tenant_models_and_records_without_ids(index):
+    tenant = SimpleNamespace(id=3, Email="model@example.com", AlternateEmail=None)
+    index.upsert_tenant(tenant)
+    index.upsert_owner({"Email": "anonymous@example.com"})
+    index.remove(OWNER, None)
+    assert index.resolve("model@example.com") == [ContactMatch(TENANT, 3)]
+    assert "anonymous@example.com" not in index
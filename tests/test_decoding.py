@@ -0,0 +1,53 @@
+import json
+
+import pytest
+from pydantic import ValidationError
+
+from domains.property_management.decoding import DecodeCache, decode_list, list_adapter
+from domains.property_management.rentals.models import PhoneNumber
+
+PAYLOAD = json.dumps(
+    [{"Number": "555-0100", "Type": "Cell"}, {"Number": "555-0101", "Type": "Home"}]
+).encode()
+
+
+def test_decodes_raw_bytes_in_order():
+    phones = decode_list(PhoneNumber, PAYLOAD)
+    assert [phone.Number for phone in phones] == ["555-0100", "555-0101"]
+    assert decode_list(PhoneNumber, PAYLOAD.decode()) == phones
+
+
+def test_adapter_is_built_once_per_model():
+    assert list_adapter(PhoneNumber) is list_adapter(PhoneNumber)
+
+
+def test_invalid_payload_raises():
+    with pytest.raises(ValidationError):
+        decode_list(PhoneNumber, b'[{"Number": "555-0100"}]')
+
+
+def test_untrusted_decodes_do_not_use_the_cache():
+    cache = DecodeCache()
+    decode_list(PhoneNumber, PAYLOAD, cache=cache)
+    assert cache.stats == {"hits": 0, "misses": 0, "size": 0}
+
+
+def test_trusted_decodes_reuse_models_of_identical_payloads():
+    cache = DecodeCache()
+    first = decode_list(PhoneNumber, PAYLOAD, trusted=True, cache=cache)
+    second = decode_list(PhoneNumber, PAYLOAD, trusted=True, cache=cache)
+    assert second == first and second is not first
+    assert second[0] is first[0]
+    assert cache.stats == {"hits": 1, "misses": 1, "size": 1}
+
+
+def test_cache_evicts_least_recently_used_pages():
+    cache = DecodeCache(max_entries=2)
+    pages = [json.dumps([{"Number": str(i), "Type": "Cell"}]) for i in range(3)]
+    decode_list(PhoneNumber, pages[0], trusted=True, cache=cache)
+    decode_list(PhoneNumber, pages[1], trusted=True, cache=cache)
+    decode_list(PhoneNumber, pages[0], trusted=True, cache=cache)
+    decode_list(PhoneNumber, pages[2], trusted=True, cache=cache)
+    decode_list(PhoneNumber, pages[0], trusted=True, cache=cache)
+    decode_list(PhoneNumber, pages[1], trusted=True, cache=cache)
+    assert cache.stats == {"hits": 2, "misses": 4, "size": 2}
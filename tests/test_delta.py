@@ -0,0 +1,70 @@
+import asyncio
+
+from domains.property_management.delta import (
+    DeltaEngine,
+    InMemoryFingerprintStore,
+    field_hash,
+    fingerprint,
+)
+
+
+def test_field_hash_ignores_key_order():
+    assert field_hash({"a": 1, "b": [1, 2]}) == field_hash({"b": [1, 2], "a": 1})
+    assert field_hash({"a": 1}) != field_hash({"a": 2})
+
+
+def test_record_hash_depends_on_every_field():
+    base = fingerprint({"Rent": 1200, "Status": "Active"})
+    assert base == fingerprint({"Status": "Active", "Rent": 1200})
+    assert base.record_hash != fingerprint({"Rent": 1250, "Status": "Active"})[0]
+
+
+def test_new_changed_and_removed_fields():
+    async def scenario():
+        engine = DeltaEngine(InMemoryFingerprintStore())
+        first = await engine.diff_many(
+            "lease", [(1, {"Rent": 1200, "Status": "Active", "Note": "x"})]
+        )
+        await engine.commit(first)
+        unchanged = await engine.diff(
+            "lease", 1, {"Note": "x", "Rent": 1200, "Status": "Active"}
+        )
+        changed = await engine.diff("lease", "1", {"Rent": 1250, "Status": "Active"})
+        return first, unchanged, changed
+
+    first, unchanged, changed = asyncio.run(scenario())
+    assert first[0].is_new and first[0].resource_id == "1"
+    assert unchanged is None
+    assert not changed.is_new
+    assert changed.changed == {"Rent": 1250}
+    assert changed.removed == ["Note"]
+
+
+def test_uncommitted_deltas_are_reported_again():
+    async def scenario():
+        engine = DeltaEngine(InMemoryFingerprintStore())
+        await engine.diff("lease", 1, {"Rent": 1200})
+        return await engine.diff("lease", 1, {"Rent": 1200})
+
+    assert asyncio.run(scenario()).is_new
+
+
+def test_include_and_exclude_limit_tracked_fields():
+    async def scenario():
+        engine = DeltaEngine(
+            InMemoryFingerprintStore(),
+            include={"lease": ["Rent", "Status", "LastUpdated"]},
+            exclude={"lease": ["LastUpdated"]},
+        )
+        first = await engine.diff(
+            "lease", 1, {"Rent": 1200, "Status": "Active", "LastUpdated": "a", "Id": 1}
+        )
+        await engine.commit([first])
+        touched = await engine.diff(
+            "lease", 1, {"Rent": 1200, "Status": "Active", "LastUpdated": "b", "Id": 2}
+        )
+        return first, touched
+
+    first, touched = asyncio.run(scenario())
+    assert first.changed == {"Rent": 1200, "Status": "Active"}
+    assert touched is None
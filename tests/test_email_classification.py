@@ -0,0 +1,186 @@
+import base64
+import json
+import random
+import re
+
+import pytest
+
+from domains.email.classification import CompiledRules, RuleEngine, _required_literal
+from domains.email.parsing import parse_gmail_message
+
+
+def make_email(subject, body, sender="Jane <jane@example.com>"):
+    return parse_gmail_message(
+        {
+            "id": "1",
+            "payload": {
+                "mimeType": "text/plain",
+                "headers": [
+                    {"name": "Subject", "value": subject},
+                    {"name": "From", "value": sender},
+                ],
+                "body": {"data": base64.urlsafe_b64encode(body.encode()).decode()},
+            },
+        }
+    )
+
+
+def write_rules(path, rules):
+    path.write_text(json.dumps({"rules": rules}))
+
+
+@pytest.mark.parametrize(
+    "pattern, expected",
+    [
+        (r"\bunit\s+#?\d+", ("unit", True)),
+        (r"unit\s+#?\d+", ("unit", False)),
+        (r"\bunit\s*\d+", ("unit", False)),  # "unit5" is one word
+        (r"^invoice #\d+", ("invoice", True)),
+        (r"\s+rent\s+", ("rent", True)),
+        (r"\bcafé\b", ("café", False)),
+        (r"heat+er", ("heat", False)),
+        (r"wo{2}dwork", ("dwork", False)),
+        (r"[]abc]zzzz", ("zzzz", False)),
+        (r"(?P<x>abcd)efg", ("efg", False)),
+        (r"\b(?:apt|unit|suite)\s*\d+", None),
+        (r"abc|defg", None),
+        (r"\d{123}-xx", None),
+        (r"(?i)leak", None),
+        (r"\x41bcd", None),
+    ],
+)
+def test_required_literal(pattern, expected):
+    assert _required_literal(pattern) == expected
+
+
+def test_anchored_regex_rules_fire_exactly_when_they_match():
+    rng = random.Random(5)
+    words = ["".join(rng.choices("abcdefgh", k=rng.randint(3, 6))) for _ in range(300)]
+    shapes = [
+        r"\b{w}\s+#?\d+\b",
+        r"{w}\d",
+        r"\b{w}-{v}\b",
+        r"(?:{w})?{v}s?\b",
+        r"^{w}",
+        r"{w}'s\b",
+        r"\b{w}_{v}",
+    ]
+    patterns = [
+        rng.choice(shapes).format(w=rng.choice(words), v=rng.choice(words))
+        for _ in range(200)
+    ]
+    compiled = CompiledRules(
+        {
+            "rules": [
+                {"name": f"r{i}", "category": "c", "type": "regex", "patterns": [p]}
+                for i, p in enumerate(patterns)
+            ]
+        }
+    )
+    for _ in range(200):
+        pieces = []
+        for _ in range(40):
+            w, v = rng.choice(words), rng.choice(words)
+            pieces.append(
+                rng.choice(
+                    [w, f"{w} #{rng.randint(1, 99)}", f"{w}7", f"{w}-{v}", f"{w}'s"]
+                    + [f"{w}_{v}", f"X{w.upper()}S"]
+                )
+            )
+        text = " ".join(pieces)
+        fired = set()
+        compiled.match("body", text, fired)
+        expected = {
+            i for i, p in enumerate(patterns) if re.search(p, text, re.IGNORECASE)
+        }
+        assert fired == expected
+
+
+def test_classifies_with_keyword_regex_and_domain_rules(tmp_path):
+    path = tmp_path / "rules.json"
+    write_rules(
+        path,
+        [
+            {
+                "name": "leak",
+                "category": "maintenance",
+                "patterns": ["leaking", "no hot water"],
+            },
+            {
+                "name": "unit",
+                "category": "maintenance",
+                "type": "regex",
+                "patterns": [r"\bunit\s+#?\d+"],
+            },
+            {
+                "name": "ours",
+                "category": "internal",
+                "type": "domain",
+                "patterns": ["wonder-st.com"],
+            },
+        ],
+    )
+    engine = RuleEngine(str(path))
+    result = engine.classify(make_email("Unit #4", "The sink is leaking"))
+    assert result.category == "maintenance"
+    assert result.matched_rules == ["leak", "unit"]
+    internal = engine.classify(make_email("hi", "", "a@mail.wonder-st.com"))
+    assert internal.category == "internal"
+    assert engine.classify(make_email("hello", "nothing")).category == "unclassified"
+
+
+def test_keeps_previous_rules_when_file_is_deleted_or_invalid(tmp_path):
+    path = tmp_path / "rules.json"
+    write_rules(
+        path, [{"name": "leak", "category": "maintenance", "patterns": ["leak"]}]
+    )
+    engine = RuleEngine(str(path), reload_interval=0)
+    email = make_email("leak", "")
+
+    path.unlink()
+    assert engine.classify(email).category == "maintenance"
+
+    path.write_text("{not json")
+    assert engine.classify(email).category == "maintenance"
+
+    write_rules(path, [{"name": "spam", "category": "spam", "patterns": ["leak"]}])
+    engine.maybe_reload(force=True)
+    assert engine.classify(email).category == "spam"
+
+
+def test_first_load_of_missing_file_raises(tmp_path):
+    with pytest.raises(FileNotFoundError):
+        RuleEngine(str(tmp_path / "missing.json"))
+
+
+def regex_rules(*patterns):
+    return CompiledRules(
+        {
+            "rules": [
+                {"name": f"r{i}", "category": "c", "type": "regex", "patterns": [p]}
+                for i, p in enumerate(patterns)
+            ]
+        }
+    )
+
+
+def test_overlapping_unanchored_rules_all_fire():
+    compiled = regex_rules(r"\$\d+", r"\$\d+\s*!!", r"\d{3}")
+    fired = set()
+    compiled.match("body", "$500 !!", fired)
+    assert fired == {0, 1, 2}
+
+    fired = set()
+    compiled.match("body", "no amounts here", fired)
+    assert fired == set()
+
+
+def test_backreferences_and_inline_flags_keep_their_meaning():
+    compiled = regex_rules(r"(\d)-\1", r"\$\d+", r"(?s)due.{0,3}now", r"(?P<a>x)y")
+    fired = set()
+    compiled.match("body", "codes 4-4 and 4-5, due\nnow", fired)
+    assert fired == {0, 2}
+
+    fired = set()
+    compiled.match("body", "codes 4-5 only, XY $3", fired)
+    assert fired == {1, 3}
@@ -0,0 +1,265 @@
+import asyncio
+import base64
+import json
+
+import httpx
+import pytest
+
+from api.v1.routers.email import handle_gmail_webhook
+from core.cache import IdempotencyCache
+from core.checkpoints import SQLiteCheckpointStore
+from domains.email.ingestion import (
+    FetchLimiter,
+    fetch_message,
+    needs_full_body,
+    process_gmail_webhook,
+    push_key,
+)
+from domains.email.models import PubSubPushRequest
+
+MAILBOX = "office@example.com"
+
+
+def make_push(history_id, message_id="push-1"):
+    data = json.dumps({"emailAddress": MAILBOX, "historyId": history_id})
+    return PubSubPushRequest.model_validate(
+        {
+            "message": {
+                "data": base64.b64encode(data.encode()).decode(),
+                "messageId": message_id,
+                "publishTime": "2026-01-01T00:00:00Z",
+            },
+            "subscription": "projects/test/subscriptions/gmail",
+        }
+    )
+
+
+class FakeGmail:
+    """History with one page of added messages; `failing` IDs fail to fetch.
+
+    History before `history_error`'s start ID answers with its status code.
+    """
+
+    def __init__(self, message_ids, failing=(), history_error=None):
+        self.message_ids = message_ids
+        self.failing = set(failing)
+        self.history_error = history_error
+        self.fetched = []
+
+    async def iter_history(self, user_id, start_history_id, user_to_impersonate):
+        if self.history_error and start_history_id < self.history_error[0]:
+            request = httpx.Request("GET", "https://gmail.test/history")
+            response = httpx.Response(self.history_error[1], request=request)
+            raise httpx.HTTPStatusError(
+                "History error", request=request, response=response
+            )
+        for offset, message_id in enumerate(self.message_ids, start=1):
+            yield {
+                "id": str(start_history_id + offset),
+                "messagesAdded": [{"message": {"id": message_id}}],
+            }
+
+    async def get_message_metadata(self, user_id, message_id, user_to_impersonate):
+        if message_id in self.failing:
+            raise RuntimeError("Gmail is unavailable")
+        self.fetched.append(message_id)
+        return {
+            "id": message_id,
+            "payload": {
+                "mimeType": "text/plain",
+                "headers": [
+                    {"name": "Subject", "value": f"Message {message_id}"},
+                    {"name": "List-Unsubscribe", "value": "<mailto:x@example.com>"},
+                ],
+                "body": {},
+            },
+        }
+
+
+def run_webhook(payload, gmail, checkpoints, dedupe):
+    return asyncio.run(
+        process_gmail_webhook(
+            payload,
+            gmail,
+            limiter=FetchLimiter(max_in_flight=4, max_per_mailbox=2),
+            checkpoint_store=checkpoints,
+            dedupe=dedupe,
+        )
+    )
+
+
+def test_push_is_marked_after_successful_ingestion(tmp_path):
+    checkpoints = SQLiteCheckpointStore(str(tmp_path / "checkpoints.sqlite3"))
+    dedupe = IdempotencyCache()
+    payload = make_push(100)
+
+    emails = run_webhook(payload, FakeGmail(["a", "b"]), checkpoints, dedupe)
+
+    assert [email["id"] for email in emails] == ["a", "b"]
+    assert asyncio.run(checkpoints.get(MAILBOX)) == 102
+    assert asyncio.run(dedupe.seen(push_key(payload)))
+
+
+def test_expired_history_checkpoint_is_reset_to_the_notification(tmp_path):
+    checkpoints = SQLiteCheckpointStore(str(tmp_path / "checkpoints.sqlite3"))
+    dedupe = IdempotencyCache()
+    asyncio.run(checkpoints.advance(MAILBOX, None, 10))
+    payload = make_push(100)
+
+    gmail = FakeGmail(["a"], history_error=(50, 404))
+    assert run_webhook(payload, gmail, checkpoints, dedupe) == []
+    assert asyncio.run(checkpoints.get(MAILBOX)) == 100
+    assert asyncio.run(dedupe.seen(push_key(payload)))
+
+    # The next notification resumes from the reset checkpoint
+    emails = run_webhook(make_push(101, "push-2"), gmail, checkpoints, dedupe)
+    assert [email["id"] for email in emails] == ["a"]
+    assert asyncio.run(checkpoints.get(MAILBOX)) == 101
+
+
+def test_other_history_errors_leave_the_checkpoint(tmp_path):
+    checkpoints = SQLiteCheckpointStore(str(tmp_path / "checkpoints.sqlite3"))
+    dedupe = IdempotencyCache()
+    asyncio.run(checkpoints.advance(MAILBOX, None, 10))
+    payload = make_push(100)
+
+    with pytest.raises(httpx.HTTPStatusError):
+        run_webhook(
+            payload, FakeGmail(["a"], history_error=(50, 500)), checkpoints, dedupe
+        )
+    assert asyncio.run(checkpoints.get(MAILBOX)) == 10
+    assert not asyncio.run(dedupe.seen(push_key(payload)))
+
+
+def test_failed_ingestion_leaves_push_unmarked(tmp_path):
+    checkpoints = SQLiteCheckpointStore(str(tmp_path / "checkpoints.sqlite3"))
+    dedupe = IdempotencyCache()
+    payload = make_push(100)
+
+    emails = run_webhook(
+        payload, FakeGmail(["a", "b"], failing={"b"}), checkpoints, dedupe
+    )
+
+    assert [email["id"] for email in emails] == ["a"]
+    assert asyncio.run(checkpoints.get(MAILBOX)) is None
+    assert not asyncio.run(dedupe.seen(push_key(payload)))
+
+    # The redelivered push only fetches the message that failed
+    retry = FakeGmail(["a", "b"])
+    emails = run_webhook(payload, retry, checkpoints, dedupe)
+    assert retry.fetched == ["b"]
+    assert asyncio.run(dedupe.seen(push_key(payload)))
+
+
+def test_webhook_does_not_mark_push_when_queued():
+    class Queue:
+        def __init__(self):
+            self.items = []
+
+        async def put(self, item):
+            self.items.append(item)
+
+    async def scenario():
+        queue, dedupe = Queue(), IdempotencyCache()
+        payload = make_push(100)
+        await handle_gmail_webhook(payload, queue=queue, dedupe=dedupe)
+        await handle_gmail_webhook(payload, queue=queue, dedupe=dedupe)
+        assert len(queue.items) == 2
+
+        await dedupe.mark(push_key(payload))
+        response = await handle_gmail_webhook(payload, queue=queue, dedupe=dedupe)
+        assert response.status_code == 204
+        assert len(queue.items) == 2
+
+    asyncio.run(scenario())
+
+
+def test_fetch_limiter_caps_global_and_per_mailbox_fetches():
+    async def scenario():
+        limiter = FetchLimiter(max_in_flight=3, max_per_mailbox=2)
+        running = {"total": 0}
+        peaks = {"total": 0}
+
+        async def fetch(mailbox):
+            async with limiter.slot(mailbox):
+                running["total"] += 1
+                running[mailbox] = running.get(mailbox, 0) + 1
+                for key in ("total", mailbox):
+                    peaks[key] = max(peaks.get(key, 0), running[key])
+                await asyncio.sleep(0.01)
+                running["total"] -= 1
+                running[mailbox] -= 1
+
+        mailboxes = ["busy@example.com"] * 8 + ["quiet@example.com"] * 4
+        await asyncio.gather(*(fetch(mailbox) for mailbox in mailboxes))
+        return peaks
+
+    peaks = asyncio.run(scenario())
+    assert peaks["total"] == 3
+    assert peaks["busy@example.com"] == 2
+    assert peaks["quiet@example.com"] <= 2
+
+
+def headers_message(message_id, *headers):
+    return {
+        "id": message_id,
+        "payload": {"headers": [{"name": n, "value": v} for n, v in headers]},
+    }
+
+
+@pytest.mark.parametrize(
+    "headers, expected",
+    [
+        ((("Subject", "Leak in unit 4"),), True),
+        ((("List-Unsubscribe", "<mailto:u@example.com>"),), False),
+        ((("Precedence", " Bulk "),), False),
+        ((("Precedence", "first-class"),), True),
+    ],
+)
+def test_needs_full_body(headers, expected):
+    assert needs_full_body(headers_message("1", *headers)) is expected
+
+
+def test_fetch_message_downloads_bodies_only_when_needed():
+    class Gmail:
+        def __init__(self):
+            self.calls = []
+
+        async def get_message_metadata(self, user_id, message_id, user_to_impersonate):
+            self.calls.append(("metadata", message_id))
+            if message_id == "newsletter":
+                return headers_message(message_id, ("Precedence", "list"))
+            return headers_message(message_id, ("Subject", "Rent"))
+
+        async def get_message(self, user_id, message_id, user_to_impersonate):
+            self.calls.append(("full", message_id))
+            if message_id == "broken":
+                raise RuntimeError("Gmail is unavailable")
+            return {"id": message_id, "payload": {"body": {"data": ""}}}
+
+    async def scenario():
+        gmail = Gmail()
+        results = [
+            await fetch_message(gmail, MAILBOX, message_id)
+            for message_id in ("newsletter", "rent", "broken")
+        ]
+        return gmail.calls, results
+
+    calls, (newsletter, rent, broken) = asyncio.run(scenario())
+    assert calls == [
+        ("metadata", "newsletter"),
+        ("metadata", "rent"),
+        ("full", "rent"),
+        ("metadata", "broken"),
+        ("full", "broken"),
+    ]
+    assert "body" not in newsletter.message["payload"]
+    assert rent.message["payload"]["body"] == {"data": ""}
+    assert broken.message is None and isinstance(broken.error, RuntimeError)
+
+
+def test_fetch_limiter_reads_caps_from_env(monkeypatch):
+    monkeypatch.setenv("GMAIL_FETCH_MAX_IN_FLIGHT", "7")
+    monkeypatch.setenv("GMAIL_FETCH_MAX_PER_MAILBOX", "not-a-number")
+    limiter = FetchLimiter()
+    assert (limiter.max_in_flight, limiter.max_per_mailbox) == (7, 10)
@@ -0,0 +1,115 @@
+import base64
+
+from domains.email.parsing import HeaderMap, parse_gmail_message
+
+
+def encode(text, charset="utf-8"):
+    return base64.urlsafe_b64encode(text.encode(charset)).decode().rstrip("=")
+
+
+def text_part(mime_type, text, charset=None):
+    headers = []
+    if charset:
+        headers.append(
+            {"name": "Content-Type", "value": f'{mime_type}; charset="{charset}"'}
+        )
+    return {
+        "mimeType": mime_type,
+        "headers": headers,
+        "body": {"size": len(text), "data": encode(text, charset or "utf-8")},
+    }
+
+
+MESSAGE = {
+    "id": "m1",
+    "threadId": "t1",
+    "labelIds": ["INBOX"],
+    "internalDate": "1767225600000",
+    "payload": {
+        "mimeType": "multipart/mixed",
+        "headers": [
+            {"name": "Subject", "value": "Lease renewal"},
+            {"name": "From", "value": "Jane <jane@example.com>"},
+            {"name": "Received", "value": "by a"},
+            {"name": "RECEIVED", "value": "by b"},
+        ],
+        "parts": [
+            {
+                "mimeType": "multipart/alternative",
+                "parts": [
+                    text_part("text/plain", "Café ✓ renewal"),
+                    text_part("text/html", "<p>Résumé</p>", charset="iso-8859-1"),
+                ],
+            },
+            {
+                "partId": "2",
+                "mimeType": "application/pdf",
+                "filename": "lease.pdf",
+                "body": {"size": 1234, "attachmentId": "att-1"},
+            },
+            text_part("text/plain", "A second text part is ignored"),
+        ],
+    },
+}
+
+
+def test_headers_are_case_insensitive_and_keep_repeats():
+    headers = HeaderMap(MESSAGE["payload"]["headers"])
+    assert headers["subject"] == "Lease renewal"
+    assert headers.get_all("received") == ["by a", "by b"]
+    assert "X-Missing" not in headers
+    assert headers.get("x-missing", "default") == "default"
+    assert len(headers) == 3
+
+
+def test_bodies_and_attachments():
+    email = parse_gmail_message(MESSAGE)
+    assert (email.id, email.thread_id, email.internal_date) == (
+        "m1",
+        "t1",
+        1767225600000,
+    )
+    assert email.subject == "Lease renewal"
+    assert email.sender == "Jane <jane@example.com>"
+    assert email.has_body
+    assert email.text == "Café ✓ renewal"
+    assert email.html == "<p>Résumé</p>"
+    (attachment,) = email.attachments
+    assert (attachment.filename, attachment.size, attachment.attachment_id) == (
+        "lease.pdf",
+        1234,
+        "att-1",
+    )
+
+
+def test_bodies_are_decoded_lazily():
+    email = parse_gmail_message(MESSAGE)
+    part = email._text_part
+    assert part._text is None
+    assert email.text == "Café ✓ renewal"
+    assert part._data == ""
+
+
+def test_unknown_charset_falls_back_to_utf8():
+    part = text_part("text/plain", "naïve")
+    part["headers"] = [
+        {"name": "Content-Type", "value": "text/plain; charset=x-unknown"}
+    ]
+    message = {"payload": part}
+    assert parse_gmail_message(message).text == "naïve"
+
+
+def test_metadata_only_message_has_no_body():
+    email = parse_gmail_message(
+        {"id": "m2", "payload": {"headers": [{"name": "Subject", "value": "Hi"}]}}
+    )
+    assert not email.has_body
+    assert email.text == email.html == ""
+    assert email.subject == "Hi"
+
+
+def test_deeply_nested_multipart_does_not_recurse():
+    payload = text_part("text/plain", "deep")
+    for _ in range(5000):
+        payload = {"mimeType": "multipart/mixed", "parts": [payload]}
+    assert parse_gmail_message({"payload": payload}).text == "deep"
@@ -0,0 +1,79 @@
+import asyncio
+
+import pytest
+
+from core.events import InProcessWorkQueue, QueueFullError
+
+
+def test_workers_process_items_concurrently():
+    async def scenario():
+        queue = InProcessWorkQueue(workers=3)
+        running, peak, done = 0, 0, []
+
+        async def handler(item):
+            nonlocal running, peak
+            running += 1
+            peak = max(peak, running)
+            await asyncio.sleep(0.01)
+            running -= 1
+            done.append(item)
+
+        await queue.start(handler)
+        for item in range(9):
+            await queue.put(item)
+        await queue.stop()
+        return sorted(done), peak
+
+    done, peak = asyncio.run(scenario())
+    assert done == list(range(9))
+    assert peak == 3
+
+
+def test_full_queue_sheds_load():
+    async def scenario():
+        queue = InProcessWorkQueue(maxsize=2, workers=1)
+        await queue.put("a")
+        await queue.put("b")
+        with pytest.raises(QueueFullError):
+            await queue.put("c")
+        return queue.qsize()
+
+    assert asyncio.run(scenario()) == 2
+
+
+def test_failed_item_does_not_stop_the_worker():
+    async def scenario():
+        queue = InProcessWorkQueue(workers=1)
+        done = []
+
+        async def handler(item):
+            if item == "bad":
+                raise RuntimeError("boom")
+            done.append(item)
+
+        await queue.start(handler)
+        for item in ("a", "bad", "b"):
+            await queue.put(item)
+        await queue.stop()
+        return done
+
+    assert asyncio.run(scenario()) == ["a", "b"]
+
+
+def test_stop_gives_up_after_the_drain_timeout():
+    async def scenario():
+        queue = InProcessWorkQueue(workers=1, drain_timeout=0.05)
+        started = asyncio.Event()
+
+        async def handler(item):
+            started.set()
+            await asyncio.sleep(10)
+
+        await queue.start(handler)
+        await queue.put("slow")
+        await queue.put("queued")
+        await started.wait()
+        await asyncio.wait_for(queue.stop(), timeout=1)
+        return queue.qsize()
+
+    assert asyncio.run(scenario()) == 1
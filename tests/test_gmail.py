@@ -0,0 +1,348 @@
+import asyncio
+import json
+import time
+from datetime import datetime, timedelta, timezone
+
+import httpx
+import pytest
+from cryptography.hazmat.primitives import serialization
+from cryptography.hazmat.primitives.asymmetric import rsa
+
+from integrations.gmail import GmailClient
+
+MAILBOX = "office@example.com"
+
+
+@pytest.fixture(scope="module")
+def service_account_file(tmp_path_factory):
+    key = rsa.generate_private_key(public_exponent=65537, key_size=2048)
+    pem = key.private_bytes(
+        serialization.Encoding.PEM,
+        serialization.PrivateFormat.PKCS8,
+        serialization.NoEncryption(),
+    ).decode()
+    path = tmp_path_factory.mktemp("gmail") / "service-account.json"
+    path.write_text(
+        json.dumps(
+            {
+                "type": "service_account",
+                "project_id": "test",
+                "private_key_id": "1",
+                "private_key": pem,
+                "client_email": "ingest@test.iam.gserviceaccount.com",
+                "client_id": "1",
+                "token_uri": "https://oauth2.googleapis.com/token",
+            }
+        )
+    )
+    return str(path)
+
+
+def make_client(service_account_file, handler):
+    client = GmailClient(
+        service_account_file, transport=httpx.MockTransport(handler), http2=False
+    )
+
+    async def ensure_token(user_to_impersonate):
+        return "token"
+
+    client.ensure_token = ensure_token
+    return client
+
+
+def test_only_metadata_tier_is_cached(service_account_file):
+    requests = []
+
+    def handler(request):
+        requests.append(request.url.params["format"])
+        return httpx.Response(200, json={"id": "m1"})
+
+    async def scenario():
+        async with make_client(service_account_file, handler) as client:
+            for _ in range(2):
+                await client.get_message_metadata("me", "m1", MAILBOX)
+                await client.get_message("me", "m1", MAILBOX)
+
+    asyncio.run(scenario())
+    assert requests == ["metadata", "full", "full"]
+
+
+def test_metadata_cache_evicts_least_recently_used(service_account_file):
+    requests = []
+
+    def handler(request):
+        requests.append(request.url.path.rsplit("/", 1)[-1])
+        return httpx.Response(200, json={"id": requests[-1]})
+
+    async def scenario():
+        async with make_client(service_account_file, handler) as client:
+            client.MESSAGE_CACHE_SIZE = 2
+            for message_id in ("a", "b", "a", "c", "a", "b"):
+                await client.get_message_metadata("me", message_id, MAILBOX)
+
+    asyncio.run(scenario())
+    assert requests == ["a", "b", "c", "b"]
+
+
+def batch_response(request, statuses):
+    """Answers a batch request; `statuses` maps message ID to its status code."""
+    lines = request.content.decode().split("\r\n")
+    paths = [line.split()[1] for line in lines if line.startswith("GET ")]
+    boundary = "batch_response"
+    parts = []
+    for index, path in enumerate(paths):
+        message_id = path.split("?")[0].rsplit("/", 1)[-1]
+        status = statuses.get(message_id, 200)
+        body = json.dumps({"id": message_id} if status == 200 else {})
+        parts.append(
+            f"--{boundary}\r\n"
+            "Content-Type: application/http\r\n"
+            f"Content-ID: <response-item{index}>\r\n"
+            "\r\n"
+            f"HTTP/1.1 {status} X\r\n"
+            "Content-Type: application/json\r\n"
+            "\r\n"
+            f"{body}\r\n"
+        )
+    content = ("".join(parts) + f"--{boundary}--\r\n").encode()
+
+    async def chunks():
+        # Small chunks so delimiters straddle chunk boundaries
+        for start in range(0, len(content), 7):
+            yield content[start : start + 7]
+
+    return httpx.Response(
+        200,
+        headers={"Content-Type": f"multipart/mixed; boundary={boundary}"},
+        content=chunks(),
+    )
+
+
+@pytest.fixture
+def sleeps(monkeypatch):
+    delays = []
+
+    async def sleep(delay):
+        delays.append(delay)
+
+    monkeypatch.setattr(asyncio, "sleep", sleep)
+    return delays
+
+
+def run_batch(service_account_file, handler, message_ids, **kwargs):
+    async def scenario():
+        async with make_client(service_account_file, handler) as client:
+            return await client.get_messages_batch(message_ids, MAILBOX, **kwargs)
+
+    return asyncio.run(scenario())
+
+
+def test_batch_splits_requests_and_parses_streamed_parts(service_account_file):
+    sizes = []
+
+    def handler(request):
+        response = batch_response(request, {})
+        sizes.append(request.content.count(b"GET "))
+        return response
+
+    ids = [f"m{i}" for i in range(5)]
+    results = run_batch(service_account_file, handler, ids, batch_size=2)
+    assert sizes == [2, 2, 1]
+    assert results == {message_id: {"id": message_id} for message_id in ids}
+
+
+def test_batch_retries_only_failed_sub_requests(service_account_file, sleeps):
+    statuses = [{"m1": 429, "m2": 404}, {}]
+    sent = []
+
+    def handler(request):
+        sent.append(request.content.count(b"GET "))
+        return batch_response(request, statuses.pop(0))
+
+    results = run_batch(service_account_file, handler, ["m0", "m1", "m2"])
+    assert sent == [3, 1]
+    assert sleeps == [1]
+    assert sorted(results) == ["m0", "m1"]
+
+
+@pytest.mark.parametrize("status", [429, 503])
+def test_batch_retries_whole_batch_on_retryable_status(
+    service_account_file, sleeps, status
+):
+    calls = []
+
+    def handler(request):
+        calls.append(request)
+        if len(calls) < 3:
+            return httpx.Response(status)
+        return batch_response(request, {})
+
+    results = run_batch(service_account_file, handler, ["m0", "m1"])
+    assert len(calls) == 3
+    assert sleeps == [1, 2]
+    assert sorted(results) == ["m0", "m1"]
+
+
+def test_batch_retries_transport_errors(service_account_file, sleeps):
+    calls = []
+
+    def handler(request):
+        calls.append(request)
+        if len(calls) == 1:
+            raise httpx.ConnectError("connection refused", request=request)
+        return batch_response(request, {})
+
+    assert sorted(run_batch(service_account_file, handler, ["m0"])) == ["m0"]
+    assert sleeps == [1]
+
+
+def test_batch_gives_up_after_max_retries(service_account_file, sleeps):
+    results = run_batch(
+        service_account_file, lambda request: httpx.Response(503), ["m0"], max_retries=2
+    )
+    assert results == {}
+    assert sleeps == [1, 2]
+
+
+def test_batch_raises_on_non_retryable_status(service_account_file, sleeps):
+    with pytest.raises(httpx.HTTPStatusError):
+        run_batch(service_account_file, lambda request: httpx.Response(401), ["m0"])
+    assert sleeps == []
+
+
+def test_iter_history_follows_pages_and_prefetches(service_account_file):
+    pages = {
+        None: {"history": [{"id": "1"}, {"id": "2"}], "nextPageToken": "p2"},
+        "p2": {"history": [{"id": "3"}], "nextPageToken": "p3"},
+        "p3": {"history": [{"id": "4"}]},
+    }
+    requested = []
+
+    def handler(request):
+        token = request.url.params.get("pageToken")
+        requested.append(token)
+        assert request.url.params["startHistoryId"] == "100"
+        return httpx.Response(200, json=pages[token])
+
+    async def scenario():
+        async with make_client(service_account_file, handler) as client:
+            records = []
+            async for record in client.iter_history("me", 100, MAILBOX):
+                records.append(record["id"])
+                # The next page is requested before this one is consumed
+                await asyncio.sleep(0.01)
+                if record["id"] == "1":
+                    assert requested == [None, "p2"]
+            return records
+
+    assert asyncio.run(scenario()) == ["1", "2", "3", "4"]
+    assert requested == [None, "p2", "p3"]
+
+
+def test_iter_history_cancels_prefetch_when_abandoned(service_account_file):
+    requested = []
+
+    async def handler(request):
+        token = request.url.params.get("pageToken")
+        requested.append(token)
+        if token:
+            await asyncio.sleep(10)
+        return httpx.Response(
+            200, json={"history": [{"id": "1"}], "nextPageToken": "p2"}
+        )
+
+    async def scenario():
+        async with make_client(service_account_file, handler) as client:
+            history = client.iter_history("me", 100, MAILBOX)
+            async for _ in history:
+                break
+            await history.aclose()
+
+    asyncio.run(asyncio.wait_for(scenario(), timeout=5))
+    assert requested[0] is None
+
+
+class FakeCredentials:
+    """Stands in for delegated service-account credentials."""
+
+    def __init__(self, lifetime, delay=0.05, fail=False):
+        self.lifetime = lifetime
+        self.delay = delay
+        self.fail = fail
+        self.refreshes = 0
+
+    def with_subject(self, subject):
+        return _Delegated(self)
+
+
+class _Delegated:
+    def __init__(self, base):
+        self.base = base
+        self.token = None
+        self.expiry = None
+
+    def refresh(self, request):
+        time.sleep(self.base.delay)
+        if self.base.fail:
+            raise RuntimeError("unauthorized_client")
+        self.base.refreshes += 1
+        self.token = f"token-{self.base.refreshes}"
+        self.expiry = datetime.now(timezone.utc).replace(tzinfo=None) + timedelta(
+            seconds=self.base.lifetime
+        )
+
+
+def token_client(service_account_file, credentials):
+    client = GmailClient(
+        service_account_file, transport=httpx.MockTransport(lambda r: None)
+    )
+    client.base_credentials = credentials
+    return client
+
+
+def test_concurrent_callers_share_one_refresh(service_account_file):
+    credentials = FakeCredentials(lifetime=3600)
+
+    async def scenario():
+        async with token_client(service_account_file, credentials) as client:
+            tokens = await asyncio.gather(
+                *(client.ensure_token(MAILBOX) for _ in range(20))
+            )
+            tokens.append(await client.ensure_token(MAILBOX))
+            return tokens, client.token_refresh_stats
+
+    tokens, stats = asyncio.run(scenario())
+    assert set(tokens) == {"token-1"}
+    assert credentials.refreshes == 1
+    assert stats["count"] == 1 and stats["failures"] == 0
+
+
+def test_token_near_expiry_is_refreshed_in_the_background(service_account_file):
+    # Inside the refresh-ahead window, outside the expiry buffer
+    credentials = FakeCredentials(lifetime=GmailClient.TOKEN_REFRESH_AHEAD - 10)
+
+    async def scenario():
+        async with token_client(service_account_file, credentials) as client:
+            first = await client.ensure_token(MAILBOX)
+            started = time.perf_counter()
+            cached = await client.ensure_token(MAILBOX)
+            waited = time.perf_counter() - started
+            await asyncio.sleep(credentials.delay * 4)
+            return first, cached, waited
+
+    first, cached, waited = asyncio.run(scenario())
+    assert first == cached == "token-1"
+    assert waited < credentials.delay
+    assert credentials.refreshes == 2
+
+
+def test_refresh_failure_is_reported(service_account_file):
+    credentials = FakeCredentials(lifetime=3600, fail=True)
+
+    async def scenario():
+        async with token_client(service_account_file, credentials) as client:
+            with pytest.raises(ValueError, match="unauthorized_client"):
+                await client.ensure_token(MAILBOX)
+            return client.token_refresh_stats
+
+    assert asyncio.run(scenario())["failures"] == 1
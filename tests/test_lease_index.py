@@ -0,0 +1,87 @@
+from datetime import date
+
+from domains.property_management.rentals.lease_index import LeaseIndex
+
+
+def lease(lease_id, unit_id, start, end, status="Active", property_id=1):
+    return {
+        "Id": lease_id,
+        "PropertyId": property_id,
+        "UnitId": unit_id,
+        "LeaseFromDate": start,
+        "LeaseToDate": end,
+        "LeaseStatus": status,
+    }
+
+
+LEASES = [
+    lease(1, 101, date(2025, 1, 1), date(2025, 12, 31), status="Past"),
+    lease(2, 101, date(2026, 1, 1), date(2026, 12, 31)),
+    lease(3, 102, date(2026, 3, 1), date(2026, 8, 31)),
+    lease(4, 103, date(2025, 6, 1), date(2026, 5, 31)),
+    lease(5, 103, date(2026, 6, 1), date(2027, 5, 31), status="Future"),
+    lease(6, 201, date(2026, 1, 1), date(2026, 6, 30), property_id=2),
+]
+UNITS = [{"Id": 104, "PropertyId": 1}, {"Id": 202, "PropertyId": 2}]
+
+
+def ids(values):
+    return sorted(values.tolist())
+
+
+def test_active_and_overlapping():
+    index = LeaseIndex.from_leases(LEASES, UNITS)
+    assert len(index) == 6 and 3 in index
+    assert ids(index.active("2026-03-01")) == [2, 3, 4, 6]
+    assert ids(index.active(date(2026, 3, 1), property_ids=[2])) == [6]
+    assert ids(index.active("2025-12-31", statuses=["Past"])) == [1]
+    assert ids(index.overlapping("2026-08-31", "2026-09-30")) == [2, 3, 5]
+
+
+def test_expiring_soonest_first_and_by_renewal():
+    index = LeaseIndex.from_leases(LEASES, UNITS)
+    window = ("2026-05-01", "2026-08-31")
+    assert index.expiring(*window).tolist() == [4, 6, 3]
+    assert index.expiring(*window, renewed=True).tolist() == [4]
+    assert index.expiring(*window, renewed=False).tolist() == [6, 3]
+    assert index.expiring(*window, statuses=None, property_ids=[1]).tolist() == [4, 3]
+
+
+def test_occupancy_counts_units_without_leases():
+    index = LeaseIndex.from_leases(LEASES, UNITS)
+    properties, occupied, total = index.occupancy("2026-07-01")
+    assert properties.tolist() == [1, 2]
+    assert occupied.tolist() == [3, 0]
+    assert total.tolist() == [4, 2]
+    assert ids(index.vacant_units("2026-07-01")) == [104, 201, 202]
+    assert ids(index.vacant_units("2026-07-01", property_ids=[1])) == [104]
+
+
+def test_pending_updates_match_a_rebuilt_index():
+    index = LeaseIndex.from_leases(LEASES, UNITS)
+    index.upsert(lease(3, 102, date(2026, 3, 1), date(2026, 7, 15)))
+    index.upsert(lease(7, 104, date(2026, 7, 1), date(2027, 6, 30)))
+    index.upsert(lease(7, 104, date(2026, 7, 1), date(2026, 7, 20)))
+    assert index.remove(6)
+    assert not index.remove(99)
+
+    queries = [
+        lambda i: ids(i.active("2026-07-10")),
+        lambda i: ids(i.overlapping("2026-07-16", "2026-07-31")),
+        lambda i: i.expiring("2026-07-01", "2026-07-31").tolist(),
+        lambda i: ids(i.vacant_units("2026-07-25")),
+    ]
+    pending = [query(index) for query in queries]
+    index.merge()
+    assert [query(index) for query in queries] == pending
+    assert pending == [[2, 3, 5, 7], [2, 5, 7], [3, 7], [102, 104, 201, 202]]
+
+
+def test_merges_once_pending_changes_exceed_the_threshold():
+    index = LeaseIndex(capacity=2, merge_threshold=3)
+    for lease_id in range(10):
+        index.upsert(
+            lease(lease_id, 100 + lease_id, date(2026, 1, 1), date(2026, 12, 31))
+        )
+    assert len(index) == 10
+    assert ids(index.active("2026-06-01")) == list(range(10))
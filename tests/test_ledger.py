@@ -0,0 +1,100 @@
+from datetime import date, datetime
+
+import numpy as np
+
+from domains.property_management.accounting.ledger import NULL_ID, Ledger
+
+
+def make_transaction(transaction_id, day, lines, kind="Charge", lease_id=10):
+    return {
+        "Id": transaction_id,
+        "Date": day,
+        "LeaseId": lease_id,
+        "TransactionTypeEnum": kind,
+        "PaymentMethod": None,
+        "Journal": {
+            "Lines": [
+                {
+                    "GLAccount": {"id": gl_account_id},
+                    "UnitId": None,
+                    "PropertyId": property_id,
+                    "Amount": amount,
+                    "IsCashPosting": kind == "Payment",
+                    "Memo": None,
+                }
+                for property_id, gl_account_id, amount in lines
+            ]
+        },
+    }
+
+
+TRANSACTIONS = [
+    make_transaction(1, date(2026, 1, 1), [(1, 4000, 1200.0), (1, 4100, 50.5)]),
+    make_transaction(2, datetime(2026, 1, 15, 9), [(2, 4000, 900.0)]),
+    make_transaction(3, date(2026, 2, 1), [(1, 4000, -300.25)], kind="Payment"),
+]
+
+
+def test_group_sums_by_one_and_several_keys():
+    ledger = Ledger.from_transactions(TRANSACTIONS)
+    assert len(ledger) == 4 and ledger.transaction_count == 3
+    assert ledger.sum_by("property_id").to_dict() == {1: 950.25, 2: 900.0}
+    assert ledger.sum_by(["property_id", "gl_account_id"]).to_dict() == {
+        (1, 4000): 899.75,
+        (1, 4100): 50.5,
+        (2, 4000): 900.0,
+    }
+    assert ledger.sum_by("transaction_type").to_dict() == {
+        "Charge": 2150.5,
+        "Payment": -300.25,
+    }
+    assert ledger.column("unit_id").tolist() == [NULL_ID] * 4
+
+
+def test_mask_filters_dates_properties_types_and_cash():
+    ledger = Ledger.from_transactions(TRANSACTIONS)
+    january = ledger.mask("2026-01-01", date(2026, 1, 31))
+    assert ledger.total(january) == 2150.5
+    assert ledger.total(ledger.mask(property_ids=[1], gl_account_ids=[4000])) == 899.75
+    assert ledger.total(ledger.mask(transaction_types=["Payment"])) == -300.25
+    assert ledger.total(ledger.mask(transaction_types=["Refund"])) == 0
+    assert ledger.total(ledger.mask(cash_only=True)) == -300.25
+
+
+def test_upsert_replaces_and_remove_drops_lines():
+    ledger = Ledger.from_transactions(TRANSACTIONS)
+    ledger.upsert([make_transaction(1, date(2026, 1, 1), [(1, 4000, 1250.0)])])
+    assert len(ledger) == 3
+    assert ledger.total() == 1849.75
+    assert ledger.column("amount_cents")[ledger.rows_of([1])].tolist() == [125000]
+
+    ledger.remove([2])
+    assert ledger.transaction_count == 2
+    assert ledger.sum_by("property_id").to_dict() == {1: 949.75}
+    assert ledger.rows_of([2]).size == 0
+
+
+def test_columns_grow_and_compact_keeps_rows_addressable():
+    ledger = Ledger(capacity=2)
+    for round_ in range(5):
+        ledger.upsert(
+            make_transaction(i, date(2026, 1, 1), [(1, 4000, 10.0 * round_)] * 2)
+            for i in range(50)
+        )
+    assert len(ledger) == 100
+    # Tombstoned rows were compacted away along the way
+    assert len(ledger.column("live")) < 500
+    assert ledger.total() == 4000.0
+    rows = ledger.rows_of(range(50))
+    assert np.all(ledger.column("transaction_id")[rows] == np.repeat(np.arange(50), 2))
+
+
+def test_raw_payload_gl_accounts_use_buildium_id_spelling():
+    raw = make_transaction(9, "2026-03-01", [(1, 40, 100.0)])
+    raw["Journal"]["Lines"][0]["GLAccount"] = {"Id": 40, "Name": "Rent"}
+    ledger = Ledger.from_transactions([raw, TRANSACTIONS[0]])
+    assert ledger.sum_by("gl_account_id").to_dict() == {
+        40: 100.0,
+        4000: 1200.0,
+        4100: 50.5,
+    }
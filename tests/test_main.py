@@ -0,0 +1,35 @@
+import asyncio
+
+import main
+from api.v1.dependencies import get_email_dedupe, get_gmail_queue
+
+
+class FakeGmailClient:
+    instances = []
+
+    def __init__(self):
+        self.closed = False
+        self.instances.append(self)
+
+    async def close(self):
+        self.closed = True
+
+
+def test_lifespan_shares_one_gmail_client_and_closes_it(tmp_path, monkeypatch):
+    monkeypatch.setattr(main, "GmailClient", FakeGmailClient)
+    monkeypatch.setenv("CHECKPOINT_DB_PATH", str(tmp_path / "checkpoints.sqlite3"))
+    monkeypatch.setenv("IDEMPOTENCY_DB_PATH", str(tmp_path / "idempotency.sqlite3"))
+    monkeypatch.setenv("GMAIL_QUEUE_WORKERS", "2")
+    FakeGmailClient.instances.clear()
+
+    async def scenario():
+        async with main.lifespan(main.app):
+            request = type("Request", (), {"app": main.app})()
+            assert get_email_dedupe(request) is main.app.state.email_dedupe
+            assert get_gmail_queue(request) is main.app.state.gmail_queue
+            client = main.app.state.gmail_client
+        return client
+
+    client = asyncio.run(scenario())
+    assert FakeGmailClient.instances == [client]
+    assert client.closed
@@ -0,0 +1,151 @@
+import asyncio
+import hashlib
+import os
+
+import httpx
+
+from domains.listings.media import (
+    CHANGED,
+    FAILED,
+    NEW,
+    UNCHANGED,
+    MediaPipeline,
+    MediaStore,
+)
+
+CDN = "https://media.test"
+
+
+def store_body(store, key, body):
+    blob = store.writer()
+    blob.write(body)
+    return store.commit(blob, key, f"{CDN}/{key}.jpg")
+
+
+def test_identical_bodies_are_stored_once(tmp_path):
+    store = MediaStore(str(tmp_path))
+    assert store_body(store, "a", b"photo")
+    assert not store_body(store, "b", b"photo")
+    assert store.get("a").digest == store.get("b").digest
+    assert store.stats == {"files": 1, "bytes": 5, "evictions": 0}
+    store.close()
+
+
+def test_eviction_drops_least_recently_used_files(tmp_path):
+    # Eviction runs down to LOW_WATER (90%) of the budget: one file here
+    store = MediaStore(str(tmp_path), max_bytes=350)
+    for key in ("a", "b", "c"):
+        store_body(store, key, key.encode() * 100)
+    store.touch([store.get("a").digest])
+    evicted = store.get("b").digest
+
+    store_body(store, "d", b"d" * 100)
+
+    assert store.get("b").digest is None
+    assert store.get("b").etag is None
+    assert not store.path(evicted).exists()
+    assert all(store.get(key).digest for key in ("a", "c", "d"))
+    assert store.total_bytes == 300
+    assert store.stats["evictions"] == 1
+    store.close()
+
+
+def test_store_reopens_with_its_index(tmp_path):
+    store = MediaStore(str(tmp_path))
+    store_body(store, "a", b"photo")
+    store.close()
+    os.makedirs(tmp_path / "tmp", exist_ok=True)
+    (tmp_path / "tmp" / "partial").write_bytes(b"interrupted")
+
+    reopened = MediaStore(str(tmp_path))
+    assert reopened.total_bytes == 5
+    assert reopened.get("a").size == 5
+    assert not (tmp_path / "tmp" / "partial").exists()
+    reopened.close()
+
+
+class FakeCDN:
+    def __init__(self):
+        self.files = {}
+        self.requests = 0
+
+    def handle(self, request):
+        self.requests += 1
+        body = self.files[str(request.url)]
+        etag = f'"{hashlib.md5(body).hexdigest()}"'
+        if request.headers.get("If-None-Match") == etag:
+            return httpx.Response(304, headers={"ETag": etag})
+
+        async def chunks():
+            for start in range(0, len(body), 1000):
+                yield body[start : start + 1000]
+
+        return httpx.Response(200, headers={"ETag": etag}, content=chunks())
+
+
+def refresh(tmp_path, cdn, media, rounds=1):
+    async def scenario():
+        store = MediaStore(str(tmp_path))
+        pipeline = MediaPipeline(store, transport=httpx.MockTransport(cdn.handle))
+        pipeline.WRITE_BUFFER_BYTES = 4096
+        try:
+            return [
+                sorted(await pipeline.refresh_all(media), key=lambda r: r.key)
+                for _ in range(rounds)
+            ]
+        finally:
+            await pipeline.close()
+            store.close()
+
+    return asyncio.run(scenario())
+
+
+def test_refresh_streams_bodies_and_revalidates(tmp_path):
+    cdn = FakeCDN()
+    body = os.urandom(10_000)
+    cdn.files[f"{CDN}/1.jpg"] = body
+    media = [{"MediaKey": "M1", "MediaURL": f"{CDN}/1.jpg"}]
+
+    first, second = refresh(tmp_path, cdn, media, rounds=2)
+
+    assert [(r.status, r.size) for r in first] == [(NEW, len(body))]
+    assert first[0].digest == hashlib.sha256(body).hexdigest()
+    assert [r.status for r in second] == [UNCHANGED]
+    assert cdn.requests == 2
+
+    cdn.files[f"{CDN}/1.jpg"] = b"replaced"
+    (changed,) = refresh(tmp_path, cdn, media)
+    assert [r.status for r in changed] == [CHANGED]
+
+
+def test_record_without_url_fails_alone(tmp_path):
+    cdn = FakeCDN()
+    cdn.files[f"{CDN}/1.jpg"] = b"photo"
+    media = [
+        {"MediaKey": "M0", "MediaURL": None},
+        {"MediaKey": "M1", "MediaURL": f"{CDN}/1.jpg"},
+    ]
+
+    (results,) = refresh(tmp_path, cdn, media)
+
+    assert [(r.key, r.status) for r in results] == [("M0", FAILED), ("M1", NEW)]
+    assert "MediaURL" in results[0].error
+
+
+def test_http_errors_are_reported_per_medium(tmp_path):
+    def handler(request):
+        return httpx.Response(404)
+
+    async def scenario():
+        store = MediaStore(str(tmp_path))
+        pipeline = MediaPipeline(store, transport=httpx.MockTransport(handler))
+        try:
+            return await pipeline.fetch(f"{CDN}/missing.jpg"), pipeline.stats
+        finally:
+            await pipeline.close()
+            store.close()
+
+    result, stats = asyncio.run(scenario())
+    assert result.status == FAILED
+    assert stats["failed"] == 1
+    assert list((tmp_path / "tmp").iterdir()) == []
@@ -0,0 +1,116 @@
+import asyncio
+import types
+from email.utils import format_datetime
+from datetime import datetime, timedelta, timezone
+
+import pytest
+
+import core.rate_limit
+from core.rate_limit import TokenBucket, parse_retry_after
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    """A fake monotonic clock that asyncio.sleep in core.rate_limit advances."""
+    state = types.SimpleNamespace(now=1000.0, sleeps=[])
+
+    async def sleep(delay):
+        state.sleeps.append(round(delay, 6))
+        state.now += delay
+        await asyncio.sleep(0)
+
+    fake_time = types.SimpleNamespace(monotonic=lambda: state.now)
+    fake_asyncio = types.SimpleNamespace(Lock=asyncio.Lock, sleep=sleep)
+    monkeypatch.setattr(core.rate_limit, "time", fake_time)
+    monkeypatch.setattr(core.rate_limit, "asyncio", fake_asyncio)
+    return state
+
+
+def test_penalize_decreases_multiplicatively_down_to_the_floor():
+    bucket = TokenBucket(10.0)
+    rates = []
+    for _ in range(5):
+        bucket.penalize()
+        rates.append(bucket.rate)
+    assert rates == [5.0, 2.5, 1.25, 1.0, 1.0]
+    assert bucket.stats["penalties"] == 5
+
+
+def test_reward_increases_additively_up_to_the_target():
+    bucket = TokenBucket(10.0)
+    bucket.penalize()
+    for _ in range(9):
+        bucket.reward()
+    assert bucket.rate == pytest.approx(9.5)
+    bucket.reward()
+    bucket.reward()
+    assert bucket.rate == 10.0
+
+
+def test_acquire_spends_the_burst_then_paces(clock):
+    async def scenario():
+        bucket = TokenBucket(4.0)
+        for _ in range(6):
+            await bucket.acquire()
+        return bucket.stats
+
+    stats = asyncio.run(scenario())
+    assert clock.sleeps == [0.25, 0.25]
+    assert stats["acquired"] == 6
+    assert stats["waited_seconds"] == pytest.approx(0.5)
+
+
+def test_penalize_empties_the_bucket_and_slows_acquire(clock):
+    async def scenario():
+        bucket = TokenBucket(4.0)
+        await bucket.acquire()
+        bucket.penalize()
+        await bucket.acquire()
+        await bucket.acquire()
+
+    asyncio.run(scenario())
+    assert clock.sleeps == [0.5, 0.5]
+
+
+def test_retry_after_blocks_until_it_passed(clock):
+    async def scenario():
+        bucket = TokenBucket(100.0)
+        bucket.penalize(retry_after=3.0)
+        started = clock.now
+        await bucket.acquire()
+        return clock.now - started
+
+    assert asyncio.run(scenario()) >= 3.0
+    assert clock.sleeps[0] == 3.0
+
+
+def test_waiters_are_served_in_order(clock):
+    async def scenario():
+        bucket = TokenBucket(2.0, burst=1.0)
+        served = []
+
+        async def worker(name):
+            await bucket.acquire()
+            served.append(name)
+
+        await asyncio.gather(*(worker(name) for name in "abcde"))
+        return served
+
+    assert asyncio.run(scenario()) == list("abcde")
+
+
+@pytest.mark.parametrize(
+    "value, expected",
+    [(None, None), ("", None), ("2.5", 2.5), ("-1", 0.0), ("soon", None)],
+)
+def test_parse_retry_after_seconds(value, expected):
+    assert parse_retry_after(value) == expected
+
+
+def test_parse_retry_after_http_date():
+    moment = datetime.now(timezone.utc) + timedelta(seconds=120)
+    assert parse_retry_after(format_datetime(moment, usegmt=True)) == pytest.approx(
+        120, abs=2
+    )
+    past = datetime.now(timezone.utc) - timedelta(seconds=120)
+    assert parse_retry_after(format_datetime(past, usegmt=True)) == 0.0
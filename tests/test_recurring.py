@@ -0,0 +1,100 @@
+from datetime import date
+
+import pytest
+
+from domains.property_management.rentals.recurring import (
+    RecurringForecast,
+    occurrences,
+    schedule_lines,
+)
+
+
+def make_schedule(schedule_id=1, **fields):
+    return {
+        "Id": schedule_id,
+        "LeaseId": 10,
+        "GLAccountId": 4001,
+        "Amount": 1200.0,
+        "OccurrencesRemaining": None,
+        "NextOccurrenceDate": date(2026, 1, 31),
+        "PostDaysInAdvance": 0,
+        "Frequency": "Monthly",
+        "Duration": "UntilEndOfTerm",
+        **fields,
+    }
+
+
+def due_dates(schedule, end_date=None, start=date(2026, 1, 1), end=date(2026, 12, 31)):
+    (line,) = schedule_lines(schedule, property_id=1, end_date=end_date)
+    return list(occurrences(line, start, end))
+
+
+def test_until_end_of_term_stops_at_lease_end_and_ignores_count():
+    schedule = make_schedule(OccurrencesRemaining=2)
+    assert due_dates(schedule, end_date=date(2026, 4, 30)) == [
+        date(2026, 1, 31),
+        date(2026, 2, 28),
+        date(2026, 3, 31),
+        date(2026, 4, 30),
+    ]
+
+
+def test_specific_number_ignores_lease_end():
+    schedule = make_schedule(Duration="SpecificNumber", OccurrencesRemaining=3)
+    assert due_dates(schedule, end_date=date(2026, 1, 31)) == [
+        date(2026, 1, 31),
+        date(2026, 2, 28),
+        date(2026, 3, 31),
+    ]
+
+
+def test_specific_number_requires_occurrences_remaining():
+    with pytest.raises(ValueError, match="OccurrencesRemaining"):
+        schedule_lines(make_schedule(Duration="SpecificNumber"))
+
+
+def test_unknown_frequency_is_rejected():
+    with pytest.raises(ValueError, match="frequency"):
+        schedule_lines(make_schedule(Frequency="Fortnightly"))
+
+
+def test_one_time_schedule_occurs_once():
+    schedule = make_schedule(Frequency="OneTime", Duration="Unspecified")
+    assert due_dates(schedule) == [date(2026, 1, 31)]
+
+
+def test_forecast_matches_lazy_generator_across_durations():
+    schedules = [
+        (make_schedule(1), date(2026, 6, 15)),
+        (make_schedule(2, Duration="SpecificNumber", OccurrencesRemaining=5), None),
+        (make_schedule(3, Frequency="Every2Weeks", CreditType="Waive"), None),
+        (make_schedule(4, Frequency="Quarterly", OccurrencesRemaining=2), None),
+    ]
+    forecast = RecurringForecast()
+    for schedule, end_date in schedules:
+        forecast.upsert(schedule, property_id=1, end_date=end_date)
+    index = forecast.index(date(2026, 1, 1), date(2026, 12, 31))
+
+    codes = {key: code for code, key in enumerate(index.keys)}
+    for schedule, end_date in schedules:
+        (line,) = schedule_lines(schedule, property_id=1, end_date=end_date)
+        code = codes[(line.kind, line.schedule_id)]
+        due = index.column("due_date")[index.column("schedule") == code]
+        assert due.tolist() == due_dates(schedule, end_date)
+
+
+def test_forecast_patches_cached_index():
+    forecast = RecurringForecast()
+    forecast.upsert(make_schedule(1), property_id=1)
+    assert forecast.remove("charge", 2) is False
+
+    index = forecast.index(date(2026, 1, 1), date(2026, 3, 31))
+    assert len(index) == 3
+    forecast.upsert(make_schedule(2, Amount=50.0), property_id=1)
+    assert forecast.index(date(2026, 1, 1), date(2026, 3, 31)) is index
+    assert len(index) == 6
+    assert forecast.remove("charge", 1)
+    assert [
+        posting.amount
+        for posting in index.postings(date(2026, 1, 1), date(2026, 3, 31))
+    ] == [50.0] * 3
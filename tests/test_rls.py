@@ -0,0 +1,224 @@
+import asyncio
+import json
+import time
+
+import httpx
+import pytest
+
+from integrations.rls import (
+    ODataPageParser,
+    RLSClient,
+    format_timestamp,
+    parse_timestamp,
+)
+
+BASE_URL = "https://rls.test/odata"
+TOKEN_URL = "https://rls.test/token"
+
+ENTITIES = [
+    {"ListingKey": "1", "Remarks": 'Braces {} and brackets [] in "quotes"'},
+    {"ListingKey": "2", "Remarks": "Café – naïve ✓", "Rooms": [{"Area": 12.5}]},
+    {"ListingKey": "3", "Media": [], "Tags": ["a]", "{b"], "Backslash": "\\"},
+]
+
+
+def page(entities, next_link=None, link_first=False):
+    envelope = {"@odata.context": "$metadata#Property"}
+    if next_link and link_first:
+        envelope["@odata.nextLink"] = next_link
+    envelope["value"] = entities
+    if next_link and not link_first:
+        envelope["@odata.nextLink"] = next_link
+    return json.dumps(envelope, ensure_ascii=False, indent=1).encode()
+
+
+def parse(body, size):
+    parser = ODataPageParser()
+    items = []
+    for start in range(0, len(body), size):
+        items.extend(parser.feed(body[start : start + size]))
+    parser.close()
+    return items, parser.annotations
+
+
+@pytest.mark.parametrize("link_first", [False, True])
+def test_every_chunk_boundary(link_first):
+    body = page(ENTITIES, "https://rls.test/odata/Property?$skip=3", link_first)
+    for split in range(1, len(body)):
+        parser = ODataPageParser()
+        items = parser.feed(body[:split]) + parser.feed(body[split:])
+        parser.close()
+        assert items == ENTITIES, split
+        assert parser.annotations["@odata.nextLink"].endswith("$skip=3")
+
+
+@pytest.mark.parametrize("size", [1, 2, 3, 7, 64])
+def test_small_chunks_with_multibyte_characters(size):
+    items, annotations = parse(page(ENTITIES), size)
+    assert items == ENTITIES
+    assert "@odata.nextLink" not in annotations
+
+
+def test_entities_are_returned_as_soon_as_they_close():
+    body = page(ENTITIES)
+    first_end = body.index(b"\n  }") + len(b"\n  }")  # Closes the first entity
+    parser = ODataPageParser()
+    assert parser.feed(body[:first_end]) == ENTITIES[:1]
+    assert parser.feed(body[first_end:]) == ENTITIES[1:]
+
+
+def test_empty_page():
+    assert parse(page([]), 5) == ([], {"@odata.context": "$metadata#Property"})
+
+
+@pytest.mark.parametrize("cut", [10, 60, -3])
+def test_truncated_body_is_rejected(cut):
+    parser = ODataPageParser()
+    parser.feed(page(ENTITIES)[:cut])
+    with pytest.raises(ValueError, match="Truncated"):
+        parser.close()
+
+
+def test_timestamps_round_trip():
+    micros = parse_timestamp("2026-03-01T12:30:45.123456Z")
+    assert format_timestamp(micros) == "2026-03-01T12:30:45.123456Z"
+    assert parse_timestamp("2026-03-01T12:30:45Z") < micros
+
+
+class FakeTrestle:
+    def __init__(self, listings, page_size=2):
+        self.listings = listings
+        self.page_size = page_size
+        self.requests = []
+        self.tokens = 0
+        self.failures = []  # Responses returned before the next real page
+
+    def handle(self, request):
+        if str(request.url) == TOKEN_URL:
+            self.tokens += 1
+            return httpx.Response(
+                200, json={"access_token": f"t{self.tokens}", "expires_in": 3600}
+            )
+        self.requests.append(request)
+        if self.failures:
+            return self.failures.pop(0)
+        params = request.url.params
+        rows = self.listings
+        if "$filter" in params:
+            mark = params["$filter"].rsplit(" gt ", 1)[1]
+            rows = [
+                r
+                for r in rows
+                if parse_timestamp(r["ModificationTimestamp"]) > parse_timestamp(mark)
+            ]
+        skip = int(params.get("$skip", 0))
+        rows = rows[skip : skip + self.page_size]
+        next_link = None
+        if skip + self.page_size < len(self.listings):
+            next_params = dict(params, **{"$skip": str(skip + self.page_size)})
+            next_link = str(request.url.copy_with(params=next_params))
+        return httpx.Response(200, content=page(rows, next_link))
+
+
+def make_client(trestle, **kwargs):
+    return RLSClient(
+        "id",
+        "secret",
+        base_url=BASE_URL,
+        token_url=TOKEN_URL,
+        rate_limit=1000,
+        transport=httpx.MockTransport(trestle.handle),
+        **kwargs,
+    )
+
+
+def listings(count):
+    return [
+        {
+            "ListingKey": str(n),
+            "ModificationTimestamp": f"2026-01-01T00:00:{n:02d}Z",
+        }
+        for n in range(count)
+    ]
+
+
+def collect(client, method, *args, **kwargs):
+    async def scenario():
+        try:
+            return [entity async for entity in method(*args, **kwargs)]
+        finally:
+            await client.close()
+
+    return asyncio.run(scenario())
+
+
+def test_query_follows_next_links():
+    trestle = FakeTrestle(listings(5))
+    client = make_client(trestle)
+    rows = collect(client, client.query, "Property", select=["ListingKey"])
+    assert [row["ListingKey"] for row in rows] == ["0", "1", "2", "3", "4"]
+    assert len(trestle.requests) == 3
+    assert trestle.requests[0].url.params["$select"] == "ListingKey"
+    assert trestle.requests[0].headers["Authorization"] == "Bearer t1"
+
+
+def test_unauthorized_refreshes_the_token_once():
+    trestle = FakeTrestle(listings(1))
+    trestle.failures = [httpx.Response(401)]
+    client = make_client(trestle)
+    assert len(collect(client, client.query, "Property")) == 1
+    assert trestle.tokens == 2
+    assert trestle.requests[-1].headers["Authorization"] == "Bearer t2"
+
+
+def test_throttling_and_server_errors_are_retried():
+    trestle = FakeTrestle(listings(1))
+    trestle.failures = [
+        httpx.Response(429, headers={"Retry-After": "0.05"}),
+        httpx.Response(503),
+    ]
+    client = make_client(trestle)
+    client.BACKOFF_BASE = 0.001
+    started = time.monotonic()
+    assert len(collect(client, client.query, "Property")) == 1
+    assert time.monotonic() - started >= 0.05
+    assert len(trestle.requests) == 3
+    assert client._limiter.stats["penalties"] == 1
+
+
+def test_retries_run_out():
+    trestle = FakeTrestle(listings(1))
+    trestle.failures = [httpx.Response(503)] * 3
+    client = make_client(trestle, max_retries=2)
+    client.BACKOFF_BASE = 0.001
+    with pytest.raises(httpx.HTTPStatusError):
+        collect(client, client.query, "Property")
+
+
+def test_replicate_moves_the_mark_only_after_a_complete_run():
+    trestle = FakeTrestle(listings(5))
+
+    async def scenario():
+        client = make_client(trestle)
+        try:
+            stream = client.replicate("Property")
+            async for _ in stream:
+                break
+            await stream.aclose()
+            assert await client.high_water_mark("Property") is None
+
+            first = [e async for e in client.replicate("Property")]
+            mark = await client.high_water_mark("Property")
+            trestle.listings.append(
+                {"ListingKey": "9", "ModificationTimestamp": "2026-01-02T00:00:00Z"}
+            )
+            second = [e async for e in client.replicate("Property")]
+            return first, mark, second
+        finally:
+            await client.close()
+
+    first, mark, second = asyncio.run(scenario())
+    assert len(first) == 5
+    assert mark == parse_timestamp("2026-01-01T00:00:04Z")
+    assert [entity["ListingKey"] for entity in second] == ["9"]
+    assert "ModificationTimestamp gt" in trestle.requests[-1].url.params["$filter"]
@@ -0,0 +1,99 @@
+import asyncio
+
+from core.sync_state import SQLiteSyncStateRepository, SyncRecord
+from domains.property_management.delta import (
+    DeltaEngine,
+    SyncStateFingerprintStore,
+)
+
+
+def make_repository(tmp_path, **kwargs):
+    return SQLiteSyncStateRepository(str(tmp_path / "state.sqlite3"), **kwargs)
+
+
+def test_upsert_keeps_fields_left_unset(tmp_path):
+    async def scenario():
+        repository = make_repository(tmp_path)
+        await repository.upsert(
+            SyncRecord("lease", "1", airtable_record_id="rec1", version="v1")
+        )
+        await repository.upsert(
+            SyncRecord("lease", "1", record_hash="h", field_hashes={"Rent": "x"})
+        )
+        record = await repository.get("lease", "1")
+        await repository.close()
+        return record
+
+    record = asyncio.run(scenario())
+    assert record.airtable_record_id == "rec1"
+    assert record.version == "v1"
+    assert record.record_hash == "h"
+    assert record.field_hashes == {"Rent": "x"}
+    assert record.updated_at is not None
+
+
+def test_batched_writes_and_chunked_reads(tmp_path):
+    async def scenario():
+        repository = make_repository(tmp_path, batch_size=7)
+        written = await repository.upsert_many(
+            SyncRecord("tenant", str(i), airtable_record_id=f"rec{i}")
+            for i in range(1200)
+        )
+        found = await repository.get_many("tenant", [*range(0, 1300, 3)])
+        counts = await repository.count(), await repository.count("lease")
+        await repository.close()
+        return written, found, counts
+
+    written, found, counts = asyncio.run(scenario())
+    assert written == 1200
+    assert sorted(found, key=int) == [str(i) for i in range(0, 1200, 3)]
+    assert counts == (1200, 0)
+
+
+def test_reverse_lookup_and_delete(tmp_path):
+    async def scenario():
+        repository = make_repository(tmp_path)
+        await repository.upsert(SyncRecord("lease", "7", airtable_record_id="recA"))
+        linked = await repository.get_by_airtable_id("recA")
+        deleted = await repository.delete("lease", "7")
+        again = await repository.delete("lease", "7")
+        gone = await repository.get("lease", "7")
+        await repository.close()
+        return linked, deleted, again, gone
+
+    linked, deleted, again, gone = asyncio.run(scenario())
+    assert linked.resource_id == "7"
+    assert (deleted, again, gone) == (True, False, None)
+
+
+def test_state_survives_reopening(tmp_path):
+    async def scenario():
+        repository = make_repository(tmp_path)
+        await repository.upsert(SyncRecord("lease", "1", status="synced"))
+        await repository.close()
+        reopened = make_repository(tmp_path)
+        record = await reopened.get("lease", "1")
+        await reopened.close()
+        return record
+
+    assert asyncio.run(scenario()).status == "synced"
+
+
+def test_delta_fingerprints_round_trip(tmp_path):
+    async def scenario():
+        repository = make_repository(tmp_path)
+        engine = DeltaEngine(SyncStateFingerprintStore(repository))
+        await repository.upsert(SyncRecord("lease", "1", airtable_record_id="rec1"))
+        first = await engine.diff("lease", 1, {"Rent": 1200, "Status": "Active"})
+        await engine.commit([first])
+        changed = await engine.diff("lease", 1, {"Rent": 1250, "Status": "Active"})
+        record = await repository.get("lease", "1")
+        await repository.close()
+        return first, changed, record
+
+    first, changed, record = asyncio.run(scenario())
+    # A record without hashes yet counts as new
+    assert first.is_new
+    assert changed.changed == {"Rent": 1250}
+    assert record.airtable_record_id == "rec1"
+    assert record.last_synced_at is not None